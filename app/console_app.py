@@ -4,12 +4,16 @@ Provides a simple command-line interface to analyze stocks and cryptocurrencies.
 """
 
 import sys
+import argparse
 import logging
-from typing import Optional
+from typing import Optional, List
 
 from src.utils import setup_logging, validate_ticker
 from src.data_fetcher import data_fetcher
 from src.analyzer import analyzer
+from src.batch import parse_tickers, run_batch, RowWriter, TickerWatcher, OUTPUT_FORMATS
+from src.screener import run_screen, ScreenError, METRICS
+from src.export import exporter, ExportError, DATASETS, EXPORT_FORMATS, EXPORT_FIELDS
 from src.config import config
 
 # Set up logging
@@ -99,14 +103,232 @@ def display_statistics(stats: dict):
     print()
 
 
-def main():
+def positive_float(value: str) -> float:
+    """argparse type for options that must be greater than zero."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if not number > 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value!r}")
+    return number
+
+
+def build_parser() -> argparse.ArgumentParser:
+    """
+    Build the command line argument parser.
+    
+    Returns:
+        Configured ArgumentParser
+    """
+    parser = argparse.ArgumentParser(
+        prog="python -m app.console_app",
+        description="Analyze stocks and cryptocurrencies from the command line."
+    )
+    parser.add_argument("tickers", nargs="*", help="Ticker symbols to analyze")
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="Non-interactive mode: analyze all tickers and emit CSV/JSONL"
+    )
+    parser.add_argument(
+        "--watch", type=positive_float, metavar="SECONDS",
+        help="Refresh the tickers every SECONDS and emit rows on each refresh"
+    )
+    parser.add_argument(
+        "--iterations", type=int, metavar="N",
+        help="Stop watch mode after N refreshes (default: run until interrupted)"
+    )
+    parser.add_argument(
+        "--screen", metavar="EXPR",
+        help="Screen the tickers, e.g. \"avg_30d > avg_90d and volatility < 0.02\""
+    )
+    parser.add_argument(
+        "--sort", metavar="METRICS",
+        help="Sort screen results, e.g. \"-return_21d,volatility\" ('-' = descending)"
+    )
+    parser.add_argument("--limit", type=int, help="Maximum number of screen results")
+    parser.add_argument(
+        "--export", metavar="DIR",
+        help="Export histories, statistics and forecasts of the tickers below DIR"
+    )
+    parser.add_argument(
+        "--export-format", choices=EXPORT_FORMATS,
+        help="Export file format (default: parquet if pyarrow is installed, else csv)"
+    )
+    parser.add_argument(
+        "--datasets", default=",".join(DATASETS),
+        help=f"Comma-separated datasets to export (default: {','.join(DATASETS)})"
+    )
+    parser.add_argument(
+        "--full", action="store_true",
+        help="Rewrite every export partition, even if unchanged"
+    )
+    parser.add_argument(
+        "-f", "--file", metavar="PATH",
+        help="Read tickers from PATH ('-' for stdin)"
+    )
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, default="csv", help="Output format")
+    parser.add_argument("--workers", type=int, help="Number of concurrent workers")
+    parser.add_argument("--period", help=f"History period (default: {config.DEFAULT_PERIOD})")
+    parser.add_argument("--interval", help=f"Data interval (default: {config.DEFAULT_INTERVAL})")
+    return parser
+
+
+def collect_tickers(args: argparse.Namespace) -> List[str]:
+    """
+    Collect tickers from arguments, a file and/or stdin.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        List of ticker symbols
+    """
+    lines = list(args.tickers)
+    if args.file == "-":
+        lines.extend(sys.stdin)
+    elif args.file:
+        with open(args.file, "r", encoding="utf-8") as handle:
+            lines.extend(handle)
+    elif not args.tickers and not sys.stdin.isatty():
+        lines.extend(sys.stdin)
+    return parse_tickers(lines)
+
+
+def run_non_interactive(args: argparse.Namespace) -> int:
+    """
+    Run batch or watch mode, writing rows to stdout.
+    
+    Args:
+        args: Parsed command line arguments
+        
+    Returns:
+        Process exit code
+    """
+    # Keep stdout machine-readable; only warnings go to stderr
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    tickers = collect_tickers(args)
+    if not tickers:
+        print("No tickers provided", file=sys.stderr)
+        return 2
+    
+    if args.export:
+        return run_export_mode(args, tickers)
+    
+    if args.screen is not None or args.sort:
+        return run_screen_mode(args, tickers)
+    
+    writer = RowWriter(sys.stdout, args.format)
+    
+    def write_rows(rows):
+        for row in rows:
+            writer.write(row)
+    
+    if args.watch:
+        watcher = TickerWatcher(
+            tickers,
+            period=args.period,
+            interval=args.interval,
+            max_workers=args.workers
+        )
+        watcher.run(
+            args.watch,
+            write_rows,
+            iterations=args.iterations
+        )
+        return 0
+    
+    failures = 0
+    for row in run_batch(tickers, args.period, args.interval, args.workers):
+        writer.write(row)
+        if row["status"] != "ok":
+            failures += 1
+    return 1 if failures == len(tickers) else 0
+
+
+def run_screen_mode(args: argparse.Namespace, tickers: List[str]) -> int:
+    """
+    Screen a ticker universe and write matching rows to stdout.
+    
+    Args:
+        args: Parsed command line arguments
+        tickers: Ticker universe
+        
+    Returns:
+        Process exit code
+    """
+    try:
+        result = run_screen(
+            tickers,
+            expression=args.screen,
+            sort=args.sort,
+            limit=args.limit,
+            period=args.period,
+            interval=args.interval,
+            fetch_missing=True
+        )
+    except ScreenError as e:
+        print(f"Invalid screen: {str(e)}", file=sys.stderr)
+        return 2
+    
+    writer = RowWriter(sys.stdout, args.format, ["ticker"] + list(METRICS))
+    for row in result["results"]:
+        writer.write(row)
+    if result["missing"]:
+        print(f"No data for: {', '.join(result['missing'])}", file=sys.stderr)
+    return 0
+
+
+def run_export_mode(args: argparse.Namespace, tickers: List[str]) -> int:
+    """
+    Export the tickers' datasets to a directory, writing one status row per file.
+    
+    Args:
+        args: Parsed command line arguments
+        tickers: Tickers to export
+        
+    Returns:
+        Process exit code
+    """
+    datasets = [d.strip() for d in args.datasets.split(",") if d.strip()]
+    writer = RowWriter(sys.stdout, args.format, EXPORT_FIELDS)
+    failures = 0
+    try:
+        for row in exporter.export_directory(
+            tickers,
+            args.export,
+            fmt=args.export_format,
+            datasets=datasets,
+            period=args.period,
+            interval=args.interval,
+            incremental=not args.full
+        ):
+            writer.write(row)
+            if row["status"] == "error":
+                failures += 1
+    except ExportError as e:
+        print(f"Invalid export: {str(e)}", file=sys.stderr)
+        return 2
+    return 1 if failures else 0
+
+
+def main(argv: Optional[List[str]] = None):
     """Main function to run the console application."""
+    args = build_parser().parse_args(argv)
+    
+    if (
+        args.batch or args.watch or args.file or args.screen is not None or
+        args.sort or args.export or len(args.tickers) > 1
+    ):
+        return run_non_interactive(args)
+    
     print_header()
     
     # Get ticker from command line argument or user input
     ticker = None
-    if len(sys.argv) > 1:
-        ticker = sys.argv[1].strip().upper()
+    if args.tickers:
+        ticker = args.tickers[0].strip().upper()
         if not validate_ticker(ticker):
             print(f"❌ Invalid ticker symbol: {ticker}")
             ticker = None
@@ -122,7 +344,7 @@ def main():
     print("Please wait...\n")
     
     # Fetch data
-    ticker_obj = data_fetcher.fetch_data(ticker)
+    ticker_obj = data_fetcher.fetch_data(ticker, args.period, args.interval)
     if not ticker_obj:
         print(f"❌ Failed to fetch data for {ticker}")
         print("Please check:")
@@ -139,7 +361,7 @@ def main():
     current_price = data_fetcher.get_current_price(ticker_obj)
     
     # Get historical data
-    historical_data = data_fetcher.get_historical_data(ticker_obj)
+    historical_data = data_fetcher.get_historical_data(ticker_obj, args.period, args.interval)
     if historical_data is None or historical_data.empty:
         print("❌ Failed to fetch historical data")
         return
@@ -159,14 +381,17 @@ def main():
     print("\n💡 Tips:")
     print("  - Try different tickers: TSLA, MSFT, ETH-USD, DOGE-USD")
     print("  - Run with ticker as argument: python -m app.console_app GOOGL")
+    print("  - Analyze many tickers: python -m app.console_app --batch AAPL MSFT BTC-USD")
+    print("  - Export datasets: python -m app.console_app --export out/ AAPL MSFT")
     print()
 
 
 if __name__ == "__main__":
     try:
-        main()
+        sys.exit(main() or 0)
     except KeyboardInterrupt:
-        print("\n\n👋 Goodbye!")
+        # stderr, so batch and watch output on stdout stays parseable
+        print("\n\n👋 Goodbye!", file=sys.stderr)
         sys.exit(0)
     except Exception as e:
         logger.error(f"Unexpected error: {str(e)}", exc_info=True)
@@ -3,17 +3,42 @@ Flask web application for interactive financial data visualization.
 Provides a web dashboard with Plotly charts.
 """
 
+import copy
 import logging
 import json
+import math
+from contextlib import nullcontext
 from pathlib import Path
-from flask import Flask, render_template, request, jsonify
+from flask import (
+    Flask, Response, g, has_request_context, render_template, request, jsonify,
+    stream_with_context
+)
 import plotly.graph_objs as go
 import plotly.utils
 
-from src.utils import setup_logging, validate_ticker
+from src.utils import setup_logging, validate_ticker, is_crypto_ticker
 from src.data_fetcher import data_fetcher
 from src.analyzer import analyzer
 from src.config import config
+from src.http_cache import (
+    compute_etag, history_key, cache_max_age, compress_response, choose_encoding
+)
+from src.price_stream import price_stream_hub
+from src.cache import cache
+from src.batch import parse_tickers
+from src.screener import run_screen, ScreenError, load_histories
+from src.correlation import correlation_report, CorrelationError, CALENDARS
+from src.chunked import ChunkSummary, DAY_NS
+from src.resample import interval_days
+from src.market_calendar import MarketCalendar, calendar_for_exchange
+from src.snapshots import snapshot_store, snapshot_scheduler
+from src.alerts import alert_engine, AlertError
+from src.admission import admission, Overloaded, Ticket, PRIORITY_CACHED, PRIORITY_UNCACHED
+from src.prefetch import access_log, prefetcher
+from src.server_timing import StageTimer
+from src.export import (
+    exporter, ExportError, check_format, default_format, DATASETS, EXTENSIONS, MEDIA_TYPES
+)
 
 # Set up logging
 setup_logging()
@@ -32,13 +57,20 @@ app = Flask(
 app.config.from_object(config)
 
 
-def create_price_chart(chart_data: dict, ticker: str, forecast_data: dict = None) -> str:
+def create_price_chart(
+    chart_data: dict,
+    ticker: str,
+    forecast_data: dict = None,
+    calendar: MarketCalendar = None
+) -> str:
     """
     Create a Plotly chart for price visualization.
     
     Args:
         chart_data: Dictionary with dates, prices, and volume
         ticker: Ticker symbol for chart title
+        forecast_data: Optional forecast with dates, mean, lower and upper
+        calendar: Exchange calendar; non-session days are cut from the x-axis
         
     Returns:
         JSON string of the Plotly chart
@@ -123,6 +155,11 @@ def create_price_chart(chart_data: dict, ticker: str, forecast_data: dict = None
         margin=dict(l=50, r=50, t=50, b=50)
     )
     
+    # Hide weekends and holidays so the x-axis has no flat gaps
+    if calendar is not None and dates:
+        axis_dates = dates + (forecast_data or {}).get('dates', [])
+        layout.xaxis.rangebreaks = calendar.rangebreaks(min(axis_dates), max(axis_dates))
+    
     # Add second y-axis for volume if available
     if volume_trace:
         layout.yaxis2 = dict(
@@ -144,12 +181,493 @@ def create_price_chart(chart_data: dict, ticker: str, forecast_data: dict = None
     return graph_json
 
 
+def create_correlation_heatmap(tickers: list, matrix: list, title: str) -> str:
+    """
+    Create a Plotly heatmap of a correlation matrix.
+    
+    Args:
+        tickers: Ticker symbols labelling both axes
+        matrix: Correlation matrix as nested lists
+        title: Chart title
+        
+    Returns:
+        JSON string of the Plotly chart
+    """
+    heatmap = go.Heatmap(
+        z=matrix,
+        x=tickers,
+        y=tickers,
+        zmin=-1,
+        zmax=1,
+        colorscale='RdBu',
+        reversescale=True,
+        hovertemplate='<b>%{y} / %{x}</b><br>Correlation: %{z:.2f}<extra></extra>'
+    )
+    layout = go.Layout(
+        title={'text': title, 'x': 0.5, 'xanchor': 'center'},
+        template='plotly_white',
+        height=max(400, 20 * len(tickers) + 150),
+        margin=dict(l=80, r=50, t=50, b=80),
+        yaxis=dict(autorange='reversed')
+    )
+    fig = go.Figure(data=[heatmap], layout=layout)
+    return json.dumps(fig, cls=plotly.utils.PlotlyJSONEncoder)
+
+
 @app.route('/')
 def index():
     """Render the main dashboard page."""
     return render_template('index.html')
 
 
+# Endpoints whose responses carry a Server-Timing header
+TIMED_ENDPOINTS = ('analyze', 'analyze_cacheable')
+
+
+def stage(name: str):
+    """Time a pipeline stage of the current request (no-op in background tasks)."""
+    timer = g.get('stage_timer') if has_request_context() else None
+    return timer.stage(name) if timer is not None else nullcontext()
+
+
+class AnalysisError(Exception):
+    """Raised when an analysis request cannot be served."""
+    
+    def __init__(self, message: str, status: int = 500):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+
+
+def load_market_data(ticker: str, period: str = None, interval: str = None) -> tuple:
+    """
+    Fetch the ticker object and its historical data.
+    
+    Args:
+        ticker: Validated, upper-cased ticker symbol
+        period: Period of historical data (default: from config)
+        interval: Data interval (default: from config)
+        
+    Returns:
+        Tuple of (ticker_obj, historical_data)
+        
+    Raises:
+        AnalysisError: If the ticker or its history cannot be fetched
+    """
+    with stage('fetch'):
+        ticker_obj = data_fetcher.fetch_data(ticker, period, interval)
+        if not ticker_obj:
+            raise AnalysisError(
+                f"Failed to fetch data for {ticker}. Please check the ticker symbol.", 404
+            )
+        
+        historical_data = data_fetcher.get_historical_data(ticker_obj, period, interval)
+    if historical_data is None or historical_data.empty:
+        raise AnalysisError("Failed to fetch historical data", 500)
+    
+    return ticker_obj, historical_data
+
+
+def compute_forecast(
+    ticker: str,
+    historical_data,
+    data_key: str,
+    calendar: MarketCalendar = None,
+    cached_only: bool = False
+):
+    """
+    Run the optional ARIMA forecast, cached per data key.
+    
+    The fit gets FORECAST_DEADLINE_SECONDS. A slower fit yields a drift
+    forecast marked 'fallback', which is not cached; the fit finishes
+    in the background and caches its result for later requests.
+    
+    Args:
+        ticker: Ticker symbol
+        historical_data: DataFrame with a 'Close' column
+        data_key: Key identifying the data (see history_key)
+        calendar: Exchange calendar for forecast dates
+        cached_only: Only return an already cached forecast (under load)
+        
+    Returns:
+        Forecast dictionary or None if disabled or unavailable
+    """
+    if not config.ENABLE_ARIMA_FORECAST:
+        return None
+    cache_key = f"forecast:{data_key}"
+    cached = cache.get(cache_key)
+    if cached is not None or cached_only:
+        return cached
+    try:
+        from src.extensions.forecasting.arima_forecaster import ForecastError
+        from src.extensions.forecasting.budgeted import budgeted_forecaster
+        forecast = budgeted_forecaster.forecast(
+            ticker,
+            historical_data,
+            key=cache_key,
+            on_refined=lambda result: cache.set(cache_key, result, config.CACHE_TTL_ANALYSIS),
+            steps=config.FORECAST_STEPS,
+            order=config.ARIMA_ORDER,
+            alpha=config.FORECAST_ALPHA,
+            trend=config.ARIMA_TREND,
+            use_log=config.FORECAST_USE_LOG,
+            calendar=calendar
+        )
+        if not forecast.get("fallback"):
+            cache.set(cache_key, forecast, config.CACHE_TTL_ANALYSIS)
+        return forecast
+    except ForecastError as e:
+        logger.warning(f"Forecast unavailable for {ticker}: {str(e)}")
+    except Exception as e:
+        logger.warning(f"Forecast error for {ticker}: {str(e)}")
+    return None
+
+
+def forecast_degradation(forecast_data, degraded: bool) -> list:
+    """Response 'degraded' entries: forecast skipped under load or replaced by a fallback."""
+    if forecast_data:
+        return ["forecast"] if forecast_data.get("fallback") else []
+    return ["forecast"] if degraded and config.ENABLE_ARIMA_FORECAST else []
+
+
+def load_market_pages(ticker: str, period: str, interval: str) -> tuple:
+    """
+    Fetch the ticker object and start paging through its history.
+    
+    Only the newest page is fetched here, so the last bar (and with it
+    the ETag) is known before the rest of the history is requested.
+    
+    Args:
+        ticker: Validated, upper-cased ticker symbol
+        period: Period of historical data
+        interval: Data interval
+        
+    Returns:
+        Tuple of (ticker_obj, newest_page, remaining_pages)
+        
+    Raises:
+        AnalysisError: If the ticker or its history cannot be fetched
+    """
+    with stage('fetch'):
+        ticker_obj = data_fetcher.fetch_data(ticker, period, interval)
+        if not ticker_obj:
+            raise AnalysisError(
+                f"Failed to fetch data for {ticker}. Please check the ticker symbol.", 404
+            )
+        
+        pages = data_fetcher.iter_history_pages(ticker_obj, period, interval)
+        newest = next(pages, None)
+    if newest is None:
+        raise AnalysisError("Failed to fetch historical data", 500)
+    
+    return ticker_obj, newest, pages
+
+
+def build_chunked_analysis(
+    ticker: str,
+    ticker_obj,
+    newest,
+    pages,
+    period: str,
+    interval: str,
+    degraded: bool = False
+) -> dict:
+    """
+    Build the analysis response from history pages with bounded memory.
+    
+    Pages are merged into running statistics, a downsampled chart series
+    and a tail window (used for the forecast) one at a time. The summary
+    of the older pages is cached under the bar the newest page starts
+    with, since those bars are complete; only the newest page, which
+    holds the running bar, is merged in on every request.
+    
+    Args:
+        ticker: Ticker symbol
+        ticker_obj: yfinance Ticker object
+        newest: Newest history page
+        pages: Iterable of the older history pages, newest first
+        period: Period of historical data
+        interval: Data interval
+        degraded: Skip the forecast unless it is already cached
+        
+    Returns:
+        JSON-serializable response dictionary
+    """
+    data_key = history_key(ticker, period, interval, newest)
+    older_key = compute_etag(ticker, period, interval, newest.index[0])
+    with stage('info'):
+        company_info = data_fetcher.get_company_info(ticker_obj)
+        current_price = data_fetcher.get_current_price(ticker_obj)
+    
+    def summarize_older() -> ChunkSummary:
+        summary = ChunkSummary(
+            config.CHUNKED_TAIL_ROWS,
+            config.CHART_MAX_POINTS,
+            int(interval_days(interval) * DAY_NS)
+        ).consume(pages)
+        logger.info(
+            f"Merged {summary.rows} older bars of {ticker} from {summary.chunks} pages "
+            f"(largest {summary.peak_chunk_rows} rows)"
+        )
+        return summary
+    
+    # Paging the remaining history happens here, so it is timed as 'stats'
+    with stage('stats'):
+        # Copied because the memory backend hands out the cached object itself
+        summary = copy.deepcopy(cache.get_or_compute(
+            f"chunked:{older_key}", config.CACHE_TTL_ANALYSIS, summarize_older
+        ))
+        summary.add(newest)
+        stats = analyzer.with_current_price(
+            summary.statistics.values(), current_price, company_info.get('currency', 'USD')
+        )
+    calendar = calendar_for_exchange(company_info.get('exchange'), ticker)
+    with stage('forecast'):
+        forecast_data = compute_forecast(
+            ticker, summary.recent_history(), data_key, calendar, cached_only=degraded
+        )
+    with stage('chart'):
+        chart_json = create_price_chart(
+            summary.chart.chart_data(), ticker, forecast_data, calendar
+        )
+    
+    response = {
+        "success": True,
+        "ticker": ticker,
+        "company_info": company_info,
+        "statistics": stats,
+        "chart": chart_json,
+        "chunked": True
+    }
+    if forecast_data:
+        response["forecast"] = forecast_data
+    degradation = forecast_degradation(forecast_data, degraded)
+    if degradation:
+        response["degraded"] = degradation
+    
+    return response
+
+
+def build_analysis(
+    ticker: str,
+    ticker_obj,
+    historical_data,
+    period: str = None,
+    interval: str = None,
+    degraded: bool = False
+) -> dict:
+    """
+    Compute statistics, chart and optional forecast for a ticker.
+    
+    Statistics and forecasts are cached under keys derived from the
+    parameters, the last bar and its close, so workers sharing a cache
+    backend compute each of them once per bar and close.
+    
+    Args:
+        ticker: Ticker symbol
+        ticker_obj: yfinance Ticker object
+        historical_data: DataFrame with historical price data
+        period: Period of historical data (default: from config)
+        interval: Data interval (default: from config)
+        degraded: Skip the forecast unless it is already cached
+        
+    Returns:
+        JSON-serializable response dictionary
+    """
+    period = period or config.DEFAULT_PERIOD
+    interval = interval or config.DEFAULT_INTERVAL
+    data_key = history_key(ticker, period, interval, historical_data)
+    
+    with stage('info'):
+        # Get company info
+        company_info = data_fetcher.get_company_info(ticker_obj)
+        
+        # Get current price
+        current_price = data_fetcher.get_current_price(ticker_obj)
+    
+    # Calculate statistics once per bar and close; the live price is applied per request
+    with stage('stats'):
+        stats = cache.get_or_compute(
+            f"stats:{data_key}",
+            config.CACHE_TTL_ANALYSIS,
+            lambda: analyzer.calculate_statistics(
+                historical_data,
+                None,
+                company_info.get('currency', 'USD')
+            )
+        )
+        stats = analyzer.with_current_price(
+            stats, current_price, company_info.get('currency', 'USD')
+        )
+    
+    calendar = calendar_for_exchange(company_info.get('exchange'), ticker)
+    with stage('forecast'):
+        forecast_data = compute_forecast(
+            ticker, historical_data, data_key, calendar, cached_only=degraded
+        )
+    
+    # Prepare chart data
+    with stage('chart'):
+        chart_data = analyzer.prepare_chart_data(historical_data)
+        chart_json = create_price_chart(chart_data, ticker, forecast_data, calendar)
+    
+    # Prepare response
+    response = {
+        "success": True,
+        "ticker": ticker,
+        "company_info": company_info,
+        "statistics": stats,
+        "chart": chart_json
+    }
+    if forecast_data:
+        response["forecast"] = forecast_data
+    degradation = forecast_degradation(forecast_data, degraded)
+    if degradation:
+        response["degraded"] = degradation
+    
+    return response
+
+
+def build_snapshot(ticker: str, period: str, interval: str) -> tuple:
+    """
+    Run the live analysis pipeline for a scheduled snapshot.
+    
+    Args:
+        ticker: Ticker symbol
+        period: Period of historical data
+        interval: Data interval
+        
+    Returns:
+        Tuple of (etag, serialized JSON response body, degraded parts)
+    """
+    if period in config.CHUNKED_PERIODS:
+        ticker_obj, newest, pages = load_market_pages(ticker, period, interval)
+        etag = history_key(ticker, period, interval, newest)
+        payload = build_chunked_analysis(ticker, ticker_obj, newest, pages, period, interval)
+    else:
+        ticker_obj, historical_data = load_market_data(ticker, period, interval)
+        etag = history_key(ticker, period, interval, historical_data)
+        payload = build_analysis(ticker, ticker_obj, historical_data, period, interval)
+    if payload.get("degraded"):
+        # Distinct from the complete response built once the forecast is refined
+        etag += "-degraded"
+    return etag, app.json.dumps(payload).encode('utf-8'), payload.get("degraded", [])
+
+
+def warm_analysis(ticker: str, period: str, interval: str) -> None:
+    """
+    Load a view's history and fill the statistics and forecast caches.
+    
+    Args:
+        ticker: Ticker symbol
+        period: Period of historical data
+        interval: Data interval
+    """
+    if period in config.CHUNKED_PERIODS:
+        ticker_obj, newest, pages = load_market_pages(ticker, period, interval)
+        build_chunked_analysis(ticker, ticker_obj, newest, pages, period, interval)
+    else:
+        ticker_obj, historical_data = load_market_data(ticker, period, interval)
+        build_analysis(ticker, ticker_obj, historical_data, period, interval)
+
+
+@app.before_request
+def start_background_tasks():
+    """Start snapshot refreshes and prefetching in the serving process."""
+    if not snapshot_scheduler.running:
+        snapshot_scheduler.start(build_snapshot)
+    if config.PREFETCH_ENABLED and not prefetcher.running:
+        prefetcher.start(warm_analysis)
+
+
+@app.before_request
+def start_stage_timer():
+    """Start timing analysis requests for the Server-Timing header."""
+    if config.SERVER_TIMING and request.endpoint in TIMED_ENDPOINTS:
+        g.stage_timer = StageTimer()
+
+
+@app.after_request
+def add_server_timing(response):
+    """
+    Report stage durations in a Server-Timing header.
+    
+    Registered before compress(), so it runs after it and the total
+    includes compression.
+    """
+    timer = g.get('stage_timer')
+    if timer is not None:
+        response.headers['Server-Timing'] = timer.header()
+    return response
+
+
+def analysis_priority(ticker: str, period: str = None, interval: str = None) -> int:
+    """Queue priority of an analysis: requests with a fresh cached history go first."""
+    key = data_fetcher.history_cache_key(ticker, period, interval)
+    return PRIORITY_CACHED if cache.contains(key, fresh=True) else PRIORITY_UNCACHED
+
+
+def request_deadline() -> float:
+    """Seconds the client is willing to wait (X-Request-Timeout header), if given."""
+    try:
+        return float(request.headers.get('X-Request-Timeout', '')) or None
+    except ValueError:
+        return None
+
+
+def admit(ticker: str, period: str = None, interval: str = None) -> Ticket:
+    """
+    Wait for an analysis slot.
+    
+    Raises:
+        Overloaded: If the request is shed
+    """
+    if not config.ADMISSION_ENABLED:
+        return Ticket(None, 0.0, False)
+    return admission.acquire(analysis_priority(ticker, period, interval), request_deadline())
+
+
+def overloaded_response(error: Overloaded):
+    """429 response telling the client when to retry."""
+    response = jsonify({
+        "error": "Server is busy, please retry later",
+        "reason": error.reason,
+        "retry_after": error.retry_after
+    })
+    response.status_code = 429
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response
+
+
+def snapshot_response(snapshot, max_age: int, state: str = 'hit'):
+    """
+    Serve a stored snapshot, honoring If-None-Match and Accept-Encoding.
+    
+    Degraded snapshots are sent like degraded live responses: without an
+    ETag and marked no-store.
+    """
+    if not snapshot.degraded and request.if_none_match.contains_weak(snapshot.etag):
+        response = app.response_class(status=304)
+    else:
+        body, encoding = snapshot.encoded(
+            choose_encoding(request.headers.get('Accept-Encoding', ''))
+        )
+        response = app.response_class(body, mimetype='application/json')
+        response.vary.add('Accept-Encoding')
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+    response.headers['X-Snapshot'] = state
+    if snapshot.degraded:
+        response.headers['X-Degraded'] = ",".join(snapshot.degraded)
+        response.cache_control.no_store = True
+        return response
+    # Weak: the gzip, br and identity bodies share the tag
+    response.set_etag(snapshot.etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age if state == 'hit' else config.HTTP_CACHE_MIN_AGE
+    return response
+
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     """
@@ -174,81 +692,512 @@ def analyze():
             return jsonify({"error": f"Invalid ticker symbol: {ticker}"}), 400
         
         logger.info(f"Analyzing ticker: {ticker}")
+        access_log.record(ticker, config.DEFAULT_PERIOD, config.DEFAULT_INTERVAL)
         
-        # Fetch data
-        ticker_obj = data_fetcher.fetch_data(ticker)
-        if not ticker_obj:
-            return jsonify({
-                "error": f"Failed to fetch data for {ticker}. Please check the ticker symbol."
-            }), 404
-        
-        # Get company info
-        company_info = data_fetcher.get_company_info(ticker_obj)
+        with stage('queue'):
+            ticket = admit(ticker)
+        with ticket:
+            ticker_obj, historical_data = load_market_data(ticker)
+            payload = build_analysis(
+                ticker, ticker_obj, historical_data, degraded=ticket.degraded
+            )
+            with stage('serialize'):
+                return jsonify(payload)
         
-        # Get current price
-        current_price = data_fetcher.get_current_price(ticker_obj)
-        
-        # Get historical data
-        historical_data = data_fetcher.get_historical_data(ticker_obj)
-        
-        if historical_data is None or historical_data.empty:
-            return jsonify({"error": "Failed to fetch historical data"}), 500
-        
-        # Calculate statistics
-        stats = analyzer.calculate_statistics(
-            historical_data,
-            current_price,
-            company_info.get('currency', 'USD')
+    except Overloaded as e:
+        return overloaded_response(e)
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status
+    except Exception as e:
+        logger.error(f"Error in analyze endpoint: {str(e)}", exc_info=True)
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+
+
+def live_analysis_response(
+    ticker: str,
+    period: str,
+    interval: str,
+    max_age: int,
+    degraded: bool = False
+):
+    """
+    Run the live pipeline for GET /analyze.
+    
+    Degraded responses (forecast skipped under load) are not given an
+    ETag, so clients do not revalidate them as if they were complete.
+    """
+    if period in config.CHUNKED_PERIODS:
+        ticker_obj, newest, pages = load_market_pages(ticker, period, interval)
+        etag = history_key(ticker, period, interval, newest)
+    else:
+        ticker_obj, historical_data = load_market_data(ticker, period, interval)
+        etag = history_key(ticker, period, interval, historical_data)
+    
+    payload = None
+    
+    if request.if_none_match.contains_weak(etag):
+        response = app.response_class(status=304)
+    elif period in config.CHUNKED_PERIODS:
+        logger.info(f"Analyzing ticker in pages: {ticker} ({period}, {interval})")
+        payload = build_chunked_analysis(
+            ticker, ticker_obj, newest, pages, period, interval, degraded=degraded
+        )
+        with stage('serialize'):
+            response = jsonify(payload)
+    else:
+        logger.info(f"Analyzing ticker: {ticker} ({period}, {interval})")
+        payload = build_analysis(
+            ticker, ticker_obj, historical_data, period, interval, degraded=degraded
         )
+        with stage('serialize'):
+            response = jsonify(payload)
+    
+    if payload and payload.get("degraded"):
+        response.headers['X-Degraded'] = ",".join(payload["degraded"])
+        response.cache_control.no_store = True
+        return response
+    
+    # Weak: compress() changes the body bytes but keeps the tag
+    response.set_etag(etag, weak=True)
+    response.cache_control.public = True
+    response.cache_control.max_age = max_age
+    return response
+
+
+@app.route('/analyze', methods=['GET'])
+def analyze_cacheable():
+    """
+    Cacheable variant of /analyze keyed by query parameters.
+    
+    Query parameters: ticker (required), period, interval.
+    Responses carry a weak ETag derived from the parameters, the
+    last bar timestamp and its close; a matching If-None-Match yields 304 before any
+    statistics, chart or forecast work is done. Views kept warm by the
+    snapshot scheduler are served from their stored snapshot. Other
+    requests pass admission control: when shed, or degraded under load,
+    a stale snapshot is served if one exists.
+    """
+    try:
+        ticker = request.args.get('ticker', '').strip().upper()
+        period = request.args.get('period') or config.DEFAULT_PERIOD
+        interval = request.args.get('interval') or config.DEFAULT_INTERVAL
         
-        # Prepare chart data
-        chart_data = analyzer.prepare_chart_data(historical_data)
-        forecast_data = None
-        if config.ENABLE_ARIMA_FORECAST:
-            try:
-                from src.extensions.forecasting.arima_forecaster import (
-                    forecast_close_prices,
-                    ForecastError
-                )
-                forecast_data = forecast_close_prices(
-                    historical_data,
-                    steps=config.FORECAST_STEPS,
-                    order=config.ARIMA_ORDER,
-                    alpha=config.FORECAST_ALPHA,
-                    trend=config.ARIMA_TREND,
-                    use_log=config.FORECAST_USE_LOG
-                )
-            except ForecastError as e:
-                logger.warning(f"Forecast unavailable for {ticker}: {str(e)}")
-            except Exception as e:
-                logger.warning(f"Forecast error for {ticker}: {str(e)}")
+        if not ticker:
+            return jsonify({"error": "Ticker symbol is required"}), 400
+        if not validate_ticker(ticker):
+            return jsonify({"error": f"Invalid ticker symbol: {ticker}"}), 400
+        if period not in config.SUPPORTED_PERIODS:
+            return jsonify({"error": f"Unsupported period: {period}"}), 400
+        if interval not in config.SUPPORTED_INTERVALS:
+            return jsonify({"error": f"Unsupported interval: {interval}"}), 400
         
-        chart_json = create_price_chart(chart_data, ticker, forecast_data)
+        access_log.record(ticker, period, interval)
+        max_age = cache_max_age(interval, is_crypto_ticker(ticker))
+        snapshot = snapshot_store.get(ticker, period, interval)
+        if snapshot is not None:
+            return snapshot_response(snapshot, max_age)
         
-        # Prepare response
-        response = {
-            "success": True,
-            "ticker": ticker,
-            "company_info": company_info,
-            "statistics": stats,
-            "chart": chart_json
-        }
-        if forecast_data:
-            response["forecast"] = forecast_data
+        try:
+            with stage('queue'):
+                ticket = admit(ticker, period, interval)
+        except Overloaded as e:
+            stale = snapshot_store.get(ticker, period, interval, allow_stale=True)
+            if stale is not None:
+                return snapshot_response(stale, max_age, 'stale')
+            return overloaded_response(e)
         
-        return jsonify(response)
+        with ticket:
+            if ticket.degraded:
+                stale = snapshot_store.get(ticker, period, interval, allow_stale=True)
+                if stale is not None:
+                    return snapshot_response(stale, max_age, 'stale')
+            return live_analysis_response(ticker, period, interval, max_age, ticket.degraded)
         
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status
     except Exception as e:
         logger.error(f"Error in analyze endpoint: {str(e)}", exc_info=True)
         return jsonify({"error": f"An error occurred: {str(e)}"}), 500
 
 
+@app.route('/screen', methods=['POST'])
+def screen_universe():
+    """
+    Screen a ticker universe over cached histories.
+    
+    Expected JSON:
+    {
+        "tickers": ["AAPL", "MSFT", ...],
+        "filter": "avg_30d > avg_90d and volatility < 0.02",
+        "sort": "-return_21d",
+        "limit": 50,
+        "period": "1y",
+        "interval": "1d"
+    }
+    
+    "tickers" may also be a comma-separated string. Only cached histories
+    are screened; uncached tickers are listed in "missing" (warm them via
+    /analyze or the console batch mode).
+    """
+    data = request.get_json(silent=True) or {}
+    raw_tickers = data.get('tickers') or []
+    if isinstance(raw_tickers, str):
+        raw_tickers = [raw_tickers]
+    if not isinstance(raw_tickers, list) or not all(isinstance(t, str) for t in raw_tickers):
+        return jsonify({"error": "tickers must be a string or a list of strings"}), 400
+    tickers = parse_tickers(raw_tickers)
+    if not tickers:
+        return jsonify({"error": "At least one ticker is required"}), 400
+    if len(tickers) > config.SCREENER_MAX_TICKERS:
+        return jsonify({"error": f"At most {config.SCREENER_MAX_TICKERS} tickers per screen"}), 400
+    limit = data.get('limit')
+    if limit is not None and (isinstance(limit, bool) or not isinstance(limit, int) or limit < 1):
+        return jsonify({"error": "limit must be a positive integer"}), 400
+    
+    try:
+        result = run_screen(
+            tickers,
+            expression=data.get('filter'),
+            sort=data.get('sort'),
+            limit=limit,
+            period=data.get('period'),
+            interval=data.get('interval')
+        )
+    except ScreenError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in screen endpoint: {str(e)}", exc_info=True)
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+    
+    return jsonify(result)
+
+
+@app.route('/correlation')
+def correlation():
+    """
+    Correlation/covariance matrices of daily returns with a heatmap.
+    
+    Query parameters: tickers (comma-separated, required), period,
+    calendar ('intersection' or 'union'), window (rolling window length),
+    step (with window: also return the rolling series, one matrix every
+    `step` days).
+    """
+    tickers = parse_tickers([request.args.get('tickers', '')])
+    period = request.args.get('period') or config.DEFAULT_PERIOD
+    calendar = request.args.get('calendar') or 'intersection'
+    window = request.args.get('window', type=int)
+    step = request.args.get('step', type=int)
+    
+    if window is not None and window < 2:
+        return jsonify({"error": "window must be an integer of at least 2"}), 400
+    if step is not None and (step < 1 or not window):
+        return jsonify({"error": "step must be a positive integer and needs a window"}), 400
+    if len(tickers) < 2:
+        return jsonify({"error": "At least two tickers are required"}), 400
+    if len(tickers) > config.CORRELATION_MAX_TICKERS:
+        return jsonify({
+            "error": f"At most {config.CORRELATION_MAX_TICKERS} tickers per request"
+        }), 400
+    if period not in config.SUPPORTED_PERIODS:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    if calendar not in CALENDARS:
+        return jsonify({"error": f"Unsupported calendar: {calendar}"}), 400
+    invalid = [t for t in tickers if not validate_ticker(t)]
+    if invalid:
+        return jsonify({"error": f"Invalid ticker symbol: {invalid[0]}"}), 400
+    
+    try:
+        histories, missing = load_histories(tickers, period, '1d', fetch_missing=True)
+        report = correlation_report(histories, calendar, window, step)
+    except CorrelationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in correlation endpoint: {str(e)}", exc_info=True)
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+    
+    matrix = report.get("rolling_correlation", report["correlation"])
+    title = f"Return Correlation ({report['start']} to {report['end']})"
+    if window:
+        title = f"Return Correlation (last {window} days to {report['end']})"
+    report["missing"] = missing
+    report["chart"] = create_correlation_heatmap(report["tickers"], matrix, title)
+    return jsonify(report)
+
+
+@app.route('/simulate')
+def simulate():
+    """
+    Monte Carlo price scenarios with quantile bands and risk measures.
+    
+    Query parameters: ticker (required), period, method ('gbm' or
+    'bootstrap'), paths, steps, levels (comma-separated prices to test
+    for a touch), seed.
+    """
+    from src.extensions.simulation.monte_carlo import (
+        simulate_close_prices,
+        SimulationError,
+        METHODS
+    )
+    
+    ticker = request.args.get('ticker', '').strip().upper()
+    period = request.args.get('period') or config.DEFAULT_PERIOD
+    method = request.args.get('method') or config.MONTE_CARLO_METHOD
+    paths = request.args.get('paths', config.MONTE_CARLO_PATHS, type=int)
+    steps = request.args.get('steps', config.FORECAST_STEPS, type=int)
+    seed = request.args.get('seed', type=int)
+    
+    if not ticker:
+        return jsonify({"error": "Ticker symbol is required"}), 400
+    if not validate_ticker(ticker):
+        return jsonify({"error": f"Invalid ticker symbol: {ticker}"}), 400
+    if period not in config.SUPPORTED_PERIODS:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    if method not in METHODS:
+        return jsonify({"error": f"Unsupported method: {method}"}), 400
+    if not 1 <= paths <= config.MONTE_CARLO_MAX_PATHS:
+        return jsonify({
+            "error": f"paths must be between 1 and {config.MONTE_CARLO_MAX_PATHS}"
+        }), 400
+    if not 1 <= steps <= config.MONTE_CARLO_MAX_STEPS:
+        return jsonify({
+            "error": f"steps must be between 1 and {config.MONTE_CARLO_MAX_STEPS}"
+        }), 400
+    try:
+        levels = [
+            float(level) for level in request.args.get('levels', '').split(',') if level.strip()
+        ]
+        if not all(math.isfinite(level) for level in levels):
+            raise ValueError("levels must be finite")
+    except ValueError:
+        return jsonify({"error": "levels must be comma-separated numbers"}), 400
+    
+    try:
+        ticker_obj, historical_data = load_market_data(ticker, period, '1d')
+        calendar = calendar_for_exchange(
+            data_fetcher.get_company_info(ticker_obj).get('exchange'), ticker
+        )
+        result = simulate_close_prices(
+            historical_data,
+            steps=steps,
+            paths=paths,
+            method=method,
+            alpha=config.FORECAST_ALPHA,
+            confidence=config.MONTE_CARLO_CONFIDENCE,
+            levels=levels,
+            chunk_size=config.MONTE_CARLO_CHUNK_SIZE,
+            max_steps=config.MONTE_CARLO_MAX_STEPS,
+            seed=seed,
+            calendar=calendar
+        )
+    except AnalysisError as e:
+        return jsonify({"error": e.message}), e.status
+    except SimulationError as e:
+        return jsonify({"error": str(e)}), 400
+    except Exception as e:
+        logger.error(f"Error in simulate endpoint: {str(e)}", exc_info=True)
+        return jsonify({"error": f"An error occurred: {str(e)}"}), 500
+    
+    chart_data = analyzer.prepare_chart_data(historical_data)
+    result["ticker"] = ticker
+    result["chart"] = create_price_chart(chart_data, ticker, result, calendar)
+    return jsonify(result)
+
+
+@app.route('/alerts', methods=['POST'])
+def create_alert():
+    """
+    Create a one-shot price or indicator alert.
+    
+    Expected JSON (one of):
+    {"ticker": "AAPL", "kind": "threshold", "direction": "above", "level": 250}
+    {"ticker": "AAPL", "kind": "percent_change", "percent": -5}
+    {"ticker": "AAPL", "kind": "indicator", "indicator": "volatility",
+     "direction": "above", "level": 0.03}
+    
+    Fired alerts are read from GET /alerts/events (and POSTed to
+    ALERT_WEBHOOK_URL when configured).
+    """
+    data = request.get_json(silent=True) or {}
+    ticker = str(data.get('ticker', '')).strip().upper()
+    if not ticker:
+        return jsonify({"error": "Ticker symbol is required"}), 400
+    if not validate_ticker(ticker):
+        return jsonify({"error": f"Invalid ticker symbol: {ticker}"}), 400
+    
+    try:
+        rule = alert_engine.add_rule(
+            ticker,
+            kind=data.get('kind', 'threshold'),
+            direction=data.get('direction'),
+            level=data.get('level'),
+            percent=data.get('percent'),
+            indicator=data.get('indicator'),
+            note=str(data.get('note', ''))
+        )
+    except (AlertError, TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    
+    alert_engine.start()
+    return jsonify(rule.to_dict()), 201
+
+
+@app.route('/alerts', methods=['GET'])
+def list_alerts():
+    """List pending alert rules, optionally for one ticker."""
+    ticker = request.args.get('ticker', '').strip().upper() or None
+    return jsonify({"rules": alert_engine.rules(ticker)})
+
+
+@app.route('/alerts/<int:rule_id>', methods=['DELETE'])
+def delete_alert(rule_id: int):
+    """Delete a pending alert rule."""
+    if not alert_engine.remove_rule(rule_id):
+        return jsonify({"error": f"Unknown alert: {rule_id}"}), 404
+    return jsonify({"deleted": rule_id})
+
+
+@app.route('/alerts/events')
+def alert_events():
+    """
+    Take fired alerts from the delivery queue.
+    
+    Query parameters: max (events per call, default 100), wait (seconds
+    to wait for the first event, at most 30).
+    """
+    try:
+        max_events = min(max(int(request.args.get('max', 100)), 1), 1000)
+        wait = float(request.args.get('wait', 0))
+        if not math.isfinite(wait):
+            raise ValueError("wait must be finite")
+        wait = min(max(wait, 0.0), 30.0)
+    except ValueError:
+        return jsonify({"error": "max and wait must be numbers"}), 400
+    return jsonify({"events": alert_engine.delivery.drain(max_events, wait)})
+
+
+@app.route('/stream')
+def stream():
+    """
+    Server-Sent Events stream of new bars and statistics deltas.
+    
+    Query parameters: tickers (comma-separated), since (last bar date or
+    timestamp the client already has, e.g. 'YYYY-MM-DD'). Upstream polling
+    is shared by all subscribers of a ticker.
+    """
+    tickers = [
+        t.strip().upper() for t in request.args.get('tickers', '').split(',') if t.strip()
+    ]
+    if not tickers:
+        return jsonify({"error": "At least one ticker is required"}), 400
+    if len(tickers) > config.STREAM_MAX_TICKERS:
+        return jsonify({"error": f"At most {config.STREAM_MAX_TICKERS} tickers per stream"}), 400
+    invalid = [t for t in tickers if not validate_ticker(t)]
+    if invalid:
+        return jsonify({"error": f"Invalid ticker symbol: {invalid[0]}"}), 400
+    
+    try:
+        subscription = price_stream_hub.subscribe(tickers, request.args.get('since'))
+    except ValueError:
+        return jsonify({"error": "since must be a date or timestamp"}), 400
+    
+    def events():
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                event = subscription.get(timeout=config.STREAM_HEARTBEAT_SECONDS)
+                if event is None:
+                    # Comment line keeps proxies from closing idle connections
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: update\ndata: {json.dumps(event, default=str)}\n\n"
+        finally:
+            price_stream_hub.unsubscribe(subscription)
+    
+    response = Response(stream_with_context(events()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+
+@app.route('/export')
+def export_dataset():
+    """
+    Stream one dataset for a ticker set as a single file.
+    
+    Query parameters: tickers (comma-separated, required), dataset
+    (history, statistics or forecast; default history), format (parquet,
+    arrow or csv; default parquet if pyarrow is installed), period,
+    interval. The body is written in row groups while tickers are
+    processed; tickers that cannot be loaded are left out.
+    """
+    tickers = parse_tickers([request.args.get('tickers', '')])
+    dataset = request.args.get('dataset') or "history"
+    fmt = request.args.get('format') or default_format()
+    period = request.args.get('period') or config.DEFAULT_PERIOD
+    interval = request.args.get('interval') or config.DEFAULT_INTERVAL
+    
+    if not tickers:
+        return jsonify({"error": "At least one ticker is required"}), 400
+    if len(tickers) > config.EXPORT_MAX_TICKERS:
+        return jsonify({"error": f"At most {config.EXPORT_MAX_TICKERS} tickers per export"}), 400
+    invalid = [t for t in tickers if not validate_ticker(t)]
+    if invalid:
+        return jsonify({"error": f"Invalid ticker symbol: {invalid[0]}"}), 400
+    if dataset not in DATASETS:
+        return jsonify({"error": f"Unsupported dataset: {dataset}"}), 400
+    if dataset == "forecast" and not config.ENABLE_ARIMA_FORECAST:
+        return jsonify({"error": "Forecasting is disabled"}), 400
+    if period not in config.SUPPORTED_PERIODS:
+        return jsonify({"error": f"Unsupported period: {period}"}), 400
+    if interval not in config.SUPPORTED_INTERVALS:
+        return jsonify({"error": f"Unsupported interval: {interval}"}), 400
+    try:
+        check_format(fmt)
+    except ExportError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    body = exporter.stream(tickers, dataset, fmt, period, interval)
+    response = Response(stream_with_context(body), mimetype=MEDIA_TYPES[fmt])
+    response.headers['Content-Disposition'] = (
+        f'attachment; filename="{dataset}-{period}-{interval}{EXTENSIONS[fmt]}"'
+    )
+    response.headers['Cache-Control'] = 'no-store'
+    return response
+
+
+@app.after_request
+def compress(response):
+    """Compress eligible responses according to Accept-Encoding."""
+    with stage('compress'):
+        return compress_response(response, request.headers.get('Accept-Encoding', ''))
+
+
 @app.route('/health')
 def health():
     """Health check endpoint."""
     return jsonify({"status": "healthy"})
 
 
+@app.route('/metrics')
+def metrics():
+    """Monitoring endpoint with upstream, cache, data quality, admission, prefetch and background task state."""
+    state = {
+        "upstream": data_fetcher.upstream_state(),
+        "cache": cache.stats(),
+        "history_memory": data_fetcher.history_memory(),
+        "data_quality": data_fetcher.data_quality(),
+        "price_stream": price_stream_hub.stats(),
+        "snapshots": snapshot_scheduler.stats(),
+        "alerts": alert_engine.stats(),
+        "admission": admission.stats(),
+        "prefetch": prefetcher.stats(),
+    }
+    if config.ENABLE_ARIMA_FORECAST:
+        from src.extensions.forecasting.budgeted import budgeted_forecaster
+        state["forecast"] = budgeted_forecaster.stats()
+    return jsonify(state)
+
+
 if __name__ == "__main__":
     print("\n" + "=" * 60)
     print("  FINANCIAL DATA ANALYZER - Web Dashboard")
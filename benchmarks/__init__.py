@@ -0,0 +1,3 @@
+"""
+Load-testing tools: a local Yahoo stand-in and a fixed-rate request driver.
+"""
@@ -0,0 +1,571 @@
+"""
+Local stand-in for Yahoo Finance's market-data endpoints.
+
+Serves the v8 chart and v10 quoteSummary JSON that yfinance reads,
+with synthetic but deterministic prices: the same seed, symbol and
+date always produce the same bars. Response latency and the share of
+throttled (429) and failed (503) responses are configurable, so the
+web app can be load-tested without touching the real upstream.
+
+Run standalone with `python -m benchmarks.fake_upstream --port 8900`
+and start the app with `UPSTREAM_URL=http://127.0.0.1:8900`.
+"""
+
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+import zlib
+from datetime import date, datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterable, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from src.market_calendar import get_calendar
+from src.resample import PERIOD_OFFSETS
+from src.utils import is_crypto_ticker
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+CHART_PATH = "/v8/finance/chart/"
+SUMMARY_PATH = "/v10/finance/quoteSummary/"
+
+# First session served for period=max
+EQUITY_ORIGIN = np.datetime64("2000-01-03", "D")
+CRYPTO_ORIGIN = np.datetime64("2015-01-01", "D")
+# Prices are scaled to each symbol's level at this date
+PRICE_ANCHOR = np.datetime64("2025-01-02", "D")
+
+INTRADAY_MINUTES = {
+    "1m": 1, "2m": 2, "5m": 5, "15m": 15, "30m": 30, "60m": 60, "90m": 90, "1h": 60,
+}
+# Days back from which Yahoo serves each intraday interval
+INTRADAY_LOOKBACK_DAYS = {"1m": 30, "60m": 730, "1h": 730}
+DEFAULT_INTRADAY_LOOKBACK_DAYS = 60
+# Ranges counted in sessions rather than calendar days
+SESSION_RANGES = {"1d": 1, "5d": 5}
+AGGREGATED_INTERVALS = ("5d", "1wk", "1mo", "3mo")
+
+EQUITY_OPEN_MINUTES = 9 * 60 + 30
+EQUITY_SESSION_MINUTES = 390
+DAY_SECONDS = 86400
+
+
+class ChartError(Exception):
+    """Error response of the fake upstream."""
+
+    def __init__(self, status: int, code: str, description: str):
+        super().__init__(description)
+        self.status = status
+        self.code = code
+        self.description = description
+
+
+class MarketSimulator:
+    """Deterministic synthetic daily and intraday bars per symbol."""
+
+    def __init__(self, seed: int = 0, as_of: Optional[date] = None):
+        """
+        Initialize the MarketSimulator.
+
+        Args:
+            seed: Seed mixed into every symbol's random stream
+            as_of: Sessions before this date are complete (default: today, UTC)
+        """
+        self.seed = seed
+        self.as_of = np.datetime64(as_of or datetime.now(timezone.utc).date(), "D")
+        self._daily: Dict[str, Dict[str, np.ndarray]] = {}
+        self._lock = threading.Lock()
+
+    def _rng(self, symbol: str, *keys: int) -> np.random.Generator:
+        return np.random.default_rng([self.seed, zlib.crc32(symbol.encode()), *keys])
+
+    def daily(self, symbol: str) -> Dict[str, np.ndarray]:
+        """
+        Full daily series of a symbol, generated once.
+
+        Returns:
+            Dictionary of 'days' (datetime64[D]) and open/high/low/close/volume arrays
+        """
+        with self._lock:
+            series = self._daily.get(symbol)
+        if series is not None:
+            return series
+
+        crypto = is_crypto_ticker(symbol)
+        sessions = get_calendar("24/7" if crypto else "XNYS").sessions
+        origin = CRYPTO_ORIGIN if crypto else EQUITY_ORIGIN
+        # Generated over every calendar session, so the prices of a day do
+        # not depend on as_of
+        days = sessions[sessions >= origin]
+        rng = self._rng(symbol)
+        drift = rng.uniform(-0.0002, 0.0006)
+        sigma = rng.uniform(0.03, 0.05) if crypto else rng.uniform(0.01, 0.03)
+        level = rng.uniform(5000, 40000) if crypto else rng.uniform(20, 400)
+
+        close = np.exp(np.cumsum(rng.normal(drift, sigma, len(days))))
+        close *= level / close[np.searchsorted(days, PRICE_ANCHOR)]
+        previous = np.concatenate([[close[0]], close[:-1]])
+        open_ = previous * np.exp(rng.normal(0, sigma / 4, len(days)))
+        high = np.maximum(open_, close) * np.exp(np.abs(rng.normal(0, sigma / 2, len(days))))
+        low = np.minimum(open_, close) * np.exp(-np.abs(rng.normal(0, sigma / 2, len(days))))
+        volume = rng.lognormal(14 if crypto else 16, 0.5, len(days)).astype("int64")
+
+        series = {
+            "days": days, "open": open_, "high": high, "low": low, "close": close,
+            "volume": volume,
+        }
+        series = {
+            name: values[days < self.as_of] for name, values in series.items()
+        }
+        with self._lock:
+            self._daily[symbol] = series
+        return series
+
+    def last_close(self, symbol: str) -> float:
+        return float(self.daily(symbol)["close"][-1])
+
+    def window(
+        self,
+        symbol: str,
+        range_: Optional[str],
+        period1: Optional[int],
+        period2: Optional[int]
+    ) -> Tuple[np.datetime64, np.datetime64]:
+        """
+        Resolve a chart request to a [start, end) window of days.
+
+        Raises:
+            ChartError: For an unsupported range
+        """
+        days = self.daily(symbol)["days"]
+        end = self.as_of
+        if period1 is not None:
+            start = np.datetime64(period1 // DAY_SECONDS, "D")
+            if period2 is not None:
+                end = np.datetime64(-(-period2 // DAY_SECONDS), "D")
+        elif range_ == "max":
+            start = days[0] if len(days) else end
+        elif range_ in SESSION_RANGES:
+            count = SESSION_RANGES[range_]
+            start = days[-count] if len(days) >= count else end
+        elif range_ == "ytd":
+            start = np.datetime64(f"{str(self.as_of)[:4]}-01-01", "D")
+        elif range_ in PERIOD_OFFSETS:
+            start = np.datetime64(
+                (pd.Timestamp(str(self.as_of)) - PERIOD_OFFSETS[range_]).date(), "D"
+            )
+        else:
+            raise ChartError(
+                422, "Unprocessable Entity", f"Invalid input - range={range_} is not supported"
+            )
+        return start, end
+
+    def bars(
+        self,
+        symbol: str,
+        interval: str,
+        start: np.datetime64,
+        end: np.datetime64
+    ) -> Dict[str, np.ndarray]:
+        """
+        Bars of one interval over [start, end).
+
+        Returns:
+            Dictionary of 'timestamp' (epoch seconds) and OHLCV arrays
+
+        Raises:
+            ChartError: For unsupported intervals or intraday requests too far back
+        """
+        series = self.daily(symbol)
+        crypto = is_crypto_ticker(symbol)
+        positions = np.flatnonzero((series["days"] >= start) & (series["days"] < end))
+        opens = self._session_opens(series["days"][positions], crypto)
+
+        if interval == "1d" or interval in AGGREGATED_INTERVALS:
+            bars = {
+                name: series[name][positions]
+                for name in ("open", "high", "low", "close", "volume")
+            }
+            bars["timestamp"] = opens
+            return bars if interval == "1d" else self._aggregate(bars, interval)
+
+        if interval not in INTRADAY_MINUTES:
+            raise ChartError(
+                422, "Unprocessable Entity", f"Invalid input - interval={interval} is not supported"
+            )
+        lookback = INTRADAY_LOOKBACK_DAYS.get(interval, DEFAULT_INTRADAY_LOOKBACK_DAYS)
+        if start < self.as_of - np.timedelta64(lookback, "D"):
+            raise ChartError(
+                422, "Unprocessable Entity",
+                f"{interval} data not available for startTime={start}. "
+                f"The requested range must be within the last {lookback} days."
+            )
+        return self._intraday(symbol, series, positions, opens, INTRADAY_MINUTES[interval])
+
+    @staticmethod
+    def _session_opens(days: np.ndarray, crypto: bool) -> np.ndarray:
+        """Epoch seconds of each session's open (09:30 New York, or midnight UTC for crypto)."""
+        midnight = pd.DatetimeIndex(days.astype("datetime64[ns]"))
+        if crypto:
+            opens = midnight.tz_localize("UTC")
+        else:
+            opens = (midnight + pd.Timedelta(minutes=EQUITY_OPEN_MINUTES)).tz_localize(
+                "America/New_York"
+            )
+        return opens.asi8 // 10**9
+
+    def _intraday(
+        self,
+        symbol: str,
+        series: Dict[str, np.ndarray],
+        positions: np.ndarray,
+        opens: np.ndarray,
+        minutes: int
+    ) -> Dict[str, np.ndarray]:
+        """Intraday bars bridging each session's open to its close."""
+        session = 1440 if is_crypto_ticker(symbol) else EQUITY_SESSION_MINUTES
+        count = -(-session // minutes)
+        fraction = np.arange(1, count + 1) / count
+        columns = {name: [] for name in ("timestamp", "open", "high", "low", "close", "volume")}
+
+        for position, session_open in zip(positions, opens):
+            rng = self._rng(symbol, int(position))
+            first, last = series["open"][position], series["close"][position]
+            walk = np.cumsum(rng.normal(0, 0.002 * np.sqrt(minutes), count))
+            walk -= fraction * walk[-1]
+            close = np.exp(np.log(first) + fraction * np.log(last / first) + walk)
+            open_ = np.concatenate([[first], close[:-1]])
+            spread = np.exp(np.abs(rng.normal(0, 0.0005 * np.sqrt(minutes), count)))
+
+            columns["timestamp"].append(session_open + np.arange(count) * minutes * 60)
+            columns["open"].append(open_)
+            columns["close"].append(close)
+            columns["high"].append(np.maximum(open_, close) * spread)
+            columns["low"].append(np.minimum(open_, close) / spread)
+            columns["volume"].append(
+                (series["volume"][position] / count * rng.uniform(0.5, 1.5, count)).astype("int64")
+            )
+
+        return {
+            name: np.concatenate(parts) if parts else np.empty(0, dtype="int64")
+            for name, parts in columns.items()
+        }
+
+    @staticmethod
+    def _aggregate(bars: Dict[str, np.ndarray], interval: str) -> Dict[str, np.ndarray]:
+        """Combine daily bars into 5-session, weekly, monthly or quarterly bars."""
+        if not len(bars["timestamp"]):
+            return bars
+        days = bars["timestamp"].astype("datetime64[s]").astype("datetime64[D]")
+        if interval == "5d":
+            keys = np.arange(len(days)) // 5
+        elif interval == "1wk":
+            keys = (days.astype("int64") + 3) // 7
+        elif interval == "1mo":
+            keys = days.astype("datetime64[M]").astype("int64")
+        else:
+            keys = days.astype("datetime64[M]").astype("int64") // 3
+        starts = np.flatnonzero(np.diff(keys, prepend=keys[0] - 1))
+        ends = np.append(starts[1:], len(keys)) - 1
+        return {
+            "timestamp": bars["timestamp"][starts],
+            "open": bars["open"][starts],
+            "high": np.maximum.reduceat(bars["high"], starts),
+            "low": np.minimum.reduceat(bars["low"], starts),
+            "close": bars["close"][ends],
+            "volume": np.add.reduceat(bars["volume"], starts),
+        }
+
+    def chart(self, symbol: str, params: Dict[str, str]) -> Dict[str, Any]:
+        """Build a v8 chart response body."""
+        interval = params.get("interval", "1d")
+        period1 = int(params["period1"]) if "period1" in params else None
+        period2 = int(params["period2"]) if "period2" in params else None
+        start, end = self.window(symbol, params.get("range", "1mo"), period1, period2)
+        bars = self.bars(symbol, interval, start, end)
+        crypto = is_crypto_ticker(symbol)
+
+        result = {
+            "meta": {
+                "currency": "USD",
+                "symbol": symbol,
+                "exchangeName": "CCC" if crypto else "NMS",
+                "instrumentType": "CRYPTOCURRENCY" if crypto else "EQUITY",
+                "exchangeTimezoneName": "UTC" if crypto else "America/New_York",
+                "regularMarketPrice": round(self.last_close(symbol), 4),
+                "dataGranularity": interval,
+                "range": params.get("range", ""),
+            },
+            "indicators": {"quote": [{}]},
+        }
+        if len(bars["timestamp"]):
+            result["timestamp"] = bars["timestamp"].astype("int64").tolist()
+            quote = {
+                name: np.round(bars[name], 4).tolist() for name in ("open", "high", "low", "close")
+            }
+            quote["volume"] = bars["volume"].astype("int64").tolist()
+            result["indicators"] = {"quote": [quote]}
+            if interval not in INTRADAY_MINUTES:
+                result["indicators"]["adjclose"] = [{"adjclose": quote["close"]}]
+        return {"chart": {"result": [result], "error": None}}
+
+    def summary(self, symbol: str) -> Dict[str, Any]:
+        """Build a v10 quoteSummary response body."""
+        crypto = is_crypto_ticker(symbol)
+        price = round(self.last_close(symbol), 4)
+        previous = round(float(self.daily(symbol)["close"][-2]), 4)
+        shares = 10 ** (6 + zlib.crc32(symbol.encode()) % 4)
+
+        def raw(value: float) -> Dict[str, Any]:
+            return {"raw": value, "fmt": f"{value:,.2f}"}
+
+        modules = {
+            "price": {
+                "symbol": symbol,
+                "longName": f"{symbol} Synthetic {'Coin' if crypto else 'Inc.'}",
+                "shortName": symbol,
+                "currency": "USD",
+                "exchange": "CCC" if crypto else "NMS",
+                "quoteType": "CRYPTOCURRENCY" if crypto else "EQUITY",
+                "regularMarketPrice": raw(price),
+                "marketCap": raw(round(price * shares)),
+            },
+            "summaryProfile": {} if crypto else {
+                "sector": "Technology",
+                "industry": "Software",
+                "longBusinessSummary": f"Synthetic company {symbol} served by the fake upstream.",
+            },
+            "summaryDetail": {"previousClose": raw(previous)},
+        }
+        return {"quoteSummary": {"result": [modules], "error": None}}
+
+
+class FakeUpstream:
+    """Threaded HTTP server answering chart and quoteSummary requests."""
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency_ms: float = 0.0,
+        jitter_ms: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        seed: int = 0,
+        as_of: Optional[date] = None,
+        unknown: Iterable[str] = ()
+    ):
+        """
+        Initialize the FakeUpstream.
+
+        Args:
+            host: Interface to bind
+            port: Port to bind (0 picks a free one)
+            latency_ms: Mean added latency per response
+            jitter_ms: Standard deviation of the added latency
+            error_rate: Share of requests answered with 503
+            throttle_rate: Share of requests answered with 429
+            seed: Seed for prices, latency and injected errors
+            as_of: Date up to which sessions are served (default: today)
+            unknown: Symbols answered with 404 (delisted/invalid)
+        """
+        self.simulator = MarketSimulator(seed, as_of)
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.unknown = {symbol.upper() for symbol in unknown}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._counts: Dict[str, int] = {}
+        self._bars = 0
+        self._bytes = 0
+        self._server = ThreadingHTTPServer((host, port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _count(self, name: str, bars: int = 0) -> None:
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + 1
+            self._bars += bars
+
+    def _sent(self, size: int) -> None:
+        with self._lock:
+            self._bytes += size
+
+    def _draw(self) -> Tuple[float, Optional[int]]:
+        """Latency in seconds and the injected error status for one request."""
+        with self._lock:
+            delay = max(0.0, self._random.gauss(self.latency_ms, self.jitter_ms)) / 1000
+            roll = self._random.random()
+        if roll < self.throttle_rate:
+            return delay, 429
+        if roll < self.throttle_rate + self.error_rate:
+            return delay, 503
+        return delay, None
+
+    def respond(self, path: str, query: str) -> Tuple[int, Dict[str, Any]]:
+        """
+        Answer one request.
+
+        Args:
+            path: Request path
+            query: Raw query string
+
+        Returns:
+            Tuple of (status, JSON body)
+        """
+        params = {key: values[-1] for key, values in parse_qs(query).items()}
+        if path.startswith(CHART_PATH):
+            endpoint, symbol = "chart", path[len(CHART_PATH):].upper()
+        elif path.startswith(SUMMARY_PATH):
+            endpoint, symbol = "quoteSummary", path[len(SUMMARY_PATH):].upper()
+        else:
+            self._count("not_found")
+            return 404, {"finance": {"result": None, "error": {
+                "code": "Not Found", "description": "HTTP 404 Not Found"
+            }}}
+
+        delay, injected = self._draw()
+        time.sleep(delay)
+        try:
+            if injected == 429:
+                raise ChartError(429, "Too Many Requests", "Too Many Requests. Rate limited.")
+            if injected == 503:
+                raise ChartError(503, "Service Unavailable", "Upstream temporarily unavailable")
+            if not symbol or symbol in self.unknown:
+                raise ChartError(404, "Not Found", "No data found, symbol may be delisted")
+            if endpoint == "chart":
+                body = self.simulator.chart(symbol, params)
+                bars = len(body["chart"]["result"][0].get("timestamp", []))
+            else:
+                body = self.simulator.summary(symbol)
+                bars = 0
+        except ChartError as e:
+            self._count(f"{endpoint}_{e.status}")
+            return e.status, {endpoint: {"result": None, "error": {
+                "code": e.code, "description": e.description
+            }}}
+        self._count(endpoint, bars)
+        return 200, body
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                parsed = urlparse(self.path)
+                if parsed.path == "/__stats":
+                    status, body = 200, upstream.stats()
+                else:
+                    status, body = upstream.respond(parsed.path, parsed.query)
+                payload = json.dumps(body).encode("utf-8")
+                upstream._sent(len(payload))
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            def log_message(self, format, *args):
+                logger.debug(format % args)
+
+        return Handler
+
+    def start(self) -> str:
+        """
+        Serve in a background thread.
+
+        Returns:
+            Base URL to use as UPSTREAM_URL
+        """
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="fake-upstream", daemon=True
+        )
+        self._thread.start()
+        logger.info(f"Fake upstream listening on {self.url}")
+        return self.url
+
+    def stop(self) -> None:
+        """Stop serving and close the socket."""
+        self._server.shutdown()
+        self._server.server_close()
+        if self._thread is not None:
+            self._thread.join(5)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return request counters.
+
+        Returns:
+            Dictionary of responses per endpoint and status, bars and bytes served
+        """
+        with self._lock:
+            return {"responses": dict(self._counts), "bars": self._bars, "bytes": self._bytes}
+
+
+def add_upstream_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the options shaping the fake upstream's behaviour."""
+    parser.add_argument("--latency-ms", type=float, default=50.0,
+                        help="Mean added upstream latency (default: 50)")
+    parser.add_argument("--jitter-ms", type=float, default=20.0,
+                        help="Standard deviation of the upstream latency (default: 20)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of upstream requests failing with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0,
+                        help="Share of upstream requests throttled with 429")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Seed for prices, latency, errors and the request mix")
+    parser.add_argument("--as-of", type=date.fromisoformat, default=None,
+                        help="Serve sessions before this date (default: today)")
+    parser.add_argument("--unknown", default="",
+                        help="Comma-separated symbols answered with 404")
+
+
+def upstream_from_args(args: argparse.Namespace, port: int = 0) -> FakeUpstream:
+    """Build a FakeUpstream from parsed add_upstream_arguments options."""
+    return FakeUpstream(
+        port=port,
+        latency_ms=args.latency_ms,
+        jitter_ms=args.jitter_ms,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        seed=args.seed,
+        as_of=args.as_of,
+        unknown=[s.strip() for s in args.unknown.split(",") if s.strip()]
+    )
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve fake Yahoo chart/quoteSummary data.")
+    parser.add_argument("--port", type=int, default=8900, help="Port to bind (default: 8900)")
+    add_upstream_arguments(parser)
+    args = parser.parse_args(argv)
+
+    upstream = upstream_from_args(args, args.port)
+    print(f"Serving on {upstream.url} (UPSTREAM_URL={upstream.url}), Ctrl+C to stop")
+    try:
+        upstream._server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        upstream._server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
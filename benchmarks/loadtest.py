@@ -0,0 +1,544 @@
+"""
+Fixed-rate load test of GET /analyze.
+
+Starts the fake upstream (benchmarks/fake_upstream.py) and the web app
+pointed at it, sends requests on a fixed schedule (open loop, so a slow
+server does not slow the offered load down) and reports throughput,
+latency percentiles and the per-stage breakdown from the Server-Timing
+header.
+
+The ticker/view mix, arrival times, prices and upstream latencies all
+derive from --seed, so runs with the same options are comparable across
+commits. Save a run with --output and pass it to --compare later:
+
+    python -m benchmarks.loadtest --rps 20 --duration 60 --output base.json
+    python -m benchmarks.loadtest --rps 20 --duration 60 --compare base.json
+"""
+
+import argparse
+import gzip
+import json
+import logging
+import os
+import platform
+import shlex
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple, Sequence, Tuple
+
+import numpy as np
+
+from benchmarks.fake_upstream import add_upstream_arguments, upstream_from_args
+from src.server_timing import parse_server_timing
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+project_root = Path(__file__).parent.parent
+
+# Popularity order of the default universe (rank 1 is requested most)
+DEFAULT_TICKERS = (
+    "AAPL", "MSFT", "NVDA", "TSLA", "AMZN", "BTC-USD", "GOOGL", "META", "AMD", "ETH-USD",
+    "NFLX", "JPM", "V", "INTC", "DIS", "BA", "KO", "WMT", "XOM", "ORCL",
+    "SOL-USD", "PEP", "CSCO", "IBM", "NKE", "MCD", "GS", "CAT", "HD", "DOGE-USD",
+)
+# period:interval=weight
+DEFAULT_VIEWS = "1y:1d=70,6mo:1d=10,5d:5m=10,1mo:1h=5,max:1d=5"
+# Symbols the fake upstream does not know, used for --invalid-share
+UNKNOWN_TICKERS = ("ZZQA", "ZZQB", "ZZQC")
+PERCENTILES = (50, 90, 95, 99)
+
+DEFAULT_SERVER_COMMAND = (
+    f"{shlex.quote(sys.executable)} -m flask --app app.web_app run --host 127.0.0.1 "
+    "--port {port} --no-reload --no-debugger --with-threads"
+)
+# Settings of the app under test; --server-env overrides them
+DEFAULT_SERVER_ENV = {
+    "CACHE_BACKEND": "memory",
+    "PREFETCH_ENABLED": "false",
+    "SNAPSHOT_TICKERS": "",
+    "SNAPSHOT_TICKERS_FILE": "",
+    "FLASK_DEBUG": "false",
+    "UPSTREAM_RATE_PER_SECOND": "1000",
+    "UPSTREAM_BURST": "1000",
+    "UPSTREAM_BACKOFF_BASE": "0.05",
+}
+
+
+class PlannedRequest(NamedTuple):
+    """One request of the schedule."""
+    offset: float
+    ticker: str
+    period: str
+    interval: str
+
+    @property
+    def view(self) -> str:
+        return f"{self.period}:{self.interval}"
+
+
+class Sample(NamedTuple):
+    """Outcome of one request; times are seconds since the run started."""
+    request: PlannedRequest
+    started: float
+    finished: float
+    status: int
+    size: int
+    stages: Dict[str, float]
+    snapshot: str
+
+
+def parse_views(raw: str) -> Tuple[List[str], np.ndarray]:
+    """
+    Parse a 'period:interval=weight,...' view mix.
+
+    Returns:
+        Tuple of (views, normalized weights)
+
+    Raises:
+        ValueError: For malformed entries
+    """
+    views, weights = [], []
+    for entry in raw.split(","):
+        view, _, weight = entry.strip().partition("=")
+        if view.count(":") != 1:
+            raise ValueError(f"Invalid view (expected period:interval=weight): {entry}")
+        views.append(view)
+        weights.append(float(weight or 1))
+    weights = np.asarray(weights)
+    return views, weights / weights.sum()
+
+
+def plan_requests(
+    rps: float,
+    duration: float,
+    tickers: Sequence[str] = DEFAULT_TICKERS,
+    views: str = DEFAULT_VIEWS,
+    zipf: float = 1.1,
+    invalid_share: float = 0.0,
+    arrivals: str = "constant",
+    seed: int = 0
+) -> List[PlannedRequest]:
+    """
+    Build a deterministic request schedule.
+
+    Tickers are drawn with Zipf weights (the i-th ticker has weight
+    1 / i**zipf), so a few tickers get most of the traffic.
+
+    Args:
+        rps: Offered requests per second
+        duration: Length of the schedule in seconds
+        tickers: Universe in popularity order
+        views: View mix, see parse_views
+        zipf: Popularity skew (0 for a uniform mix)
+        invalid_share: Share of requests for tickers upstream does not know
+        arrivals: 'constant' spacing or 'poisson' arrivals
+        seed: Random seed
+
+    Returns:
+        Requests ordered by offset
+    """
+    rng = np.random.default_rng(seed)
+    count = int(rps * duration)
+    if arrivals == "poisson":
+        offsets = np.cumsum(rng.exponential(1 / rps, count))
+    else:
+        offsets = np.arange(count) / rps
+
+    weights = 1 / np.arange(1, len(tickers) + 1) ** zipf
+    picked = rng.choice(len(tickers), count, p=weights / weights.sum())
+    names, view_weights = parse_views(views)
+    picked_views = rng.choice(len(names), count, p=view_weights)
+    invalid = rng.random(count) < invalid_share
+
+    plan = []
+    for i in range(count):
+        ticker = UNKNOWN_TICKERS[i % len(UNKNOWN_TICKERS)] if invalid[i] else tickers[picked[i]]
+        period, interval = names[picked_views[i]].split(":")
+        plan.append(PlannedRequest(float(offsets[i]), ticker, period, interval))
+    return plan
+
+
+def send(base_url: str, planned: PlannedRequest, started_at: float, timeout: float) -> Sample:
+    """Send one GET /analyze and record its outcome."""
+    query = urllib.parse.urlencode(
+        {"ticker": planned.ticker, "period": planned.period, "interval": planned.interval}
+    )
+    request = urllib.request.Request(
+        f"{base_url}/analyze?{query}", headers={"Accept-Encoding": "gzip"}
+    )
+    started = time.perf_counter() - started_at
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            status, headers, body = response.status, response.headers, response.read()
+    except urllib.error.HTTPError as e:
+        status, headers, body = e.code, e.headers, e.read()
+    except OSError as e:
+        logger.debug(f"{planned.ticker}: {str(e)}")
+        status, headers, body = 0, {}, b""
+    finished = time.perf_counter() - started_at
+    return Sample(
+        planned, started, finished, status, len(body),
+        parse_server_timing(headers.get("Server-Timing", "")),
+        headers.get("X-Snapshot", "")
+    )
+
+
+def run_schedule(
+    base_url: str,
+    plan: Sequence[PlannedRequest],
+    concurrency: int,
+    timeout: float
+) -> List[Sample]:
+    """
+    Send the planned requests at their offsets.
+
+    Requests are submitted on time even if earlier ones have not
+    finished; when all `concurrency` connections are busy they queue
+    client-side, and that wait counts towards their latency.
+
+    Returns:
+        Samples in schedule order
+    """
+    started_at = time.perf_counter()
+    futures = []
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        for planned in plan:
+            delay = started_at + planned.offset - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            futures.append(pool.submit(send, base_url, planned, started_at, timeout))
+    return [future.result() for future in futures]
+
+
+def distribution(values: Sequence[float]) -> Dict[str, float]:
+    """Count, mean, percentiles and maximum of millisecond values."""
+    if not len(values):
+        return {"count": 0}
+    values = np.asarray(values, dtype="float64")
+    result = {"count": int(len(values)), "mean": round(float(values.mean()), 2)}
+    for q, value in zip(PERCENTILES, np.percentile(values, PERCENTILES)):
+        result[f"p{q}"] = round(float(value), 2)
+    result["max"] = round(float(values.max()), 2)
+    return result
+
+
+def summarize(samples: Sequence[Sample], warmup: float) -> Dict[str, Any]:
+    """
+    Aggregate the samples scheduled after the warm-up.
+
+    Latency runs from the scheduled send time to the last byte, so
+    client-side queueing behind a slow server is included; 'service'
+    excludes it.
+
+    Returns:
+        Dictionary with summary, per-stage and per-view statistics
+    """
+    measured = [s for s in samples if s.request.offset >= warmup]
+    if not measured:
+        return {"summary": {"requests": 0}, "stages": {}, "views": {}}
+    ok = [s for s in measured if 200 <= s.status < 400]
+    elapsed = max(s.finished for s in measured) - warmup
+    statuses: Dict[str, int] = {}
+    for sample in measured:
+        statuses[str(sample.status)] = statuses.get(str(sample.status), 0) + 1
+
+    stage_values: Dict[str, List[float]] = {}
+    for sample in ok:
+        for name, duration in sample.stages.items():
+            stage_values.setdefault(name, []).append(duration)
+    total = sum(stage_values.get("total", [])) or 1.0
+    stages = {}
+    for name, values in stage_values.items():
+        stages[name] = distribution(values)
+        stages[name]["share"] = round(sum(values) / total, 3)
+
+    views: Dict[str, List[Sample]] = {}
+    for sample in ok:
+        views.setdefault(sample.request.view, []).append(sample)
+
+    return {
+        "summary": {
+            "requests": len(measured),
+            "ok": len(ok),
+            "elapsed_s": round(elapsed, 2),
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed > 0 else 0.0,
+            "statuses": dict(sorted(statuses.items())),
+            "snapshot_hits": sum(1 for s in ok if s.snapshot),
+            "latency_ms": distribution(
+                [(s.finished - s.request.offset) * 1000 for s in measured]
+            ),
+            "service_ms": distribution([(s.finished - s.started) * 1000 for s in measured]),
+            "response_bytes": distribution([s.size for s in ok]),
+        },
+        "stages": stages,
+        "views": {
+            view: distribution([(s.finished - s.request.offset) * 1000 for s in group])
+            for view, group in sorted(views.items())
+        },
+    }
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def get_json(url: str, timeout: float = 5.0) -> Any:
+    request = urllib.request.Request(url, headers={"Accept-Encoding": "gzip"})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        body = response.read()
+        if response.headers.get("Content-Encoding") == "gzip":
+            body = gzip.decompress(body)
+        return json.loads(body)
+
+
+def start_server(command: str, env: Dict[str, str], log_path: str) -> Tuple[subprocess.Popen, str]:
+    """
+    Start the app under test and wait for /health.
+
+    Args:
+        command: Shell-style command with a {port} placeholder
+        env: Environment overrides
+        log_path: File receiving the server's output
+
+    Returns:
+        Tuple of (process, base URL)
+
+    Raises:
+        RuntimeError: If the server exits or does not become healthy
+    """
+    port = free_port()
+    log = open(log_path, "ab")
+    process = subprocess.Popen(
+        shlex.split(command.format(port=port)),
+        cwd=project_root, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT
+    )
+    log.close()
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with code {process.returncode}, see {log_path}")
+        try:
+            get_json(f"{base_url}/health", timeout=1)
+            return process, base_url
+        except OSError:
+            time.sleep(0.2)
+    process.kill()
+    raise RuntimeError(f"Server did not become healthy within 60s, see {log_path}")
+
+
+def stop_server(process: subprocess.Popen) -> None:
+    process.terminate()
+    try:
+        process.wait(10)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def git_revision() -> Dict[str, Any]:
+    """Commit and dirty state of the working tree, if it is a git checkout."""
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+        dirty = bool(subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"], cwd=project_root,
+            capture_output=True, text=True, check=True
+        ).stdout.strip())
+        return {"commit": commit, "dirty": dirty}
+    except (OSError, subprocess.CalledProcessError):
+        return {"commit": None, "dirty": None}
+
+
+def parse_env(entries: Sequence[str]) -> Dict[str, str]:
+    env = {}
+    for entry in entries:
+        key, sep, value = entry.partition("=")
+        if not sep:
+            raise ValueError(f"Invalid --server-env entry (expected KEY=VALUE): {entry}")
+        env[key] = value
+    return env
+
+
+def format_report(report: Dict[str, Any]) -> str:
+    """Render a run as text."""
+    summary = report["summary"]
+    if not summary["requests"]:
+        return "No requests were measured."
+    latency = summary["latency_ms"]
+    lines = [
+        f"Commit {report['meta']['git']['commit']}"
+        f"{' (dirty)' if report['meta']['git']['dirty'] else ''}, "
+        f"offered {report['meta']['options']['rps']} rps",
+        f"Throughput: {summary['throughput_rps']} rps ({summary['ok']}/{summary['requests']} ok, "
+        f"statuses {summary['statuses']})",
+        "Latency ms: " + ", ".join(
+            f"{key} {latency[key]}" for key in ("mean", "p50", "p90", "p95", "p99", "max")
+        ),
+        "",
+        f"{'stage':<12}{'count':>8}{'mean':>10}{'p50':>10}{'p95':>10}{'p99':>10}{'share':>8}",
+    ]
+    for name, stats in report["stages"].items():
+        lines.append(
+            f"{name:<12}{stats['count']:>8}{stats['mean']:>10}{stats['p50']:>10}"
+            f"{stats['p95']:>10}{stats['p99']:>10}{stats['share']:>8}"
+        )
+    lines += ["", f"{'view':<12}{'count':>8}{'p50':>10}{'p95':>10}{'p99':>10}"]
+    for view, stats in report["views"].items():
+        lines.append(
+            f"{view:<12}{stats['count']:>8}{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}"
+        )
+    return "\n".join(lines)
+
+
+def compare_reports(baseline: Dict[str, Any], current: Dict[str, Any]) -> str:
+    """Render the key metrics of two runs side by side."""
+    def metrics(report):
+        summary = report["summary"]
+        values = {"throughput_rps": summary.get("throughput_rps")}
+        for key in ("p50", "p95", "p99"):
+            values[f"latency {key}"] = summary.get("latency_ms", {}).get(key)
+        for name, stats in report.get("stages", {}).items():
+            for key in ("p50", "p95"):
+                values[f"{name} {key}"] = stats.get(key)
+        return values
+
+    before, after = metrics(baseline), metrics(current)
+    lines = [
+        f"{'metric':<22}{baseline['meta']['git']['commit'] or 'baseline':>12}"
+        f"{current['meta']['git']['commit'] or 'current':>12}{'change':>10}"
+    ]
+    for key in dict.fromkeys([*before, *after]):
+        old, new = before.get(key), after.get(key)
+        change = f"{(new - old) / old * 100:+.1f}%" if old and new is not None else ""
+        lines.append(f"{key:<22}{str(old):>12}{str(new):>12}{change:>10}")
+    differing = {
+        key for key in ("rps", "duration", "warmup", "seed", "views", "tickers", "zipf")
+        if baseline["meta"]["options"].get(key) != current["meta"]["options"].get(key)
+    }
+    if differing:
+        lines.append(f"Warning: runs differ in {', '.join(sorted(differing))}")
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Fixed-rate load test of GET /analyze against a fake upstream."
+    )
+    parser.add_argument("--rps", type=float, default=10.0, help="Offered requests per second")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds of load")
+    parser.add_argument("--warmup", type=float, default=5.0,
+                        help="Leading seconds excluded from the statistics")
+    parser.add_argument("--arrivals", choices=("constant", "poisson"), default="constant")
+    parser.add_argument("--tickers", default=",".join(DEFAULT_TICKERS),
+                        help="Comma-separated universe, most popular first")
+    parser.add_argument("--zipf", type=float, default=1.1,
+                        help="Popularity skew of the ticker mix (0 = uniform)")
+    parser.add_argument("--views", default=DEFAULT_VIEWS,
+                        help=f"period:interval=weight mix (default: {DEFAULT_VIEWS})")
+    parser.add_argument("--invalid-share", type=float, default=0.0,
+                        help="Share of requests for tickers upstream does not know")
+    parser.add_argument("--concurrency", type=int, default=64,
+                        help="Maximum requests in flight")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout")
+    parser.add_argument("--forecast", action="store_true", help="Enable ARIMA forecasts")
+    parser.add_argument("--server-env", action="append", default=[], metavar="KEY=VALUE",
+                        help="Environment override for the app (repeatable)")
+    parser.add_argument("--server-cmd", default=DEFAULT_SERVER_COMMAND,
+                        help="Command starting the app, with a {port} placeholder "
+                             "(e.g. 'gunicorn -w 4 -b 127.0.0.1:{port} app.web_app:app')")
+    parser.add_argument("--server-log", default=None,
+                        help="File for the app's output (default: a temporary file)")
+    parser.add_argument("--target", default=None,
+                        help="Load an already running app at this URL instead")
+    parser.add_argument("--output", default=None, help="Write the report as JSON")
+    parser.add_argument("--compare", default=None, help="JSON report to compare against")
+    add_upstream_arguments(parser)
+    args = parser.parse_args(argv)
+
+    tickers = [t.strip().upper() for t in args.tickers.split(",") if t.strip()]
+    try:
+        plan = plan_requests(
+            args.rps, args.duration, tickers, args.views, args.zipf, args.invalid_share,
+            args.arrivals, args.seed
+        )
+        server_env = {**DEFAULT_SERVER_ENV, **parse_env(args.server_env)}
+    except ValueError as e:
+        parser.error(str(e))
+    if args.forecast:
+        server_env.setdefault("ENABLE_ARIMA_FORECAST", "true")
+
+    upstream = process = None
+    server_metrics: Dict[str, Any] = {}
+    try:
+        if args.target:
+            base_url = args.target.rstrip("/")
+        else:
+            args.unknown = ",".join([args.unknown, *UNKNOWN_TICKERS])
+            upstream = upstream_from_args(args)
+            server_env["UPSTREAM_URL"] = upstream.start()
+            log_path = args.server_log or tempfile.mkstemp(prefix="loadtest-", suffix=".log")[1]
+            process, base_url = start_server(args.server_cmd, server_env, log_path)
+            print(f"App at {base_url} (log: {log_path}), upstream at {upstream.url}")
+
+        print(f"Sending {len(plan)} requests at {args.rps} rps for {args.duration}s...")
+        samples = run_schedule(base_url, plan, args.concurrency, args.timeout)
+        try:
+            server_metrics = get_json(f"{base_url}/metrics")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Could not read /metrics: {str(e)}")
+    finally:
+        if process is not None:
+            stop_server(process)
+        if upstream is not None:
+            upstream.stop()
+
+    report = {
+        "meta": {
+            "git": git_revision(),
+            "started": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "options": {
+                key: value for key, value in vars(args).items()
+                if key not in ("output", "compare", "server_log")
+            },
+            "server_env": server_env if not args.target else None,
+            "as_of": str(upstream.simulator.as_of) if upstream is not None else None,
+        },
+        **summarize(samples, args.warmup),
+        "upstream": upstream.stats() if upstream is not None else None,
+        "server": {
+            key: server_metrics.get(key)
+            for key in ("upstream", "cache", "admission", "forecast") if key in server_metrics
+        },
+    }
+    print()
+    print(format_report(report))
+
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, default=str))
+        print(f"\nReport written to {args.output}")
+    if args.compare:
+        print()
+        print(compare_reports(json.loads(Path(args.compare).read_text()), report))
+    return 0 if report["summary"].get("ok") else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
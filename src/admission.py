@@ -0,0 +1,223 @@
+"""
+Admission control for expensive requests.
+
+At most max_concurrent requests run at a time; the rest wait in a
+bounded priority queue (cheap requests, whose data is already cached,
+go first). A request is rejected up front when the queue is full or
+when the expected wait, estimated from the recent service time, would
+exceed its deadline, so overload turns into a few fast 429 responses
+instead of slow responses for everyone. Callers can also ask whether
+the system is under pressure to degrade the work they do.
+"""
+
+import heapq
+import itertools
+import logging
+import math
+import threading
+import time
+from typing import Dict, Any, List, Optional
+
+from src.config import config
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Queue priorities (lower runs first)
+PRIORITY_CACHED = 0
+PRIORITY_UNCACHED = 1
+
+# Weight of the newest sample in the service time average
+SERVICE_TIME_SMOOTHING = 0.2
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed."""
+
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Server overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = max(1, int(math.ceil(retry_after)))
+
+
+class _Waiter:
+    """A queued request waiting for a slot."""
+
+    __slots__ = ("priority", "sequence", "event", "admitted")
+
+    def __init__(self, priority: int, sequence: int):
+        self.priority = priority
+        self.sequence = sequence
+        self.event = threading.Event()
+        self.admitted = False
+
+    def __lt__(self, other: "_Waiter") -> bool:
+        return (self.priority, self.sequence) < (other.priority, other.sequence)
+
+
+class Ticket:
+    """
+    A granted slot; release it (or leave the with-block) when done.
+
+    A ticket without a controller stands for an unlimited slot.
+    """
+
+    def __init__(
+        self,
+        controller: Optional["AdmissionController"],
+        waited: float,
+        degraded: bool
+    ):
+        self.controller = controller
+        self.waited = waited
+        self.degraded = degraded
+        self.started = time.monotonic()
+        self._released = False
+
+    def release(self) -> None:
+        if not self._released and self.controller is not None:
+            self._released = True
+            self.controller._release(time.monotonic() - self.started)
+
+    def __enter__(self) -> "Ticket":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.release()
+
+
+class AdmissionController:
+    """Concurrency limit with a bounded, deadline-aware priority queue."""
+
+    def __init__(
+        self,
+        max_concurrent: int = None,
+        max_queue: int = None,
+        deadline: float = None,
+        degrade_ratio: float = None
+    ):
+        """
+        Initialize the AdmissionController.
+
+        Args:
+            max_concurrent: Requests processed at the same time (default: from config)
+            max_queue: Requests allowed to wait for a slot (default: from config)
+            deadline: Default seconds a request may take including queueing
+                (default: from config)
+            degrade_ratio: Queue fill ratio from which requests are degraded
+                (default: from config)
+        """
+        self.max_concurrent = max(1, max_concurrent or config.ADMISSION_MAX_CONCURRENT)
+        self.max_queue = max(0, config.ADMISSION_MAX_QUEUE if max_queue is None else max_queue)
+        self.deadline = deadline or config.ADMISSION_DEADLINE_SECONDS
+        ratio = config.ADMISSION_DEGRADE_RATIO if degrade_ratio is None else degrade_ratio
+        self.degrade_depth = max(1, int(math.ceil(self.max_queue * ratio)))
+        self._active = 0
+        self._queue: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._service_time: Optional[float] = None
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._queued = 0
+        self._degraded = 0
+        self._shed = {"queue_full": 0, "deadline": 0, "timeout": 0}
+
+    def _expected_wait(self, position: int) -> float:
+        """Estimated seconds until the request at a queue position gets a slot."""
+        service = self._service_time or 0.0
+        return math.ceil(position / self.max_concurrent) * service
+
+    def under_pressure(self) -> bool:
+        """True while the queue is at least degrade_ratio full."""
+        with self._lock:
+            return len(self._queue) >= self.degrade_depth
+
+    def acquire(self, priority: int = PRIORITY_UNCACHED, deadline: float = None) -> Ticket:
+        """
+        Wait for a processing slot.
+
+        Args:
+            priority: PRIORITY_CACHED or PRIORITY_UNCACHED
+            deadline: Seconds the caller is willing to spend in total
+                (default: the controller's deadline)
+
+        Returns:
+            Ticket holding the slot
+
+        Raises:
+            Overloaded: If the queue is full, the deadline cannot be met
+                or passes while waiting
+        """
+        deadline = min(deadline or self.deadline, self.deadline)
+        arrived = time.monotonic()
+        with self._lock:
+            if self._active < self.max_concurrent and not self._queue:
+                self._active += 1
+                return self._grant(arrived)
+            if len(self._queue) >= self.max_queue:
+                self._shed["queue_full"] += 1
+                raise Overloaded("queue full", self._expected_wait(len(self._queue) + 1))
+            position = 1 + sum(1 for w in self._queue if w.priority <= priority)
+            wait = self._expected_wait(position)
+            if wait + (self._service_time or 0.0) > deadline:
+                self._shed["deadline"] += 1
+                raise Overloaded("deadline", wait)
+            waiter = _Waiter(priority, next(self._sequence))
+            heapq.heappush(self._queue, waiter)
+            self._queued += 1
+
+        waiter.event.wait(max(0.0, deadline - (self._service_time or 0.0)))
+        with self._lock:
+            if waiter.admitted:
+                return self._grant(arrived)
+            self._queue.remove(waiter)
+            heapq.heapify(self._queue)
+            self._shed["timeout"] += 1
+            raise Overloaded("timeout", self._expected_wait(len(self._queue) + 1))
+
+    def _grant(self, arrived: float) -> Ticket:
+        """Count an admission (caller holds the lock)."""
+        self._admitted += 1
+        degraded = len(self._queue) >= self.degrade_depth
+        if degraded:
+            self._degraded += 1
+        return Ticket(self, time.monotonic() - arrived, degraded)
+
+    def _release(self, service_time: float) -> None:
+        """Return a slot, handing it to the first waiter if there is one."""
+        with self._lock:
+            if self._service_time is None:
+                self._service_time = service_time
+            else:
+                self._service_time += SERVICE_TIME_SMOOTHING * (service_time - self._service_time)
+            if self._queue:
+                waiter = heapq.heappop(self._queue)
+                waiter.admitted = True
+                waiter.event.set()
+            else:
+                self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return queue depth, admission and shed counters.
+
+        Returns:
+            Dictionary suitable for a monitoring endpoint
+        """
+        with self._lock:
+            return {
+                "active": self._active,
+                "max_concurrent": self.max_concurrent,
+                "queue_depth": len(self._queue),
+                "max_queue": self.max_queue,
+                "admitted": self._admitted,
+                "queued": self._queued,
+                "degraded": self._degraded,
+                "shed": dict(self._shed),
+                "shed_total": sum(self._shed.values()),
+                "service_seconds": self._service_time,
+            }
+
+
+# Create a global instance
+admission = AdmissionController()
@@ -0,0 +1,512 @@
+"""
+Price alert engine with indexed threshold evaluation.
+
+Rules are kept in sorted level indexes per (ticker, series, direction).
+When a new value arrives, the rules crossed between the previous and the
+new value form a contiguous slice of the index, found with two binary
+searches, so each update costs O(log n + k) for k fired rules regardless
+of how many rules are stored. Percent-change rules are turned into
+absolute levels when created; indicator rules index statistics such as
+the 30-day average. Fired rules are one-shot and are queued for
+delivery (polling consumers and an optional webhook).
+"""
+
+import itertools
+import json
+import logging
+import math
+import queue
+import threading
+import urllib.request
+from bisect import bisect_left, bisect_right, insort
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+
+from src.analyzer import analyzer
+from src.config import config
+from src.data_fetcher import data_fetcher
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+RULE_KINDS = ("threshold", "percent_change", "indicator")
+DIRECTIONS = ("above", "below")
+PRICE = "price"
+
+# Raw statistics (FinancialAnalyzer.calculate_statistics) usable by indicator rules
+INDICATORS = (
+    "volatility",
+    "avg_30d",
+    "avg_90d",
+    "price_change_pct",
+    "high_52w",
+    "low_52w",
+)
+
+
+class AlertError(ValueError):
+    """Raised when an alert rule is invalid."""
+
+
+class AlertRule:
+    """A one-shot condition on a ticker's price or indicator."""
+
+    def __init__(
+        self,
+        rule_id: int,
+        ticker: str,
+        kind: str,
+        series: str,
+        direction: str,
+        level: float,
+        reference: Optional[float] = None,
+        note: str = ""
+    ):
+        self.id = rule_id
+        self.ticker = ticker
+        self.kind = kind
+        self.series = series
+        self.direction = direction
+        self.level = level
+        self.reference = reference
+        self.note = note
+        self.created_at = datetime.now(timezone.utc).isoformat()
+
+    @property
+    def index_key(self) -> Tuple[str, str, str]:
+        return (self.ticker, self.series, self.direction)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "ticker": self.ticker,
+            "kind": self.kind,
+            "series": self.series,
+            "direction": self.direction,
+            "level": self.level,
+            "reference": self.reference,
+            "note": self.note,
+            "created_at": self.created_at,
+        }
+
+
+class ThresholdIndex:
+    """Rule levels of one (ticker, series, direction), kept sorted."""
+
+    def __init__(self, direction: str):
+        self.direction = direction
+        self._entries: List[Tuple[float, int]] = []
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, level: float, rule_id: int) -> None:
+        insort(self._entries, (level, rule_id))
+
+    def remove(self, level: float, rule_id: int) -> bool:
+        position = bisect_left(self._entries, (level, rule_id))
+        if position < len(self._entries) and self._entries[position] == (level, rule_id):
+            del self._entries[position]
+            return True
+        return False
+
+    def pop_crossed(self, previous: float, current: float) -> List[int]:
+        """
+        Remove and return the rules crossed by a move from previous to current.
+
+        'above' rules fire for levels in (previous, current], 'below'
+        rules for levels in [current, previous).
+
+        Args:
+            previous: Last observed value
+            current: New value
+
+        Returns:
+            Rule ids in level order
+        """
+        if self.direction == "above":
+            if current <= previous:
+                return []
+            low = bisect_right(self._entries, (previous, float("inf")))
+            high = bisect_right(self._entries, (current, float("inf")))
+        else:
+            if current >= previous:
+                return []
+            low = bisect_left(self._entries, (current, -1))
+            high = bisect_left(self._entries, (previous, -1))
+        crossed = [rule_id for _, rule_id in self._entries[low:high]]
+        del self._entries[low:high]
+        return crossed
+
+
+class AlertQueue:
+    """Bounded local queue of fired alerts, standing in for a push channel."""
+
+    def __init__(self, maxsize: int = None, webhook_url: str = None):
+        """
+        Initialize the AlertQueue.
+
+        Args:
+            maxsize: Events retained for polling consumers (default: from config)
+            webhook_url: URL receiving each event as a JSON POST (default: from config)
+        """
+        self.events: queue.Queue = queue.Queue(maxsize=maxsize or config.ALERT_QUEUE_SIZE)
+        self.webhook_url = config.ALERT_WEBHOOK_URL if webhook_url is None else webhook_url
+        self._webhook = (
+            ThreadPoolExecutor(max_workers=1, thread_name_prefix="alert-webhook")
+            if self.webhook_url else None
+        )
+        self._lock = threading.Lock()
+        self._published = 0
+        self._dropped = 0
+        self._webhook_failures = 0
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Queue an event, dropping the oldest one when full."""
+        while True:
+            try:
+                self.events.put_nowait(event)
+                break
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                    with self._lock:
+                        self._dropped += 1
+                except queue.Empty:
+                    pass
+        with self._lock:
+            self._published += 1
+        if self._webhook is not None:
+            self._webhook.submit(self._post, event)
+
+    def _post(self, event: Dict[str, Any]) -> None:
+        request = urllib.request.Request(
+            self.webhook_url,
+            data=json.dumps(event).encode("utf-8"),
+            headers={"Content-Type": "application/json"},
+            method="POST"
+        )
+        try:
+            with urllib.request.urlopen(request, timeout=config.ALERT_WEBHOOK_TIMEOUT):
+                pass
+        except Exception as e:
+            with self._lock:
+                self._webhook_failures += 1
+            logger.warning(f"Alert webhook delivery failed: {str(e)}")
+
+    def drain(self, max_events: int = 100, timeout: float = 0.0) -> List[Dict[str, Any]]:
+        """
+        Take up to max_events queued events.
+
+        Args:
+            max_events: Maximum number of events returned
+            timeout: Seconds to wait for the first event
+
+        Returns:
+            Events, oldest first
+        """
+        events = []
+        try:
+            events.append(self.events.get(timeout=timeout) if timeout else self.events.get_nowait())
+            while len(events) < max_events:
+                events.append(self.events.get_nowait())
+        except queue.Empty:
+            pass
+        return events
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "queued": self.events.qsize(),
+                "published": self._published,
+                "dropped": self._dropped,
+                "webhook": bool(self.webhook_url),
+                "webhook_failures": self._webhook_failures,
+            }
+
+
+class AlertEngine:
+    """Stores alert rules and evaluates them against quotes and bars."""
+
+    def __init__(self, delivery: AlertQueue = None, poll_seconds: float = None):
+        """
+        Initialize the AlertEngine.
+
+        Args:
+            delivery: Queue receiving fired alerts (default: a new AlertQueue)
+            poll_seconds: Seconds between upstream polls (default: from config)
+        """
+        self.delivery = delivery or AlertQueue()
+        self.poll_seconds = poll_seconds or config.ALERT_POLL_SECONDS
+        self._rules: Dict[int, AlertRule] = {}
+        self._indexes: Dict[Tuple[str, str, str], ThresholdIndex] = {}
+        self._per_ticker: Dict[str, int] = defaultdict(int)
+        self._last: Dict[Tuple[str, str], float] = {}
+        self._last_bar: Dict[str, Any] = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fired = 0
+        self._evaluations = 0
+        self._polls = 0
+
+    def add_rule(
+        self,
+        ticker: str,
+        kind: str = "threshold",
+        direction: str = None,
+        level: float = None,
+        percent: float = None,
+        indicator: str = None,
+        reference: float = None,
+        note: str = ""
+    ) -> AlertRule:
+        """
+        Add a rule.
+
+        Price rules are only fired by moves after their creation: the
+        current quote is observed before the rule is indexed, so the
+        comparison never starts from an older price.
+
+        Args:
+            ticker: Ticker symbol
+            kind: 'threshold', 'percent_change' or 'indicator'
+            direction: 'above' or 'below' (threshold and indicator rules)
+            level: Price or indicator level (threshold and indicator rules)
+            percent: Signed change in percent (percent_change rules)
+            indicator: One of INDICATORS (indicator rules)
+            reference: Base price for percent_change (default: current quote)
+            note: Free text returned with the alert
+
+        Returns:
+            The stored rule
+        """
+        ticker = ticker.strip().upper()
+        if kind not in RULE_KINDS:
+            raise AlertError(f"Unsupported alert kind: {kind}")
+        series = PRICE if kind != "indicator" else indicator
+        if kind == "percent_change":
+            if percent is None or float(percent) == 0:
+                raise AlertError("percent_change rules need a non-zero percent")
+            direction = "above" if percent > 0 else "below"
+        elif level is None:
+            raise AlertError("level is required")
+        elif kind == "indicator" and indicator not in INDICATORS:
+            raise AlertError(f"Unsupported indicator: {indicator}")
+        if direction not in DIRECTIONS:
+            raise AlertError(f"direction must be one of {', '.join(DIRECTIONS)}")
+
+        current = self.quote(ticker) if series == PRICE else None
+        if kind == "percent_change":
+            if reference is None:
+                reference = current
+            if not reference or reference <= 0:
+                raise AlertError(f"No reference price for {ticker}")
+            level = float(reference) * (1 + float(percent) / 100)
+        level = float(level)
+        if not math.isfinite(level):
+            # NaN would break the sort order of the level index
+            raise AlertError("level must be a finite number")
+        if current:
+            self.on_quote(ticker, current)
+
+        with self._lock:
+            if len(self._rules) >= config.ALERT_MAX_RULES:
+                raise AlertError("Too many alert rules")
+            rule = AlertRule(
+                next(self._ids), ticker, kind, series, direction, level, reference, note
+            )
+            self._rules[rule.id] = rule
+            self._per_ticker[ticker] += 1
+            index = self._indexes.get(rule.index_key)
+            if index is None:
+                index = self._indexes[rule.index_key] = ThresholdIndex(direction)
+            index.add(rule.level, rule.id)
+        return rule
+
+    def _forget(self, rule: AlertRule) -> None:
+        """
+        Drop a rule from the registry (caller holds the lock).
+
+        Once no rule watches a series it is no longer polled, so its last
+        value is dropped too; a later rule must not compare against it.
+        """
+        del self._rules[rule.id]
+        self._per_ticker[rule.ticker] -= 1
+        if not self._per_ticker[rule.ticker]:
+            del self._per_ticker[rule.ticker]
+        if not any(self._indexes.get((rule.ticker, rule.series, d)) for d in DIRECTIONS):
+            self._last.pop((rule.ticker, rule.series), None)
+            if rule.series != PRICE:
+                self._last_bar.pop(rule.ticker, None)
+
+    def remove_rule(self, rule_id: int) -> bool:
+        """Delete a rule that has not fired yet."""
+        with self._lock:
+            rule = self._rules.get(rule_id)
+            if rule is None:
+                return False
+            self._indexes[rule.index_key].remove(rule.level, rule.id)
+            self._forget(rule)
+            return True
+
+    def rules(self, ticker: str = None) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                rule.to_dict() for rule in self._rules.values()
+                if ticker is None or rule.ticker == ticker
+            ]
+
+    def tickers(self) -> List[str]:
+        with self._lock:
+            return list(self._per_ticker)
+
+    def _observe(self, ticker: str, series: str, value: float) -> List[Dict[str, Any]]:
+        """Record a new value and fire the rules it crossed."""
+        events = []
+        now = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._evaluations += 1
+            previous = self._last.get((ticker, series))
+            self._last[(ticker, series)] = value
+            if previous is None or previous == value:
+                return events
+            for direction in DIRECTIONS:
+                index = self._indexes.get((ticker, series, direction))
+                if not index:
+                    continue
+                for rule_id in index.pop_crossed(previous, value):
+                    rule = self._rules[rule_id]
+                    self._forget(rule)
+                    event = rule.to_dict()
+                    event.update({"previous": previous, "value": value, "triggered_at": now})
+                    events.append(event)
+            self._fired += len(events)
+        for event in events:
+            self.delivery.publish(event)
+        return events
+
+    def on_quote(self, ticker: str, price: float) -> List[Dict[str, Any]]:
+        """
+        Evaluate price rules against a new quote.
+
+        Args:
+            ticker: Ticker symbol
+            price: Latest price
+
+        Returns:
+            Fired alert events
+        """
+        if price is None:
+            return []
+        return self._observe(ticker.upper(), PRICE, float(price))
+
+    def on_statistics(self, ticker: str, statistics: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """
+        Evaluate indicator rules against freshly computed statistics.
+
+        Args:
+            ticker: Ticker symbol
+            statistics: Raw statistics of FinancialAnalyzer.calculate_statistics
+
+        Returns:
+            Fired alert events
+        """
+        ticker = ticker.upper()
+        watched = self._watched_indicators(ticker)
+        events = []
+        for indicator in watched:
+            value = statistics.get(indicator)
+            if value is not None:
+                events.extend(self._observe(ticker, indicator, float(value)))
+        return events
+
+    def _watched_indicators(self, ticker: str) -> List[str]:
+        """Indicators of a ticker that have at least one pending rule."""
+        with self._lock:
+            return [
+                indicator for indicator in INDICATORS
+                if any(self._indexes.get((ticker, indicator, d)) for d in DIRECTIONS)
+            ]
+
+    def quote(self, ticker: str) -> Optional[float]:
+        """Current price through the fetcher's cached quote path."""
+        ticker_obj = data_fetcher.fetch_data(ticker)
+        return data_fetcher.get_current_price(ticker_obj) if ticker_obj else None
+
+    def poll_once(self) -> List[Dict[str, Any]]:
+        """
+        Poll every ticker with active rules once and evaluate its rules.
+
+        One quote serves all price rules of a ticker; indicator rules are
+        evaluated when a new bar arrives.
+
+        Returns:
+            Fired alert events
+        """
+        events = []
+        for ticker in self.tickers():
+            try:
+                ticker_obj = data_fetcher.fetch_data(ticker)
+                if not ticker_obj:
+                    continue
+                events.extend(self.on_quote(ticker, data_fetcher.get_current_price(ticker_obj)))
+                if not self._watched_indicators(ticker):
+                    continue
+                history = data_fetcher.get_historical_data(ticker_obj)
+                if history is None or history.empty or self._last_bar.get(ticker) == history.index[-1]:
+                    continue
+                self._last_bar[ticker] = history.index[-1]
+                events.extend(self.on_statistics(ticker, analyzer.calculate_statistics(history)))
+            except Exception as e:
+                logger.error(f"Alert poll failed for {ticker}: {str(e)}")
+        with self._lock:
+            self._polls += 1
+        return events
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stop.is_set()
+
+    def start(self) -> bool:
+        """Start the polling thread (no-op if already running)."""
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._thread = threading.Thread(target=self._run, name="alert-poller", daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.poll_seconds):
+            self.poll_once()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return rule, evaluation and delivery counters.
+
+        Returns:
+            Dictionary suitable for a monitoring endpoint
+        """
+        with self._lock:
+            state = {
+                "running": self.running,
+                "rules": len(self._rules),
+                "tickers": len(self._per_ticker),
+                "indexes": len(self._indexes),
+                "evaluations": self._evaluations,
+                "fired": self._fired,
+                "polls": self._polls,
+            }
+        state["delivery"] = self.delivery.stats()
+        return state
+
+
+# Create a global instance
+alert_engine = AlertEngine()
@@ -8,6 +8,7 @@ import pandas as pd
 import numpy as np
 
 from src.utils import format_currency, format_percentage, format_number
+from src.shared_arrays import resolve
 
 # Set up logger
 logger = logging.getLogger(__name__)
@@ -30,13 +31,15 @@ class FinancialAnalyzer:
         Calculate key financial statistics from historical data.
         
         Args:
-            historical_data: DataFrame with historical price data
+            historical_data: DataFrame with historical price data, a
+                CompactHistory or a shared-memory HistoryDescriptor
             current_price: Current price (optional, will use latest if not provided)
             currency: Currency symbol for formatting
             
         Returns:
             Dictionary with calculated statistics
         """
+        historical_data = resolve(historical_data)
         if historical_data is None or historical_data.empty:
             self.logger.warning("No historical data provided")
             return self._empty_statistics()
@@ -68,7 +71,7 @@ class FinancialAnalyzer:
             avg_30d = float(prices.tail(30).mean()) if len(prices) >= 30 else None
             avg_90d = float(prices.tail(90).mean()) if len(prices) >= 90 else None
             
-            statistics = {
+            statistics = self.format_statistics({
                 "current_price": current,
                 "high_52w": high_52w,
                 "low_52w": low_52w,
@@ -79,20 +82,7 @@ class FinancialAnalyzer:
                 "avg_30d": avg_30d,
                 "avg_90d": avg_90d,
                 "data_points": len(prices),
-                "currency": currency,
-                # Formatted versions for display
-                "formatted": {
-                    "current_price": format_currency(current, currency),
-                    "high_52w": format_currency(high_52w, currency),
-                    "low_52w": format_currency(low_52w, currency),
-                    "average_price": format_currency(avg_price, currency),
-                    "price_change": format_currency(price_change, currency),
-                    "price_change_pct": format_percentage(price_change_pct),
-                    "volatility": format_percentage(volatility),
-                    "avg_30d": format_currency(avg_30d, currency) if avg_30d else "N/A",
-                    "avg_90d": format_currency(avg_90d, currency) if avg_90d else "N/A",
-                }
-            }
+            }, currency)
             
             self.logger.info("Statistics calculated successfully")
             return statistics
@@ -101,6 +91,72 @@ class FinancialAnalyzer:
             self.logger.error(f"Error calculating statistics: {str(e)}")
             return self._empty_statistics()
     
+    def format_statistics(self, values: Dict[str, Any], currency: str = "USD") -> Dict[str, Any]:
+        """
+        Add currency and display-formatted fields to raw statistics.
+        
+        Args:
+            values: Raw statistics as computed by calculate_statistics
+            currency: Currency symbol for formatting
+            
+        Returns:
+            Dictionary with calculated and formatted statistics
+        """
+        avg_30d = values.get("avg_30d")
+        avg_90d = values.get("avg_90d")
+        return {
+            **values,
+            "currency": currency,
+            # Formatted versions for display
+            "formatted": {
+                "current_price": format_currency(values["current_price"], currency),
+                "high_52w": format_currency(values["high_52w"], currency),
+                "low_52w": format_currency(values["low_52w"], currency),
+                "average_price": format_currency(values["average_price"], currency),
+                "price_change": format_currency(values["price_change"], currency),
+                "price_change_pct": format_percentage(values["price_change_pct"]),
+                "volatility": format_percentage(values["volatility"]),
+                "avg_30d": format_currency(avg_30d, currency) if avg_30d else "N/A",
+                "avg_90d": format_currency(avg_90d, currency) if avg_90d else "N/A",
+            }
+        }
+    
+    def with_current_price(
+        self,
+        statistics: Dict[str, Any],
+        current_price: Optional[float] = None,
+        currency: str = "USD"
+    ) -> Dict[str, Any]:
+        """
+        Re-base statistics computed against the last close on a live price.
+        
+        Only the current price and the change since the first bar depend on
+        the live price, so statistics can be cached per bar and re-based
+        per request.
+        
+        Args:
+            statistics: Raw or formatted statistics computed without a current price
+            current_price: Current price (optional, keeps the last close if not provided)
+            currency: Currency symbol for formatting
+            
+        Returns:
+            Dictionary with calculated and formatted statistics
+        """
+        if not statistics or statistics.get("current_price") is None:
+            return statistics
+        values = {
+            key: value for key, value in statistics.items()
+            if key not in ("currency", "formatted")
+        }
+        if current_price:
+            first_price = values["current_price"] - values["price_change"]
+            values["current_price"] = float(current_price)
+            values["price_change"] = values["current_price"] - first_price
+            values["price_change_pct"] = (
+                values["price_change"] / first_price if first_price > 0 else 0
+            )
+        return self.format_statistics(values, currency)
+    
     def _empty_statistics(self) -> Dict[str, Any]:
         """Return empty statistics dictionary."""
         return {
@@ -133,11 +189,13 @@ class FinancialAnalyzer:
         Prepare data for Plotly chart visualization.
         
         Args:
-            historical_data: DataFrame with historical price data
+            historical_data: DataFrame with historical price data, a
+                CompactHistory or a shared-memory HistoryDescriptor
             
         Returns:
             Dictionary with chart-ready data
         """
+        historical_data = resolve(historical_data)
         if historical_data is None or historical_data.empty:
             return {"dates": [], "prices": [], "volume": []}
         
@@ -0,0 +1,315 @@
+"""
+Vectorized portfolio backtesting.
+
+Prices are a (bars x tickers) matrix and signals a matrix of the same
+shape holding target exposures. Positions, returns, drawdowns and
+turnover are computed with whole-array NumPy operations (no per-bar
+Python loop). Parameter sweeps are spread across processes, which read
+large price matrices from shared memory instead of unpickling a copy.
+"""
+
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.config import config
+from src.shared_arrays import ArrayDescriptor, SharedArrayRegistry, resolve
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+PERIODS_PER_YEAR = 252
+
+
+class BacktestError(ValueError):
+    """Raised when a backtest cannot be run with the given inputs."""
+
+
+def price_panel(histories: Dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """
+    Build an aligned close-price panel from per-ticker histories.
+
+    Args:
+        histories: Mapping of ticker to DataFrame with a 'Close' column
+
+    Returns:
+        DataFrame (dates x tickers), forward-filled over missing bars
+    """
+    closes = {
+        ticker: history["Close"]
+        for ticker, history in histories.items()
+        if history is not None and not history.empty and "Close" in history.columns
+    }
+    if not closes:
+        raise BacktestError("No price histories")
+    return pd.concat(closes, axis=1).sort_index().ffill()
+
+
+def moving_average(prices: np.ndarray, window: int) -> np.ndarray:
+    """
+    Simple moving average along the time axis using cumulative sums.
+
+    Args:
+        prices: Array of shape (bars, tickers)
+        window: Window length in bars
+
+    Returns:
+        Array of the same shape, NaN wherever the window holds a missing
+        price (the first window-1 bars, and bars before a late listing)
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    result = np.full(prices.shape, np.nan)
+    if window < 1 or window > prices.shape[0]:
+        return result
+    valid = np.isfinite(prices)
+    padding = np.zeros((1,) + prices.shape[1:])
+    cumulative = np.vstack([padding, np.cumsum(np.where(valid, prices, 0.0), axis=0)])
+    counts = np.vstack([padding, np.cumsum(valid, axis=0)])
+    sums = cumulative[window:] - cumulative[:-window]
+    full = (counts[window:] - counts[:-window]) == window
+    result[window - 1:] = np.where(full, sums / window, np.nan)
+    return result
+
+
+def ma_crossover_signals(prices: np.ndarray, fast: int, slow: int) -> np.ndarray:
+    """
+    Long when the fast moving average is above the slow one, else flat.
+
+    Args:
+        prices: Array of shape (bars, tickers)
+        fast: Fast window length
+        slow: Slow window length
+
+    Returns:
+        Array of 0/1 exposures with the same shape as prices
+    """
+    if fast >= slow:
+        raise BacktestError("fast window must be shorter than slow window")
+    with np.errstate(invalid="ignore"):
+        return (moving_average(prices, fast) > moving_average(prices, slow)).astype(np.float64)
+
+
+def equal_weight_signals(prices: np.ndarray) -> np.ndarray:
+    """Constant exposure to every ticker that has a price."""
+    return np.isfinite(np.asarray(prices, dtype=np.float64)).astype(np.float64)
+
+
+def normalize_weights(signals: np.ndarray) -> np.ndarray:
+    """
+    Scale each bar's exposures so gross exposure is at most 100%.
+
+    Args:
+        signals: Array of shape (bars, tickers)
+
+    Returns:
+        Weights with sum(|w|) <= 1 per bar
+    """
+    signals = np.nan_to_num(np.asarray(signals, dtype=np.float64))
+    gross = np.abs(signals).sum(axis=1, keepdims=True)
+    return signals / np.maximum(gross, 1.0)
+
+
+def _asset_returns(prices: np.ndarray) -> np.ndarray:
+    """Per-bar simple returns, 0 for the first bar and missing prices."""
+    prices = np.asarray(prices, dtype=np.float64)
+    returns = np.zeros(prices.shape)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        returns[1:] = prices[1:] / prices[:-1] - 1.0
+    returns[~np.isfinite(returns)] = 0.0
+    return returns
+
+
+def run_backtest(
+    prices: np.ndarray,
+    signals: np.ndarray,
+    cost_bps: float = 0.0,
+    rebalance_every: Optional[int] = None,
+    normalize: bool = True
+) -> Dict[str, np.ndarray]:
+    """
+    Simulate a portfolio following target exposures.
+
+    Signals observed at the close of bar t are traded at that close and
+    earn the return of bar t+1. With rebalance_every=None, weights are
+    reset to target every bar. Otherwise targets are applied every N bars
+    and holdings drift with prices in between.
+
+    Args:
+        prices: Array of shape (bars, tickers)
+        signals: Target exposures, same shape as prices
+        cost_bps: Transaction cost in basis points of traded notional
+        rebalance_every: Bars between rebalances (default: every bar)
+        normalize: Scale exposures so gross exposure is at most 100%
+
+    Returns:
+        Dictionary with 'positions', 'returns', 'equity', 'drawdown' and
+        'turnover' arrays
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    signals = np.asarray(signals, dtype=np.float64)
+    if prices.ndim != 2 or prices.shape != signals.shape:
+        raise BacktestError("prices and signals must be 2-D arrays of the same shape")
+    if rebalance_every is not None and rebalance_every < 1:
+        raise BacktestError("rebalance_every must be positive")
+
+    targets = normalize_weights(signals) if normalize else np.nan_to_num(signals)
+    returns = _asset_returns(prices)
+    bars = prices.shape[0]
+
+    # Weights held during bar t were decided at the close of bar t-1
+    positions = np.zeros_like(targets)
+    positions[1:] = targets[:-1]
+    cost = cost_bps / 10000.0
+
+    if rebalance_every is None or rebalance_every == 1:
+        portfolio_returns = (positions * returns).sum(axis=1)
+        # Holdings drift during a bar before being reset to target
+        growth = 1.0 + portfolio_returns
+        drifted = positions * (1.0 + returns) / np.where(growth == 0, 1.0, growth)[:, None]
+        prior = np.vstack([np.zeros((1, positions.shape[1])), drifted[:-1]])
+        turnover = np.abs(positions - prior).sum(axis=1)
+    else:
+        # Blocks start at bar 1 (first tradable bar) and every N bars after
+        block_start = ((np.arange(bars) - 1) // rebalance_every) * rebalance_every + 1
+        block_start[0] = 0
+        block_weights = positions[block_start]
+        with np.errstate(divide="ignore"):
+            log_growth = np.cumsum(np.log1p(returns), axis=0)
+        previous = np.vstack([np.zeros((1, returns.shape[1])), log_growth[:-1]])
+        growth = np.exp(log_growth - previous[block_start])
+        cash = 1.0 - block_weights.sum(axis=1)
+        value = (block_weights * growth).sum(axis=1) + cash
+        is_start = block_start == np.arange(bars)
+        value_before = np.ones(bars)
+        value_before[~is_start] = value[np.flatnonzero(~is_start) - 1]
+        portfolio_returns = value / value_before - 1.0
+        # Trades only happen at block starts, against drifted holdings
+        drifted = block_weights * growth / np.where(value == 0, 1.0, value)[:, None]
+        prior = np.vstack([np.zeros((1, positions.shape[1])), drifted[:-1]])
+        turnover = np.where(is_start, np.abs(positions - prior).sum(axis=1), 0.0)
+
+    net_returns = portfolio_returns - turnover * cost
+    equity = np.cumprod(1.0 + net_returns)
+    drawdown = equity / np.maximum.accumulate(equity) - 1.0
+    return {
+        "positions": positions,
+        "returns": net_returns,
+        "equity": equity,
+        "drawdown": drawdown,
+        "turnover": turnover,
+    }
+
+
+def summarize(
+    result: Dict[str, np.ndarray],
+    periods_per_year: int = PERIODS_PER_YEAR
+) -> Dict[str, float]:
+    """
+    Summary statistics of a backtest result.
+
+    Args:
+        result: Output of run_backtest
+        periods_per_year: Bars per year for annualization
+
+    Returns:
+        Dictionary of total/annual return, volatility, Sharpe ratio,
+        max drawdown and average turnover
+    """
+    returns = result["returns"][1:]
+    bars = max(len(returns), 1)
+    total_return = float(result["equity"][-1] - 1.0)
+    annual_return = float((1.0 + total_return) ** (periods_per_year / bars) - 1.0) \
+        if total_return > -1.0 else -1.0
+    volatility = float(returns.std(ddof=1) * np.sqrt(periods_per_year)) if len(returns) > 1 else 0.0
+    sharpe = float(returns.mean() / returns.std(ddof=1) * np.sqrt(periods_per_year)) \
+        if len(returns) > 1 and returns.std(ddof=1) > 0 else 0.0
+    return {
+        "total_return": total_return,
+        "annual_return": annual_return,
+        "annual_volatility": volatility,
+        "sharpe": sharpe,
+        "max_drawdown": float(result["drawdown"].min()),
+        "avg_turnover": float(result["turnover"].mean()),
+    }
+
+
+def _sweep_chunk(
+    prices: Union[np.ndarray, ArrayDescriptor],
+    params: List[Tuple[int, int]],
+    cost_bps: float,
+    rebalance_every: Optional[int]
+) -> List[Dict[str, Any]]:
+    """Run MA crossover backtests for a chunk of (fast, slow) pairs."""
+    prices = resolve(prices)
+    averages = {}
+    rows = []
+    for fast, slow in params:
+        for window in (fast, slow):
+            if window not in averages:
+                averages[window] = moving_average(prices, window)
+        with np.errstate(invalid="ignore"):
+            signals = (averages[fast] > averages[slow]).astype(np.float64)
+        stats = summarize(run_backtest(prices, signals, cost_bps, rebalance_every))
+        rows.append({"fast": fast, "slow": slow, **stats})
+    return rows
+
+
+def parameter_sweep(
+    prices: np.ndarray,
+    fast_windows: Iterable[int],
+    slow_windows: Iterable[int],
+    cost_bps: float = 0.0,
+    rebalance_every: Optional[int] = None,
+    max_workers: Optional[int] = None
+) -> pd.DataFrame:
+    """
+    Backtest an MA crossover over a grid of window pairs in parallel.
+
+    The grid is split into one chunk per worker process so each worker
+    reuses moving averages shared by its pairs. Prices of at least
+    SHARED_MEMORY_MIN_BYTES are published once to shared memory and
+    workers receive only a descriptor.
+
+    Args:
+        prices: Array of shape (bars, tickers)
+        fast_windows: Candidate fast windows
+        slow_windows: Candidate slow windows
+        cost_bps: Transaction cost in basis points
+        rebalance_every: Bars between rebalances (default: every bar)
+        max_workers: Worker processes (default: CPU count; 1 runs in-process)
+
+    Returns:
+        DataFrame with one row per (fast, slow) pair, sorted by Sharpe ratio
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    grid = [(f, s) for f in sorted(set(fast_windows)) for s in sorted(set(slow_windows)) if f < s]
+    if not grid:
+        raise BacktestError("Parameter grid is empty")
+
+    max_workers = max(1, min(max_workers or os.cpu_count() or 1, len(grid)))
+    if max_workers == 1:
+        rows = _sweep_chunk(prices, grid, cost_bps, rebalance_every)
+    else:
+        # Contiguous slices of the (fast-sorted) grid share moving averages
+        bounds = np.linspace(0, len(grid), max_workers + 1).astype(int)
+        chunks = [grid[start:end] for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+        with SharedArrayRegistry() as registry:
+            shared = prices
+            if prices.nbytes >= config.SHARED_MEMORY_MIN_BYTES:
+                try:
+                    shared = registry.publish(prices)
+                except OSError as e:
+                    logger.warning(f"Shared memory unavailable, pickling prices: {str(e)}")
+            with ProcessPoolExecutor(max_workers=max_workers) as executor:
+                futures = [
+                    executor.submit(_sweep_chunk, shared, chunk, cost_bps, rebalance_every)
+                    for chunk in chunks
+                ]
+                rows = [row for future in futures for row in future.result()]
+
+    return pd.DataFrame(rows).sort_values("sharpe", ascending=False, kind="stable") \
+        .reset_index(drop=True)
@@ -0,0 +1,335 @@
+"""
+Batch and watch processing for analyzing many tickers in one process.
+Used by the console application's non-interactive modes.
+"""
+
+import csv
+import json
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, Iterator, List, Optional, TextIO, Callable
+
+import pandas as pd
+
+from src.config import config
+from src.data_fetcher import data_fetcher
+from src.analyzer import analyzer
+from src.utils import validate_ticker
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Columns emitted for every ticker, in output order
+SUMMARY_FIELDS = [
+    "ticker",
+    "status",
+    "name",
+    "currency",
+    "current_price",
+    "high_52w",
+    "low_52w",
+    "average_price",
+    "avg_30d",
+    "avg_90d",
+    "price_change",
+    "price_change_pct",
+    "volatility",
+    "data_points",
+    "last_bar",
+    "error",
+]
+
+OUTPUT_FORMATS = ("csv", "jsonl")
+
+
+def parse_tickers(lines: Iterable[str]) -> List[str]:
+    """
+    Parse ticker symbols from lines of text.
+
+    Symbols may be separated by whitespace or commas. Blank lines and
+    lines starting with '#' are ignored, duplicates are dropped.
+
+    Args:
+        lines: Iterable of text lines (e.g. argv, stdin or a file)
+
+    Returns:
+        List of upper-cased ticker symbols in first-seen order
+    """
+    tickers = []
+    seen = set()
+    for line in lines:
+        line = line.split("#", 1)[0]
+        for token in line.replace(",", " ").split():
+            ticker = token.strip().upper()
+            if not ticker or ticker in seen:
+                continue
+            seen.add(ticker)
+            tickers.append(ticker)
+    return tickers
+
+
+def _summary_row(
+    ticker: str,
+    company_info: Optional[Dict[str, Any]] = None,
+    stats: Optional[Dict[str, Any]] = None,
+    historical_data: Optional[pd.DataFrame] = None,
+    error: Optional[str] = None
+) -> Dict[str, Any]:
+    """Flatten analysis results into a single output row."""
+    row = {field: None for field in SUMMARY_FIELDS}
+    row["ticker"] = ticker
+    row["status"] = "error" if error else "ok"
+    row["error"] = error
+    if company_info:
+        row["name"] = company_info.get("name")
+        row["currency"] = company_info.get("currency")
+    if stats:
+        for field in SUMMARY_FIELDS:
+            if field in stats and field != "currency":
+                row[field] = stats[field]
+    if historical_data is not None and not historical_data.empty:
+        row["last_bar"] = historical_data.index[-1].isoformat()
+    return row
+
+
+def analyze_ticker(
+    ticker: str,
+    period: str = None,
+    interval: str = None
+) -> Dict[str, Any]:
+    """
+    Fetch and analyze one ticker, returning a flat summary row.
+
+    Errors are reported in the row instead of being raised so that one
+    bad symbol does not abort a whole batch.
+
+    Args:
+        ticker: Stock or cryptocurrency ticker symbol
+        period: Period of historical data (default: from config)
+        interval: Data interval (default: from config)
+
+    Returns:
+        Dictionary keyed by SUMMARY_FIELDS
+    """
+    if not validate_ticker(ticker):
+        return _summary_row(ticker, error="invalid ticker symbol")
+
+    ticker_obj = data_fetcher.fetch_data(ticker, period, interval)
+    if not ticker_obj:
+        return _summary_row(ticker, error="failed to fetch data")
+
+    company_info = data_fetcher.get_company_info(ticker_obj)
+    current_price = data_fetcher.get_current_price(ticker_obj)
+    historical_data = data_fetcher.get_historical_data(ticker_obj, period, interval)
+    if historical_data is None or historical_data.empty:
+        return _summary_row(ticker, company_info, error="failed to fetch historical data")
+
+    stats = analyzer.calculate_statistics(
+        historical_data,
+        current_price,
+        company_info.get("currency", "USD")
+    )
+    return _summary_row(ticker, company_info, stats, historical_data)
+
+
+def run_batch(
+    tickers: List[str],
+    period: str = None,
+    interval: str = None,
+    max_workers: int = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze many tickers concurrently in this process.
+
+    Work is I/O bound (upstream requests), so a thread pool is used.
+    Rows are yielded in input order as soon as they are available.
+
+    Args:
+        tickers: Ticker symbols to analyze
+        period: Period of historical data (default: from config)
+        interval: Data interval (default: from config)
+        max_workers: Number of concurrent workers (default: from config)
+
+    Yields:
+        Summary row per ticker
+    """
+    max_workers = max(1, max_workers or config.BATCH_MAX_WORKERS)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        yield from executor.map(
+            lambda ticker: analyze_ticker(ticker, period, interval),
+            tickers
+        )
+
+
+class RowWriter:
+    """Write summary rows to a text stream as CSV or JSON Lines."""
+
+    def __init__(self, stream: TextIO, fmt: str = "csv", fieldnames: List[str] = None):
+        """
+        Initialize the RowWriter.
+
+        Args:
+            stream: Text stream to write to
+            fmt: Output format, one of OUTPUT_FORMATS
+            fieldnames: CSV columns (default: SUMMARY_FIELDS)
+        """
+        if fmt not in OUTPUT_FORMATS:
+            raise ValueError(f"Unsupported output format: {fmt}")
+        self.stream = stream
+        self.fmt = fmt
+        self.fieldnames = list(fieldnames or SUMMARY_FIELDS)
+        self._csv_writer = None
+
+    def write(self, row: Dict[str, Any]) -> None:
+        """Write a single row and flush so consumers see it immediately."""
+        if self.fmt == "jsonl":
+            self.stream.write(json.dumps(row, default=str) + "\n")
+        else:
+            if self._csv_writer is None:
+                self._csv_writer = csv.DictWriter(
+                    self.stream,
+                    fieldnames=self.fieldnames,
+                    extrasaction="ignore"
+                )
+                self._csv_writer.writeheader()
+            self._csv_writer.writerow(row)
+        self.stream.flush()
+
+
+class TickerWatcher:
+    """
+    Periodically refresh a fixed set of tickers.
+
+    The full history is fetched once per ticker; later refreshes only
+    request a short tail window and merge new bars into the cached
+    history before statistics are recomputed.
+    """
+
+    def __init__(
+        self,
+        tickers: List[str],
+        period: str = None,
+        interval: str = None,
+        refresh_period: str = None,
+        max_workers: int = None
+    ):
+        """
+        Initialize the TickerWatcher.
+
+        Args:
+            tickers: Ticker symbols to watch
+            period: Period of the initial history (default: from config)
+            interval: Data interval (default: from config)
+            refresh_period: Tail window fetched on refresh (default: from config)
+            max_workers: Number of concurrent workers (default: from config)
+        """
+        self.tickers = tickers
+        self.period = period or config.DEFAULT_PERIOD
+        self.interval = interval or config.DEFAULT_INTERVAL
+        self.refresh_period = refresh_period or config.WATCH_REFRESH_PERIOD
+        self.max_workers = max(1, max_workers or config.BATCH_MAX_WORKERS)
+        self._ticker_objs: Dict[str, Any] = {}
+        self._company_info: Dict[str, Dict[str, Any]] = {}
+        self._history: Dict[str, pd.DataFrame] = {}
+        self._window: Dict[str, pd.Timedelta] = {}
+
+    @staticmethod
+    def merge_history(
+        cached: pd.DataFrame,
+        update: pd.DataFrame,
+        window: Optional[pd.Timedelta] = None
+    ) -> pd.DataFrame:
+        """
+        Merge freshly fetched bars into a cached history.
+
+        Bars present in both frames are taken from the update (the last bar
+        of a running session changes until it closes). When a window is
+        given, bars older than the newest bar minus the window are dropped.
+
+        Args:
+            cached: Previously fetched history
+            update: Recently fetched tail of the history
+            window: Time span to keep (optional)
+
+        Returns:
+            Merged DataFrame sorted by index
+        """
+        if update is None or update.empty:
+            return cached
+        first_new = update.index[0]
+        merged = pd.concat([cached[cached.index < first_new], update])
+        if window is not None:
+            merged = merged[merged.index >= merged.index[-1] - window]
+        return merged
+
+    def _refresh_one(self, ticker: str) -> Dict[str, Any]:
+        """Refresh a single ticker and return its summary row."""
+        ticker_obj = self._ticker_objs.get(ticker)
+        if ticker_obj is None:
+            if not validate_ticker(ticker):
+                return _summary_row(ticker, error="invalid ticker symbol")
+            ticker_obj = data_fetcher.fetch_data(ticker, self.period, self.interval)
+            if not ticker_obj:
+                return _summary_row(ticker, error="failed to fetch data")
+            self._ticker_objs[ticker] = ticker_obj
+            self._company_info[ticker] = data_fetcher.get_company_info(ticker_obj)
+
+        company_info = self._company_info[ticker]
+        cached = self._history.get(ticker)
+        if cached is None:
+            history = data_fetcher.get_historical_data(ticker_obj, self.period, self.interval)
+            if history is not None and not history.empty:
+                self._window[ticker] = history.index[-1] - history.index[0]
+        else:
+            # The cached history would repeat the same tail until its TTL expires
+            update = data_fetcher.get_recent_bars(
+                ticker_obj, self.refresh_period, self.interval
+            )
+            history = self.merge_history(cached, update, self._window.get(ticker))
+
+        if history is None or history.empty:
+            return _summary_row(ticker, company_info, error="failed to fetch historical data")
+        self._history[ticker] = history
+
+        # The latest bar is the freshest price we have; Ticker.info is cached
+        stats = analyzer.calculate_statistics(
+            history,
+            None,
+            company_info.get("currency", "USD")
+        )
+        return _summary_row(ticker, company_info, stats, history)
+
+    def refresh(self) -> List[Dict[str, Any]]:
+        """
+        Refresh all watched tickers concurrently.
+
+        Returns:
+            Summary rows in ticker order
+        """
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(self._refresh_one, self.tickers))
+
+    def run(
+        self,
+        every: float,
+        on_rows: Callable[[List[Dict[str, Any]]], None],
+        iterations: Optional[int] = None
+    ) -> None:
+        """
+        Refresh on a fixed interval until interrupted.
+
+        Args:
+            every: Seconds between the start of consecutive refreshes
+            on_rows: Callback receiving the rows of each refresh
+            iterations: Stop after this many refreshes (default: run forever)
+        """
+        count = 0
+        while iterations is None or count < iterations:
+            started = time.monotonic()
+            on_rows(self.refresh())
+            count += 1
+            if iterations is not None and count >= iterations:
+                break
+            elapsed = time.monotonic() - started
+            time.sleep(max(0.0, every - elapsed))
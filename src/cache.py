@@ -0,0 +1,448 @@
+"""
+Cache backends shared by the fetcher, analyzer and forecasting.
+
+Two tiers are provided:
+  - MemoryCache: per-process LRU cache
+  - SQLiteCache: a file-backed store shared by all worker processes on
+    the same host, with cross-process locks so only one worker refreshes
+    a given key
+
+Entries have per-entry TTLs and are kept for a grace period after they
+expire so callers can fall back to stale data when upstream is down.
+"""
+
+import logging
+import os
+import pickle
+import sqlite3
+import threading
+import time
+import uuid
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from src.config import config
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class CacheEntry:
+    """A cached value together with its expiry time."""
+
+    __slots__ = ("value", "expires_at")
+
+    def __init__(self, value: Any, expires_at: float):
+        self.value = value
+        self.expires_at = expires_at
+
+    @property
+    def is_fresh(self) -> bool:
+        return time.time() < self.expires_at
+
+
+class CacheBackend(ABC):
+    """
+    Base class for cache backends.
+
+    Subclasses implement get_entry, set and delete; the lookup, locking
+    and compute helpers are built on them.
+    """
+
+    @abstractmethod
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        """
+        Look up an entry, fresh or stale.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            CacheEntry or None if the key is unknown
+        """
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        """
+        Store a value.
+
+        Args:
+            key: Cache key
+            value: Picklable value
+            ttl: Seconds until the entry is considered stale
+        """
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        """Remove a key if present."""
+
+    @contextmanager
+    def lock(self, key: str, timeout: float = None) -> Iterator[bool]:
+        """
+        Hold an exclusive lock on a key while refreshing it.
+
+        Args:
+            key: Cache key
+            timeout: Seconds to wait for the lock (default: from config)
+
+        Yields:
+            True if the lock was acquired, False if waiting timed out
+        """
+        yield True
+
+    def contains(self, key: str, fresh: bool = False) -> bool:
+        """Return True if the key is held (fresh only, or also stale), without loading it."""
+        entry = self.get_entry(key)
+        return entry is not None and (not fresh or entry.is_fresh)
+
+    def stats(self) -> Dict[str, Any]:
+        """Return backend statistics for monitoring."""
+        return {"backend": type(self).__name__}
+
+    def get(self, key: str, allow_stale: bool = False) -> Optional[Any]:
+        """
+        Look up a value.
+
+        Args:
+            key: Cache key
+            allow_stale: Also return entries whose TTL has passed
+
+        Returns:
+            Cached value or None
+        """
+        entry = self.get_entry(key)
+        if entry is None or not (allow_stale or entry.is_fresh):
+            return None
+        return entry.value
+
+    def get_or_compute(
+        self,
+        key: str,
+        ttl: float,
+        compute: Callable[[], Any]
+    ) -> Any:
+        """
+        Return a fresh cached value or compute and store it.
+
+        Concurrent callers (threads or processes, depending on the backend)
+        wait for the one holding the key's lock instead of recomputing.
+        None results are not cached.
+
+        Args:
+            key: Cache key
+            ttl: Seconds until the computed value is considered stale
+            compute: Callable producing the value
+
+        Returns:
+            Cached or freshly computed value
+        """
+        value = self.get(key)
+        if value is not None:
+            return value
+        with self.lock(key):
+            value = self.get(key)
+            if value is not None:
+                return value
+            value = compute()
+            if value is not None:
+                self.set(key, value, ttl)
+            return value
+
+
+class NullCache(CacheBackend):
+    """Backend that never stores anything (caching disabled)."""
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        return None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        pass
+
+    def delete(self, key: str) -> None:
+        pass
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-process LRU cache."""
+
+    def __init__(self, max_entries: int = None, stale_seconds: float = None):
+        """
+        Initialize the MemoryCache.
+
+        Args:
+            max_entries: Maximum number of entries (default: from config)
+            stale_seconds: Grace period after expiry (default: from config)
+        """
+        self.max_entries = max_entries or config.CACHE_MAX_ENTRIES
+        self.stale_seconds = config.CACHE_STALE_SECONDS if stale_seconds is None else stale_seconds
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._locks: Dict[str, threading.Lock] = {}
+        self._mutex = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        with self._mutex:
+            entry = self._entries.get(key)
+            if entry is None or time.time() >= entry.expires_at + self.stale_seconds:
+                if entry is not None:
+                    del self._entries[key]
+                self._misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._hits += 1
+            return entry
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._mutex:
+            self._entries[key] = CacheEntry(value, time.time() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                evicted, _ = self._entries.popitem(last=False)
+                self._locks.pop(evicted, None)
+                self._evictions += 1
+
+    def delete(self, key: str) -> None:
+        with self._mutex:
+            self._entries.pop(key, None)
+
+    def contains(self, key: str, fresh: bool = False) -> bool:
+        with self._mutex:
+            entry = self._entries.get(key)
+            grace = 0.0 if fresh else self.stale_seconds
+            return entry is not None and time.time() < entry.expires_at + grace
+
+    @contextmanager
+    def lock(self, key: str, timeout: float = None) -> Iterator[bool]:
+        timeout = config.CACHE_LOCK_TIMEOUT if timeout is None else timeout
+        with self._mutex:
+            key_lock = self._locks.setdefault(key, threading.Lock())
+        acquired = key_lock.acquire(timeout=timeout)
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                key_lock.release()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._mutex:
+            return {
+                "backend": "memory",
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+            }
+
+
+class SQLiteCache(CacheBackend):
+    """
+    Cache stored in a SQLite database shared by all processes on a host.
+
+    Values are pickled. Eviction removes the least recently accessed
+    entries once the entry count or total payload size exceeds its bound.
+    Locks are lease rows, so a crashed worker cannot hold a key forever.
+    """
+
+    def __init__(
+        self,
+        path: str = None,
+        max_entries: int = None,
+        max_bytes: int = None,
+        stale_seconds: float = None
+    ):
+        """
+        Initialize the SQLiteCache.
+
+        Args:
+            path: Database file (default: from config)
+            max_entries: Maximum number of entries (default: from config)
+            max_bytes: Maximum total payload size (default: from config)
+            stale_seconds: Grace period after expiry (default: from config)
+        """
+        self.path = str(path or config.CACHE_PATH)
+        self.max_entries = max_entries or config.CACHE_MAX_ENTRIES
+        self.max_bytes = max_bytes or config.CACHE_MAX_BYTES
+        self.stale_seconds = config.CACHE_STALE_SECONDS if stale_seconds is None else stale_seconds
+        self._owner = f"{os.getpid()}-{uuid.uuid4().hex}"
+        self._local = threading.local()
+        self._hits = 0
+        self._misses = 0
+        Path(self.path).parent.mkdir(parents=True, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY,"
+                " value BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " expires_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL)"
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed_at)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS locks ("
+                " key TEXT PRIMARY KEY,"
+                " owner TEXT NOT NULL,"
+                " expires_at REAL NOT NULL)"
+            )
+
+    def _connection(self) -> sqlite3.Connection:
+        """Return this thread's connection (SQLite connections are not thread-safe)."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None or getattr(self._local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=config.CACHE_LOCK_TIMEOUT)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def get_entry(self, key: str) -> Optional[CacheEntry]:
+        now = time.time()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT value, expires_at FROM entries WHERE key = ? AND expires_at > ?",
+            (key, now - self.stale_seconds)
+        ).fetchone()
+        if row is None:
+            self._misses += 1
+            return None
+        with conn:
+            conn.execute("UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key))
+        try:
+            value = pickle.loads(row[0])
+        except Exception as e:
+            logger.warning(f"Dropping unreadable cache entry {key}: {str(e)}")
+            self.delete(key)
+            self._misses += 1
+            return None
+        self._hits += 1
+        return CacheEntry(value, row[1])
+
+    def contains(self, key: str, fresh: bool = False) -> bool:
+        grace = 0.0 if fresh else self.stale_seconds
+        row = self._connection().execute(
+            "SELECT 1 FROM entries WHERE key = ? AND expires_at > ?",
+            (key, time.time() - grace)
+        ).fetchone()
+        return row is not None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        payload = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, value, size, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (key, payload, len(payload), now + ttl, now)
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float) -> None:
+        """Drop dead entries, then least recently used ones beyond the bounds."""
+        conn.execute("DELETE FROM entries WHERE expires_at <= ?", (now - self.stale_seconds,))
+        count, total = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if count <= self.max_entries and total <= self.max_bytes:
+            return
+        excess_rows = max(0, count - self.max_entries)
+        excess_bytes = max(0, total - self.max_bytes)
+        freed_rows = 0
+        freed_bytes = 0
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed_at"):
+            if freed_rows >= excess_rows and freed_bytes >= excess_bytes:
+                break
+            victims.append((key,))
+            freed_rows += 1
+            freed_bytes += size
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def delete(self, key: str) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE key = ?", (key,))
+
+    def _try_lock(self, key: str, lease: float) -> bool:
+        now = time.time()
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now))
+            cursor = conn.execute(
+                "INSERT OR IGNORE INTO locks (key, owner, expires_at) VALUES (?, ?, ?)",
+                (key, self._owner, now + lease)
+            )
+            return cursor.rowcount == 1
+
+    def _unlock(self, key: str) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, self._owner))
+
+    @contextmanager
+    def lock(self, key: str, timeout: float = None) -> Iterator[bool]:
+        timeout = config.CACHE_LOCK_TIMEOUT if timeout is None else timeout
+        # The lease outlives the wait so a slow refresh is not interrupted
+        lease = max(timeout * 2, 1.0)
+        deadline = time.monotonic() + timeout
+        acquired = self._try_lock(key, lease)
+        while not acquired and time.monotonic() < deadline:
+            time.sleep(0.05)
+            acquired = self._try_lock(key, lease)
+        if not acquired:
+            logger.warning(f"Timed out waiting for cache lock on {key}")
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                self._unlock(key)
+
+    def stats(self) -> Dict[str, Any]:
+        count, total = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        return {
+            "backend": "sqlite",
+            "path": self.path,
+            "entries": count,
+            "bytes": total,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self._hits,
+            "misses": self._misses,
+        }
+
+
+def create_cache(backend: str = None) -> CacheBackend:
+    """
+    Create a cache backend by name.
+
+    Args:
+        backend: 'memory', 'sqlite' or 'none' (default: from config)
+
+    Returns:
+        CacheBackend instance
+    """
+    backend = (backend or config.CACHE_BACKEND).lower()
+    if backend == "sqlite":
+        try:
+            return SQLiteCache()
+        except sqlite3.Error as e:
+            logger.error(f"Could not open SQLite cache, using memory cache: {str(e)}")
+            return MemoryCache()
+    if backend == "memory":
+        return MemoryCache()
+    return NullCache()
+
+
+# Create a global instance
+cache = create_cache()
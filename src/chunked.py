@@ -0,0 +1,294 @@
+"""
+Chunked processing of long price histories.
+
+Statistics and chart data are built from fixed-size chunks (upstream
+pages, CSV files on disk or slices of a frame) by merging partial
+aggregates, so peak memory depends on the chunk size and not on the
+length of the history. Chunks may arrive oldest-first or newest-first.
+"""
+
+import logging
+from typing import Dict, Any, Iterable, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+DAY_NS = 86400 * 10**9
+
+
+class ChunkOrderError(ValueError):
+    """Raised when a chunk overlaps data that was already consumed."""
+
+
+class _Partial:
+    """Mergeable aggregates of a contiguous run of closes."""
+
+    def __init__(self, closes: pd.Series, tail_rows: int):
+        values = closes.to_numpy(dtype=np.float64)
+        returns = values[1:] / values[:-1] - 1.0 if len(values) > 1 else np.empty(0)
+        self.start = closes.index[0]
+        self.end = closes.index[-1]
+        self.count = len(values)
+        self.total = float(values.sum())
+        self.low = float(values.min())
+        self.high = float(values.max())
+        self.first = float(values[0])
+        self.last = float(values[-1])
+        self.return_count = len(returns)
+        self.return_mean = float(returns.mean()) if len(returns) else 0.0
+        self.return_m2 = float(((returns - self.return_mean) ** 2).sum()) if len(returns) else 0.0
+        self.tail = closes.iloc[-tail_rows:]
+
+    def _merge_returns(self, count: int, mean: float, m2: float) -> None:
+        """Combine return moments with another group (Chan et al.)."""
+        if count == 0:
+            return
+        merged = self.return_count + count
+        delta = mean - self.return_mean
+        self.return_mean += delta * count / merged
+        self.return_m2 += m2 + delta * delta * self.return_count * count / merged
+        self.return_count = merged
+
+    def absorb(self, later: "_Partial", tail_rows: int) -> None:
+        """Merge the aggregates of a run that directly follows this one."""
+        # The return across the boundary belongs to neither run
+        self._merge_returns(1, later.first / self.last - 1.0, 0.0)
+        self._merge_returns(later.return_count, later.return_mean, later.return_m2)
+        self.end = later.end
+        self.count += later.count
+        self.total += later.total
+        self.low = min(self.low, later.low)
+        self.high = max(self.high, later.high)
+        self.last = later.last
+        if len(later.tail) >= tail_rows:
+            self.tail = later.tail
+        else:
+            self.tail = pd.concat([self.tail, later.tail]).iloc[-tail_rows:]
+
+
+class StatisticsAccumulator:
+    """
+    Running close-price statistics over chunks of a history.
+
+    Keeps count/sum/min/max, first and last close, count/mean/M2 of
+    bar-to-bar returns (for volatility) and a bounded tail window.
+    """
+
+    def __init__(self, tail_rows: int = 90):
+        """
+        Initialize the StatisticsAccumulator.
+
+        Args:
+            tail_rows: Most recent closes retained (for trailing averages
+                and models that need a recent window)
+        """
+        self.tail_rows = max(tail_rows, 90)
+        self._partial: Optional[_Partial] = None
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """
+        Merge one chunk of bars.
+
+        Args:
+            chunk: DataFrame with a 'Close' column, sorted by index, entirely
+                before or entirely after everything added so far
+        """
+        closes = chunk["Close"].dropna()
+        if closes.empty:
+            return
+        partial = _Partial(closes, self.tail_rows)
+        if self._partial is None:
+            self._partial = partial
+        elif partial.start > self._partial.end:
+            self._partial.absorb(partial, self.tail_rows)
+        elif partial.end < self._partial.start:
+            partial.absorb(self._partial, self.tail_rows)
+            self._partial = partial
+        else:
+            raise ChunkOrderError("Chunk overlaps bars that were already added")
+
+    @property
+    def count(self) -> int:
+        return self._partial.count if self._partial else 0
+
+    @property
+    def tail(self) -> pd.Series:
+        """Most recent closes, oldest first."""
+        return self._partial.tail if self._partial else pd.Series(dtype=np.float64)
+
+    def values(self, current_price: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Raw statistics in the layout of FinancialAnalyzer.calculate_statistics.
+
+        Args:
+            current_price: Current price (optional, will use latest if not provided)
+
+        Returns:
+            Dictionary of statistics, or None if nothing was added
+        """
+        partial = self._partial
+        if partial is None:
+            return None
+        current = float(current_price) if current_price else partial.last
+        price_change = current - partial.first
+        tail = partial.tail.to_numpy(dtype=np.float64)
+        volatility = (
+            float(np.sqrt(partial.return_m2 / (partial.return_count - 1)))
+            if partial.return_count > 1 else 0.0
+        )
+        return {
+            "current_price": current,
+            "high_52w": partial.high,
+            "low_52w": partial.low,
+            "average_price": partial.total / partial.count,
+            "price_change": price_change,
+            "price_change_pct": price_change / partial.first if partial.first > 0 else 0,
+            "volatility": volatility,
+            "avg_30d": float(tail[-30:].mean()) if partial.count >= 30 else None,
+            "avg_90d": float(tail[-90:].mean()) if partial.count >= 90 else None,
+            "data_points": partial.count,
+        }
+
+
+class ChartDownsampler:
+    """
+    Bounded-size chart series built from chunks.
+
+    Bars are bucketed on a time grid whose resolution doubles whenever
+    more than max_points buckets are held; each bucket keeps its last
+    close and total volume. The grid is anchored at the epoch, so the
+    result does not depend on chunk order or size.
+    """
+
+    def __init__(self, max_points: int = 2000, resolution_ns: int = DAY_NS):
+        """
+        Initialize the ChartDownsampler.
+
+        Args:
+            max_points: Maximum number of points kept
+            resolution_ns: Initial bucket width (the bar interval)
+        """
+        self.max_points = max(2, max_points)
+        self.resolution = max(1, int(resolution_ns))
+        self._times = np.empty(0, dtype=np.int64)
+        self._prices = np.empty(0)
+        self._volume = np.empty(0)
+
+    def _reduce(self) -> None:
+        """Merge points sharing a bucket: last close, summed volume."""
+        buckets = self._times // self.resolution
+        starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+        ends = np.r_[starts[1:], len(buckets)] - 1
+        self._volume = np.add.reduceat(self._volume, starts)
+        self._times = self._times[ends]
+        self._prices = self._prices[ends]
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """
+        Merge one chunk of bars.
+
+        Args:
+            chunk: DataFrame with 'Close' (and optionally 'Volume') columns
+        """
+        chunk = chunk[chunk["Close"].notna()]
+        if chunk.empty:
+            return
+        index = chunk.index
+        local = index.tz_localize(None) if index.tz is not None else index
+        volume = (
+            chunk["Volume"].to_numpy(dtype=np.float64)
+            if "Volume" in chunk.columns else np.zeros(len(chunk))
+        )
+        times = np.asarray(local, dtype="datetime64[ns]").astype(np.int64)
+        prices = chunk["Close"].to_numpy(dtype=np.float64)
+        times = np.concatenate([self._times, times])
+        order = np.argsort(times, kind="stable")
+        self._times = times[order]
+        self._prices = np.concatenate([self._prices, prices])[order]
+        self._volume = np.concatenate([self._volume, volume])[order]
+        self._reduce()
+        while len(self._times) > self.max_points:
+            self.resolution *= 2
+            self._reduce()
+
+    def chart_data(self) -> Dict[str, Any]:
+        """
+        Return points in the layout of FinancialAnalyzer.prepare_chart_data.
+
+        Returns:
+            Dictionary with dates, prices and volume lists
+        """
+        dates = pd.DatetimeIndex(self._times.astype("datetime64[ns]"))
+        return {
+            "dates": dates.strftime("%Y-%m-%d").tolist(),
+            "prices": self._prices.tolist(),
+            "volume": self._volume.tolist(),
+        }
+
+
+class ChunkSummary:
+    """Statistics, chart points and recent bars gathered from chunks."""
+
+    def __init__(self, tail_rows: int = 90, max_points: int = 2000, resolution_ns: int = DAY_NS):
+        """
+        Initialize the ChunkSummary.
+
+        Args:
+            tail_rows: Most recent bars retained
+            max_points: Maximum chart points
+            resolution_ns: Bar interval in nanoseconds
+        """
+        self.statistics = StatisticsAccumulator(tail_rows)
+        self.chart = ChartDownsampler(max_points, resolution_ns)
+        self.chunks = 0
+        self.rows = 0
+        self.peak_chunk_rows = 0
+        self.last_bar = None
+
+    def add(self, chunk: pd.DataFrame) -> None:
+        """Merge one chunk into all aggregates."""
+        if chunk is None or chunk.empty:
+            return
+        self.statistics.add(chunk)
+        self.chart.add(chunk)
+        self.chunks += 1
+        self.rows += len(chunk)
+        self.peak_chunk_rows = max(self.peak_chunk_rows, len(chunk))
+        if self.last_bar is None or chunk.index[-1] > self.last_bar:
+            self.last_bar = chunk.index[-1]
+
+    def consume(self, chunks: Iterable[pd.DataFrame]) -> "ChunkSummary":
+        """Merge every chunk of an iterable and return self."""
+        for chunk in chunks:
+            self.add(chunk)
+        return self
+
+    def recent_history(self) -> pd.DataFrame:
+        """Retained tail of the history as a Close-only DataFrame."""
+        return self.statistics.tail.to_frame("Close")
+
+
+def iter_frame_chunks(history: pd.DataFrame, rows: int) -> Iterator[pd.DataFrame]:
+    """Yield consecutive row slices (views) of an in-memory history."""
+    for start in range(0, len(history), max(1, rows)):
+        yield history.iloc[start:start + rows]
+
+
+def iter_csv_chunks(path: str, rows: int, index_col: str = "Date") -> Iterator[pd.DataFrame]:
+    """
+    Read a history stored on disk as CSV in chunks of rows.
+
+    Args:
+        path: CSV file with a date column and OHLCV columns, oldest first
+        rows: Rows per chunk
+        index_col: Name of the date column
+
+    Yields:
+        DataFrames indexed by timestamp
+    """
+    for chunk in pd.read_csv(path, chunksize=max(1, rows)):
+        index = pd.to_datetime(chunk.pop(index_col), utc=True)
+        yield chunk.set_index(pd.DatetimeIndex(index, name=index_col))
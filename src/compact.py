@@ -0,0 +1,166 @@
+"""
+Compact in-memory representation of price histories.
+
+yfinance frames carry float64 OHLC, Dividends/Stock Splits columns and a
+tz-aware index. CompactHistory keeps only the needed columns: prices in
+one (columns x bars) block of a configurable float dtype, volume as
+int64 and timestamps as int64 nanoseconds since the epoch (UTC) plus a
+timezone name. Columns are exposed as NumPy views and DataFrames built
+from it share those buffers instead of copying them.
+"""
+
+import logging
+from typing import Dict, Any, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+DEFAULT_COLUMNS = PRICE_COLUMNS + ("Volume",)
+PRICE_DTYPES = ("float32", "float64")
+
+
+class CompactHistory:
+    """Read-only, column-pruned price history backed by NumPy arrays."""
+
+    def __init__(
+        self,
+        timestamps: np.ndarray,
+        prices: np.ndarray,
+        price_columns: Tuple[str, ...],
+        volume: Optional[np.ndarray] = None,
+        tz: Optional[str] = None,
+        index_name: Optional[str] = None
+    ):
+        """
+        Initialize the CompactHistory.
+
+        Args:
+            timestamps: int64 nanoseconds since the epoch (UTC), one per bar
+            prices: Array of shape (len(price_columns), bars)
+            price_columns: Names of the rows of prices
+            volume: int64 volume per bar (optional)
+            tz: Timezone name of the original index (None for naive)
+            index_name: Name of the original index
+        """
+        self.timestamps = timestamps
+        self.prices = prices
+        self.price_columns = tuple(price_columns)
+        self.volume = volume
+        self.tz = tz
+        self.index_name = index_name
+        for array in (self.timestamps, self.prices, self.volume):
+            if array is not None:
+                array.flags.writeable = False
+        self._index = None
+
+    @classmethod
+    def from_frame(
+        cls,
+        frame: pd.DataFrame,
+        columns: Iterable[str] = DEFAULT_COLUMNS,
+        price_dtype: str = "float64"
+    ) -> "CompactHistory":
+        """
+        Build a compact copy of a history DataFrame.
+
+        Args:
+            frame: DataFrame indexed by a DatetimeIndex
+            columns: Columns to keep; missing ones are skipped
+            price_dtype: 'float32' or 'float64'
+
+        Returns:
+            CompactHistory holding only the requested columns
+        """
+        if price_dtype not in PRICE_DTYPES:
+            raise ValueError(f"Unsupported price dtype: {price_dtype}")
+        index = pd.DatetimeIndex(frame.index)
+        tz = str(index.tz) if index.tz is not None else None
+        utc = index.tz_convert("UTC").tz_localize(None) if tz else index
+        timestamps = np.asarray(utc, dtype="datetime64[ns]").astype(np.int64)
+
+        price_columns = tuple(c for c in columns if c in PRICE_COLUMNS and c in frame.columns)
+        prices = np.empty((len(price_columns), len(frame)), dtype=price_dtype)
+        for row, column in enumerate(price_columns):
+            prices[row] = frame[column].to_numpy()
+
+        volume = None
+        if "Volume" in columns and "Volume" in frame.columns:
+            volume = np.nan_to_num(frame["Volume"].to_numpy(dtype=np.float64)).astype(np.int64)
+        return cls(timestamps, prices, price_columns, volume, tz, index.name)
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    @property
+    def empty(self) -> bool:
+        return len(self.timestamps) == 0
+
+    @property
+    def columns(self) -> Tuple[str, ...]:
+        return self.price_columns + (("Volume",) if self.volume is not None else ())
+
+    @property
+    def index(self) -> pd.DatetimeIndex:
+        """Bar timestamps in the original timezone (built once)."""
+        if self._index is None:
+            index = pd.DatetimeIndex(self.timestamps.view("datetime64[ns]"), name=self.index_name)
+            self._index = index.tz_localize("UTC").tz_convert(self.tz) if self.tz else index
+        return self._index
+
+    def column(self, name: str) -> np.ndarray:
+        """
+        Return a column as a read-only NumPy view.
+
+        Args:
+            name: Column name
+
+        Returns:
+            View into the compact buffers (no copy)
+        """
+        if name == "Volume" and self.volume is not None:
+            return self.volume
+        if name in self.price_columns:
+            return self.prices[self.price_columns.index(name)]
+        raise KeyError(name)
+
+    def __getitem__(self, name: str) -> pd.Series:
+        """Return a column as a Series sharing the compact buffer."""
+        return pd.Series(self.column(name), index=self.index, name=name, copy=False)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Return a DataFrame whose columns are views of the compact buffers.
+
+        Returns:
+            DataFrame with the kept columns and the original index
+        """
+        data = {name: self.column(name) for name in self.columns}
+        return pd.DataFrame(data, index=self.index, copy=False)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held by the timestamp, price and volume buffers."""
+        return sum(
+            array.nbytes for array in (self.timestamps, self.prices, self.volume)
+            if array is not None
+        )
+
+    def __getstate__(self) -> Dict[str, Any]:
+        state = self.__dict__.copy()
+        state["_index"] = None
+        return state
+
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        self.__dict__.update(state)
+        for array in (self.timestamps, self.prices, self.volume):
+            if array is not None:
+                array.flags.writeable = False
+
+
+def frame_nbytes(frame: pd.DataFrame) -> int:
+    """Bytes held by a DataFrame's columns and index."""
+    return int(frame.memory_usage(index=True, deep=True).sum())
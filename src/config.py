@@ -8,7 +8,8 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 # Load environment variables from .env file
-env_path = Path(__file__).parent.parent / ".env"
+project_root = Path(__file__).parent.parent
+env_path = project_root / ".env"
 load_dotenv(dotenv_path=env_path)
 
 
@@ -53,9 +54,174 @@ class Config:
     ARIMA_TREND = os.getenv("ARIMA_TREND", "t")
     FORECAST_ALPHA = _parse_float(os.getenv("FORECAST_ALPHA", "0.2"), 0.2)
     FORECAST_USE_LOG = os.getenv("FORECAST_USE_LOG", "true").lower() == "true"
-    
+    # Forecast time budget: a fit still running after FORECAST_DEADLINE_SECONDS
+    # is answered with a drift forecast and refined in the background for up
+    # to FORECAST_REFINE_SECONDS on FORECAST_WORKERS threads
+    FORECAST_DEADLINE_SECONDS = _parse_float(os.getenv("FORECAST_DEADLINE_SECONDS", "2"), 2.0)
+    FORECAST_REFINE_SECONDS = _parse_float(os.getenv("FORECAST_REFINE_SECONDS", "60"), 60.0)
+    FORECAST_MAXITER = int(os.getenv("FORECAST_MAXITER", "50"))
+    FORECAST_WORKERS = int(os.getenv("FORECAST_WORKERS", "2"))
+
+    # Batch and watch mode settings (console application)
+    BATCH_MAX_WORKERS = int(os.getenv("BATCH_MAX_WORKERS", "8"))
+    WATCH_REFRESH_PERIOD = os.getenv("WATCH_REFRESH_PERIOD", "5d")
+
+    # HTTP caching and compression for analysis responses
+    HTTP_CACHE_MAX_AGE_OPEN = int(os.getenv("HTTP_CACHE_MAX_AGE_OPEN", "60"))
+    HTTP_CACHE_MAX_AGE_CLOSED = int(os.getenv("HTTP_CACHE_MAX_AGE_CLOSED", "21600"))
+    HTTP_CACHE_MIN_AGE = int(os.getenv("HTTP_CACHE_MIN_AGE", "5"))
+    HTTP_COMPRESS_MIN_SIZE = int(os.getenv("HTTP_COMPRESS_MIN_SIZE", "1024"))
+    HTTP_GZIP_LEVEL = int(os.getenv("HTTP_GZIP_LEVEL", "6"))
+    HTTP_BROTLI_QUALITY = int(os.getenv("HTTP_BROTLI_QUALITY", "5"))
+
+    # Live price stream (Server-Sent Events)
+    STREAM_POLL_SECONDS = _parse_float(os.getenv("STREAM_POLL_SECONDS", "15"), 15.0)
+    STREAM_POLL_PERIOD = os.getenv("STREAM_POLL_PERIOD", "5d")
+    STREAM_HEARTBEAT_SECONDS = _parse_float(os.getenv("STREAM_HEARTBEAT_SECONDS", "15"), 15.0)
+    STREAM_QUEUE_SIZE = int(os.getenv("STREAM_QUEUE_SIZE", "100"))
+    STREAM_MAX_TICKERS = int(os.getenv("STREAM_MAX_TICKERS", "10"))
+
+    # Cache settings: backend is 'memory' (per process), 'sqlite' (shared
+    # by all worker processes on the host) or 'none'
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")
+    CACHE_PATH = os.getenv("CACHE_PATH", str(project_root / ".cache" / "analyzer_cache.sqlite3"))
+    CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", "5000"))
+    CACHE_MAX_BYTES = int(os.getenv("CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+    CACHE_STALE_SECONDS = _parse_float(os.getenv("CACHE_STALE_SECONDS", "86400"), 86400.0)
+    CACHE_LOCK_TIMEOUT = _parse_float(os.getenv("CACHE_LOCK_TIMEOUT", "30"), 30.0)
+    CACHE_TTL_INFO = _parse_float(os.getenv("CACHE_TTL_INFO", "60"), 60.0)
+    CACHE_TTL_HISTORY = _parse_float(os.getenv("CACHE_TTL_HISTORY", "300"), 300.0)
+    CACHE_TTL_INTRADAY_HISTORY = _parse_float(os.getenv("CACHE_TTL_INTRADAY_HISTORY", "60"), 60.0)
+    CACHE_TTL_ANALYSIS = _parse_float(os.getenv("CACHE_TTL_ANALYSIS", "3600"), 3600.0)
+    # Cached histories keep only these columns, with prices stored as
+    # HISTORY_PRICE_DTYPE ('float64' or 'float32')
+    HISTORY_COMPACT = os.getenv("HISTORY_COMPACT", "true").lower() == "true"
+    HISTORY_COLUMNS = tuple(
+        c.strip() for c in os.getenv("HISTORY_COLUMNS", "Open,High,Low,Close,Volume").split(",")
+        if c.strip()
+    )
+    HISTORY_PRICE_DTYPE = os.getenv("HISTORY_PRICE_DTYPE", "float64")
+    # Build coarser bars from cached finer ones instead of fetching them
+    RESAMPLE_FROM_CACHE = os.getenv("RESAMPLE_FROM_CACHE", "true").lower() == "true"
+
+    # Validation of fetched histories: gap policy 'ffill', 'drop' or 'none';
+    # outlier returns scored by 'mad' or 'zscore' and either only counted
+    # ('flag') or, for single-bar spikes, removed ('drop')
+    DATA_VALIDATION = os.getenv("DATA_VALIDATION", "true").lower() == "true"
+    DATA_GAP_POLICY = os.getenv("DATA_GAP_POLICY", "ffill")
+    DATA_OUTLIER_METHOD = os.getenv("DATA_OUTLIER_METHOD", "mad")
+    DATA_OUTLIER_THRESHOLD = _parse_float(os.getenv("DATA_OUTLIER_THRESHOLD", "8"), 8.0)
+    DATA_OUTLIER_POLICY = os.getenv("DATA_OUTLIER_POLICY", "flag")
+
+    # Upstream protection: rate limit, retries and circuit breaker
+    UPSTREAM_RATE_PER_SECOND = _parse_float(os.getenv("UPSTREAM_RATE_PER_SECOND", "2"), 2.0)
+    UPSTREAM_BURST = _parse_float(os.getenv("UPSTREAM_BURST", "5"), 5.0)
+    UPSTREAM_LIMITER_TIMEOUT = _parse_float(os.getenv("UPSTREAM_LIMITER_TIMEOUT", "30"), 30.0)
+    UPSTREAM_MAX_RETRIES = int(os.getenv("UPSTREAM_MAX_RETRIES", "3"))
+    UPSTREAM_BACKOFF_BASE = _parse_float(os.getenv("UPSTREAM_BACKOFF_BASE", "0.5"), 0.5)
+    UPSTREAM_BACKOFF_MAX = _parse_float(os.getenv("UPSTREAM_BACKOFF_MAX", "8"), 8.0)
+    BREAKER_FAILURE_THRESHOLD = int(os.getenv("BREAKER_FAILURE_THRESHOLD", "5"))
+    BREAKER_RESET_SECONDS = _parse_float(os.getenv("BREAKER_RESET_SECONDS", "30"), 30.0)
+
+    # Market data source: Yahoo through yfinance, unless UPSTREAM_URL points
+    # at a server with Yahoo-compatible chart and quoteSummary endpoints
+    # (such as benchmarks/fake_upstream.py)
+    UPSTREAM_URL = os.getenv("UPSTREAM_URL", "").rstrip("/")
+    UPSTREAM_HTTP_TIMEOUT = _parse_float(os.getenv("UPSTREAM_HTTP_TIMEOUT", "10"), 10.0)
+
+    # Per-stage durations of /analyze in a Server-Timing response header
+    SERVER_TIMING = os.getenv("SERVER_TIMING", "true").lower() == "true"
+
+    # Chunked processing of long histories: periods analyzed page by page
+    # with bounded memory instead of as one DataFrame
+    CHUNKED_PERIODS = tuple(
+        p.strip() for p in os.getenv("CHUNKED_PERIODS", "max").split(",") if p.strip()
+    )
+    CHUNK_ROWS = int(os.getenv("CHUNK_ROWS", "5000"))
+    CHUNKED_TAIL_ROWS = int(os.getenv("CHUNKED_TAIL_ROWS", "500"))
+    CHART_MAX_POINTS = int(os.getenv("CHART_MAX_POINTS", "2000"))
+
+    # Access-frequency log and prefetching: the most requested views are
+    # warmed at startup and refreshed ahead of expiry while traffic is low.
+    # Off by default: it persists requested tickers and calls upstream unprompted
+    ACCESS_LOG_PATH = os.getenv("ACCESS_LOG_PATH", str(project_root / ".cache" / "access_log.json"))
+    ACCESS_LOG_HALF_LIFE_HOURS = _parse_float(os.getenv("ACCESS_LOG_HALF_LIFE_HOURS", "72"), 72.0)
+    ACCESS_LOG_MAX_KEYS = int(os.getenv("ACCESS_LOG_MAX_KEYS", "10000"))
+    PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "false").lower() == "true"
+    PREFETCH_TOP_N = int(os.getenv("PREFETCH_TOP_N", "50"))
+    PREFETCH_INTERVAL_SECONDS = _parse_float(os.getenv("PREFETCH_INTERVAL_SECONDS", "30"), 30.0)
+    PREFETCH_REFRESH_AHEAD_SECONDS = _parse_float(
+        os.getenv("PREFETCH_REFRESH_AHEAD_SECONDS", "60"), 60.0
+    )
+    PREFETCH_IDLE_RPS = _parse_float(os.getenv("PREFETCH_IDLE_RPS", "1"), 1.0)
+    # Rate-limit tokens left to user traffic; prefetching waits below this
+    PREFETCH_MIN_TOKENS = _parse_float(os.getenv("PREFETCH_MIN_TOKENS", "2"), 2.0)
+
+    # Precomputed /analyze snapshots, rebuilt in the background for the
+    # listed tickers and (period:interval) views
+    SNAPSHOT_TICKERS = os.getenv("SNAPSHOT_TICKERS", "")
+    SNAPSHOT_TICKERS_FILE = os.getenv("SNAPSHOT_TICKERS_FILE", "")
+    SNAPSHOT_MAX_TICKERS = int(os.getenv("SNAPSHOT_MAX_TICKERS", "500"))
+    SNAPSHOT_VIEWS = tuple(
+        tuple(v.strip().split(":", 1)) for v in os.getenv("SNAPSHOT_VIEWS", "1y:1d").split(",")
+        if ":" in v
+    )
+    SNAPSHOT_WORKERS = int(os.getenv("SNAPSHOT_WORKERS", "4"))
+    SNAPSHOT_REFRESH_SECONDS = _parse_float(os.getenv("SNAPSHOT_REFRESH_SECONDS", "300"), 300.0)
+    SNAPSHOT_REFRESH_INTRADAY_SECONDS = _parse_float(
+        os.getenv("SNAPSHOT_REFRESH_INTRADAY_SECONDS", "60"), 60.0
+    )
+    # Snapshots are served until this many refresh intervals have passed
+    SNAPSHOT_STALE_FACTOR = _parse_float(os.getenv("SNAPSHOT_STALE_FACTOR", "2"), 2.0)
+
+    # Admission control for /analyze: concurrent requests, bounded queue,
+    # deadline per request and the queue fill ratio from which responses
+    # are degraded (no forecast, stale snapshots)
+    ADMISSION_ENABLED = os.getenv("ADMISSION_ENABLED", "true").lower() == "true"
+    ADMISSION_MAX_CONCURRENT = int(os.getenv("ADMISSION_MAX_CONCURRENT", "8"))
+    ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+    ADMISSION_DEADLINE_SECONDS = _parse_float(os.getenv("ADMISSION_DEADLINE_SECONDS", "10"), 10.0)
+    ADMISSION_DEGRADE_RATIO = _parse_float(os.getenv("ADMISSION_DEGRADE_RATIO", "0.5"), 0.5)
+
+    # Price alerts: rules are evaluated on quotes polled every
+    # ALERT_POLL_SECONDS; fired alerts are queued and optionally POSTed
+    ALERT_POLL_SECONDS = _parse_float(os.getenv("ALERT_POLL_SECONDS", "15"), 15.0)
+    ALERT_MAX_RULES = int(os.getenv("ALERT_MAX_RULES", "100000"))
+    ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "10000"))
+    ALERT_WEBHOOK_URL = os.getenv("ALERT_WEBHOOK_URL", "")
+    ALERT_WEBHOOK_TIMEOUT = _parse_float(os.getenv("ALERT_WEBHOOK_TIMEOUT", "5"), 5.0)
+
+    # Bulk export: rows per Parquet/Arrow row group (or CSV chunk) and
+    # tickers per web export request
+    EXPORT_ROW_GROUP_ROWS = int(os.getenv("EXPORT_ROW_GROUP_ROWS", "50000"))
+    EXPORT_MAX_TICKERS = int(os.getenv("EXPORT_MAX_TICKERS", "500"))
+
+    # Universe screener
+    SCREENER_MAX_TICKERS = int(os.getenv("SCREENER_MAX_TICKERS", "5000"))
+
+    # Correlation engine; the rolling series is capped at
+    # CORRELATION_MAX_ROLLING_VALUES matrix entries per response
+    CORRELATION_MAX_TICKERS = int(os.getenv("CORRELATION_MAX_TICKERS", "500"))
+    CORRELATION_MAX_ROLLING_VALUES = int(os.getenv("CORRELATION_MAX_ROLLING_VALUES", "1000000"))
+
+    # Monte Carlo simulation
+    MONTE_CARLO_METHOD = os.getenv("MONTE_CARLO_METHOD", "gbm")
+    MONTE_CARLO_PATHS = int(os.getenv("MONTE_CARLO_PATHS", "100000"))
+    MONTE_CARLO_MAX_PATHS = int(os.getenv("MONTE_CARLO_MAX_PATHS", "1000000"))
+    MONTE_CARLO_MAX_STEPS = int(os.getenv("MONTE_CARLO_MAX_STEPS", "252"))
+    MONTE_CARLO_CHUNK_SIZE = int(os.getenv("MONTE_CARLO_CHUNK_SIZE", "10000"))
+    MONTE_CARLO_CONFIDENCE = _parse_float(os.getenv("MONTE_CARLO_CONFIDENCE", "0.95"), 0.95)
+
+    # Arrays of at least this size are handed to worker processes through
+    # shared memory instead of being pickled
+    SHARED_MEMORY_MIN_BYTES = int(os.getenv("SHARED_MEMORY_MIN_BYTES", "1048576"))
+
     # Supported periods: 1d, 5d, 1mo, 3mo, 6mo, 1y, 2y, 5y, 10y, ytd, max
     # Supported intervals: 1m, 2m, 5m, 15m, 30m, 60m, 90m, 1h, 1d, 5d, 1wk, 1mo, 3mo
+    SUPPORTED_PERIODS = ("1d", "5d", "1mo", "3mo", "6mo", "1y", "2y", "5y", "10y", "ytd", "max")
+    SUPPORTED_INTERVALS = (
+        "1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d", "5d", "1wk", "1mo", "3mo"
+    )
 
 
 # Create a global config instance
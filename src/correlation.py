@@ -0,0 +1,251 @@
+"""
+Cross-asset correlation and covariance of daily returns.
+
+Histories are aligned on a common calendar before returns are computed
+(crypto trades on weekends, stocks do not), then full matrices are built
+with a single BLAS matrix product. RollingCovariance keeps a running
+mean and co-moment matrix so a window can be advanced by one bar in
+O(k^2) instead of recomputing; /correlation uses it for rolling series.
+"""
+
+import logging
+from collections import deque
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import config
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+CALENDARS = ("intersection", "union")
+
+
+class CorrelationError(ValueError):
+    """Raised when a correlation matrix cannot be computed."""
+
+
+def align_closes(histories: Dict[str, pd.DataFrame], calendar: str = "intersection") -> pd.DataFrame:
+    """
+    Align close prices of many tickers on a common daily calendar.
+
+    Args:
+        histories: Mapping of ticker to DataFrame with a 'Close' column
+        calendar: 'intersection' keeps only days on which every ticker
+            traded; 'union' keeps all days and carries the last close
+            forward over days a market was closed
+
+    Returns:
+        DataFrame of closes indexed by date, one column per ticker
+    """
+    if calendar not in CALENDARS:
+        raise CorrelationError(f"Unsupported calendar: {calendar}")
+
+    columns = {}
+    for ticker, history in histories.items():
+        if history is None or history.empty or "Close" not in history.columns:
+            continue
+        index = history.index
+        if isinstance(index, pd.DatetimeIndex) and index.tz is not None:
+            # Compare trading days in each exchange's own local date
+            index = index.tz_localize(None)
+        closes = pd.Series(history["Close"].to_numpy(), index=pd.DatetimeIndex(index).normalize())
+        columns[ticker] = closes[~closes.index.duplicated(keep="last")]
+
+    if not columns:
+        raise CorrelationError("No histories to align")
+
+    closes = pd.concat(columns, axis=1).sort_index()
+    if calendar == "intersection":
+        return closes.dropna(how="any")
+    return closes.ffill().dropna(how="any")
+
+
+def returns_from_closes(closes: pd.DataFrame) -> pd.DataFrame:
+    """Simple daily returns of aligned closes."""
+    return closes.pct_change().iloc[1:]
+
+
+def covariance_matrix(returns: np.ndarray) -> np.ndarray:
+    """
+    Sample covariance matrix of return columns.
+
+    Args:
+        returns: Array of shape (observations, tickers)
+
+    Returns:
+        Array of shape (tickers, tickers)
+    """
+    n = returns.shape[0]
+    if n < 2:
+        raise CorrelationError("At least two observations are required")
+    centered = returns - returns.mean(axis=0)
+    return (centered.T @ centered) / (n - 1)
+
+
+def correlation_from_covariance(covariance: np.ndarray) -> np.ndarray:
+    """Convert a covariance matrix to a correlation matrix."""
+    std = np.sqrt(np.diag(covariance))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        correlation = covariance / np.outer(std, std)
+    np.fill_diagonal(correlation, 1.0)
+    return correlation
+
+
+class RollingCovariance:
+    """
+    Covariance over a sliding window, updated incrementally.
+
+    The window mean and the co-moment matrix (sum of centered outer
+    products) are updated Welford-style, so adding a bar and dropping the
+    oldest one costs O(k^2) for k tickers without the cancellation of raw
+    sums. Every `window` evictions they are recomputed exactly from the
+    retained rows, which bounds accumulated rounding error.
+    """
+
+    def __init__(self, n_assets: int, window: int):
+        """
+        Initialize the RollingCovariance.
+
+        Args:
+            n_assets: Number of tickers (columns)
+            window: Number of observations in the window
+        """
+        if window < 2:
+            raise CorrelationError("Window must contain at least two observations")
+        self.window = window
+        self._rows: deque = deque()
+        self._mean = np.zeros(n_assets)
+        self._comoment = np.zeros((n_assets, n_assets))
+        self._evictions = 0
+
+    def update(self, row: np.ndarray) -> None:
+        """
+        Add one observation, dropping the oldest if the window is full.
+
+        Args:
+            row: Returns of all tickers for one date
+        """
+        row = np.asarray(row, dtype=np.float64)
+        self._rows.append(row)
+        delta = row - self._mean
+        self._mean += delta / len(self._rows)
+        self._comoment += np.outer(delta, row - self._mean)
+        if len(self._rows) > self.window:
+            old = self._rows.popleft()
+            self._evictions += 1
+            if self._evictions % self.window == 0:
+                self._recompute()
+                return
+            delta = old - self._mean
+            self._mean -= delta / len(self._rows)
+            self._comoment -= np.outer(delta, old - self._mean)
+
+    def _recompute(self) -> None:
+        """Rebuild the mean and co-moment matrix from the window's rows."""
+        rows = np.asarray(self._rows)
+        self._mean = rows.mean(axis=0)
+        centered = rows - self._mean
+        self._comoment = centered.T @ centered
+
+    @property
+    def ready(self) -> bool:
+        return len(self._rows) >= self.window
+
+    def covariance(self) -> np.ndarray:
+        """Sample covariance of the current window."""
+        n = len(self._rows)
+        if n < 2:
+            raise CorrelationError("At least two observations are required")
+        return self._comoment / (n - 1)
+
+    def correlation(self) -> np.ndarray:
+        """Correlation of the current window."""
+        return correlation_from_covariance(self.covariance())
+
+
+def rolling_correlations(
+    returns: pd.DataFrame,
+    window: int,
+    step: int = 1
+) -> List[Dict[str, Any]]:
+    """
+    Correlation matrices over a sliding window.
+
+    Args:
+        returns: Aligned returns (dates x tickers)
+        window: Observations per window
+        step: Emit a matrix every `step` observations once the window is full
+
+    Returns:
+        List of {"date", "correlation"} dicts, oldest first
+    """
+    rolling = RollingCovariance(returns.shape[1], window)
+    values = returns.to_numpy(dtype=np.float64)
+    results = []
+    for position, row in enumerate(values):
+        rolling.update(row)
+        if rolling.ready and (position - window + 1) % step == 0:
+            results.append({
+                "date": returns.index[position].strftime("%Y-%m-%d"),
+                "correlation": rolling.correlation(),
+            })
+    return results
+
+
+def correlation_report(
+    histories: Dict[str, pd.DataFrame],
+    calendar: str = "intersection",
+    window: Optional[int] = None,
+    step: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Full (and optionally rolling) correlation/covariance matrices.
+
+    Args:
+        histories: Mapping of ticker to DataFrame with a 'Close' column
+        calendar: Calendar alignment, see align_closes
+        window: Rolling window length; the most recent window is reported
+        step: With a window, also report the rolling correlation series,
+            one matrix every `step` observations (see rolling_correlations)
+
+    Returns:
+        JSON-serializable dictionary with tickers, date range and matrices
+    """
+    returns = returns_from_closes(align_closes(histories, calendar))
+    values = returns.to_numpy(dtype=np.float64)
+    covariance = covariance_matrix(values)
+    report = {
+        "tickers": list(returns.columns),
+        "calendar": calendar,
+        "observations": len(returns),
+        "start": returns.index[0].strftime("%Y-%m-%d"),
+        "end": returns.index[-1].strftime("%Y-%m-%d"),
+        "covariance": _to_list(covariance),
+        "correlation": _to_list(correlation_from_covariance(covariance)),
+    }
+    if window is not None and window < 2:
+        raise CorrelationError("Window must span at least 2 returns")
+    if window:
+        if window > len(values):
+            raise CorrelationError("Window is longer than the aligned history")
+        recent = covariance_matrix(values[-window:])
+        report["window"] = window
+        report["rolling_correlation"] = _to_list(correlation_from_covariance(recent))
+        if step:
+            matrices = (len(values) - window) // step + 1
+            if matrices * len(returns.columns) ** 2 > config.CORRELATION_MAX_ROLLING_VALUES:
+                raise CorrelationError("Rolling series too large; use a larger step")
+            report["step"] = step
+            report["rolling"] = [
+                {"date": entry["date"], "correlation": _to_list(entry["correlation"])}
+                for entry in rolling_correlations(returns, window, step)
+            ]
+    return report
+
+
+def _to_list(matrix: np.ndarray) -> List[List[Optional[float]]]:
+    """Convert a matrix to nested lists with NaN replaced by None."""
+    return [[None if np.isnan(v) else float(v) for v in row] for row in matrix]
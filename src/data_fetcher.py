@@ -4,12 +4,28 @@ Uses yfinance library to fetch stock and cryptocurrency data.
 """
 
 import logging
-from typing import Optional, Dict, Any
+import threading
+import time
+from functools import partial
+from typing import Optional, Dict, Any, Callable, Iterator, List
 import yfinance as yf
 import pandas as pd
 from datetime import datetime
 
 from src.config import config
+from src.cache import cache as shared_cache, CacheBackend
+from src.compact import CompactHistory, frame_nbytes
+from src.data_quality import HistoryValidator, history_validator
+from src.resilience import TokenBucket, CircuitBreaker, UpstreamGuard, is_transient
+from src.resample import (
+    resample_ohlcv,
+    slice_period,
+    derivation_sources,
+    plan_fetch,
+    interval_days,
+    PERIOD_OFFSETS,
+)
+from src.upstream_http import HTTPTicker
 from src.utils import validate_ticker
 
 # Set up logger
@@ -19,9 +35,356 @@ logger = logging.getLogger(__name__)
 class DataFetcher:
     """Class for fetching financial data from various sources."""
     
-    def __init__(self):
-        """Initialize the DataFetcher."""
+    def __init__(
+        self,
+        cache: CacheBackend = None,
+        guard: UpstreamGuard = None,
+        validator: HistoryValidator = None,
+        ticker_factory: Callable[[str], Any] = None
+    ):
+        """
+        Initialize the DataFetcher.
+        
+        Args:
+            cache: Cache backend for upstream responses (default: shared cache)
+            guard: Rate limiter/retry/breaker for upstream calls (default: from config)
+            validator: Cleaning stage for fetched histories (default: shared validator)
+            ticker_factory: Callable building a Ticker object from a symbol
+                (default: yf.Ticker, or HTTPTicker when UPSTREAM_URL is set)
+        """
         self.logger = logging.getLogger(__name__)
+        self.cache = cache or shared_cache
+        self.validator = validator or history_validator
+        self.ticker_factory = ticker_factory or (
+            partial(HTTPTicker, base_url=config.UPSTREAM_URL) if config.UPSTREAM_URL else yf.Ticker
+        )
+        self.guard = guard or UpstreamGuard(
+            TokenBucket(config.UPSTREAM_RATE_PER_SECOND, config.UPSTREAM_BURST),
+            CircuitBreaker(config.BREAKER_FAILURE_THRESHOLD, config.BREAKER_RESET_SECONDS),
+            max_retries=config.UPSTREAM_MAX_RETRIES,
+            backoff_base=config.UPSTREAM_BACKOFF_BASE,
+            backoff_max=config.UPSTREAM_BACKOFF_MAX,
+            limiter_timeout=config.UPSTREAM_LIMITER_TIMEOUT
+        )
+        self._stale_served = 0
+        self._derived_served = 0
+        self._history_memory: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+    
+    def _cached_upstream(self, key: str, ttl: float, fn: Callable[[], Any]) -> Any:
+        """
+        Serve a value from the cache or fetch it through the upstream guard.
+        
+        When the upstream call fails (throttling, open circuit, network
+        errors) a stale cached value is served if one is still retained.
+        
+        Args:
+            key: Cache key
+            ttl: Seconds until a fetched value is considered stale
+            fn: Zero-argument callable performing the upstream request
+            
+        Returns:
+            Fresh, freshly fetched or stale value
+        """
+        try:
+            return self.cache.get_or_compute(key, ttl, lambda: self.guard.call(fn, key))
+        except Exception as e:
+            stale = self.cache.get(key, allow_stale=True)
+            if stale is None:
+                raise
+            with self._stats_lock:
+                self._stale_served += 1
+            self.logger.warning(f"Upstream unavailable, serving stale {key}: {str(e)}")
+            return stale
+    
+    def upstream_state(self) -> Dict[str, Any]:
+        """
+        Return rate limiter, circuit breaker and fallback counters.
+        
+        Returns:
+            Dictionary suitable for a monitoring endpoint
+        """
+        state = self.guard.state()
+        with self._stats_lock:
+            state["stale_served"] = self._stale_served
+            state["derived_served"] = self._derived_served
+        return state
+    
+    def data_quality(self) -> Dict[str, Any]:
+        """
+        Return counters of issues fixed by the validation stage.
+        
+        Returns:
+            Dictionary suitable for a monitoring endpoint
+        """
+        state = self.validator.counters()
+        state["enabled"] = config.DATA_VALIDATION
+        return state
+    
+    def _validate(self, key: str, frame: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+        """
+        Run a fetched history through the validation stage.
+        
+        Args:
+            key: Cache key or description of the history
+            frame: DataFrame returned by yfinance
+            
+        Returns:
+            Cleaned DataFrame (the same object if nothing was fixed)
+        """
+        if not config.DATA_VALIDATION:
+            return frame
+        cleaned, _ = self.validator.validate(frame, key)
+        return cleaned
+    
+    def _compact(self, key: str, frame: pd.DataFrame) -> Any:
+        """
+        Convert a fetched history to the cached representation.
+        
+        Args:
+            key: Cache key of the history
+            frame: DataFrame returned by yfinance
+            
+        Returns:
+            CompactHistory, or the frame itself if compaction is disabled
+        """
+        if not config.HISTORY_COMPACT or frame is None or frame.empty:
+            return frame
+        compact = CompactHistory.from_frame(
+            frame, config.HISTORY_COLUMNS, config.HISTORY_PRICE_DTYPE
+        )
+        with self._stats_lock:
+            self._history_memory[key] = {
+                "bars": len(compact),
+                "bytes": compact.nbytes,
+                "frame_bytes": frame_nbytes(frame),
+            }
+        return compact
+    
+    @staticmethod
+    def _as_frame(history: Any) -> Optional[pd.DataFrame]:
+        """Return a cached history as a DataFrame sharing its buffers."""
+        if isinstance(history, CompactHistory):
+            return history.to_frame()
+        return history
+    
+    def history_memory(self) -> Dict[str, Any]:
+        """
+        Report memory held by cached histories, per ticker.
+        
+        Entries the cache no longer holds are dropped from the report.
+        
+        Returns:
+            Dictionary with totals and a per-ticker breakdown
+        """
+        with self._stats_lock:
+            tracked = dict(self._history_memory)
+        gone = [key for key in tracked if not self.cache.contains(key)]
+        
+        tickers: Dict[str, Dict[str, int]] = {}
+        for key, usage in tracked.items():
+            if key in gone:
+                continue
+            ticker = key.split(":")[1]
+            totals = tickers.setdefault(ticker, {"histories": 0, "bars": 0, "bytes": 0})
+            totals["histories"] += 1
+            totals["bars"] += usage["bars"]
+            totals["bytes"] += usage["bytes"]
+        
+        with self._stats_lock:
+            for key in gone:
+                self._history_memory.pop(key, None)
+        
+        total = sum(usage["bytes"] for key, usage in tracked.items() if key not in gone)
+        frame_total = sum(
+            usage["frame_bytes"] for key, usage in tracked.items() if key not in gone
+        )
+        return {
+            "price_dtype": config.HISTORY_PRICE_DTYPE,
+            "columns": list(config.HISTORY_COLUMNS),
+            "tickers": len(tickers),
+            "bytes": total,
+            "frame_bytes": frame_total,
+            "bytes_per_ticker": round(total / len(tickers)) if tickers else 0,
+            "per_ticker": tickers,
+        }
+    
+    def _get_info(self, ticker_obj: yf.Ticker) -> Dict[str, Any]:
+        """Return the ticker's info dict, served from the cache when fresh."""
+        return self._cached_upstream(
+            f"info:{ticker_obj.ticker}",
+            config.CACHE_TTL_INFO,
+            lambda: ticker_obj.info
+        )
+    
+    @staticmethod
+    def history_cache_key(ticker: str, period: str = None, interval: str = None) -> str:
+        """
+        Cache key under which a ticker's history is stored.
+        
+        Args:
+            ticker: Ticker symbol
+            period: Period of historical data (default: from config)
+            interval: Data interval (default: from config)
+            
+        Returns:
+            Cache key string
+        """
+        period = period or config.DEFAULT_PERIOD
+        interval = interval or config.DEFAULT_INTERVAL
+        return f"history:{ticker.strip().upper()}:{period}:{interval}"
+    
+    def get_cached_history(
+        self,
+        ticker: str,
+        period: str = None,
+        interval: str = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Return a previously fetched history without contacting upstream.
+        
+        Stale entries are returned as well; callers that need fresh data
+        should use get_historical_data.
+        
+        Args:
+            ticker: Ticker symbol
+            period: Period of historical data (default: from config)
+            interval: Data interval (default: from config)
+            
+        Returns:
+            DataFrame with historical data or None if not cached
+        """
+        return self._as_frame(
+            self.cache.get(self.history_cache_key(ticker, period, interval), allow_stale=True)
+        )
+    
+    def history_expires_in(
+        self,
+        ticker: str,
+        period: str = None,
+        interval: str = None
+    ) -> Optional[float]:
+        """
+        Seconds until a cached history turns stale.
+        
+        Args:
+            ticker: Ticker symbol
+            period: Period of historical data (default: from config)
+            interval: Data interval (default: from config)
+            
+        Returns:
+            Remaining lifetime (negative if already stale), None if not cached
+        """
+        entry = self.cache.get_entry(self.history_cache_key(ticker, period, interval))
+        return None if entry is None else entry.expires_at - time.time()
+    
+    def upstream_headroom(self) -> float:
+        """Rate-limit tokens available right now (0 while the circuit is not closed)."""
+        if self.guard.breaker.state != self.guard.breaker.CLOSED:
+            return 0.0
+        return self.guard.limiter.available()
+    
+    def refresh_history(
+        self,
+        ticker_obj: yf.Ticker,
+        period: str = None,
+        interval: str = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Fetch a history from upstream and replace the cached copy, even if fresh.
+        
+        Used to refresh popular histories ahead of their expiry.
+        
+        Args:
+            ticker_obj: yfinance Ticker object
+            period: Period of historical data (default: from config)
+            interval: Data interval (default: from config)
+            
+        Returns:
+            DataFrame with the refreshed history or None if empty
+        """
+        period = period or config.DEFAULT_PERIOD
+        interval = interval or config.DEFAULT_INTERVAL
+        key = self.history_cache_key(ticker_obj.ticker, period, interval)
+        frame = self.guard.call(
+            lambda: ticker_obj.history(period=period, interval=interval, raise_errors=True),
+            key
+        )
+        history = self._compact(key, self._validate(key, frame))
+        if history is None or history.empty:
+            return None
+        self.cache.set(key, history, self._history_ttl(interval))
+        return self._as_frame(history)
+    
+    @staticmethod
+    def _history_ttl(interval: str) -> float:
+        """Cache lifetime for a history of the given interval."""
+        intraday = interval[-1] in ("m", "h") and not interval.endswith("mo")
+        if intraday:
+            return config.CACHE_TTL_INTRADAY_HISTORY
+        return config.CACHE_TTL_HISTORY
+    
+    def _derive_from_cache(
+        self,
+        ticker: str,
+        period: str,
+        interval: str
+    ) -> Optional[pd.DataFrame]:
+        """
+        Build a history from a fresh cached history of a finer interval.
+        
+        Args:
+            ticker: Ticker symbol
+            period: Requested period
+            interval: Requested interval
+            
+        Returns:
+            Resampled DataFrame or None if no suitable source is cached
+        """
+        if not config.RESAMPLE_FROM_CACHE:
+            return None
+        sources = derivation_sources(
+            period, interval, config.SUPPORTED_PERIODS, config.SUPPORTED_INTERVALS
+        )
+        for source_period, source_interval in sources:
+            source = self._as_frame(
+                self.cache.get(self.history_cache_key(ticker, source_period, source_interval))
+            )
+            if source is None or source.empty:
+                continue
+            self.logger.info(
+                f"Deriving {interval} bars for {ticker} from cached {source_interval} bars"
+            )
+            with self._stats_lock:
+                self._derived_served += 1
+            derived = resample_ohlcv(source, interval, source_interval)
+            if source_period != period:
+                derived = slice_period(derived, period)
+            self._store_derived(
+                self.history_cache_key(ticker, period, interval),
+                self.history_cache_key(ticker, source_period, source_interval),
+                derived
+            )
+            return derived
+        return None
+    
+    def _store_derived(self, key: str, source_key: str, frame: pd.DataFrame) -> None:
+        """
+        Cache a resampled history under its own key.
+        
+        The entry expires together with the history it was derived from,
+        so it is never fresher than its source.
+        
+        Args:
+            key: Cache key of the derived history
+            source_key: Cache key of the finer history it was built from
+            frame: Derived DataFrame
+        """
+        entry = self.cache.get_entry(source_key)
+        ttl = entry.expires_at - time.time() if entry is not None else 0
+        if frame is None or frame.empty or ttl <= 0:
+            return
+        self.cache.set(key, self._compact(key, frame), ttl)
     
     def fetch_data(
         self,
@@ -50,10 +413,10 @@ class DataFetcher:
         
         try:
             self.logger.info(f"Fetching data for {ticker_upper}...")
-            ticker_obj = yf.Ticker(ticker_upper)
+            ticker_obj = self.ticker_factory(ticker_upper)
             
             # Test if ticker is valid by trying to get info
-            info = ticker_obj.info
+            info = self._get_info(ticker_obj)
             if not info or len(info) < 2:  # Empty or minimal info means invalid ticker
                 self.logger.error(f"Ticker {ticker_upper} not found or invalid")
                 return None
@@ -76,7 +439,7 @@ class DataFetcher:
             Current price or None if error
         """
         try:
-            info = ticker_obj.info
+            info = self._get_info(ticker_obj)
             # Try different possible keys for current price
             price = (
                 info.get("currentPrice") or
@@ -111,10 +474,27 @@ class DataFetcher:
         interval = interval or config.DEFAULT_INTERVAL
         
         try:
-            self.logger.info(f"Fetching historical data (period: {period}, interval: {interval})...")
-            hist = ticker_obj.history(period=period, interval=interval)
+            key = self.history_cache_key(ticker_obj.ticker, period, interval)
+            hist = self._as_frame(self.cache.get(key))
+            if hist is None:
+                hist = self._derive_from_cache(ticker_obj.ticker, period, interval)
+            if hist is None:
+                self.logger.info(
+                    f"Fetching historical data (period: {period}, interval: {interval})..."
+                )
+                hist = self._as_frame(self._cached_upstream(
+                    key,
+                    self._history_ttl(interval),
+                    lambda: self._compact(
+                        key,
+                        self._validate(
+                            key,
+                            ticker_obj.history(period=period, interval=interval, raise_errors=True)
+                        )
+                    )
+                ))
             
-            if hist.empty:
+            if hist is None or hist.empty:
                 self.logger.warning("Historical data is empty")
                 return None
             
@@ -125,6 +505,149 @@ class DataFetcher:
             self.logger.error(f"Error fetching historical data: {str(e)}")
             return None
 
+    def get_recent_bars(
+        self,
+        ticker_obj: yf.Ticker,
+        period: str = None,
+        interval: str = None
+    ) -> Optional[pd.DataFrame]:
+        """
+        Fetch recent bars from upstream, bypassing the cache.
+        
+        Live pollers need the running bar as it is now, while a cached
+        history may be up to its TTL old. The request still goes through
+        the upstream guard and the validation stage.
+        
+        Args:
+            ticker_obj: yfinance Ticker object
+            period: Period of historical data (default: from config)
+            interval: Data interval (default: from config)
+            
+        Returns:
+            DataFrame with the recent bars or None if error
+        """
+        period = period or config.DEFAULT_PERIOD
+        interval = interval or config.DEFAULT_INTERVAL
+        description = f"recent bars {ticker_obj.ticker} {period} {interval}"
+        try:
+            hist = self._validate(description, self.guard.call(
+                lambda: ticker_obj.history(period=period, interval=interval, raise_errors=True),
+                description
+            ))
+        except Exception as e:
+            self.logger.error(f"Error fetching recent bars: {str(e)}")
+            return None
+        if hist is None or hist.empty:
+            return None
+        return hist
+    
+    def iter_history_pages(
+        self,
+        ticker_obj: yf.Ticker,
+        period: str = None,
+        interval: str = None,
+        rows: int = None
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Fetch a history in date-window pages, newest page first.
+        
+        Pages are not cached, so only one page is held at a time. Paging
+        stops at the start of the period or, for 'max', at the first
+        empty page.
+        
+        Args:
+            ticker_obj: yfinance Ticker object
+            period: Period of historical data (default: from config)
+            interval: Data interval (default: from config)
+            rows: Approximate bars per page (default: from config)
+            
+        Yields:
+            DataFrames of consecutive, non-overlapping date windows
+        """
+        period = period or config.DEFAULT_PERIOD
+        interval = interval or config.DEFAULT_INTERVAL
+        rows = rows or config.CHUNK_ROWS
+        window = pd.Timedelta(days=max(1.0, rows * interval_days(interval)))
+        
+        end = pd.Timestamp.now(tz="UTC").normalize() + pd.Timedelta(days=1)
+        if period == "max":
+            first = None
+        elif period == "ytd":
+            first = end.replace(month=1, day=1)
+        else:
+            first = end - PERIOD_OFFSETS.get(period, pd.DateOffset(years=1))
+        
+        while first is None or end > first:
+            start = end - window if first is None else max(end - window, first)
+            description = f"history page {ticker_obj.ticker} {start.date()}..{end.date()}"
+            try:
+                page = self.guard.call(
+                    lambda: ticker_obj.history(
+                        start=start.strftime("%Y-%m-%d"),
+                        end=end.strftime("%Y-%m-%d"),
+                        interval=interval,
+                        raise_errors=True
+                    ),
+                    description
+                )
+            except Exception as e:
+                # yfinance raises for windows without bars (e.g. before listing)
+                if is_transient(e):
+                    raise
+                self.logger.info(f"No bars in {description}: {str(e)}")
+                page = None
+            page = self._validate(description, page)
+            if page is not None and not page.empty:
+                yield page
+            elif first is None:
+                return
+            end = start
+    
+    def get_histories(
+        self,
+        ticker_obj: yf.Ticker,
+        period: str = None,
+        intervals: List[str] = None
+    ) -> Dict[str, Optional[pd.DataFrame]]:
+        """
+        Get histories of several intervals with as few upstream requests as possible.
+        
+        Only the finest interval upstream serves over the period is
+        fetched; coarser intervals are resampled from it locally and
+        cached under their own keys until the source expires.
+        
+        Args:
+            ticker_obj: yfinance Ticker object
+            period: Period of historical data (default: from config)
+            intervals: Intervals needed (default: the configured interval)
+            
+        Returns:
+            Dictionary of interval to DataFrame (None if unavailable)
+        """
+        period = period or config.DEFAULT_PERIOD
+        intervals = intervals or [config.DEFAULT_INTERVAL]
+        plan = plan_fetch(period, intervals)
+        
+        fetched = {}
+        for source in dict.fromkeys(plan.values()):
+            fetched[source] = self.get_historical_data(ticker_obj, period, source)
+        
+        histories = {}
+        for interval in intervals:
+            source = plan[interval]
+            history = fetched[source]
+            if history is not None and source != interval:
+                key = self.history_cache_key(ticker_obj.ticker, period, interval)
+                derived = self._as_frame(self.cache.get(key))
+                if derived is None:
+                    derived = resample_ohlcv(history, interval, source)
+                    self._store_derived(
+                        key, self.history_cache_key(ticker_obj.ticker, period, source), derived
+                    )
+                history = derived
+            histories[interval] = history
+        return histories
+    
     def get_company_info(self, ticker_obj: yf.Ticker) -> Dict[str, Any]:
         """
         Get company/cryptocurrency information.
@@ -136,7 +659,7 @@ class DataFetcher:
             Dictionary with company information
         """
         try:
-            info = ticker_obj.info
+            info = self._get_info(ticker_obj)
             return {
                 "name": info.get("longName") or info.get("shortName", "N/A"),
                 "sector": info.get("sector", "N/A"),
@@ -0,0 +1,236 @@
+"""
+Validation and cleaning of fetched price histories.
+
+Every history fetched from upstream passes through HistoryValidator
+before it is cached: timestamps are sorted, duplicated bars dropped,
+non-positive or non-finite prices treated as missing, outlier returns
+flagged with a vectorized z-score or MAD test and missing bars filled or
+dropped according to the gap policy. Clean histories (the common case)
+are returned unchanged without a copy. Every fixed issue is counted.
+"""
+
+import logging
+import threading
+from typing import Dict, Any, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import config
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+PRICE_COLUMNS = ("Open", "High", "Low", "Close")
+GAP_POLICIES = ("ffill", "drop", "none")
+OUTLIER_METHODS = ("mad", "zscore")
+OUTLIER_POLICIES = ("flag", "drop")
+
+# Issues counted per validated history
+ISSUES = (
+    "unsorted",
+    "duplicates",
+    "invalid_prices",
+    "missing_prices",
+    "outliers",
+    "outliers_removed",
+    "filled",
+    "dropped",
+)
+
+# Scale factor turning a median absolute deviation into a standard deviation
+MAD_SCALE = 1.4826
+
+# Fewer returns than this give no meaningful dispersion estimate
+MIN_RETURNS = 20
+
+
+def outlier_scores(returns: np.ndarray, method: str = "mad") -> np.ndarray:
+    """
+    Score returns by their distance from the center in units of dispersion.
+
+    Args:
+        returns: Log returns without NaNs
+        method: 'mad' (median/MAD, robust) or 'zscore' (mean/std)
+
+    Returns:
+        Array of absolute scores (zeros if dispersion is zero)
+    """
+    if method not in OUTLIER_METHODS:
+        raise ValueError(f"Unsupported outlier method: {method}")
+    if method == "mad":
+        center = np.median(returns)
+        scale = MAD_SCALE * np.median(np.abs(returns - center))
+    else:
+        center = returns.mean()
+        scale = returns.std(ddof=1)
+    if not scale > 0:
+        return np.zeros(len(returns))
+    return np.abs(returns - center) / scale
+
+
+class HistoryValidator:
+    """Checks and repairs OHLCV histories, keeping counters of fixed issues."""
+
+    def __init__(
+        self,
+        gap_policy: str = "ffill",
+        outlier_method: str = "mad",
+        outlier_threshold: float = 8.0,
+        outlier_policy: str = "flag"
+    ):
+        """
+        Initialize the HistoryValidator.
+
+        Args:
+            gap_policy: 'ffill' (carry the last close forward, zero volume),
+                'drop' (remove bars without a close) or 'none'
+            outlier_method: 'mad' or 'zscore'
+            outlier_threshold: Score above which a return is an outlier
+            outlier_policy: 'flag' (count only) or 'drop' (treat single-bar
+                spikes, an outlier return immediately reversed, as missing)
+        """
+        if gap_policy not in GAP_POLICIES:
+            raise ValueError(f"Unsupported gap policy: {gap_policy}")
+        if outlier_method not in OUTLIER_METHODS:
+            raise ValueError(f"Unsupported outlier method: {outlier_method}")
+        if outlier_policy not in OUTLIER_POLICIES:
+            raise ValueError(f"Unsupported outlier policy: {outlier_policy}")
+        self.gap_policy = gap_policy
+        self.outlier_method = outlier_method
+        self.outlier_threshold = outlier_threshold
+        self.outlier_policy = outlier_policy
+        self._totals = dict.fromkeys(ISSUES, 0)
+        self._checked = 0
+        self._repaired = 0
+        self._lock = threading.Lock()
+
+    def _outliers(self, close: np.ndarray) -> Tuple[int, np.ndarray]:
+        """
+        Find outlier returns among the valid closes.
+
+        Args:
+            close: Close prices, NaN where missing
+
+        Returns:
+            Tuple of (outlier return count, row positions of spikes to remove)
+        """
+        positions = np.flatnonzero(~np.isnan(close))
+        if len(positions) <= MIN_RETURNS:
+            return 0, np.empty(0, dtype=np.int64)
+        returns = np.diff(np.log(close[positions]))
+        flagged = outlier_scores(returns, self.outlier_method) > self.outlier_threshold
+        if self.outlier_policy != "drop":
+            return int(flagged.sum()), np.empty(0, dtype=np.int64)
+        # Return i leads into bar positions[i + 1]; a spike is a flagged
+        # move followed by a flagged move in the opposite direction
+        spikes = flagged[:-1] & flagged[1:] & (np.sign(returns[:-1]) != np.sign(returns[1:]))
+        return int(flagged.sum()), positions[1:-1][spikes]
+
+    def validate(
+        self,
+        frame: Optional[pd.DataFrame],
+        label: str = None
+    ) -> Tuple[Optional[pd.DataFrame], Dict[str, int]]:
+        """
+        Validate a history and repair what the policies allow.
+
+        Args:
+            frame: History indexed by timestamp with OHLC(V) columns
+            label: Name used in log messages (e.g. the cache key)
+
+        Returns:
+            Tuple of (cleaned DataFrame, counts of each issue found)
+        """
+        report = dict.fromkeys(ISSUES, 0)
+        if frame is None or frame.empty or "Close" not in frame.columns:
+            return frame, report
+
+        if not frame.index.is_monotonic_increasing:
+            frame = frame.sort_index(kind="stable")
+            report["unsorted"] = 1
+        duplicated = frame.index.duplicated(keep="last")
+        if duplicated.any():
+            frame = frame[~duplicated]
+            report["duplicates"] = int(duplicated.sum())
+
+        columns = [c for c in PRICE_COLUMNS if c in frame.columns]
+        prices = frame[columns].to_numpy(dtype=np.float64)
+        # Invalid cells are judged per column; only the Close decides
+        # whether the whole bar is a gap
+        cells = np.isinf(prices) | (prices <= 0)
+        close = prices[:, columns.index("Close")]
+        invalid = cells[:, columns.index("Close")]
+        missing = np.isnan(close) & ~invalid
+        report["invalid_prices"] = int(cells.any(axis=1).sum())
+        report["missing_prices"] = int(missing.sum())
+
+        report["outliers"], spikes = self._outliers(np.where(invalid, np.nan, close))
+        report["outliers_removed"] = len(spikes)
+
+        cells[spikes] = True
+        gaps = invalid | missing
+        gaps[spikes] = True
+        if cells.any() or (gaps.any() and self.gap_policy != "none"):
+            frame = frame.copy()
+            for position, column in enumerate(columns):
+                if cells[:, position].any():
+                    frame[column] = frame[column].mask(cells[:, position])
+            if self.gap_policy == "ffill":
+                # Gap bars become flat bars at the previous close; a bad
+                # Open/High/Low on a valid bar takes that bar's own close
+                filled = frame["Close"].ffill()
+                repaired = gaps | cells.any(axis=1)
+                for position, column in enumerate(columns):
+                    frame[column] = frame[column].where(~(gaps | cells[:, position]), filled)
+                if "Volume" in frame.columns:
+                    frame.loc[gaps, "Volume"] = 0
+                leading = frame["Close"].isna().to_numpy()
+                report["filled"] = int((repaired & ~leading).sum())
+                if leading.any():
+                    frame = frame[~leading]
+                    report["dropped"] = int(leading.sum())
+            elif gaps.any() and self.gap_policy == "drop":
+                frame = frame[~gaps]
+                report["dropped"] = int(gaps.sum())
+
+        self._record(report, label)
+        return frame, report
+
+    def _record(self, report: Dict[str, int], label: Optional[str]) -> None:
+        """Add a validation report to the running counters."""
+        issues = {name: count for name, count in report.items() if count}
+        with self._lock:
+            self._checked += 1
+            if issues:
+                self._repaired += 1
+            for name, count in issues.items():
+                self._totals[name] += count
+        if issues:
+            logger.warning(f"Data quality issues in {label or 'history'}: {issues}")
+
+    def counters(self) -> Dict[str, Any]:
+        """
+        Return totals of every issue found since startup.
+
+        Returns:
+            Dictionary suitable for a monitoring endpoint
+        """
+        with self._lock:
+            return {
+                "checked": self._checked,
+                "with_issues": self._repaired,
+                "issues": dict(self._totals),
+                "gap_policy": self.gap_policy,
+                "outlier_method": self.outlier_method,
+                "outlier_policy": self.outlier_policy,
+            }
+
+
+# Create a global validator instance
+history_validator = HistoryValidator(
+    gap_policy=config.DATA_GAP_POLICY,
+    outlier_method=config.DATA_OUTLIER_METHOD,
+    outlier_threshold=config.DATA_OUTLIER_THRESHOLD,
+    outlier_policy=config.DATA_OUTLIER_POLICY
+)
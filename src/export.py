@@ -0,0 +1,580 @@
+"""
+Bulk export of histories, statistics and forecasts.
+
+Exports cover a ticker set and are written as Parquet, Arrow IPC (both
+require the optional pyarrow package) or CSV. Rows are produced one
+ticker at a time and written in row groups of EXPORT_ROW_GROUP_ROWS, so
+memory stays bounded however many tickers are exported. Directory
+exports keep one file per dataset and ticker plus a manifest of content
+fingerprints; incremental runs skip partitions whose data is unchanged.
+The same writers stream a single file for the web endpoint.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import BinaryIO, Dict, Any, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Optional dependency
+    pa = None
+    pq = None
+
+from src.analyzer import analyzer
+from src.cache import cache
+from src.config import config
+from src.data_fetcher import data_fetcher
+from src.http_cache import history_key
+from src.market_calendar import calendar_for_exchange
+from src.utils import validate_ticker
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+DATASETS = ("history", "statistics", "forecast")
+EXPORT_FORMATS = ("parquet", "arrow", "csv")
+COLUMNAR_FORMATS = ("parquet", "arrow")
+EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "csv": ".csv"}
+MEDIA_TYPES = {
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "text/csv",
+}
+MANIFEST_NAME = "manifest.json"
+
+# Column types per dataset, so every row group of a file shares one schema
+COLUMNS = {
+    "history": {
+        "ticker": "str",
+        "timestamp": "datetime64[ns, UTC]",
+        "Open": "float64",
+        "High": "float64",
+        "Low": "float64",
+        "Close": "float64",
+        "Volume": "int64",
+    },
+    "statistics": {
+        "ticker": "str",
+        "last_bar": "datetime64[ns, UTC]",
+        "currency": "str",
+        "current_price": "float64",
+        "high_52w": "float64",
+        "low_52w": "float64",
+        "average_price": "float64",
+        "price_change": "float64",
+        "price_change_pct": "float64",
+        "volatility": "float64",
+        "avg_30d": "float64",
+        "avg_90d": "float64",
+        "data_points": "int64",
+    },
+    "forecast": {
+        "ticker": "str",
+        "date": "datetime64[ns]",
+        "mean": "float64",
+        "lower": "float64",
+        "upper": "float64",
+        "method": "str",
+    },
+}
+
+
+class ExportError(ValueError):
+    """Raised when an export cannot be produced with the given inputs."""
+
+
+def default_format() -> str:
+    """Parquet when pyarrow is installed, CSV otherwise."""
+    return "parquet" if pa is not None else "csv"
+
+
+def check_format(fmt: str) -> None:
+    """
+    Validate an export format.
+
+    Raises:
+        ExportError: If the format is unknown or needs the missing pyarrow package
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ExportError(f"Unsupported export format: {fmt}")
+    if fmt in COLUMNAR_FORMATS and pa is None:
+        raise ExportError(f"The {fmt} format requires the optional pyarrow package")
+
+
+def conform(frame: pd.DataFrame, dataset: str) -> pd.DataFrame:
+    """Reorder and cast columns to the dataset's fixed schema."""
+    columns = COLUMNS[dataset]
+    frame = frame.reindex(columns=list(columns))
+    if "Volume" in columns:
+        frame["Volume"] = frame["Volume"].fillna(0)
+    return frame.astype(columns)
+
+
+class FrameWriter:
+    """Writes DataFrames of one schema to a binary stream in row groups."""
+
+    def __init__(
+        self,
+        sink: BinaryIO,
+        fmt: str,
+        dataset: str,
+        row_group_rows: int = None
+    ):
+        """
+        Initialize the FrameWriter.
+
+        Args:
+            sink: Binary stream receiving the output
+            fmt: One of EXPORT_FORMATS
+            dataset: One of DATASETS (its schema is written even without rows)
+            row_group_rows: Rows buffered per row group (default: from config)
+        """
+        check_format(fmt)
+        self.sink = sink
+        self.fmt = fmt
+        self.dataset = dataset
+        self.row_group_rows = max(1, row_group_rows or config.EXPORT_ROW_GROUP_ROWS)
+        self.rows = 0
+        self._pending: List[pd.DataFrame] = []
+        self._pending_rows = 0
+        self._writer = None
+        self._schema = None
+
+    def write(self, frame: pd.DataFrame) -> None:
+        """Buffer a frame, writing a row group once enough rows are pending."""
+        if frame.empty:
+            return
+        self._pending.append(frame)
+        self._pending_rows += len(frame)
+        if self._pending_rows >= self.row_group_rows:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write pending rows as one row group."""
+        if not self._pending:
+            return
+        frame = self._pending[0] if len(self._pending) == 1 else pd.concat(self._pending)
+        self._pending = []
+        self._pending_rows = 0
+        if self.fmt == "csv":
+            self.sink.write(frame.to_csv(index=False, header=self.rows == 0).encode("utf-8"))
+        else:
+            table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                if self.fmt == "parquet":
+                    self._writer = pq.ParquetWriter(self.sink, self._schema)
+                else:
+                    self._writer = pa.ipc.new_stream(self.sink, self._schema)
+            self._writer.write_table(table)
+        self.rows += len(frame)
+
+    def close(self) -> None:
+        """Write pending rows and the format's footer."""
+        if self.rows == 0 and not self._pending:
+            # Empty files still carry the header or schema
+            self._pending.append(conform(pd.DataFrame(), self.dataset))
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+class _ChunkSink:
+    """Write-only binary stream whose output is taken in chunks."""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+        self._position = 0
+        self.closed = False
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        self.closed = True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return False
+
+    def readable(self) -> bool:
+        return False
+
+    def take(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class Exporter:
+    """Produces export rows per ticker and writes them to files or streams."""
+
+    def __init__(self, fetcher=None, row_group_rows: int = None):
+        """
+        Initialize the Exporter.
+
+        Args:
+            fetcher: DataFetcher used for upstream access (default: shared fetcher)
+            row_group_rows: Rows per row group (default: from config)
+        """
+        self.fetcher = fetcher or data_fetcher
+        self.row_group_rows = max(1, row_group_rows or config.EXPORT_ROW_GROUP_ROWS)
+
+    def load(self, ticker: str, period: str, interval: str) -> Dict[str, Any]:
+        """
+        Fetch what the datasets of one ticker are built from.
+
+        Returns:
+            Dictionary with company_info, current_price and history
+
+        Raises:
+            ExportError: If the ticker or its history cannot be fetched
+        """
+        if not validate_ticker(ticker):
+            raise ExportError("invalid ticker symbol")
+        ticker_obj = self.fetcher.fetch_data(ticker, period, interval)
+        if not ticker_obj:
+            raise ExportError("failed to fetch data")
+        history = self.fetcher.get_historical_data(ticker_obj, period, interval)
+        if history is None or history.empty:
+            raise ExportError("failed to fetch historical data")
+        return {
+            "company_info": self.fetcher.get_company_info(ticker_obj),
+            "current_price": self.fetcher.get_current_price(ticker_obj),
+            "history": history,
+        }
+
+    @staticmethod
+    def fingerprint(
+        ticker: str,
+        period: str,
+        interval: str,
+        data: Dict[str, Any],
+        dataset: str = None
+    ) -> str:
+        """
+        Identify the content of a dataset of a ticker's export.
+
+        Covers the parameters and a hash of the whole history, so any
+        revised bar counts as a change. Only the statistics also depend on
+        the current price.
+        """
+        history = data["history"]
+        digest = hashlib.sha256(
+            history_key(ticker, period, interval, history).encode("utf-8")
+        )
+        digest.update(pd.util.hash_pandas_object(history).to_numpy().tobytes())
+        if dataset == "statistics":
+            digest.update(repr(data["current_price"]).encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+    def forecast(
+        self,
+        ticker: str,
+        data: Dict[str, Any],
+        period: str,
+        interval: str
+    ) -> Dict[str, Any]:
+        """
+        Forecast a ticker's closes the way /analyze does.
+
+        Forecasts share the analysis cache entry (forecast:<data key>) and
+        run on the budgeted forecaster with the exchange calendar. An
+        export waits up to the refine budget, so it gets the ARIMA fit
+        rather than the drift fallback whenever the fit completes.
+
+        Raises:
+            ExportError: If forecasting is disabled or fails
+        """
+        if not config.ENABLE_ARIMA_FORECAST:
+            raise ExportError("forecasting is disabled")
+        from src.extensions.forecasting.budgeted import budgeted_forecaster
+        history = data["history"]
+        cache_key = f"forecast:{history_key(ticker, period, interval, history)}"
+        forecast = cache.get(cache_key)
+        if forecast is not None:
+            return forecast
+        try:
+            forecast = budgeted_forecaster.forecast(
+                ticker,
+                history,
+                key=cache_key,
+                deadline=budgeted_forecaster.refine_seconds,
+                on_refined=lambda result: cache.set(cache_key, result, config.CACHE_TTL_ANALYSIS),
+                steps=config.FORECAST_STEPS,
+                order=config.ARIMA_ORDER,
+                alpha=config.FORECAST_ALPHA,
+                trend=config.ARIMA_TREND,
+                use_log=config.FORECAST_USE_LOG,
+                calendar=calendar_for_exchange(data["company_info"].get("exchange"), ticker)
+            )
+        except Exception as e:
+            raise ExportError(f"forecast unavailable: {str(e)}")
+        if not forecast.get("fallback"):
+            cache.set(cache_key, forecast, config.CACHE_TTL_ANALYSIS)
+        return forecast
+
+    def frames(
+        self,
+        ticker: str,
+        dataset: str,
+        data: Dict[str, Any],
+        period: str,
+        interval: str
+    ) -> Iterator[pd.DataFrame]:
+        """
+        Produce the rows of one dataset for a ticker, in slices of at most a row group.
+
+        Args:
+            ticker: Ticker symbol
+            dataset: One of DATASETS
+            data: Output of load
+            period: Period of historical data
+            interval: Data interval
+
+        Yields:
+            DataFrames conforming to the dataset's schema
+        """
+        history = data["history"]
+        if dataset == "history":
+            index = pd.DatetimeIndex(history.index)
+            timestamps = index.tz_convert("UTC") if index.tz is not None \
+                else index.tz_localize("UTC")
+            for start in range(0, len(history), self.row_group_rows):
+                stop = start + self.row_group_rows
+                frame = pd.DataFrame({
+                    column: history[column].to_numpy()[start:stop]
+                    for column in COLUMNS["history"] if column in history.columns
+                })
+                frame["ticker"] = ticker
+                frame["timestamp"] = timestamps[start:stop]
+                yield conform(frame, "history")
+        elif dataset == "statistics":
+            currency = data["company_info"].get("currency", "USD")
+            stats = analyzer.calculate_statistics(history, data["current_price"], currency)
+            row = {column: stats.get(column) for column in COLUMNS["statistics"]}
+            row.update(ticker=ticker, last_bar=pd.Timestamp(history.index[-1]), currency=currency)
+            if row["last_bar"].tzinfo is None:
+                row["last_bar"] = row["last_bar"].tz_localize("UTC")
+            yield conform(pd.DataFrame([row]), "statistics")
+        elif dataset == "forecast":
+            forecast = self.forecast(ticker, data, period, interval)
+            frame = pd.DataFrame({
+                "date": pd.to_datetime(forecast["dates"]),
+                "mean": forecast["mean"],
+                "lower": forecast["lower"],
+                "upper": forecast["upper"],
+            })
+            frame["ticker"] = ticker
+            frame["method"] = forecast.get("method", "arima")
+            yield conform(frame, "forecast")
+        else:
+            raise ExportError(f"Unsupported dataset: {dataset}")
+
+    def export_directory(
+        self,
+        tickers: Iterable[str],
+        directory: str,
+        fmt: str = None,
+        datasets: Iterable[str] = DATASETS,
+        period: str = None,
+        interval: str = None,
+        incremental: bool = True
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Write one file per dataset and ticker below a directory.
+
+        Files are named <dataset>/<ticker><ext> and replaced atomically.
+        The manifest records each file's fingerprint; with incremental
+        exports, partitions whose fingerprint is unchanged are skipped.
+
+        Args:
+            tickers: Ticker symbols
+            directory: Output directory (created if missing)
+            fmt: One of EXPORT_FORMATS (default: parquet if available, else csv)
+            datasets: Datasets to export
+            period: Period of historical data (default: from config)
+            interval: Data interval (default: from config)
+            incremental: Skip unchanged partitions
+
+        Yields:
+            Row per ticker and dataset with status 'written', 'skipped' or 'error'
+        """
+        fmt = fmt or default_format()
+        check_format(fmt)
+        datasets = list(datasets)
+        for dataset in datasets:
+            if dataset not in DATASETS:
+                raise ExportError(f"Unsupported dataset: {dataset}")
+        period = period or config.DEFAULT_PERIOD
+        interval = interval or config.DEFAULT_INTERVAL
+        root = Path(directory)
+        manifest = self._load_manifest(root)
+        partitions = manifest.setdefault("partitions", {})
+
+        try:
+            for ticker in tickers:
+                try:
+                    data = self.load(ticker, period, interval)
+                except Exception as e:
+                    for dataset in datasets:
+                        yield self._row(ticker, dataset, "error", error=str(e))
+                    continue
+                for dataset in datasets:
+                    fingerprint = (
+                        f"{fmt}:{self.fingerprint(ticker, period, interval, data, dataset)}"
+                    )
+                    relative = f"{dataset}/{ticker}{EXTENSIONS[fmt]}"
+                    entry = partitions.get(relative)
+                    if (
+                        incremental and entry and entry.get("fingerprint") == fingerprint
+                        and (root / relative).exists()
+                    ):
+                        yield self._row(ticker, dataset, "skipped", entry.get("rows"), relative)
+                        continue
+                    try:
+                        rows = self._write_file(
+                            root / relative, fmt, dataset,
+                            self.frames(ticker, dataset, data, period, interval)
+                        )
+                    except Exception as e:
+                        logger.warning(f"Export of {dataset} for {ticker} failed: {str(e)}")
+                        yield self._row(ticker, dataset, "error", error=str(e))
+                        continue
+                    partitions[relative] = {
+                        "fingerprint": fingerprint,
+                        "rows": rows,
+                        "period": period,
+                        "interval": interval,
+                    }
+                    yield self._row(ticker, dataset, "written", rows, relative)
+        finally:
+            self._save_manifest(root, manifest)
+
+    def stream(
+        self,
+        tickers: Iterable[str],
+        dataset: str,
+        fmt: str = None,
+        period: str = None,
+        interval: str = None
+    ) -> Iterator[bytes]:
+        """
+        Stream one dataset for a ticker set as a single file.
+
+        Tickers that cannot be loaded are skipped (and logged).
+
+        Args:
+            tickers: Ticker symbols
+            dataset: One of DATASETS
+            fmt: One of EXPORT_FORMATS (default: parquet if available, else csv)
+            period: Period of historical data (default: from config)
+            interval: Data interval (default: from config)
+
+        Yields:
+            Chunks of the encoded file, at most about a row group each
+        """
+        fmt = fmt or default_format()
+        check_format(fmt)
+        if dataset not in DATASETS:
+            raise ExportError(f"Unsupported dataset: {dataset}")
+        period = period or config.DEFAULT_PERIOD
+        interval = interval or config.DEFAULT_INTERVAL
+        sink = _ChunkSink()
+        writer = FrameWriter(sink, fmt, dataset, self.row_group_rows)
+        for ticker in tickers:
+            try:
+                data = self.load(ticker, period, interval)
+                for frame in self.frames(ticker, dataset, data, period, interval):
+                    writer.write(frame)
+                    chunk = sink.take()
+                    if chunk:
+                        yield chunk
+            except Exception as e:
+                logger.warning(f"Skipping {ticker} in {dataset} export: {str(e)}")
+        writer.close()
+        chunk = sink.take()
+        if chunk:
+            yield chunk
+
+    def _write_file(
+        self,
+        path: Path,
+        fmt: str,
+        dataset: str,
+        frames: Iterable[pd.DataFrame]
+    ) -> int:
+        """Write frames to a file atomically, returning the number of rows."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = path.with_name(path.name + ".tmp")
+        try:
+            with open(temporary, "wb") as handle:
+                writer = FrameWriter(handle, fmt, dataset, self.row_group_rows)
+                for frame in frames:
+                    writer.write(frame)
+                writer.close()
+            os.replace(temporary, path)
+        finally:
+            if temporary.exists():
+                temporary.unlink()
+        return writer.rows
+
+    @staticmethod
+    def _row(
+        ticker: str,
+        dataset: str,
+        status: str,
+        rows: Optional[int] = None,
+        path: Optional[str] = None,
+        error: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "ticker": ticker,
+            "dataset": dataset,
+            "status": status,
+            "rows": rows,
+            "path": path,
+            "error": error,
+        }
+
+    @staticmethod
+    def _load_manifest(root: Path) -> Dict[str, Any]:
+        try:
+            return json.loads((root / MANIFEST_NAME).read_text())
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable export manifest: {str(e)}")
+            return {}
+
+    @staticmethod
+    def _save_manifest(root: Path, manifest: Dict[str, Any]) -> None:
+        root.mkdir(parents=True, exist_ok=True)
+        temporary = root / (MANIFEST_NAME + ".tmp")
+        temporary.write_text(json.dumps(manifest, indent=2, sort_keys=True))
+        os.replace(temporary, root / MANIFEST_NAME)
+
+
+# Fields of the rows reported by Exporter.export_directory
+EXPORT_FIELDS = ["ticker", "dataset", "status", "rows", "path", "error"]
+
+# Create a global instance
+exporter = Exporter()
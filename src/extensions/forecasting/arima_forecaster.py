@@ -3,12 +3,16 @@ ARIMA forecasting extension.
 Requires the optional dependency: statsmodels.
 """
 
-from typing import Dict, Any, Tuple, List
+from statistics import NormalDist
+from typing import Callable, Dict, Any, Tuple, List, Optional, Union
 import logging
 
 import pandas as pd
 import numpy as np
 
+from src.market_calendar import MarketCalendar, infer_calendar
+from src.shared_arrays import HistoryDescriptor, resolve
+
 logger = logging.getLogger(__name__)
 
 
@@ -16,27 +20,46 @@ class ForecastError(Exception):
     """Raised when a forecast cannot be produced."""
 
 
-def _infer_future_dates(index: pd.DatetimeIndex, steps: int) -> List[str]:
+class ForecastCancelled(ForecastError):
+    """Raised when a fit is stopped before the optimizer finishes."""
+
+
+def _infer_future_dates(
+    index: pd.DatetimeIndex,
+    steps: int,
+    calendar: Optional[MarketCalendar] = None
+) -> List[str]:
+    """Next `steps` sessions after the last bar, from the exchange calendar."""
     if index is None or len(index) == 0:
         raise ForecastError("No index to build forecast dates")
-    has_weekend = any(ts.weekday() >= 5 for ts in index)
-    freq = "D" if has_weekend else "B"
-    start = index[-1] + pd.Timedelta(days=1)
-    future_index = pd.date_range(start=start, periods=steps, freq=freq)
-    return future_index.strftime("%Y-%m-%d").tolist()
+    calendar = calendar or infer_calendar(pd.DatetimeIndex(index))
+    sessions = calendar.next_sessions(index[-1], steps)
+    return np.datetime_as_string(sessions, unit="D").tolist()
 
 
 def forecast_close_prices(
-    historical_data: pd.DataFrame,
+    historical_data: Union[pd.DataFrame, HistoryDescriptor],
     steps: int = 14,
     order: Tuple[int, int, int] = (1, 1, 1),
     alpha: float = 0.4,
     trend: str = "t",
-    use_log: bool = True
+    use_log: bool = True,
+    calendar: Optional[MarketCalendar] = None,
+    maxiter: Optional[int] = None,
+    should_stop: Optional[Callable[[], bool]] = None
 ) -> Dict[str, Any]:
     """
     Forecast future close prices using ARIMA.
     
+    Forecast dates are the sessions of `calendar` after the last bar
+    (default: inferred from whether the history has weekend bars).
+    The history may also be a CompactHistory or a shared-memory
+    HistoryDescriptor; its close prices are read in place.
+    
+    The optimizer runs for at most `maxiter` iterations (default: the
+    statsmodels default) and checks `should_stop` after each one,
+    raising ForecastCancelled when it returns True.
+    
     Returns a dict with:
       - dates: list[str]
       - mean: list[float]
@@ -44,7 +67,11 @@ def forecast_close_prices(
       - upper: list[float]
       - order: tuple[int, int, int]
       - steps: int
+      - method: 'arima'
+      - converged: bool
+      - iterations: int or None
     """
+    historical_data = resolve(historical_data)
     if historical_data is None or historical_data.empty:
         raise ForecastError("No historical data")
     if "Close" not in historical_data.columns:
@@ -74,7 +101,16 @@ def forecast_close_prices(
         enforce_stationarity=False,
         enforce_invertibility=False
     )
-    results = model.fit()
+    fit_options = {}
+    if maxiter is not None:
+        fit_options["maxiter"] = maxiter
+    if should_stop is not None:
+        def check_stop(params):
+            if should_stop():
+                raise ForecastCancelled("ARIMA fit cancelled")
+        fit_options["callback"] = check_stop
+    results = model.fit(method_kwargs=fit_options)
+    retvals = getattr(results, "mle_retvals", None) or {}
     forecast = results.get_forecast(steps=steps)
     
     mean = forecast.predicted_mean
@@ -87,10 +123,7 @@ def forecast_close_prices(
         lower = np.exp(lower)
         upper = np.exp(upper)
     
-    if isinstance(mean.index, pd.DatetimeIndex):
-        dates = mean.index.strftime("%Y-%m-%d").tolist()
-    else:
-        dates = _infer_future_dates(series.index, steps)
+    dates = _infer_future_dates(series.index, steps, calendar)
     
     return {
         "dates": dates,
@@ -98,5 +131,66 @@ def forecast_close_prices(
         "lower": lower.tolist(),
         "upper": upper.tolist(),
         "order": order,
-        "steps": steps
+        "steps": steps,
+        "method": "arima",
+        "converged": bool(retvals.get("converged", True)),
+        "iterations": int(retvals["iterations"]) if "iterations" in retvals else None
+    }
+
+
+def drift_forecast(
+    historical_data: Union[pd.DataFrame, HistoryDescriptor],
+    steps: int = 14,
+    alpha: float = 0.4,
+    use_log: bool = True,
+    calendar: Optional[MarketCalendar] = None
+) -> Dict[str, Any]:
+    """
+    Forecast future close prices as a random walk with drift.
+    
+    A closed-form fallback for when an ARIMA fit is too slow: the mean
+    extends the average change per bar, and the interval widens with
+    the square root of the horizon.
+    
+    Returns a dict with the keys of forecast_close_prices and method 'drift'.
+    """
+    historical_data = resolve(historical_data)
+    if historical_data is None or historical_data.empty:
+        raise ForecastError("No historical data")
+    if "Close" not in historical_data.columns:
+        raise ForecastError("Missing Close column")
+    if not (0.0 < alpha < 1.0):
+        raise ForecastError("alpha must be between 0 and 1")
+    
+    series = historical_data["Close"].dropna()
+    values = series.to_numpy(dtype=np.float64)
+    if len(values) < 3:
+        raise ForecastError("Not enough data for a drift forecast")
+    if use_log:
+        if (values <= 0).any():
+            raise ForecastError("Close values must be positive for log transform")
+        values = np.log(values)
+    
+    changes = np.diff(values)
+    horizon = np.arange(1, steps + 1)
+    mean = values[-1] + changes.mean() * horizon
+    spread = NormalDist().inv_cdf(1 - alpha / 2) * changes.std(ddof=1) * np.sqrt(horizon)
+    lower = mean - spread
+    upper = mean + spread
+    
+    if use_log:
+        mean = np.exp(mean)
+        lower = np.exp(lower)
+        upper = np.exp(upper)
+    
+    return {
+        "dates": _infer_future_dates(series.index, steps, calendar),
+        "mean": mean.tolist(),
+        "lower": lower.tolist(),
+        "upper": upper.tolist(),
+        "order": None,
+        "steps": steps,
+        "method": "drift",
+        "converged": True,
+        "iterations": 0
     }
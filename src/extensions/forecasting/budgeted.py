@@ -0,0 +1,252 @@
+"""
+Time-budgeted ARIMA forecasting.
+
+Fits run on a small thread pool with capped optimizer iterations. A
+caller waits at most its deadline; if the fit is still running, it gets
+a drift forecast flagged as a fallback while the fit keeps refining in
+the background and hands its result to a callback (typically storing it
+in the cache) when done. Background fits are cancelled once they exceed
+the refine budget. Fit time and convergence are recorded per ticker.
+"""
+
+import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeout
+from typing import Callable, Dict, Any, Optional
+
+from src.config import config
+from src.extensions.forecasting.arima_forecaster import (
+    ForecastCancelled,
+    drift_forecast,
+    forecast_close_prices
+)
+
+logger = logging.getLogger(__name__)
+
+# Keyword arguments shared by the ARIMA fit and the drift fallback
+FALLBACK_OPTIONS = ("steps", "alpha", "use_log", "calendar")
+
+
+class _TickerFitStats:
+    """Fit counters of one ticker."""
+
+    __slots__ = (
+        "fits", "not_converged", "fallbacks", "cancelled", "failed",
+        "fit_seconds", "last_fit_seconds", "last_iterations",
+    )
+
+    def __init__(self):
+        self.fits = 0
+        self.not_converged = 0
+        self.fallbacks = 0
+        self.cancelled = 0
+        self.failed = 0
+        self.fit_seconds = 0.0
+        self.last_fit_seconds = None
+        self.last_iterations = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "fits": self.fits,
+            "not_converged": self.not_converged,
+            "fallbacks": self.fallbacks,
+            "cancelled": self.cancelled,
+            "failed": self.failed,
+            "avg_fit_seconds": self.fit_seconds / self.fits if self.fits else None,
+            "last_fit_seconds": self.last_fit_seconds,
+            "last_iterations": self.last_iterations,
+        }
+
+
+class BudgetedForecaster:
+    """Runs ARIMA fits against a deadline, falling back to a drift forecast."""
+
+    def __init__(
+        self,
+        workers: int = None,
+        deadline: float = None,
+        refine_seconds: float = None,
+        maxiter: int = None
+    ):
+        """
+        Initialize the BudgetedForecaster.
+
+        Args:
+            workers: Threads running fits (default: from config)
+            deadline: Default seconds a caller waits for a fit (default: from config)
+            refine_seconds: Seconds after which a fit is cancelled (default: from config)
+            maxiter: Optimizer iteration cap (default: from config)
+        """
+        self.workers = max(1, workers or config.FORECAST_WORKERS)
+        self.deadline = config.FORECAST_DEADLINE_SECONDS if deadline is None else deadline
+        self.refine_seconds = refine_seconds or config.FORECAST_REFINE_SECONDS
+        self.maxiter = maxiter or config.FORECAST_MAXITER
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Dict[str, Future] = {}
+        self._refining: set = set()
+        self._closing = threading.Event()
+        self._lock = threading.Lock()
+        self._stats: Dict[str, _TickerFitStats] = {}
+
+    def _ticker_stats(self, ticker: str) -> _TickerFitStats:
+        """Counters of a ticker (caller holds the lock)."""
+        stats = self._stats.get(ticker)
+        if stats is None:
+            stats = self._stats[ticker] = _TickerFitStats()
+        return stats
+
+    def _fit(self, ticker: str, historical_data, options: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one fit, cancelling it past the refine budget, and record its statistics."""
+        started = time.monotonic()
+        stop_at = started + self.refine_seconds
+        try:
+            result = forecast_close_prices(
+                historical_data,
+                maxiter=self.maxiter,
+                should_stop=lambda: self._closing.is_set() or time.monotonic() > stop_at,
+                **options
+            )
+        except ForecastCancelled:
+            with self._lock:
+                self._ticker_stats(ticker).cancelled += 1
+            raise
+        except Exception:
+            with self._lock:
+                self._ticker_stats(ticker).failed += 1
+            raise
+        elapsed = time.monotonic() - started
+        result["fit_seconds"] = round(elapsed, 4)
+        with self._lock:
+            stats = self._ticker_stats(ticker)
+            stats.fits += 1
+            stats.fit_seconds += elapsed
+            stats.last_fit_seconds = elapsed
+            stats.last_iterations = result.get("iterations")
+            if not result.get("converged", True):
+                stats.not_converged += 1
+        if not result.get("converged", True):
+            logger.info(f"ARIMA fit for {ticker} stopped at {self.maxiter} iterations")
+        return result
+
+    def _submit(
+        self,
+        key: str,
+        ticker: str,
+        historical_data,
+        options: Dict[str, Any],
+        on_refined: Optional[Callable[[Dict[str, Any]], Any]]
+    ) -> Future:
+        """Start a fit for a key, or join the one already running."""
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                return future
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.workers, thread_name_prefix="forecast"
+                )
+            future = self._executor.submit(self._fit, ticker, historical_data, options)
+            self._inflight[key] = future
+
+        def finished(done: Future) -> None:
+            with self._lock:
+                self._inflight.pop(key, None)
+                self._refining.discard(key)
+            if done.cancelled() or done.exception() is not None:
+                return
+            if on_refined is not None:
+                try:
+                    on_refined(done.result())
+                except Exception as e:
+                    logger.warning(f"Cannot store refined forecast for {ticker}: {str(e)}")
+
+        future.add_done_callback(finished)
+        return future
+
+    def forecast(
+        self,
+        ticker: str,
+        historical_data,
+        key: str = None,
+        deadline: float = None,
+        on_refined: Callable[[Dict[str, Any]], Any] = None,
+        **options
+    ) -> Dict[str, Any]:
+        """
+        Forecast within a time budget.
+
+        Args:
+            ticker: Ticker symbol (statistics are kept per ticker)
+            historical_data: History accepted by forecast_close_prices
+            key: Identifies the data, so concurrent callers share one fit
+                (default: the ticker)
+            deadline: Seconds to wait for the fit (default: the forecaster's)
+            on_refined: Called with the ARIMA result when a fit that missed
+                the deadline completes
+            **options: Arguments of forecast_close_prices (steps, order,
+                alpha, trend, use_log, calendar)
+
+        Returns:
+            ARIMA forecast, or a drift forecast with 'fallback': True
+
+        Raises:
+            ForecastError: If neither forecast can be produced
+        """
+        key = key or ticker
+        deadline = self.deadline if deadline is None else deadline
+        with self._lock:
+            refining = key in self._refining
+        if not refining:
+            future = self._submit(key, ticker, historical_data, options, on_refined)
+            try:
+                return future.result(timeout=deadline)
+            except FutureTimeout:
+                with self._lock:
+                    if not future.done():
+                        self._refining.add(key)
+
+        fallback = drift_forecast(
+            historical_data,
+            **{name: options[name] for name in FALLBACK_OPTIONS if name in options}
+        )
+        fallback["fallback"] = True
+        with self._lock:
+            self._ticker_stats(ticker).fallbacks += 1
+        return fallback
+
+    def shutdown(self) -> None:
+        """Cancel running fits and stop the worker threads."""
+        self._closing.set()
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return fit counters overall and per ticker.
+
+        Returns:
+            Dictionary suitable for a monitoring endpoint
+        """
+        with self._lock:
+            tickers = {ticker: stats.to_dict() for ticker, stats in self._stats.items()}
+            running = len(self._inflight)
+            refining = len(self._refining)
+        totals = {
+            name: sum(stats[name] for stats in tickers.values())
+            for name in ("fits", "not_converged", "fallbacks", "cancelled", "failed")
+        }
+        return {
+            **totals,
+            "running": running,
+            "refining": refining,
+            "deadline_seconds": self.deadline,
+            "maxiter": self.maxiter,
+            "tickers": tickers,
+        }
+
+
+# Create a global instance
+budgeted_forecaster = BudgetedForecaster()
@@ -0,0 +1,3 @@
+"""
+Simulation extensions (optional).
+"""
@@ -0,0 +1,236 @@
+"""
+Monte Carlo price simulation extension.
+
+Paths are calibrated on the historical Close series, either as geometric
+Brownian motion (normal log returns) or by bootstrapping observed log
+returns. Paths are generated in fixed-size NumPy chunks and reduced into
+per-step histograms, so memory does not grow with the number of paths.
+"""
+
+from typing import Dict, Any, Optional, Sequence
+import logging
+
+import pandas as pd
+import numpy as np
+
+from src.extensions.forecasting.arima_forecaster import _infer_future_dates
+from src.market_calendar import MarketCalendar
+
+logger = logging.getLogger(__name__)
+
+METHODS = ("gbm", "bootstrap")
+
+# Histogram resolution per step and its half-width in standard deviations
+HISTOGRAM_BINS = 4096
+HISTOGRAM_SIGMAS = 8.0
+
+# Largest horizon simulated; each chunk holds chunk_size x steps values
+MAX_STEPS = 252
+
+
+class SimulationError(Exception):
+    """Raised when a simulation cannot be produced."""
+
+
+def calibrate(historical_data: pd.DataFrame) -> Dict[str, Any]:
+    """
+    Estimate per-bar log-return parameters from the Close series.
+
+    Returns a dict with:
+      - start_price: float (last close)
+      - mu: float (mean log return per bar)
+      - sigma: float (std of log returns per bar)
+      - log_returns: np.ndarray (observed log returns, for bootstrapping)
+    """
+    if historical_data is None or historical_data.empty:
+        raise SimulationError("No historical data")
+    if "Close" not in historical_data.columns:
+        raise SimulationError("Missing Close column")
+
+    closes = historical_data["Close"].dropna().to_numpy(dtype=np.float64)
+    if len(closes) < 20:
+        raise SimulationError("Not enough data for simulation")
+    if (closes <= 0).any():
+        raise SimulationError("Close values must be positive")
+
+    log_returns = np.diff(np.log(closes))
+    return {
+        "start_price": float(closes[-1]),
+        "mu": float(log_returns.mean()),
+        "sigma": float(log_returns.std(ddof=1)),
+        "log_returns": log_returns,
+    }
+
+
+def _chunk_log_returns(
+    method: str,
+    params: Dict[str, Any],
+    paths: int,
+    steps: int,
+    rng: np.random.Generator
+) -> np.ndarray:
+    """Draw a (paths x steps) block of per-bar log returns."""
+    if method == "gbm":
+        return rng.normal(params["mu"], params["sigma"], size=(paths, steps))
+    observed = params["log_returns"]
+    return observed[rng.integers(0, len(observed), size=(paths, steps))]
+
+
+def _histogram_quantile(counts: np.ndarray, edges: np.ndarray, q: float) -> float:
+    """Quantile of a histogram, interpolating linearly within the bin."""
+    cumulative = np.cumsum(counts)
+    target = q * cumulative[-1]
+    position = int(np.searchsorted(cumulative, target, side="left"))
+    position = min(position, len(counts) - 1)
+    below = cumulative[position - 1] if position > 0 else 0
+    fraction = (target - below) / counts[position] if counts[position] else 0.0
+    return float(edges[position] + fraction * (edges[position + 1] - edges[position]))
+
+
+def _histogram_tail_mean(
+    counts: np.ndarray,
+    sums: np.ndarray,
+    edges: np.ndarray,
+    q: float
+) -> float:
+    """Mean of the values below the q-quantile, using exact per-bin sums."""
+    cumulative = np.cumsum(counts)
+    target = q * cumulative[-1]
+    position = min(int(np.searchsorted(cumulative, target, side="left")), len(counts) - 1)
+    below = cumulative[position - 1] if position > 0 else 0
+    partial = (target - below) / counts[position] if counts[position] else 0.0
+    total = sums[:position].sum() + partial * sums[position]
+    count = below + partial * counts[position]
+    return float(total / count) if count > 0 else float(edges[0])
+
+
+def simulate_close_prices(
+    historical_data: pd.DataFrame,
+    steps: int = 14,
+    paths: int = 100_000,
+    method: str = "gbm",
+    alpha: float = 0.2,
+    confidence: float = 0.95,
+    levels: Optional[Sequence[float]] = None,
+    chunk_size: int = 10_000,
+    seed: Optional[int] = None,
+    calendar: Optional[MarketCalendar] = None,
+    max_steps: int = MAX_STEPS
+) -> Dict[str, Any]:
+    """
+    Simulate future close prices with Monte Carlo paths.
+
+    Quantile bands use the same two-sided convention as the ARIMA
+    forecast: lower/upper are the alpha/2 and 1 - alpha/2 quantiles.
+    Value at risk and expected shortfall are reported as positive losses
+    of the simple return over the whole horizon. Touch probabilities are
+    monitored on simulated closes only. Dates are the next sessions of
+    `calendar` (default: inferred from the history).
+
+    Returns a dict with:
+      - dates: list[str]
+      - mean: list[float]
+      - lower: list[float]
+      - upper: list[float]
+      - median: list[float]
+      - method: str
+      - paths: int
+      - steps: int
+      - start_price: float
+      - risk: dict (confidence, var, expected_shortfall)
+      - touch_probabilities: list[dict] (level, probability)
+    """
+    if method not in METHODS:
+        raise SimulationError(f"Unsupported method: {method}")
+    if steps < 1 or paths < 1 or chunk_size < 1:
+        raise SimulationError("steps, paths and chunk_size must be positive")
+    if steps > max_steps:
+        raise SimulationError(f"steps must be at most {max_steps}")
+    if not (0.0 < alpha < 1.0):
+        raise SimulationError("alpha must be between 0 and 1")
+    if not (0.0 < confidence < 1.0):
+        raise SimulationError("confidence must be between 0 and 1")
+
+    params = calibrate(historical_data)
+    start_price = params["start_price"]
+    levels = np.array(sorted(levels or []), dtype=np.float64)
+    if not np.isfinite(levels).all() or (levels <= 0).any():
+        raise SimulationError("Levels must be positive finite numbers")
+    log_levels = np.log(levels / start_price)
+    above = log_levels >= 0
+
+    # Fixed per-step histogram ranges in cumulative log return, wide enough
+    # that clipping only ever touches far-tail bins
+    horizon = np.arange(1, steps + 1)
+    scale = max(params["sigma"], 1e-12)
+    if method == "bootstrap":
+        scale = max(scale, np.abs(params["log_returns"] - params["mu"]).max() / HISTOGRAM_SIGMAS)
+    half_width = HISTOGRAM_SIGMAS * scale * np.sqrt(horizon)
+    low = params["mu"] * horizon - half_width
+    bin_width = 2 * half_width / HISTOGRAM_BINS
+    step_offsets = np.arange(steps) * HISTOGRAM_BINS
+
+    counts = np.zeros(steps * HISTOGRAM_BINS)
+    price_sum = np.zeros(steps)
+    terminal_sums = np.zeros(HISTOGRAM_BINS)
+    touches = np.zeros(len(levels))
+    rng = np.random.default_rng(seed)
+
+    remaining = paths
+    while remaining > 0:
+        size = min(chunk_size, remaining)
+        remaining -= size
+        log_paths = np.cumsum(_chunk_log_returns(method, params, size, steps, rng), axis=1)
+
+        bins = np.floor((log_paths - low) / bin_width).astype(np.int64)
+        np.clip(bins, 0, HISTOGRAM_BINS - 1, out=bins)
+        counts += np.bincount((bins + step_offsets).ravel(), minlength=counts.size)
+        price_sum += np.exp(log_paths).sum(axis=0)
+        terminal_sums += np.bincount(
+            bins[:, -1],
+            weights=np.expm1(log_paths[:, -1]),
+            minlength=HISTOGRAM_BINS
+        )
+
+        if len(levels):
+            highs = log_paths.max(axis=1)[:, None]
+            lows = log_paths.min(axis=1)[:, None]
+            touched = np.where(above, highs >= log_levels, lows <= log_levels)
+            touches += touched.sum(axis=0)
+
+    counts = counts.reshape(steps, HISTOGRAM_BINS)
+    lower, median, upper = [], [], []
+    for step in range(steps):
+        edges = low[step] + bin_width[step] * np.arange(HISTOGRAM_BINS + 1)
+        for quantile, values in ((alpha / 2, lower), (0.5, median), (1 - alpha / 2, upper)):
+            log_quantile = _histogram_quantile(counts[step], edges, quantile)
+            values.append(start_price * float(np.exp(log_quantile)))
+
+    # Horizon returns are monotone in the log-return bins of the last step
+    terminal_edges = np.expm1(low[-1] + bin_width[-1] * np.arange(HISTOGRAM_BINS + 1))
+    tail = 1.0 - confidence
+    var = -_histogram_quantile(counts[-1], terminal_edges, tail)
+    expected_shortfall = -_histogram_tail_mean(counts[-1], terminal_sums, terminal_edges, tail)
+
+    dates = _infer_future_dates(historical_data.index, steps, calendar)
+
+    return {
+        "dates": dates,
+        "mean": (start_price * price_sum / paths).tolist(),
+        "lower": lower,
+        "upper": upper,
+        "median": median,
+        "method": method,
+        "paths": paths,
+        "steps": steps,
+        "start_price": start_price,
+        "risk": {
+            "confidence": confidence,
+            "var": var,
+            "expected_shortfall": expected_shortfall,
+        },
+        "touch_probabilities": [
+            {"level": float(level), "probability": float(count / paths)}
+            for level, count in zip(levels, touches)
+        ],
+    }
@@ -0,0 +1,269 @@
+"""
+HTTP caching helpers for analysis responses.
+Builds ETags, chooses Cache-Control lifetimes from market hours
+and compresses response bodies (gzip, or brotli when installed).
+"""
+
+import gzip
+import hashlib
+from datetime import datetime, time, timedelta
+from typing import Optional
+
+from zoneinfo import ZoneInfo
+
+try:
+    import brotli
+except ImportError:  # Optional dependency
+    brotli = None
+
+from src import __version__
+from src.config import config
+
+# Approximate bar length in seconds for each supported interval
+INTERVAL_SECONDS = {
+    "1m": 60,
+    "2m": 120,
+    "5m": 300,
+    "15m": 900,
+    "30m": 1800,
+    "60m": 3600,
+    "90m": 5400,
+    "1h": 3600,
+    "1d": 86400,
+    "5d": 5 * 86400,
+    "1wk": 7 * 86400,
+    "1mo": 30 * 86400,
+    "3mo": 90 * 86400,
+}
+
+# Regular trading session of US equity exchanges
+MARKET_TIMEZONE = ZoneInfo("America/New_York")
+MARKET_OPEN = time(9, 30)
+MARKET_CLOSE = time(16, 0)
+
+COMPRESSIBLE_MIMETYPES = ("application/json", "text/html", "text/css", "text/plain", "text/csv")
+
+
+def compute_etag(
+    ticker: str,
+    period: str,
+    interval: str,
+    last_bar: datetime,
+    last_close: Optional[float] = None
+) -> str:
+    """
+    Build the ETag value of an analysis response.
+
+    Responses send it as a weak validator, since every content-coding
+    of a response carries the same tag.
+
+    The tag changes whenever a new bar arrives, the running bar's close
+    moves, the request parameters differ or the application/forecast
+    settings change.
+
+    Args:
+        ticker: Ticker symbol
+        period: Period of historical data
+        interval: Data interval
+        last_bar: Timestamp of the latest bar in the history
+        last_close: Close of the latest bar, which keeps changing while
+            the bar is still running
+
+    Returns:
+        Opaque ETag value (without quotes)
+    """
+    parts = [
+        __version__,
+        ticker,
+        period,
+        interval,
+        last_bar.isoformat(),
+        str(config.ENABLE_ARIMA_FORECAST),
+        str(config.FORECAST_STEPS),
+        str(config.ARIMA_ORDER),
+    ]
+    if last_close is not None:
+        parts.append(repr(float(last_close)))
+    return hashlib.sha256("|".join(parts).encode("utf-8")).hexdigest()[:32]
+
+
+def history_key(ticker: str, period: str, interval: str, history) -> str:
+    """
+    ETag and cache key of a fetched history.
+
+    Every cache entry derived from a history (statistics, forecasts,
+    exports) and the analysis ETag are keyed through this function, so
+    they all move together with the last bar and its close.
+
+    Args:
+        ticker: Ticker symbol
+        period: Period of historical data
+        interval: Data interval
+        history: DataFrame with a 'Close' column (or its newest page)
+
+    Returns:
+        Opaque key (see compute_etag)
+    """
+    return compute_etag(ticker, period, interval, history.index[-1], history["Close"].iloc[-1])
+
+
+def is_market_open(now: Optional[datetime] = None, is_crypto: bool = False) -> bool:
+    """
+    Check whether the market is in its regular session.
+
+    Args:
+        now: Current time (default: now); naive values are treated as UTC
+        is_crypto: Cryptocurrencies trade around the clock
+
+    Returns:
+        True if new bars are currently being produced
+    """
+    if is_crypto:
+        return True
+    now = _to_market_time(now)
+    if now.weekday() >= 5:
+        return False
+    return MARKET_OPEN <= now.time() < MARKET_CLOSE
+
+
+def seconds_until_open(now: Optional[datetime] = None) -> int:
+    """
+    Seconds until the next regular session opens (0 if open now).
+
+    Exchange holidays are not considered, so the result may be short.
+
+    Args:
+        now: Current time (default: now); naive values are treated as UTC
+
+    Returns:
+        Number of seconds
+    """
+    now = _to_market_time(now)
+    if is_market_open(now):
+        return 0
+    candidate = now.replace(
+        hour=MARKET_OPEN.hour, minute=MARKET_OPEN.minute, second=0, microsecond=0
+    )
+    if now.time() >= MARKET_OPEN:
+        candidate += timedelta(days=1)
+    while candidate.weekday() >= 5:
+        candidate += timedelta(days=1)
+    return int((candidate - now).total_seconds())
+
+
+def cache_max_age(
+    interval: str,
+    is_crypto: bool = False,
+    now: Optional[datetime] = None
+) -> int:
+    """
+    Choose a Cache-Control max-age for an analysis response.
+
+    While the market is open the response is valid until the next bar is
+    expected (the running daily bar keeps changing, so it is capped).
+    While closed it is valid until the next open, within a configured cap.
+
+    Args:
+        interval: Data interval of the response
+        is_crypto: Cryptocurrencies trade around the clock
+        now: Current time (default: now)
+
+    Returns:
+        Lifetime in seconds
+    """
+    bar_seconds = INTERVAL_SECONDS.get(interval, INTERVAL_SECONDS["1d"])
+    if is_market_open(now, is_crypto):
+        max_age = min(bar_seconds, config.HTTP_CACHE_MAX_AGE_OPEN)
+    else:
+        max_age = min(seconds_until_open(now), config.HTTP_CACHE_MAX_AGE_CLOSED)
+    return max(config.HTTP_CACHE_MIN_AGE, max_age)
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    Pick the best supported content coding from an Accept-Encoding header.
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+
+    Returns:
+        'br', 'gzip' or None
+    """
+    accepted = {}
+    for item in (accept_encoding or "").split(","):
+        name, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if name:
+            accepted[name.strip().lower()] = quality
+    if brotli is not None and accepted.get("br", 0) > 0:
+        return "br"
+    if accepted.get("gzip", 0) > 0 or accepted.get("*", 0) > 0:
+        return "gzip"
+    return None
+
+
+def compress_body(body: bytes, encoding: str) -> bytes:
+    """
+    Compress a response body with the given content coding.
+
+    Args:
+        body: Uncompressed bytes
+        encoding: 'br' or 'gzip'
+
+    Returns:
+        Compressed bytes
+    """
+    if encoding == "br":
+        return brotli.compress(body, quality=config.HTTP_BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=config.HTTP_GZIP_LEVEL)
+
+
+def compress_response(response, accept_encoding: str):
+    """
+    Compress a Flask response in place when the client supports it.
+
+    Streaming, small, non-2xx and already encoded responses are left alone.
+
+    Args:
+        response: Flask response object
+        accept_encoding: Raw Accept-Encoding header of the request
+
+    Returns:
+        The same response object
+    """
+    if (
+        response.direct_passthrough or
+        response.is_streamed or
+        response.status_code < 200 or response.status_code >= 300 or
+        "Content-Encoding" in response.headers or
+        response.mimetype not in COMPRESSIBLE_MIMETYPES
+    ):
+        return response
+
+    response.vary.add("Accept-Encoding")
+    body = response.get_data()
+    if len(body) < config.HTTP_COMPRESS_MIN_SIZE:
+        return response
+
+    encoding = choose_encoding(accept_encoding)
+    if encoding is None:
+        return response
+
+    response.set_data(compress_body(body, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def _to_market_time(now: Optional[datetime]) -> datetime:
+    """Convert a timestamp to exchange local time."""
+    if now is None:
+        return datetime.now(MARKET_TIMEZONE)
+    if now.tzinfo is None:
+        now = now.replace(tzinfo=ZoneInfo("UTC"))
+    return now.astimezone(MARKET_TIMEZONE)
@@ -0,0 +1,254 @@
+"""
+Exchange calendars with precomputed session arrays.
+
+Each calendar builds a sorted datetime64[D] array of its trading
+sessions once (weekmask minus regular holidays) and is cached per
+process. Lookups such as the next N sessions after a date are binary
+searches into that array, so they are vectorized over many dates.
+Only regular holidays are modelled; unscheduled closures are not.
+"""
+
+import logging
+import threading
+from datetime import date
+from typing import Dict, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    Holiday,
+    GoodFriday,
+    EasterMonday,
+    USMartinLutherKingJr,
+    USPresidentsDay,
+    USMemorialDay,
+    USLaborDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday,
+    next_monday,
+    next_monday_or_tuesday,
+)
+from pandas.tseries.offsets import DateOffset
+from dateutil.relativedelta import MO
+
+from src.utils import is_crypto_ticker
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+FIRST_YEAR = 1970
+YEARS_AHEAD = 10
+
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """Regular NYSE/Nasdaq holidays."""
+
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01",
+                observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday),
+    ]
+
+
+class LSEHolidayCalendar(AbstractHolidayCalendar):
+    """Regular London Stock Exchange holidays."""
+
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=next_monday),
+        GoodFriday,
+        EasterMonday,
+        Holiday("Early May Bank Holiday", month=5, day=1, offset=DateOffset(weekday=MO(1))),
+        Holiday("Spring Bank Holiday", month=5, day=31, offset=DateOffset(weekday=MO(-1))),
+        Holiday("Summer Bank Holiday", month=8, day=31, offset=DateOffset(weekday=MO(-1))),
+        Holiday("Christmas Day", month=12, day=25, observance=next_monday),
+        Holiday("Boxing Day", month=12, day=26, observance=next_monday_or_tuesday),
+    ]
+
+
+# Calendar name -> (weekmask, holiday calendar class or None)
+CALENDAR_RULES = {
+    "XNYS": ("1111100", NYSEHolidayCalendar),
+    "XLON": ("1111100", LSEHolidayCalendar),
+    "WEEKDAYS": ("1111100", None),
+    "24/7": ("1111111", None),
+}
+
+# yfinance `exchange` codes -> calendar name
+EXCHANGE_CALENDARS = {
+    "NMS": "XNYS",
+    "NGM": "XNYS",
+    "NCM": "XNYS",
+    "NAS": "XNYS",
+    "NYQ": "XNYS",
+    "NYS": "XNYS",
+    "ASE": "XNYS",
+    "PCX": "XNYS",
+    "BTS": "XNYS",
+    "PNK": "XNYS",
+    "LSE": "XLON",
+    "IOB": "XLON",
+    "CCC": "24/7",
+}
+
+DateLike = Union[str, date, np.datetime64, pd.Timestamp]
+
+
+def _to_day(value: DateLike) -> np.datetime64:
+    """Convert a date-like value to datetime64[D] in its own local date."""
+    return np.datetime64(pd.Timestamp(value).date(), "D")
+
+
+def _to_days(values) -> np.ndarray:
+    """Convert date-likes (tz-aware ones in their local date) to datetime64[D]."""
+    index = pd.DatetimeIndex(values)
+    if index.tz is not None:
+        index = index.tz_localize(None)
+    return index.to_numpy().astype("datetime64[D]")
+
+
+class MarketCalendar:
+    """Trading sessions of one exchange."""
+
+    def __init__(self, name: str, first_year: int = FIRST_YEAR, last_year: int = None):
+        """
+        Initialize the MarketCalendar and precompute its sessions.
+
+        Args:
+            name: Calendar name, a key of CALENDAR_RULES
+            first_year: First year of precomputed sessions
+            last_year: Last year of precomputed sessions (default: YEARS_AHEAD from now)
+        """
+        if name not in CALENDAR_RULES:
+            raise ValueError(f"Unknown calendar: {name}")
+        self.name = name
+        self.weekmask, holiday_calendar = CALENDAR_RULES[name]
+        last_year = last_year or date.today().year + YEARS_AHEAD
+        start = np.datetime64(f"{first_year}-01-01", "D")
+        end = np.datetime64(f"{last_year + 1}-01-01", "D")
+
+        if holiday_calendar is not None:
+            holidays = holiday_calendar().holidays(
+                start=str(start), end=str(end)
+            ).to_numpy().astype("datetime64[D]")
+        else:
+            holidays = np.empty(0, dtype="datetime64[D]")
+        self.holidays = np.unique(holidays)
+
+        days = np.arange(start, end, dtype="datetime64[D]")
+        is_session = np.is_busday(days, weekmask=self.weekmask, holidays=self.holidays)
+        self.sessions = days[is_session]
+        self.sessions.flags.writeable = False
+
+    @property
+    def trades_weekends(self) -> bool:
+        return self.weekmask[5:] != "00"
+
+    def is_session(self, dates: Sequence[DateLike]) -> np.ndarray:
+        """Vectorized check whether dates are trading sessions."""
+        days = _to_days(dates)
+        positions = np.searchsorted(self.sessions, days)
+        positions = np.minimum(positions, len(self.sessions) - 1)
+        return self.sessions[positions] == days
+
+    def next_sessions(self, after: DateLike, count: int) -> np.ndarray:
+        """
+        Return the first `count` sessions strictly after a date.
+
+        Args:
+            after: Reference date (e.g. the last bar)
+            count: Number of sessions
+
+        Returns:
+            datetime64[D] array of length count
+        """
+        return self.next_sessions_many([pd.Timestamp(after)], count)[0]
+
+    def next_sessions_many(self, after: Sequence[DateLike], count: int) -> np.ndarray:
+        """
+        Vectorized next-N-sessions lookup for many reference dates.
+
+        Args:
+            after: Reference dates
+            count: Sessions per reference date
+
+        Returns:
+            datetime64[D] array of shape (len(after), count)
+        """
+        start = np.searchsorted(self.sessions, _to_days(after), side="right")
+        positions = start[:, None] + np.arange(count)
+        if positions.size and positions.max() >= len(self.sessions):
+            raise ValueError(f"Calendar {self.name} does not extend that far")
+        return self.sessions[positions]
+
+    def closed_days(self, start: DateLike, end: DateLike) -> np.ndarray:
+        """Weekdays of the weekmask that are holidays, within [start, end]."""
+        low, high = _to_day(start), _to_day(end)
+        return self.holidays[(self.holidays >= low) & (self.holidays <= high)]
+
+    def rangebreaks(self, start: DateLike, end: DateLike) -> List[Dict]:
+        """
+        Plotly x-axis rangebreaks hiding non-session days.
+
+        Args:
+            start: First date on the axis
+            end: Last date on the axis
+
+        Returns:
+            List of rangebreak dicts (empty for 24/7 markets)
+        """
+        breaks = []
+        if not self.trades_weekends:
+            breaks.append({"bounds": ["sat", "mon"]})
+        holidays = self.closed_days(start, end)
+        if len(holidays):
+            breaks.append({"values": np.datetime_as_string(holidays, unit="D").tolist()})
+        return breaks
+
+
+_calendars: Dict[str, MarketCalendar] = {}
+_calendars_lock = threading.Lock()
+
+
+def get_calendar(name: str) -> MarketCalendar:
+    """Return the cached calendar of that name, building it on first use."""
+    with _calendars_lock:
+        calendar = _calendars.get(name)
+        if calendar is None:
+            calendar = MarketCalendar(name)
+            _calendars[name] = calendar
+            logger.info(f"Built {name} calendar with {len(calendar.sessions)} sessions")
+        return calendar
+
+
+def calendar_for_exchange(exchange: Optional[str], ticker: str = None) -> MarketCalendar:
+    """
+    Pick the calendar for a yfinance exchange code.
+
+    Args:
+        exchange: company_info['exchange'] (e.g. 'NMS', 'NYQ', 'CCC')
+        ticker: Ticker symbol, used when the exchange is unknown
+
+    Returns:
+        MarketCalendar (weekdays without holidays for unknown exchanges)
+    """
+    name = EXCHANGE_CALENDARS.get((exchange or "").upper())
+    if name is None:
+        name = "24/7" if ticker and is_crypto_ticker(ticker) else "WEEKDAYS"
+    return get_calendar(name)
+
+
+def infer_calendar(index: pd.DatetimeIndex) -> MarketCalendar:
+    """Guess a calendar from bar dates: 24/7 if any bar falls on a weekend."""
+    if index is not None and len(index) and (index.dayofweek >= 5).any():
+        return get_calendar("24/7")
+    return get_calendar("WEEKDAYS")
@@ -0,0 +1,364 @@
+"""
+Access-pattern-driven prefetching.
+
+AccessLog counts requests per (ticker, period, interval) view with
+exponential decay, so recent popularity outweighs old, and persists the
+counts to a local JSON file. At startup the Prefetcher warms the top-N
+views through the DataFetcher (history, company info and the analysis
+caches); afterwards, while traffic is low, it refreshes popular
+histories shortly before their cache entries expire. Prefetching only
+proceeds while the upstream rate limiter has tokens to spare, so user
+requests keep priority.
+"""
+
+import atexit
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from src.config import config
+from src.data_fetcher import DataFetcher, data_fetcher
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+ViewKey = Tuple[str, str, str]
+
+# Window over which the current request rate is measured
+RATE_WINDOW_SECONDS = 60.0
+
+# Exponent of the epoch weight at which scores are rebased to the current
+# time; exp() overflows a float above about 709
+REBASE_EXPONENT = 32.0
+
+
+class AccessLog:
+    """Decaying access counts per view, persisted to a JSON file."""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        half_life_hours: float = None,
+        max_keys: int = None
+    ):
+        """
+        Initialize the AccessLog.
+
+        Args:
+            path: JSON file the counts are saved to (None: not persisted)
+            half_life_hours: Hours after which a count has half its weight
+            max_keys: Views retained; the least popular are dropped beyond it
+        """
+        self.path = Path(path) if path else None
+        half_life = (half_life_hours or config.ACCESS_LOG_HALF_LIFE_HOURS) * 3600
+        self.decay = math.log(2) / half_life
+        self.max_keys = max_keys or config.ACCESS_LOG_MAX_KEYS
+        # Scores are stored relative to an epoch and scaled by
+        # exp(decay * (t - epoch)), so recording never rescales old entries;
+        # the epoch is moved forward before the weights grow too large
+        self.epoch = time.time()
+        self._scores: Dict[ViewKey, float] = {}
+        self._recent: deque = deque()
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _weight(self, at: float) -> float:
+        """Weight of an event at `at` relative to the epoch (caller holds the lock)."""
+        if self.decay * (at - self.epoch) > REBASE_EXPONENT:
+            self._rebase(at)
+        return math.exp(self.decay * (at - self.epoch))
+
+    def _rebase(self, at: float) -> None:
+        """Move the epoch to `at` and rescale the stored scores (caller holds the lock)."""
+        scale = math.exp(-self.decay * (at - self.epoch))
+        self._scores = {key: score * scale for key, score in self._scores.items()}
+        self.epoch = at
+
+    def record(self, ticker: str, period: str, interval: str) -> None:
+        """Count one request for a view."""
+        now = time.time()
+        key = (ticker, period, interval)
+        with self._lock:
+            self._scores[key] = self._scores.get(key, 0.0) + self._weight(now)
+            self._recent.append(now)
+            self._dirty = True
+            if len(self._scores) > self.max_keys * 1.1:
+                self._prune()
+
+    def _prune(self) -> None:
+        """Keep the max_keys most popular views (caller holds the lock)."""
+        ranked = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)
+        self._scores = dict(ranked[:self.max_keys])
+
+    def top(self, count: int) -> List[Tuple[ViewKey, float]]:
+        """
+        Return the most requested views.
+
+        Args:
+            count: Number of views
+
+        Returns:
+            List of (view, decayed request count), most popular first
+        """
+        with self._lock:
+            scale = 1.0 / self._weight(time.time())
+            ranked = sorted(self._scores.items(), key=lambda item: item[1], reverse=True)
+        return [(key, score * scale) for key, score in ranked[:count]]
+
+    def request_rate(self) -> float:
+        """Requests per second over the last minute."""
+        cutoff = time.time() - RATE_WINDOW_SECONDS
+        with self._lock:
+            while self._recent and self._recent[0] < cutoff:
+                self._recent.popleft()
+            return len(self._recent) / RATE_WINDOW_SECONDS
+
+    def save(self) -> bool:
+        """
+        Write the counts to the log file if they changed.
+
+        The file is replaced atomically, so a crash never leaves a
+        truncated log behind.
+
+        Returns:
+            True if the file was written
+        """
+        if self.path is None:
+            return False
+        now = time.time()
+        with self._lock:
+            if not self._dirty:
+                return False
+            scale = 1.0 / self._weight(now)
+            entries = [
+                {"ticker": t, "period": p, "interval": i, "score": score * scale}
+                for (t, p, i), score in self._scores.items()
+            ]
+            self._dirty = False
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            temporary = self.path.with_suffix(".tmp")
+            temporary.write_text(json.dumps({"saved_at": now, "views": entries}))
+            os.replace(temporary, self.path)
+            return True
+        except OSError as e:
+            logger.error(f"Cannot save access log: {str(e)}")
+            with self._lock:
+                self._dirty = True
+            return False
+
+    def load(self) -> int:
+        """
+        Merge counts from the log file, decayed by the time since they were saved.
+
+        Returns:
+            Number of views loaded
+        """
+        if self.path is None or not self.path.exists():
+            return 0
+        try:
+            data = json.loads(self.path.read_text())
+            saved_at = min(float(data.get("saved_at", time.time())), time.time())
+            views = data.get("views", [])
+            with self._lock:
+                weight = self._weight(saved_at)
+                for view in views:
+                    key = (view["ticker"], view["period"], view["interval"])
+                    self._scores[key] = self._scores.get(key, 0.0) + float(view["score"]) * weight
+            return len(views)
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            logger.error(f"Cannot load access log: {str(e)}")
+            return 0
+
+    def __len__(self) -> int:
+        return len(self._scores)
+
+
+class Prefetcher:
+    """Warms and refreshes the most requested views in the background."""
+
+    def __init__(
+        self,
+        access_log: AccessLog,
+        fetcher: DataFetcher = None,
+        top_n: int = None,
+        poll_seconds: float = None
+    ):
+        """
+        Initialize the Prefetcher.
+
+        Args:
+            access_log: Source of view popularity
+            fetcher: DataFetcher used for upstream access (default: shared fetcher)
+            top_n: Views warmed and kept fresh (default: from config)
+            poll_seconds: Seconds between refresh passes (default: from config)
+        """
+        self.access_log = access_log
+        self.fetcher = fetcher or data_fetcher
+        self.top_n = top_n or config.PREFETCH_TOP_N
+        self.poll_seconds = poll_seconds or config.PREFETCH_INTERVAL_SECONDS
+        self._warm: Optional[Callable[[str, str, str], Any]] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._warmed = 0
+        self._refreshed = 0
+        self._deferred = 0
+        self._failed = 0
+
+    def _has_headroom(self) -> bool:
+        """True if upstream can take a prefetch without delaying user requests."""
+        if self.fetcher.upstream_headroom() >= config.PREFETCH_MIN_TOKENS:
+            return True
+        with self._lock:
+            self._deferred += 1
+        return False
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def warm_view(self, ticker: str, period: str, interval: str) -> bool:
+        """
+        Load a view into the caches.
+
+        Args:
+            ticker: Ticker symbol
+            period: Period of historical data
+            interval: Data interval
+
+        Returns:
+            True on success
+        """
+        try:
+            if self._warm is not None:
+                self._warm(ticker, period, interval)
+            else:
+                ticker_obj = self.fetcher.fetch_data(ticker, period, interval)
+                if ticker_obj is None:
+                    raise ValueError("unknown ticker")
+                self.fetcher.get_historical_data(ticker_obj, period, interval)
+            return True
+        except Exception as e:
+            logger.warning(f"Prefetch failed for {ticker} ({period}, {interval}): {str(e)}")
+            self._count("_failed")
+            return False
+
+    def warm_up(self) -> int:
+        """
+        Warm the top-N views, most popular first.
+
+        Returns:
+            Number of views warmed
+        """
+        warmed = 0
+        for (ticker, period, interval), _ in self.access_log.top(self.top_n):
+            while not self._has_headroom():
+                if self._stop.wait(1.0):
+                    return warmed
+            if self.warm_view(ticker, period, interval):
+                warmed += 1
+                self._count("_warmed")
+        logger.info(f"Prefetch warmed {warmed} views")
+        return warmed
+
+    def refresh_ahead(self) -> int:
+        """
+        Refresh popular histories that expire within the refresh-ahead window.
+
+        Stops early when upstream headroom runs out; the rest is picked
+        up by the next pass.
+
+        Returns:
+            Number of views refreshed
+        """
+        refreshed = 0
+        for (ticker, period, interval), _ in self.access_log.top(self.top_n):
+            remaining = self.fetcher.history_expires_in(ticker, period, interval)
+            if remaining is None or remaining > config.PREFETCH_REFRESH_AHEAD_SECONDS:
+                continue
+            if not self._has_headroom():
+                break
+            try:
+                ticker_obj = self.fetcher.fetch_data(ticker, period, interval)
+                if ticker_obj is None:
+                    continue
+                self.fetcher.refresh_history(ticker_obj, period, interval)
+            except Exception as e:
+                logger.warning(f"Prefetch refresh failed for {ticker}: {str(e)}")
+                self._count("_failed")
+                continue
+            if self.warm_view(ticker, period, interval):
+                refreshed += 1
+                self._count("_refreshed")
+        return refreshed
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stop.is_set()
+
+    def start(self, warm: Callable[[str, str, str], Any] = None) -> bool:
+        """
+        Load the access log and start warming in a background thread.
+
+        Args:
+            warm: Callable loading a view into all caches (default: fetch
+                its history only)
+
+        Returns:
+            True if the prefetcher was started by this call
+        """
+        with self._lock:
+            if self._thread is not None:
+                return False
+            self._warm = warm
+            self._thread = threading.Thread(target=self._run, name="prefetcher", daemon=True)
+        loaded = self.access_log.load()
+        logger.info(f"Loaded {loaded} views from the access log")
+        atexit.register(self.access_log.save)
+        self._thread.start()
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self) -> None:
+        self.warm_up()
+        while not self._stop.wait(self.poll_seconds):
+            self.access_log.save()
+            if self.access_log.request_rate() <= config.PREFETCH_IDLE_RPS:
+                self.refresh_ahead()
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return prefetch counters and the most popular views.
+
+        Returns:
+            Dictionary suitable for a monitoring endpoint
+        """
+        with self._lock:
+            state = {
+                "running": self.running,
+                "warmed": self._warmed,
+                "refreshed": self._refreshed,
+                "deferred": self._deferred,
+                "failed": self._failed,
+            }
+        state["views"] = len(self.access_log)
+        state["request_rate"] = round(self.access_log.request_rate(), 3)
+        state["top"] = [
+            {"ticker": t, "period": p, "interval": i, "score": round(score, 3)}
+            for (t, p, i), score in self.access_log.top(10)
+        ]
+        return state
+
+
+# Create global instances
+access_log = AccessLog(config.ACCESS_LOG_PATH)
+prefetcher = Prefetcher(access_log)
@@ -0,0 +1,314 @@
+"""
+Live price stream shared by all dashboard subscribers.
+One poller thread per ticker fetches recent bars from upstream and fans
+out only new bars, the revised running bar and changed statistics to
+every subscriber.
+"""
+
+import logging
+import queue
+import threading
+from typing import Dict, Any, List, Optional, Set
+
+import numpy as np
+import pandas as pd
+
+from src.config import config
+from src.data_fetcher import data_fetcher
+from src.analyzer import analyzer
+from src.batch import TickerWatcher
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Statistics compared between polls to build deltas
+DELTA_FIELDS = (
+    "current_price",
+    "high_52w",
+    "low_52w",
+    "average_price",
+    "price_change",
+    "price_change_pct",
+    "volatility",
+    "avg_30d",
+    "avg_90d",
+    "data_points",
+)
+
+
+def statistics_delta(previous: Optional[Dict[str, Any]], current: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Compute the statistics that changed between two polls.
+
+    Args:
+        previous: Statistics from the previous poll (or None)
+        current: Statistics from this poll
+
+    Returns:
+        Dictionary with the changed raw values and a 'formatted' sub-dict
+    """
+    delta = {"formatted": {}}
+    for field in DELTA_FIELDS:
+        value = current.get(field)
+        if previous is None or previous.get(field) != value:
+            delta[field] = value
+            if field in current.get("formatted", {}):
+                delta["formatted"][field] = current["formatted"][field]
+    return delta
+
+
+class Subscription:
+    """A subscriber's event queue for one or more tickers."""
+
+    def __init__(self, tickers: List[str], since: Optional[str] = None):
+        """
+        Initialize the Subscription.
+
+        Args:
+            tickers: Ticker symbols the subscriber receives events for
+            since: Last bar date ('YYYY-MM-DD') or timestamp the subscriber already has
+
+        Raises:
+            ValueError: If since is not a date or timestamp
+        """
+        self.tickers = tickers
+        self.since = pd.Timestamp(since) if since else None
+        self.events: queue.Queue = queue.Queue(maxsize=config.STREAM_QUEUE_SIZE)
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Queue an event, dropping the oldest one if the client is too slow."""
+        while True:
+            try:
+                self.events.put_nowait(event)
+                return
+            except queue.Full:
+                try:
+                    self.events.get_nowait()
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout: float) -> Optional[Dict[str, Any]]:
+        """Wait for the next event, returning None on timeout."""
+        try:
+            return self.events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class _TickerFeed:
+    """Polls one ticker and fans out updates to its subscribers."""
+
+    def __init__(self, ticker: str, interval: str, poll_seconds: float):
+        self.ticker = ticker
+        self.interval = interval
+        self.poll_seconds = poll_seconds
+        self.subscribers: Set[Subscription] = set()
+        self.history: Optional[pd.DataFrame] = None
+        self.statistics: Optional[Dict[str, Any]] = None
+        self._ticker_obj = None
+        self._currency = "USD"
+        self._window: Optional[pd.Timedelta] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(
+            target=self._run, name=f"price-stream-{ticker}", daemon=True
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    @property
+    def running(self) -> bool:
+        return not self._stop.is_set()
+
+    def add_subscriber(self, subscription: Subscription) -> None:
+        """Add a subscriber, replaying what it missed if the feed is warm."""
+        with self._lock:
+            self.subscribers.add(subscription)
+            if self.history is not None:
+                subscription.publish(self._backlog(subscription.since))
+
+    def remove_subscriber(self, subscription: Subscription) -> int:
+        """Remove a subscriber and return how many are left."""
+        with self._lock:
+            self.subscribers.discard(subscription)
+            return len(self.subscribers)
+
+    def _backlog(self, since: Optional[pd.Timestamp]) -> Dict[str, Any]:
+        """Build an event with the bars after `since` and the full statistics."""
+        history = self.history
+        if since is None:
+            history = history.iloc[0:0]
+        else:
+            index = history.index
+            if since.tzinfo is None and index.tz is not None:
+                since = since.tz_localize(index.tz)
+            elif since.tzinfo is not None and index.tz is None:
+                since = since.tz_convert(None)
+            elif index.tz is not None:
+                since = since.tz_convert(index.tz)
+            # A plain date means the subscriber has every bar of that day
+            if since == since.normalize():
+                history = history[index.normalize() > since]
+            else:
+                history = history[index > since]
+        return self._event(history, statistics_delta(None, self.statistics))
+
+    def _event(self, bars: pd.DataFrame, delta: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "ticker": self.ticker,
+            "bars": analyzer.prepare_chart_data(bars),
+            "statistics": delta,
+        }
+
+    def _load(self) -> bool:
+        """Fetch the ticker object and initial history."""
+        self._ticker_obj = data_fetcher.fetch_data(self.ticker, interval=self.interval)
+        if not self._ticker_obj:
+            return False
+        self._currency = data_fetcher.get_company_info(self._ticker_obj).get("currency", "USD")
+        history = data_fetcher.get_historical_data(self._ticker_obj, interval=self.interval)
+        if history is None or history.empty:
+            return False
+        self._window = history.index[-1] - history.index[0]
+        statistics = analyzer.calculate_statistics(history, None, self._currency)
+        with self._lock:
+            self.history = history
+            self.statistics = statistics
+            for subscription in self.subscribers:
+                subscription.publish(self._backlog(subscription.since))
+        return True
+
+    def poll(self) -> Optional[Dict[str, Any]]:
+        """
+        Fetch the latest bars and build an update event.
+
+        The previous last bar is sent again when upstream revised it (the
+        running bar of the session), so clients replace their last point.
+
+        Returns:
+            Event with new bars and changed statistics, or None if nothing changed
+        """
+        update = data_fetcher.get_recent_bars(
+            self._ticker_obj, config.STREAM_POLL_PERIOD, self.interval
+        )
+        if update is None or update.empty:
+            return None
+        with self._lock:
+            previous = self.history.iloc[-1:]
+            last_bar = previous.index[-1]
+            history = TickerWatcher.merge_history(self.history, update, self._window)
+            statistics = analyzer.calculate_statistics(history, None, self._currency)
+            delta = statistics_delta(self.statistics, statistics)
+            self.history = history
+            self.statistics = statistics
+        revised = not np.array_equal(
+            history.loc[[last_bar], previous.columns].to_numpy(dtype=np.float64),
+            previous.to_numpy(dtype=np.float64),
+            equal_nan=True
+        )
+        new_bars = history[history.index >= last_bar] if revised else history[history.index > last_bar]
+        if new_bars.empty and len(delta) == 1 and not delta["formatted"]:
+            return None
+        return self._event(new_bars, delta)
+
+    def _run(self) -> None:
+        try:
+            if not self._load():
+                logger.warning(f"Price stream for {self.ticker} could not load data")
+                self._broadcast({"ticker": self.ticker, "error": "Failed to fetch data"})
+                return
+            while not self._stop.wait(self.poll_seconds):
+                try:
+                    event = self.poll()
+                except Exception as e:
+                    logger.error(f"Price stream poll failed for {self.ticker}: {str(e)}")
+                    continue
+                if event:
+                    self._broadcast(event)
+        finally:
+            self._stop.set()
+
+    def _broadcast(self, event: Dict[str, Any]) -> None:
+        with self._lock:
+            subscribers = list(self.subscribers)
+        for subscription in subscribers:
+            subscription.publish(event)
+
+
+class PriceStreamHub:
+    """Registry of shared ticker feeds and their subscribers."""
+
+    def __init__(self, interval: str = None, poll_seconds: float = None):
+        """
+        Initialize the PriceStreamHub.
+
+        Args:
+            interval: Bar interval streamed to clients (default: from config)
+            poll_seconds: Seconds between upstream polls (default: from config)
+        """
+        self.interval = interval or config.DEFAULT_INTERVAL
+        self.poll_seconds = poll_seconds or config.STREAM_POLL_SECONDS
+        self._feeds: Dict[str, _TickerFeed] = {}
+        self._lock = threading.Lock()
+
+    def subscribe(self, tickers: List[str], since: Optional[str] = None) -> Subscription:
+        """
+        Subscribe to updates for the given tickers.
+
+        Feeds are shared: a ticker is polled once no matter how many
+        clients subscribe to it.
+
+        Args:
+            tickers: Ticker symbols
+            since: Last bar date ('YYYY-MM-DD') or timestamp the client already has
+
+        Returns:
+            Subscription receiving update events
+
+        Raises:
+            ValueError: If since is not a date or timestamp
+        """
+        subscription = Subscription(tickers, since)
+        with self._lock:
+            for ticker in tickers:
+                feed = self._feeds.get(ticker)
+                if feed is None or not feed.running:
+                    feed = _TickerFeed(ticker, self.interval, self.poll_seconds)
+                    self._feeds[ticker] = feed
+                    feed.start()
+                feed.add_subscriber(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription) -> None:
+        """
+        Remove a subscription and stop feeds nobody listens to anymore.
+
+        Args:
+            subscription: Subscription returned by subscribe()
+        """
+        with self._lock:
+            for ticker in subscription.tickers:
+                feed = self._feeds.get(ticker)
+                if feed is None:
+                    continue
+                if feed.remove_subscriber(subscription) == 0:
+                    feed.stop()
+                    del self._feeds[ticker]
+
+    def stats(self) -> Dict[str, Any]:
+        """Return feed and subscriber counts for monitoring."""
+        with self._lock:
+            return {
+                "feeds": len(self._feeds),
+                "subscribers": {
+                    ticker: len(feed.subscribers) for ticker, feed in self._feeds.items()
+                },
+            }
+
+
+# Create a global instance
+price_stream_hub = PriceStreamHub()
@@ -0,0 +1,310 @@
+"""
+Derive coarser OHLCV bars from finer ones.
+
+Intraday bins are anchored at each session's open (Yahoo labels hourly
+stock bars 9:30, 10:30, ...) and never cross a session boundary. Daily,
+weekly, monthly and quarterly bars are keyed by the exchange-local date.
+Aggregation uses ufunc.reduceat over group boundaries of the sorted
+index, so no per-bar Python loop is involved.
+"""
+
+import logging
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+INTRADAY_MINUTES = {
+    "1m": 1,
+    "2m": 2,
+    "5m": 5,
+    "15m": 15,
+    "30m": 30,
+    "60m": 60,
+    "90m": 90,
+    "1h": 60,
+}
+
+# Calendar intervals, each derivable from any finer entry of this tuple
+# except that weeks do not nest in months
+CALENDAR_INTERVALS = ("1d", "1wk", "1mo", "3mo")
+
+# How far back Yahoo serves each intraday interval
+INTRADAY_LOOKBACK_DAYS = {
+    "1m": 7,
+    "2m": 60,
+    "5m": 60,
+    "15m": 60,
+    "30m": 60,
+    "60m": 730,
+    "90m": 60,
+    "1h": 730,
+}
+
+PERIOD_OFFSETS = {
+    "1d": pd.DateOffset(days=1),
+    "5d": pd.DateOffset(days=5),
+    "1mo": pd.DateOffset(months=1),
+    "3mo": pd.DateOffset(months=3),
+    "6mo": pd.DateOffset(months=6),
+    "1y": pd.DateOffset(years=1),
+    "2y": pd.DateOffset(years=2),
+    "5y": pd.DateOffset(years=5),
+    "10y": pd.DateOffset(years=10),
+}
+
+DAY_NS = 86400 * 10**9
+MINUTE_NS = 60 * 10**9
+
+
+class ResampleError(ValueError):
+    """Raised when bars cannot be derived from the given source."""
+
+
+def _fineness(interval: str) -> float:
+    """Sort key ordering intervals from finest to coarsest (in minutes)."""
+    if interval in INTRADAY_MINUTES:
+        return INTRADAY_MINUTES[interval]
+    if interval in CALENDAR_INTERVALS:
+        return interval_days(interval) * 1440.0
+    return float("inf")
+
+
+def interval_days(interval: str) -> float:
+    """Calendar days covered by one bar of the interval."""
+    if interval in INTRADAY_MINUTES:
+        return INTRADAY_MINUTES[interval] / 1440.0
+    return {"1d": 1.0, "5d": 5.0, "1wk": 7.0, "1mo": 31.0, "3mo": 92.0}.get(interval, 1.0)
+
+
+def can_derive(source: str, target: str) -> bool:
+    """
+    Check whether bars of the target interval can be built from the source.
+
+    Args:
+        source: Interval of the available bars
+        target: Requested interval
+
+    Returns:
+        True if every target bar is a union of whole source bars
+    """
+    if source == target:
+        return True
+    if source in INTRADAY_MINUTES:
+        if target in INTRADAY_MINUTES:
+            return INTRADAY_MINUTES[target] % INTRADAY_MINUTES[source] == 0
+        return target in CALENDAR_INTERVALS
+    if source in CALENDAR_INTERVALS and target in CALENDAR_INTERVALS:
+        if source == "1wk":
+            return False
+        return CALENDAR_INTERVALS.index(target) > CALENDAR_INTERVALS.index(source)
+    return False
+
+
+def period_days(period: str, now: Optional[datetime] = None) -> float:
+    """
+    Approximate calendar days spanned by a period string.
+
+    Args:
+        period: Period string such as '5d', '1y', 'ytd' or 'max'
+        now: Reference time for 'ytd' (default: now)
+
+    Returns:
+        Number of days, infinity for 'max'
+    """
+    if period == "max":
+        return float("inf")
+    now = pd.Timestamp(now or datetime.now())
+    if period == "ytd":
+        return float((now - pd.Timestamp(year=now.year, month=1, day=1)).days + 1)
+    if period not in PERIOD_OFFSETS:
+        raise ResampleError(f"Unsupported period: {period}")
+    return float((now - (now - PERIOD_OFFSETS[period])).days)
+
+
+def can_fetch(interval: str, period: str) -> bool:
+    """Check whether Yahoo serves the interval over the whole period."""
+    limit = INTRADAY_LOOKBACK_DAYS.get(interval)
+    return limit is None or period_days(period) <= limit
+
+
+def slice_period(history: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    Keep the bars of a longer history that fall within a shorter period.
+
+    Args:
+        history: DataFrame indexed by bar start time
+        period: Period to keep, counted back from the last bar
+
+    Returns:
+        Trailing slice of the history
+    """
+    if history is None or history.empty or period == "max":
+        return history
+    if period in ("1d", "5d"):
+        # Day periods count trading sessions, not calendar days
+        dates = history.index.normalize()
+        keep = dates.unique()[-int(period[:-1]):]
+        return history[dates >= keep[0]]
+    last = history.index[-1].normalize()
+    if period == "ytd":
+        return history[history.index >= last.replace(month=1, day=1)]
+    return history[history.index > last - PERIOD_OFFSETS[period]]
+
+
+def _group_labels(wall: np.ndarray, target: str) -> np.ndarray:
+    """Bin start of every bar as exchange-local nanoseconds since epoch."""
+    day = wall // DAY_NS
+    if target in INTRADAY_MINUTES:
+        time_of_day = wall - day * DAY_NS
+        # Anchor bins at the usual session open (first bar of most days)
+        first = np.r_[True, day[1:] != day[:-1]]
+        opens, counts = np.unique(time_of_day[first], return_counts=True)
+        anchor = opens[np.argmax(counts)]
+        width = INTRADAY_MINUTES[target] * MINUTE_NS
+        return day * DAY_NS + anchor + ((time_of_day - anchor) // width) * width
+    if target == "1d":
+        return day * DAY_NS
+    if target == "1wk":
+        # 1970-01-01 was a Thursday; weeks start on Monday
+        return (day - (day + 3) % 7) * DAY_NS
+    months = wall.astype("datetime64[ns]").astype("datetime64[M]").astype(np.int64)
+    if target == "3mo":
+        months = months - months % 3
+    return months.astype("datetime64[M]").astype("datetime64[ns]").astype(np.int64)
+
+
+def resample_ohlcv(history: pd.DataFrame, target: str, source: str = None) -> pd.DataFrame:
+    """
+    Aggregate bars into a coarser interval.
+
+    Open is the first open, High/Low the extremes, Close the last close
+    and Volume/Dividends the sum of each group. Stock splits are
+    multiplied. Bars are labelled by bin start in the history's timezone.
+
+    Args:
+        history: DataFrame with Open/High/Low/Close/Volume columns, sorted
+            by a DatetimeIndex
+        target: Interval to produce
+        source: Interval of the input bars, used to validate the request
+
+    Returns:
+        Resampled DataFrame with the same columns
+    """
+    if source is not None and not can_derive(source, target):
+        raise ResampleError(f"Cannot derive {target} bars from {source} bars")
+    if target not in INTRADAY_MINUTES and target not in CALENDAR_INTERVALS:
+        raise ResampleError(f"Unsupported target interval: {target}")
+    if history is None or history.empty or source == target:
+        return history
+
+    history = history[history["Close"].notna()]
+    index = history.index
+    local = index.tz_localize(None) if index.tz is not None else index
+    wall = np.asarray(local, dtype="datetime64[ns]").astype(np.int64)
+    labels = _group_labels(wall, target)
+
+    starts = np.flatnonzero(np.r_[True, labels[1:] != labels[:-1]])
+    ends = np.r_[starts[1:], len(labels)] - 1
+
+    columns = {}
+    for column in history.columns:
+        values = history[column].to_numpy(dtype=np.float64)
+        if column == "Open":
+            columns[column] = values[starts]
+        elif column == "High":
+            columns[column] = np.fmax.reduceat(values, starts)
+        elif column == "Low":
+            columns[column] = np.fmin.reduceat(values, starts)
+        elif column in ("Volume", "Dividends", "Capital Gains"):
+            columns[column] = np.add.reduceat(np.nan_to_num(values), starts)
+        elif column == "Stock Splits":
+            ratios = np.where(np.nan_to_num(values) == 0, 1.0, values)
+            product = np.multiply.reduceat(ratios, starts)
+            columns[column] = np.where(product == 1.0, 0.0, product)
+        else:
+            columns[column] = values[ends]
+
+    # Shift each group's first timestamp back to its bin start, keeping the
+    # timezone (and its UTC offset on that day) of the original index
+    new_index = index[starts] - pd.to_timedelta(wall[starts] - labels[starts], unit="ns")
+    result = pd.DataFrame(columns, index=new_index)
+    result.index.name = history.index.name
+    if "Volume" in result.columns and history["Volume"].dtype.kind == "i":
+        result["Volume"] = result["Volume"].astype(history["Volume"].dtype)
+    return result
+
+
+def derivation_sources(
+    period: str,
+    interval: str,
+    periods: Sequence[str],
+    intervals: Sequence[str]
+) -> List[Tuple[str, str]]:
+    """
+    List (period, interval) histories from which a request can be derived.
+
+    Sources are coarsest interval first (cheapest to aggregate) and
+    shortest covering period first (most likely to be cached).
+
+    Args:
+        period: Requested period
+        interval: Requested interval
+        periods: Candidate source periods
+        intervals: Candidate source intervals
+
+    Returns:
+        List of (source_period, source_interval) pairs, excluding the request
+    """
+    needed = period_days(period)
+    covering = sorted(
+        (p for p in periods if period_days(p) >= needed and (p == "max" or period != "max")),
+        key=period_days
+    )
+    sources = sorted(
+        (i for i in intervals if i != interval and can_derive(i, interval)),
+        key=_fineness,
+        reverse=True
+    )
+    return [
+        (source_period, source)
+        for source in sources
+        for source_period in covering
+        if can_fetch(source, source_period)
+    ]
+
+
+def plan_fetch(period: str, intervals: Sequence[str]) -> Dict[str, str]:
+    """
+    Choose which intervals to fetch so the others can be derived locally.
+
+    The finest requested interval Yahoo serves over the period is fetched,
+    and every interval derivable from it is resampled. Intervals that
+    cannot be derived are fetched directly.
+
+    Args:
+        period: Period of historical data
+        intervals: Intervals needed
+
+    Returns:
+        Mapping of each requested interval to the interval it is built from
+    """
+    fetchable = sorted(
+        (interval for interval in set(intervals) if can_fetch(interval, period)),
+        key=_fineness
+    )
+    plan = {}
+    sources: List[str] = []
+    for interval in fetchable:
+        source = next((s for s in sources if can_derive(s, interval)), None)
+        if source is None:
+            sources.append(interval)
+            source = interval
+        plan[interval] = source
+    for interval in intervals:
+        plan.setdefault(interval, interval)
+    return plan
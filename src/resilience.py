@@ -0,0 +1,367 @@
+"""
+Upstream protection: token-bucket rate limiting, retries with jittered
+exponential backoff and a circuit breaker.
+"""
+
+import logging
+import random
+import socket
+import threading
+import time
+import urllib.error
+from typing import Any, Callable, Dict, Optional
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# HTTP statuses that indicate a retryable upstream condition
+TRANSIENT_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+# Network errors of the standard library; a URLError without a status
+# means the server was never reached
+TRANSIENT_TYPES = (TimeoutError, ConnectionError, socket.gaierror, urllib.error.URLError)
+
+# Names of retryable exception classes of optional HTTP stacks (yfinance,
+# requests, curl_cffi), matched along the class hierarchy so those
+# packages need not be imported here
+TRANSIENT_TYPE_NAMES = frozenset({
+    "YFRateLimitError",
+    "Timeout",
+    "ConnectTimeout",
+    "ReadTimeout",
+    "ConnectionError",
+})
+
+
+class UpstreamUnavailable(Exception):
+    """Raised when a call is refused locally because upstream is unhealthy."""
+
+
+class CircuitOpenError(UpstreamUnavailable):
+    """Raised when the circuit breaker is open."""
+
+
+class RateLimitTimeout(UpstreamUnavailable):
+    """Raised when no rate-limit token became available in time."""
+
+
+def is_transient(error: Exception) -> bool:
+    """
+    Decide whether an upstream error is worth retrying.
+
+    Errors carrying an HTTP status (UpstreamHTTPError.status, urllib's
+    HTTPError.code or a requests-style response.status_code) are judged
+    by the status alone; others by their exception type.
+
+    Args:
+        error: Exception raised by the upstream call
+
+    Returns:
+        True for throttling, server and network errors
+    """
+    status = http_status(error)
+    if status is not None:
+        return status in TRANSIENT_STATUSES
+    if isinstance(error, TRANSIENT_TYPES):
+        return True
+    return any(cls.__name__ in TRANSIENT_TYPE_NAMES for cls in type(error).__mro__)
+
+
+def http_status(error: Exception) -> Optional[int]:
+    """HTTP status attached to an exception, if any."""
+    for status in (
+        getattr(error, "status", None),
+        getattr(error, "code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+    ):
+        if isinstance(status, int) and not isinstance(status, bool):
+            return status
+    return None
+
+
+class TokenBucket:
+    """Thread-safe token bucket rate limiter."""
+
+    def __init__(self, rate: float, capacity: float):
+        """
+        Initialize the TokenBucket.
+
+        Args:
+            rate: Tokens added per second
+            capacity: Maximum burst size
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+        self._granted = 0
+        self._waited_seconds = 0.0
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take tokens if available without waiting."""
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                self._granted += 1
+                return True
+            return False
+
+    def acquire(self, tokens: float = 1.0, timeout: Optional[float] = None) -> bool:
+        """
+        Take tokens, waiting for the bucket to refill if necessary.
+
+        Args:
+            tokens: Number of tokens to take
+            timeout: Maximum seconds to wait (default: wait indefinitely)
+
+        Returns:
+            True if the tokens were taken, False on timeout
+        """
+        started = time.monotonic()
+        deadline = None if timeout is None else started + timeout
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    self._granted += 1
+                    self._waited_seconds += time.monotonic() - started
+                    return True
+                wait = (tokens - self._tokens) / self.rate
+            if deadline is not None:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(wait)
+
+    def available(self) -> float:
+        """Return the number of tokens currently available."""
+        with self._lock:
+            self._refill()
+            return self._tokens
+
+    def state(self) -> Dict[str, Any]:
+        """Return limiter state for monitoring."""
+        with self._lock:
+            self._refill()
+            return {
+                "rate": self.rate,
+                "capacity": self.capacity,
+                "tokens": round(self._tokens, 3),
+                "granted": self._granted,
+                "waited_seconds": round(self._waited_seconds, 3),
+            }
+
+
+class CircuitBreaker:
+    """
+    Circuit breaker for upstream calls.
+
+    After `failure_threshold` consecutive transient failures the circuit
+    opens and calls are refused for `reset_timeout` seconds. Then a single
+    trial call is let through (half-open); its outcome closes or re-opens
+    the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        """
+        Initialize the CircuitBreaker.
+
+        Args:
+            failure_threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds to stay open before a trial call
+        """
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._times_opened = 0
+        self._rejected = 0
+
+    def allow_request(self) -> bool:
+        """Return True if a call may be made now."""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout:
+                    self._rejected += 1
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self._trial_in_flight:
+                self._rejected += 1
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def record_success(self) -> None:
+        """Record a successful call."""
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def release_trial(self) -> None:
+        """Give back a half-open trial that never reached upstream."""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_failure(self) -> None:
+        """Record a transient failure."""
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                if self._state != self.OPEN:
+                    self._times_opened += 1
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if (
+                self._state == self.OPEN and
+                time.monotonic() - self._opened_at >= self.reset_timeout
+            ):
+                return self.HALF_OPEN
+            return self._state
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Return breaker state for monitoring."""
+        state = self.state
+        with self._lock:
+            return {
+                "state": state,
+                "consecutive_failures": self._failures,
+                "failure_threshold": self.failure_threshold,
+                "reset_timeout": self.reset_timeout,
+                "times_opened": self._times_opened,
+                "rejected": self._rejected,
+            }
+
+
+class UpstreamGuard:
+    """Combines rate limiting, retries and circuit breaking for one upstream."""
+
+    def __init__(
+        self,
+        limiter: TokenBucket,
+        breaker: CircuitBreaker,
+        max_retries: int = 3,
+        backoff_base: float = 0.5,
+        backoff_max: float = 8.0,
+        limiter_timeout: Optional[float] = None,
+        sleep: Callable[[float], None] = time.sleep
+    ):
+        """
+        Initialize the UpstreamGuard.
+
+        Args:
+            limiter: Rate limiter shared by all calls
+            breaker: Circuit breaker shared by all calls
+            max_retries: Retries after the first attempt for transient errors
+            backoff_base: Base delay in seconds for exponential backoff
+            backoff_max: Upper bound of a single backoff delay
+            limiter_timeout: Maximum seconds to wait for a rate-limit token
+            sleep: Sleep function (replaceable in tests)
+        """
+        self.limiter = limiter
+        self.breaker = breaker
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.limiter_timeout = limiter_timeout
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._calls = 0
+        self._retries = 0
+        self._failures = 0
+
+    def backoff_delay(self, attempt: int) -> float:
+        """Full-jitter exponential backoff delay for a retry attempt (0-based)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    def call(self, fn: Callable[[], Any], description: str = "upstream call") -> Any:
+        """
+        Run an upstream call under rate limiting, retries and the breaker.
+
+        Args:
+            fn: Zero-argument callable performing the request
+            description: Label used in log messages
+
+        Returns:
+            Result of fn
+
+        Raises:
+            CircuitOpenError: If the circuit is open
+            RateLimitTimeout: If no token became available in time
+            Exception: The last error raised by fn
+        """
+        attempt = 0
+        while True:
+            if not self.breaker.allow_request():
+                raise CircuitOpenError(f"Circuit open, refusing {description}")
+            if not self.limiter.acquire(timeout=self.limiter_timeout):
+                self.breaker.release_trial()
+                raise RateLimitTimeout(f"Rate limit wait exceeded for {description}")
+            with self._lock:
+                self._calls += 1
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_transient(e):
+                    # Bad symbols and similar errors say nothing about upstream health
+                    self.breaker.record_success()
+                    raise
+                self.breaker.record_failure()
+                with self._lock:
+                    self._failures += 1
+                if attempt >= self.max_retries:
+                    raise
+                delay = self.backoff_delay(attempt)
+                logger.warning(
+                    f"Transient error in {description} (attempt {attempt + 1}), "
+                    f"retrying in {delay:.2f}s: {str(e)}"
+                )
+                with self._lock:
+                    self._retries += 1
+                self._sleep(delay)
+                attempt += 1
+                continue
+            except BaseException:
+                # Interrupted calls say nothing about upstream health either
+                self.breaker.release_trial()
+                raise
+            self.breaker.record_success()
+            return result
+
+    def state(self) -> Dict[str, Any]:
+        """Return limiter, breaker and retry counters for monitoring."""
+        with self._lock:
+            counters = {
+                "calls": self._calls,
+                "retries": self._retries,
+                "transient_failures": self._failures,
+            }
+        return {
+            "rate_limiter": self.limiter.state(),
+            "circuit_breaker": self.breaker.snapshot(),
+            **counters,
+        }
@@ -0,0 +1,440 @@
+"""
+Universe screener over cached histories.
+
+Histories are packed into a right-aligned, NaN-padded price matrix so the
+statistics from FinancialAnalyzer.calculate_statistics (plus a few
+indicators) are computed for every ticker at once. Filter expressions are
+parsed into a small whitelisted AST and evaluated column-wise over the
+whole universe in one pass.
+"""
+
+import ast
+import logging
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.config import config
+from src.data_fetcher import data_fetcher
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Metrics available to filter and sort expressions
+METRICS = (
+    "current_price",
+    "high_52w",
+    "low_52w",
+    "average_price",
+    "price_change",
+    "price_change_pct",
+    "volatility",
+    "avg_30d",
+    "avg_90d",
+    "data_points",
+    "return_5d",
+    "return_21d",
+    "drawdown",
+    "rsi_14",
+)
+
+_COMPARE_OPS = {
+    ast.Lt: np.less,
+    ast.LtE: np.less_equal,
+    ast.Gt: np.greater,
+    ast.GtE: np.greater_equal,
+    ast.Eq: np.equal,
+    ast.NotEq: np.not_equal,
+}
+
+_BINARY_OPS = {
+    ast.Add: np.add,
+    ast.Sub: np.subtract,
+    ast.Mult: np.multiply,
+    ast.Div: np.divide,
+}
+
+
+class ScreenError(ValueError):
+    """Raised when a filter or sort expression is invalid."""
+
+
+class PricePanel:
+    """
+    Close prices of many tickers in one matrix.
+
+    Row i holds the last `lengths[i]` closes of `tickers[i]`, aligned to
+    the right edge; missing leading values are NaN.
+    """
+
+    def __init__(self, tickers: List[str], closes: np.ndarray, lengths: np.ndarray):
+        """
+        Initialize the PricePanel.
+
+        Args:
+            tickers: Ticker symbols, one per row
+            closes: Matrix of shape (len(tickers), max_length)
+            lengths: Number of valid (right-aligned) values per row
+        """
+        self.tickers = tickers
+        self.closes = closes
+        self.lengths = lengths
+
+    @classmethod
+    def from_histories(
+        cls,
+        histories: Dict[str, pd.DataFrame],
+        max_length: int = None
+    ) -> "PricePanel":
+        """
+        Build a panel from per-ticker history DataFrames.
+
+        Args:
+            histories: Mapping of ticker to DataFrame with a 'Close' column
+            max_length: Keep at most this many trailing bars per ticker
+
+        Returns:
+            PricePanel
+        """
+        tickers = []
+        series = []
+        for ticker, history in histories.items():
+            if history is None or history.empty or "Close" not in history.columns:
+                continue
+            values = history["Close"].to_numpy(dtype=np.float64)
+            if max_length:
+                values = values[-max_length:]
+            tickers.append(ticker)
+            series.append(values)
+
+        width = max((len(values) for values in series), default=0)
+        closes = np.full((len(series), width), np.nan)
+        lengths = np.zeros(len(series), dtype=np.int64)
+        for row, values in enumerate(series):
+            if len(values):
+                closes[row, width - len(values):] = values
+            lengths[row] = len(values)
+        return cls(tickers, closes, lengths)
+
+    def __len__(self) -> int:
+        return len(self.tickers)
+
+
+def _tail_mean(closes: np.ndarray, lengths: np.ndarray, window: int) -> np.ndarray:
+    """Mean of the last `window` values, NaN where fewer are available."""
+    means = np.nanmean(closes[:, -window:], axis=1)
+    return np.where(lengths >= window, means, np.nan)
+
+
+def _trailing_return(closes: np.ndarray, lengths: np.ndarray, bars: int) -> np.ndarray:
+    """Return over the last `bars` bars, NaN where the history is shorter."""
+    if closes.shape[1] <= bars:
+        return np.full(len(closes), np.nan)
+    returns = closes[:, -1] / closes[:, -1 - bars] - 1.0
+    return np.where(lengths > bars, returns, np.nan)
+
+
+def _rsi(closes: np.ndarray, lengths: np.ndarray, window: int = 14) -> np.ndarray:
+    """Relative strength index over the last `window` changes (simple averages)."""
+    if closes.shape[1] <= window:
+        return np.full(len(closes), np.nan)
+    changes = np.diff(closes[:, -window - 1:], axis=1)
+    gains = np.where(changes > 0, changes, 0.0).mean(axis=1)
+    losses = np.where(changes < 0, -changes, 0.0).mean(axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rsi = np.where(losses == 0, 100.0, 100.0 - 100.0 / (1.0 + gains / losses))
+    return np.where(lengths > window, rsi, np.nan)
+
+
+def compute_metrics(panel: PricePanel) -> pd.DataFrame:
+    """
+    Compute screening metrics for every ticker in a panel.
+
+    Values match FinancialAnalyzer.calculate_statistics (using the latest
+    close as the current price) and are extended with a few indicators.
+
+    Args:
+        panel: PricePanel to analyze
+
+    Returns:
+        DataFrame indexed by ticker with one column per entry in METRICS
+    """
+    closes = panel.closes
+    lengths = panel.lengths
+    rows = np.arange(len(panel))
+    if len(panel) == 0 or closes.shape[1] == 0:
+        return pd.DataFrame(columns=list(METRICS), index=pd.Index([], name="ticker"))
+
+    with warnings.catch_warnings():
+        # All-NaN rows (tickers without data) legitimately produce NaN
+        warnings.simplefilter("ignore", category=RuntimeWarning)
+        current = closes[:, -1]
+        first = closes[rows, np.minimum(closes.shape[1] - lengths, closes.shape[1] - 1)]
+        high = np.nanmax(closes, axis=1)
+        low = np.nanmin(closes, axis=1)
+        average = np.nanmean(closes, axis=1)
+        change = current - first
+        change_pct = np.where(first > 0, change / first, 0.0)
+
+        returns = closes[:, 1:] / closes[:, :-1] - 1.0
+        return_counts = np.sum(~np.isnan(returns), axis=1)
+        volatility = np.where(
+            return_counts > 1, np.nanstd(returns, axis=1, ddof=1), 0.0
+        )
+
+        metrics = pd.DataFrame(
+            {
+                "current_price": current,
+                "high_52w": high,
+                "low_52w": low,
+                "average_price": average,
+                "price_change": change,
+                "price_change_pct": change_pct,
+                "volatility": volatility,
+                "avg_30d": _tail_mean(closes, lengths, 30),
+                "avg_90d": _tail_mean(closes, lengths, 90),
+                "data_points": lengths,
+                "return_5d": _trailing_return(closes, lengths, 5),
+                "return_21d": _trailing_return(closes, lengths, 21),
+                "drawdown": current / high - 1.0,
+                "rsi_14": _rsi(closes, lengths, 14),
+            },
+            index=pd.Index(panel.tickers, name="ticker"),
+        )
+    return metrics
+
+
+class _Evaluator:
+    """Evaluates a whitelisted expression AST against metric columns."""
+
+    def __init__(self, columns: Dict[str, np.ndarray]):
+        self.columns = columns
+
+    def visit(self, node: ast.AST):
+        if isinstance(node, ast.Expression):
+            return self.visit(node.body)
+        if isinstance(node, ast.BoolOp):
+            values = [np.asarray(self.visit(value), dtype=bool) for value in node.values]
+            reducer = np.logical_and if isinstance(node.op, ast.And) else np.logical_or
+            return reducer.reduce(values)
+        if isinstance(node, ast.UnaryOp):
+            operand = self.visit(node.operand)
+            if isinstance(node.op, ast.Not):
+                return np.logical_not(operand)
+            if isinstance(node.op, ast.USub):
+                return np.negative(operand)
+            if isinstance(node.op, ast.UAdd):
+                return operand
+        if isinstance(node, ast.Compare):
+            result = None
+            left = self.visit(node.left)
+            for op, comparator in zip(node.ops, node.comparators):
+                func = _COMPARE_OPS.get(type(op))
+                if func is None:
+                    break
+                right = self.visit(comparator)
+                part = func(left, right)
+                result = part if result is None else np.logical_and(result, part)
+                left = right
+            else:
+                return result
+        if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                return _BINARY_OPS[type(node.op)](self.visit(node.left), self.visit(node.right))
+        if isinstance(node, ast.Name):
+            if node.id not in self.columns:
+                raise ScreenError(f"Unknown metric: {node.id}")
+            return self.columns[node.id]
+        if isinstance(node, ast.Constant) and isinstance(node.value, (int, float)) \
+                and not isinstance(node.value, bool):
+            return node.value
+        raise ScreenError(f"Unsupported expression element: {type(node).__name__}")
+
+
+def evaluate_filter(metrics: pd.DataFrame, expression: str) -> np.ndarray:
+    """
+    Evaluate a filter expression over all tickers.
+
+    Expressions use Python syntax restricted to metric names, numbers,
+    arithmetic, comparisons and and/or/not, e.g.
+    "avg_30d > avg_90d and volatility < 0.02".
+
+    Args:
+        metrics: DataFrame from compute_metrics
+        expression: Filter expression
+
+    Returns:
+        Boolean mask, one entry per ticker (NaN comparisons are False)
+
+    Raises:
+        ScreenError: If the expression is invalid
+    """
+    if not expression or not expression.strip():
+        return np.ones(len(metrics), dtype=bool)
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ScreenError(f"Invalid filter expression: {e.msg}") from e
+    columns = {name: metrics[name].to_numpy(dtype=np.float64) for name in metrics.columns}
+    with np.errstate(invalid="ignore"):
+        mask = _Evaluator(columns).visit(tree)
+    mask = np.asarray(mask)
+    if mask.dtype != bool:
+        raise ScreenError("Filter expression must be a condition")
+    return np.broadcast_to(mask, (len(metrics),))
+
+
+def parse_sort(sort: Optional[str]) -> List[Tuple[str, bool]]:
+    """
+    Parse a sort specification like "-volatility,avg_30d".
+
+    Args:
+        sort: Comma-separated metric names; a leading '-' sorts descending
+
+    Returns:
+        List of (metric, ascending) tuples
+
+    Raises:
+        ScreenError: If a metric is unknown
+    """
+    keys = []
+    for part in (sort or "").split(","):
+        part = part.strip()
+        if not part:
+            continue
+        ascending = not part.startswith("-")
+        name = part.lstrip("+-").strip()
+        if name not in METRICS:
+            raise ScreenError(f"Unknown sort metric: {name}")
+        keys.append((name, ascending))
+    return keys
+
+
+def screen(
+    metrics: pd.DataFrame,
+    expression: str = None,
+    sort: str = None,
+    limit: int = None
+) -> pd.DataFrame:
+    """
+    Filter and sort a metrics table.
+
+    Args:
+        metrics: DataFrame from compute_metrics
+        expression: Filter expression (default: keep all)
+        sort: Sort specification (see parse_sort)
+        limit: Maximum number of rows to return
+
+    Returns:
+        Matching rows, sorted (NaN values last)
+    """
+    result = metrics[evaluate_filter(metrics, expression)]
+    keys = parse_sort(sort)
+    if keys:
+        result = result.sort_values(
+            by=[name for name, _ in keys],
+            ascending=[ascending for _, ascending in keys],
+            na_position="last",
+            kind="stable",
+        )
+    if limit:
+        result = result.head(limit)
+    return result
+
+
+def load_histories(
+    tickers: List[str],
+    period: str = None,
+    interval: str = None,
+    fetch_missing: bool = False,
+    max_workers: int = None
+) -> Tuple[Dict[str, pd.DataFrame], List[str]]:
+    """
+    Load histories from the cache, optionally fetching missing ones.
+
+    Missing histories go through DataFetcher.get_histories, so they are
+    derived from a cached finer interval when one is at hand, and derived
+    frames are cached under their own keys.
+
+    Args:
+        tickers: Ticker symbols
+        period: Period of historical data (default: from config)
+        interval: Data interval (default: from config)
+        fetch_missing: Fetch tickers that are not cached (rate limited)
+        max_workers: Concurrent fetches (default: from config)
+
+    Returns:
+        Tuple of (histories by ticker, tickers without data)
+    """
+    interval = interval or config.DEFAULT_INTERVAL
+    histories = {}
+    missing = []
+    for ticker in tickers:
+        history = data_fetcher.get_cached_history(ticker, period, interval)
+        if history is None or history.empty:
+            missing.append(ticker)
+        else:
+            histories[ticker] = history
+
+    if fetch_missing and missing:
+        def fetch(ticker):
+            ticker_obj = data_fetcher.fetch_data(ticker, period, interval)
+            if not ticker_obj:
+                return ticker, None
+            return ticker, data_fetcher.get_histories(ticker_obj, period, [interval])[interval]
+
+        with ThreadPoolExecutor(max_workers=max_workers or config.BATCH_MAX_WORKERS) as executor:
+            fetched = dict(executor.map(fetch, missing))
+        still_missing = []
+        for ticker in missing:
+            history = fetched.get(ticker)
+            if history is None or history.empty:
+                still_missing.append(ticker)
+            else:
+                histories[ticker] = history
+        missing = still_missing
+
+    # Preserve the requested order
+    ordered = {ticker: histories[ticker] for ticker in tickers if ticker in histories}
+    return ordered, missing
+
+
+def run_screen(
+    tickers: List[str],
+    expression: str = None,
+    sort: str = None,
+    limit: int = None,
+    period: str = None,
+    interval: str = None,
+    fetch_missing: bool = False
+) -> Dict[str, Any]:
+    """
+    Screen a ticker universe end to end.
+
+    Args:
+        tickers: Ticker symbols
+        expression: Filter expression
+        sort: Sort specification
+        limit: Maximum number of results
+        period: Period of historical data (default: from config)
+        interval: Data interval (default: from config)
+        fetch_missing: Fetch tickers that are not cached
+
+    Returns:
+        Dictionary with 'results' (list of row dicts), 'count', 'universe'
+        and 'missing'
+    """
+    histories, missing = load_histories(tickers, period, interval, fetch_missing)
+    metrics = compute_metrics(PricePanel.from_histories(histories))
+    matches = screen(metrics, expression, sort, limit)
+    records = matches.reset_index().astype(object)
+    records = records.where(pd.notna(records), None).to_dict(orient="records")
+    return {
+        "results": records,
+        "count": len(records),
+        "universe": len(metrics),
+        "missing": missing,
+    }
@@ -0,0 +1,70 @@
+"""
+Per-request stage timing reported in the Server-Timing header.
+"""
+
+import re
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator
+
+# One metric of a Server-Timing header: name followed by optional parameters
+METRIC_PATTERN = re.compile(r"\s*([A-Za-z0-9_.-]+)((?:\s*;\s*[^,;]+)*)")
+DURATION_PATTERN = re.compile(r";\s*dur=([0-9.]+)")
+
+
+class StageTimer:
+    """Accumulates the wall-clock time spent in named stages of a request."""
+
+    def __init__(self):
+        """Initialize the StageTimer; the total runs from construction."""
+        self.started = time.perf_counter()
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Time the enclosed block; repeated stages are summed.
+
+        Args:
+            name: Stage name (a header token, e.g. 'fetch')
+        """
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - started
+            self.durations[name] = self.durations.get(name, 0.0) + elapsed
+
+    def header(self) -> str:
+        """
+        Format the stages and the total as a Server-Timing header value.
+
+        Returns:
+            Header value such as 'fetch;dur=12.1, stats;dur=3.4, total;dur=16.0'
+        """
+        total = time.perf_counter() - self.started
+        metrics = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self.durations.items()]
+        metrics.append(f"total;dur={total * 1000:.1f}")
+        return ", ".join(metrics)
+
+
+def parse_server_timing(value: str) -> Dict[str, float]:
+    """
+    Parse a Server-Timing header into durations.
+
+    Args:
+        value: Header value
+
+    Returns:
+        Dictionary of metric name to duration in milliseconds (metrics
+        without a duration are skipped)
+    """
+    durations = {}
+    for metric in (value or "").split(","):
+        match = METRIC_PATTERN.match(metric)
+        if not match:
+            continue
+        duration = DURATION_PATTERN.search(match.group(2))
+        if duration:
+            durations[match.group(1)] = float(duration.group(1))
+    return durations
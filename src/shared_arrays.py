@@ -0,0 +1,212 @@
+"""
+Zero-copy handoff of price arrays to worker processes.
+
+Process pools pickle their arguments, so sending price panels or
+histories to every worker copies them once per task. SharedArrayRegistry
+instead copies each array once into a named shared memory block and
+hands out small picklable descriptors; workers attach to the block and
+get a read-only NumPy view of it. Histories are published as the arrays
+of a CompactHistory, so a worker rebuilds the same view-backed object
+the cache holds, and the analyzer and forecaster accept descriptors
+wherever they accept a history.
+"""
+
+import logging
+import threading
+from multiprocessing import shared_memory
+from typing import Dict, Any, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from src.compact import CompactHistory
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+
+class ArrayDescriptor(NamedTuple):
+    """Location and layout of an array in a shared memory block."""
+
+    name: str
+    shape: Tuple[int, ...]
+    dtype: str
+
+    @property
+    def nbytes(self) -> int:
+        return int(np.prod(self.shape, dtype=np.int64)) * np.dtype(self.dtype).itemsize
+
+
+class HistoryDescriptor(NamedTuple):
+    """A CompactHistory whose arrays live in shared memory."""
+
+    timestamps: ArrayDescriptor
+    prices: ArrayDescriptor
+    price_columns: Tuple[str, ...]
+    volume: Optional[ArrayDescriptor]
+    tz: Optional[str]
+    index_name: Optional[str]
+
+
+# Blocks attached by this process, kept open while views of them may exist
+_attached: Dict[str, shared_memory.SharedMemory] = {}
+_attached_lock = threading.Lock()
+
+
+def attach(descriptor: ArrayDescriptor) -> np.ndarray:
+    """
+    Return a read-only view of a published array.
+
+    The block stays mapped in this process for as long as it lives, so
+    views can be handed around freely; the publisher unlinks it.
+
+    Args:
+        descriptor: Descriptor returned by SharedArrayRegistry.publish
+
+    Returns:
+        NumPy array backed by the shared block (no copy)
+    """
+    with _attached_lock:
+        block = _attached.get(descriptor.name)
+        if block is None:
+            # Pool workers share the publisher's resource tracker, which
+            # forgets the block once the publisher unlinks it
+            block = shared_memory.SharedMemory(name=descriptor.name)
+            _attached[descriptor.name] = block
+    array = np.ndarray(descriptor.shape, dtype=descriptor.dtype, buffer=block.buf)
+    array.flags.writeable = False
+    return array
+
+
+def _detach(name: str) -> None:
+    """Unmap a block attached by this process unless views of it are still alive."""
+    with _attached_lock:
+        block = _attached.get(name)
+        if block is None:
+            return
+        try:
+            block.close()
+        except BufferError:
+            return
+        del _attached[name]
+
+
+def attach_history(descriptor: HistoryDescriptor) -> CompactHistory:
+    """
+    Rebuild a published history from its shared arrays.
+
+    Args:
+        descriptor: Descriptor returned by SharedArrayRegistry.publish_history
+
+    Returns:
+        CompactHistory whose columns are views of the shared blocks
+    """
+    return CompactHistory(
+        attach(descriptor.timestamps),
+        attach(descriptor.prices),
+        descriptor.price_columns,
+        attach(descriptor.volume) if descriptor.volume is not None else None,
+        descriptor.tz,
+        descriptor.index_name
+    )
+
+
+def resolve(data: Any) -> Any:
+    """
+    Turn a descriptor into the view it describes; pass anything else through.
+
+    Args:
+        data: ArrayDescriptor, HistoryDescriptor, array or history
+
+    Returns:
+        Attached array or CompactHistory, or data unchanged
+    """
+    if isinstance(data, HistoryDescriptor):
+        return attach_history(data)
+    if isinstance(data, ArrayDescriptor):
+        return attach(data)
+    return data
+
+
+class SharedArrayRegistry:
+    """Publishes arrays into shared memory and unlinks them on close."""
+
+    def __init__(self):
+        self._blocks: Dict[str, shared_memory.SharedMemory] = {}
+        self._lock = threading.Lock()
+
+    def publish(self, array: np.ndarray) -> ArrayDescriptor:
+        """
+        Copy an array into a new shared memory block.
+
+        Args:
+            array: Array to share (made C-contiguous if needed)
+
+        Returns:
+            Picklable descriptor of the block
+
+        Raises:
+            OSError: If shared memory cannot be allocated
+        """
+        array = np.ascontiguousarray(array)
+        # Zero-size blocks are not allowed
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        target = np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)
+        target[...] = array
+        del target
+        with self._lock:
+            self._blocks[block.name] = block
+        return ArrayDescriptor(block.name, tuple(array.shape), array.dtype.str)
+
+    def publish_history(
+        self,
+        history: Union[CompactHistory, pd.DataFrame]
+    ) -> HistoryDescriptor:
+        """
+        Publish the arrays of a history.
+
+        Args:
+            history: CompactHistory or DataFrame (compacted first)
+
+        Returns:
+            Picklable descriptor, resolved by attach_history
+        """
+        if isinstance(history, pd.DataFrame):
+            history = CompactHistory.from_frame(history)
+        return HistoryDescriptor(
+            self.publish(history.timestamps),
+            self.publish(history.prices),
+            history.price_columns,
+            self.publish(history.volume) if history.volume is not None else None,
+            history.tz,
+            history.index_name
+        )
+
+    def close(self) -> None:
+        """Unlink every published block; attached processes keep their mappings."""
+        with self._lock:
+            blocks, self._blocks = self._blocks, {}
+        for block in blocks.values():
+            _detach(block.name)
+            try:
+                block.close()
+            except (BufferError, OSError) as e:
+                # A live export keeps this mapping; the name must still go
+                logger.warning(f"Cannot close shared block {block.name}: {str(e)}")
+            try:
+                block.unlink()
+            except OSError as e:
+                logger.warning(f"Cannot unlink shared block {block.name}: {str(e)}")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "blocks": len(self._blocks),
+                "bytes": sum(block.size for block in self._blocks.values()),
+            }
+
+    def __enter__(self) -> "SharedArrayRegistry":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
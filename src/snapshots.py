@@ -0,0 +1,314 @@
+"""
+Precomputed analysis snapshots for frequently requested tickers.
+
+A scheduler rebuilds the analysis of every configured (ticker, period,
+interval) view in the background on a per-interval cadence, spread over
+a worker pool. Snapshots hold the serialized response body and its
+ETag, so serving one is a dictionary lookup and a freshness check; the
+compressed variants are built once per snapshot on first use.
+"""
+
+import heapq
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Any, List, Optional, Tuple
+
+from src.batch import parse_tickers
+from src.config import config
+from src.http_cache import compress_body
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# Builds (etag, response body, degraded parts) for a (ticker, period, interval) view
+SnapshotBuilder = Callable[[str, str, str], Tuple[str, bytes, List[str]]]
+
+ViewKey = Tuple[str, str, str]
+
+
+def refresh_seconds(interval: str) -> float:
+    """Seconds between rebuilds of a snapshot with bars of the given interval."""
+    intraday = interval[-1] in ("m", "h") and not interval.endswith("mo")
+    if intraday:
+        return config.SNAPSHOT_REFRESH_INTRADAY_SECONDS
+    return config.SNAPSHOT_REFRESH_SECONDS
+
+
+def load_snapshot_tickers() -> List[str]:
+    """
+    Read the tickers to precompute from the configuration.
+
+    SNAPSHOT_TICKERS (comma separated) come first, followed by those in
+    SNAPSHOT_TICKERS_FILE, capped at SNAPSHOT_MAX_TICKERS.
+
+    Returns:
+        List of upper-cased ticker symbols, most important first
+    """
+    lines = [config.SNAPSHOT_TICKERS]
+    if config.SNAPSHOT_TICKERS_FILE:
+        try:
+            lines.extend(Path(config.SNAPSHOT_TICKERS_FILE).read_text().splitlines())
+        except OSError as e:
+            logger.error(f"Cannot read snapshot tickers file: {str(e)}")
+    return parse_tickers(lines)[:config.SNAPSHOT_MAX_TICKERS]
+
+
+class Snapshot:
+    """A serialized analysis response and its validity."""
+
+    def __init__(
+        self,
+        etag: str,
+        body: bytes,
+        built_at: float,
+        fresh_until: float,
+        degraded: Optional[List[str]] = None
+    ):
+        self.etag = etag
+        self.body = body
+        self.built_at = built_at
+        self.fresh_until = fresh_until
+        # Parts of the response that were skipped or replaced by a fallback
+        self.degraded = list(degraded or [])
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+        """
+        Return the body in a content coding, compressing it once.
+
+        Args:
+            encoding: 'br', 'gzip' or None
+
+        Returns:
+            Tuple of (body, applied encoding or None)
+        """
+        if encoding is None or len(self.body) < config.HTTP_COMPRESS_MIN_SIZE:
+            return self.body, None
+        body = self._encoded.get(encoding)
+        if body is None:
+            body = compress_body(self.body, encoding)
+            self._encoded[encoding] = body
+        return body, encoding
+
+
+class SnapshotStore:
+    """In-process store of the latest snapshot per view."""
+
+    def __init__(self):
+        self._snapshots: Dict[ViewKey, Snapshot] = {}
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._expired = 0
+        self._stale_served = 0
+
+    def get(
+        self,
+        ticker: str,
+        period: str,
+        interval: str,
+        allow_stale: bool = False
+    ) -> Optional[Snapshot]:
+        """
+        Return the snapshot of a view if it is still fresh.
+
+        Args:
+            ticker: Ticker symbol
+            period: Period of historical data
+            interval: Data interval
+            allow_stale: Also return an expired snapshot (e.g. under load)
+
+        Returns:
+            Snapshot or None (cold, or expired and not allowed)
+        """
+        snapshot = self._snapshots.get((ticker, period, interval))
+        fresh = snapshot is not None and time.time() <= snapshot.fresh_until
+        with self._lock:
+            if fresh:
+                self._hits += 1
+            elif snapshot is None:
+                self._misses += 1
+            elif allow_stale:
+                self._stale_served += 1
+            else:
+                self._expired += 1
+        return snapshot if fresh or allow_stale else None
+
+    def put(self, key: ViewKey, snapshot: Snapshot) -> None:
+        with self._lock:
+            self._snapshots[key] = snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "snapshots": len(self._snapshots),
+                "bytes": sum(len(s.body) for s in self._snapshots.values()),
+                "hits": self._hits,
+                "misses": self._misses,
+                "expired": self._expired,
+                "stale_served": self._stale_served,
+            }
+
+
+class SnapshotScheduler:
+    """Rebuilds snapshots of configured views on a per-interval cadence."""
+
+    def __init__(
+        self,
+        store: SnapshotStore,
+        tickers: List[str] = None,
+        views: List[Tuple[str, str]] = None,
+        workers: int = None
+    ):
+        """
+        Initialize the SnapshotScheduler.
+
+        Args:
+            store: Store receiving built snapshots
+            tickers: Tickers to precompute (default: from config)
+            views: (period, interval) pairs per ticker (default: from config)
+            workers: Size of the worker pool (default: from config)
+        """
+        self.store = store
+        self.tickers = load_snapshot_tickers() if tickers is None else tickers
+        self.views = list(views or config.SNAPSHOT_VIEWS)
+        self.workers = max(1, workers or config.SNAPSHOT_WORKERS)
+        self._build: Optional[SnapshotBuilder] = None
+        self._due: List[Tuple[float, int, ViewKey]] = []
+        self._sequence = 0
+        self._wakeup = threading.Condition()
+        self._stop = threading.Event()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._thread: Optional[threading.Thread] = None
+        self._built = 0
+        self._failed = 0
+        self._build_seconds = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and not self._stop.is_set()
+
+    def scheduled(self, ticker: str, period: str, interval: str) -> bool:
+        """Check whether a view is kept warm by this scheduler."""
+        return ticker in self.tickers and (period, interval) in self.views
+
+    def _schedule(self, key: ViewKey, due: float) -> None:
+        with self._wakeup:
+            self._sequence += 1
+            heapq.heappush(self._due, (due, self._sequence, key))
+            self._wakeup.notify()
+
+    def start(self, build: SnapshotBuilder) -> bool:
+        """
+        Start the scheduler thread (no-op if running or nothing is configured).
+
+        All views are due immediately, in ticker order, so the most
+        important tickers are warmed first.
+
+        Args:
+            build: Callable producing (etag, body, degraded parts) for a view
+
+        Returns:
+            True if the scheduler was started by this call
+        """
+        with self._wakeup:
+            if self._thread is not None or not self.tickers or not self.views:
+                return False
+            self._build = build
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.workers, thread_name_prefix="snapshot"
+            )
+            self._thread = threading.Thread(
+                target=self._run, name="snapshot-scheduler", daemon=True
+            )
+        now = time.time()
+        for ticker in self.tickers:
+            for period, interval in self.views:
+                self._schedule((ticker, period, interval), now)
+        self._thread.start()
+        logger.info(
+            f"Snapshot scheduler started for {len(self.tickers)} tickers, "
+            f"{len(self.views)} views each, {self.workers} workers"
+        )
+        return True
+
+    def stop(self) -> None:
+        self._stop.set()
+        with self._wakeup:
+            self._wakeup.notify()
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _run(self) -> None:
+        while not self._stop.is_set():
+            with self._wakeup:
+                wait = self._due[0][0] - time.time() if self._due else None
+                if wait is None or wait > 0:
+                    self._wakeup.wait(wait)
+                    continue
+                _, _, key = heapq.heappop(self._due)
+            try:
+                self._executor.submit(self.refresh, key)
+            except RuntimeError:
+                return
+
+    def refresh(self, key: ViewKey) -> Optional[Snapshot]:
+        """
+        Rebuild one snapshot and schedule its next refresh.
+
+        Args:
+            key: (ticker, period, interval)
+
+        Returns:
+            The new snapshot, or None if the build failed
+        """
+        ticker, period, interval = key
+        cadence = refresh_seconds(interval)
+        started = time.time()
+        snapshot = None
+        try:
+            etag, body, degraded = self._build(ticker, period, interval)
+            finished = time.time()
+            snapshot = Snapshot(
+                etag, body, finished, finished + cadence * config.SNAPSHOT_STALE_FACTOR, degraded
+            )
+            self.store.put(key, snapshot)
+            with self._wakeup:
+                self._built += 1
+                self._build_seconds += finished - started
+        except Exception as e:
+            logger.warning(f"Snapshot build failed for {ticker} ({period}, {interval}): {str(e)}")
+            with self._wakeup:
+                self._failed += 1
+        if not self._stop.is_set():
+            self._schedule(key, time.time() + cadence)
+        return snapshot
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Return scheduler and store counters.
+
+        Returns:
+            Dictionary suitable for a monitoring endpoint
+        """
+        state = self.store.stats()
+        with self._wakeup:
+            state.update({
+                "running": self.running,
+                "tickers": len(self.tickers),
+                "views": len(self.views),
+                "workers": self.workers,
+                "pending": len(self._due),
+                "built": self._built,
+                "failed": self._failed,
+                "avg_build_seconds": self._build_seconds / self._built if self._built else None,
+            })
+        return state
+
+
+# Create global snapshot store and scheduler instances
+snapshot_store = SnapshotStore()
+snapshot_scheduler = SnapshotScheduler(snapshot_store)
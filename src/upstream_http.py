@@ -0,0 +1,174 @@
+"""
+Market data over plain HTTP from a Yahoo-compatible server.
+
+HTTPTicker mirrors the parts of yfinance.Ticker the fetcher uses
+(`ticker`, `info`, `history`) but reads the v8 chart and v10
+quoteSummary JSON from a configurable base URL. It lets the app run
+against a local stand-in such as benchmarks/fake_upstream.py.
+"""
+
+import json
+import logging
+import urllib.error
+import urllib.parse
+import urllib.request
+from typing import Any, Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.config import config
+
+# Set up logger
+logger = logging.getLogger(__name__)
+
+# quoteSummary modules that make up the info dictionary
+INFO_MODULES = ("price", "summaryProfile", "summaryDetail")
+
+# Intervals whose bars are labelled with the session date (yfinance: 'Date')
+DAILY_INTERVALS = ("1d", "5d", "1wk", "1mo", "3mo")
+
+
+class UpstreamHTTPError(Exception):
+    """Raised for an error response; the message starts with the HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(f"{status} {message}")
+        self.status = status
+
+
+def _flatten(value: Any) -> Any:
+    """Reduce Yahoo's {'raw': ..., 'fmt': ...} values to the raw number."""
+    if isinstance(value, dict):
+        return value.get("raw") if "raw" in value else None
+    return value
+
+
+class HTTPTicker:
+    """Drop-in for yfinance.Ticker backed by a Yahoo-compatible HTTP server."""
+
+    def __init__(self, ticker: str, base_url: str = None, timeout: float = None):
+        """
+        Initialize the HTTPTicker.
+
+        Args:
+            ticker: Ticker symbol
+            base_url: Server root, e.g. 'http://127.0.0.1:8900' (default: from config)
+            timeout: Socket timeout in seconds (default: from config)
+        """
+        self.ticker = ticker.strip().upper()
+        self.base_url = (base_url or config.UPSTREAM_URL).rstrip("/")
+        self.timeout = timeout or config.UPSTREAM_HTTP_TIMEOUT
+
+    def __repr__(self) -> str:
+        return f"HTTPTicker({self.ticker!r}, {self.base_url!r})"
+
+    def _get(self, path: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        GET a JSON document.
+
+        Raises:
+            UpstreamHTTPError: For error responses
+        """
+        url = (
+            f"{self.base_url}{path}/{urllib.parse.quote(self.ticker)}"
+            f"?{urllib.parse.urlencode(params)}"
+        )
+        request = urllib.request.Request(url, headers={"Accept": "application/json"})
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return json.loads(response.read())
+        except urllib.error.HTTPError as e:
+            try:
+                body = json.loads(e.read())
+                error = next(iter(body.values()))["error"] or {}
+                message = error.get("description") or e.reason
+            except (ValueError, KeyError, TypeError, StopIteration, AttributeError):
+                message = e.reason
+            raise UpstreamHTTPError(e.code, f"{e.reason} for {self.ticker}: {message}")
+
+    @property
+    def info(self) -> Dict[str, Any]:
+        """
+        Flat info dictionary, as yfinance builds it from quoteSummary.
+
+        Unknown tickers yield an empty dictionary.
+        """
+        try:
+            body = self._get("/v10/finance/quoteSummary", {"modules": ",".join(INFO_MODULES)})
+        except UpstreamHTTPError as e:
+            if e.status == 404:
+                return {}
+            raise
+        results = body.get("quoteSummary", {}).get("result") or [{}]
+        info = {"symbol": self.ticker}
+        for module in results[0].values():
+            for key, value in (module or {}).items():
+                value = _flatten(value)
+                if value is not None and key not in info:
+                    info[key] = value
+        if "regularMarketPrice" in info:
+            info.setdefault("currentPrice", info["regularMarketPrice"])
+        return info
+
+    def history(
+        self,
+        period: str = "1mo",
+        interval: str = "1d",
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        raise_errors: bool = False
+    ) -> pd.DataFrame:
+        """
+        Fetch OHLCV bars from the v8 chart endpoint.
+
+        Args:
+            period: Period of historical data (ignored when start is given)
+            interval: Data interval
+            start: First date (YYYY-MM-DD), inclusive
+            end: Last date (YYYY-MM-DD), exclusive
+            raise_errors: Raise on errors instead of returning an empty frame
+
+        Returns:
+            DataFrame in yfinance layout, indexed in the exchange timezone
+        """
+        params = {"interval": interval}
+        if start is not None:
+            params["period1"] = int(pd.Timestamp(start, tz="UTC").timestamp())
+            end = pd.Timestamp(end, tz="UTC") if end else pd.Timestamp.now(tz="UTC")
+            params["period2"] = int(end.timestamp())
+        else:
+            params["range"] = period
+        try:
+            body = self._get("/v8/finance/chart", params)
+            return self._frame(body["chart"]["result"][0], interval)
+        except Exception as e:
+            if raise_errors:
+                raise
+            logger.error(f"{self.ticker}: {str(e)}")
+            return pd.DataFrame()
+
+    @staticmethod
+    def _frame(result: Dict[str, Any], interval: str) -> pd.DataFrame:
+        """Build the history DataFrame from one chart result."""
+        timestamps = result.get("timestamp") or []
+        tz = result.get("meta", {}).get("exchangeTimezoneName") or "UTC"
+        index = pd.to_datetime(np.asarray(timestamps, dtype="int64"), unit="s", utc=True)
+        index = index.tz_convert(tz)
+        if interval in DAILY_INTERVALS:
+            index = index.normalize()
+        index.name = "Date" if interval in DAILY_INTERVALS else "Datetime"
+
+        quote = (result.get("indicators", {}).get("quote") or [{}])[0]
+        columns = {}
+        for name in ("open", "high", "low", "close"):
+            columns[name.capitalize()] = np.asarray(
+                [np.nan if v is None else v for v in quote.get(name) or []], dtype="float64"
+            )
+        columns["Volume"] = np.asarray(
+            [0 if v is None else v for v in quote.get("volume") or []], dtype="int64"
+        )
+        frame = pd.DataFrame(columns, index=index)
+        frame["Dividends"] = 0.0
+        frame["Stock Splits"] = 0.0
+        return frame
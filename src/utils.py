@@ -96,6 +96,14 @@ def format_number(value: float, decimals: int = 2) -> str:
     return f"{value:,.{decimals}f}"
 
 
-
-
-
+def is_crypto_ticker(ticker: str) -> bool:
+    """
+    Check whether a ticker symbol refers to a cryptocurrency pair.
+    
+    Args:
+        ticker: Ticker symbol (e.g., BTC-USD)
+        
+    Returns:
+        True for crypto pairs quoted in USD, False otherwise
+    """
+    return bool(ticker) and "-USD" in ticker.strip().upper()
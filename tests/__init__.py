@@ -2,3 +2,8 @@
 Test package for financial analyzer.
 """
 
+import os
+
+# Tests exercise the web app without network access; keep the prefetcher
+# from warming (and persisting) the views they request
+os.environ.setdefault("PREFETCH_ENABLED", "false")
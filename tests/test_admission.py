@@ -0,0 +1,116 @@
+"""
+Unit tests for admission control of /analyze.
+"""
+
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.admission import (
+    AdmissionController,
+    Overloaded,
+    PRIORITY_CACHED,
+    PRIORITY_UNCACHED,
+)
+from src.snapshots import Snapshot, SnapshotStore
+from app import web_app
+
+
+class TestAdmissionController(unittest.TestCase):
+    """Test cases for AdmissionController."""
+    
+    def test_cached_requests_are_admitted_first(self):
+        """Test the concurrency limit and queue priority."""
+        controller = AdmissionController(max_concurrent=1, max_queue=4, deadline=5)
+        order = []
+        
+        def request(name, priority):
+            with controller.acquire(priority):
+                order.append(name)
+        
+        first = controller.acquire()
+        threads = [
+            threading.Thread(target=request, args=("uncached", PRIORITY_UNCACHED)),
+            threading.Thread(target=request, args=("cached", PRIORITY_CACHED)),
+        ]
+        for thread in threads:
+            thread.start()
+            time.sleep(0.05)
+        self.assertEqual(controller.stats()["queue_depth"], 2)
+        first.release()
+        for thread in threads:
+            thread.join(2)
+        
+        self.assertEqual(order, ["cached", "uncached"])
+        stats = controller.stats()
+        self.assertEqual((stats["active"], stats["admitted"], stats["queued"]), (0, 3, 2))
+    
+    def test_sheds_when_queue_full_or_deadline_unreachable(self):
+        """Test fast rejection with a Retry-After hint."""
+        controller = AdmissionController(max_concurrent=1, max_queue=1, deadline=2)
+        held = controller.acquire()
+        
+        with self.assertRaises(Overloaded) as timeout:
+            controller.acquire(deadline=0.05)
+        self.assertEqual(timeout.exception.reason, "timeout")
+        
+        held.release()
+        held = controller.acquire()
+        controller._service_time = 3.0
+        with self.assertRaises(Overloaded) as deadline:
+            controller.acquire()
+        self.assertEqual(deadline.exception.reason, "deadline")
+        self.assertEqual(deadline.exception.retry_after, 3)
+        
+        controller.max_queue = 0
+        with self.assertRaises(Overloaded) as full:
+            controller.acquire()
+        self.assertEqual(full.exception.reason, "queue full")
+        held.release()
+        self.assertEqual(controller.stats()["shed"], {"queue_full": 1, "deadline": 1, "timeout": 1})
+
+
+class TestAnalyzeAdmission(unittest.TestCase):
+    """Test cases for shedding and degradation in /analyze."""
+    
+    def test_shed_request_gets_429_or_stale_snapshot(self):
+        """Test 429 with Retry-After, and stale snapshots served instead when available."""
+        controller = AdmissionController(max_concurrent=1, max_queue=0)
+        store = SnapshotStore()
+        client = web_app.app.test_client()
+        held = controller.acquire()
+        
+        with patch.object(web_app, "admission", controller), \
+                patch.object(web_app, "snapshot_store", store):
+            response = client.get("/analyze?ticker=AAPL")
+            self.assertEqual(response.status_code, 429)
+            self.assertGreaterEqual(int(response.headers["Retry-After"]), 1)
+            
+            store.put(("AAPL", "1y", "1d"), Snapshot("etag", b'{"ticker": "AAPL"}', 0, 1))
+            response = client.get("/analyze?ticker=AAPL")
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["X-Snapshot"], "stale")
+        held.release()
+    
+    def test_degraded_analysis_skips_forecast(self):
+        """Test that a degraded analysis does not fit a forecast."""
+        index = pd.bdate_range("2024-01-01", periods=60)
+        history = pd.DataFrame({"Close": np.linspace(100, 120, 60)}, index=index)
+        
+        with patch.object(web_app.config, "ENABLE_ARIMA_FORECAST", True), \
+                patch.object(web_app.data_fetcher, "get_company_info", return_value={}), \
+                patch.object(web_app.data_fetcher, "get_current_price", return_value=None), \
+                patch("src.extensions.forecasting.budgeted.forecast_close_prices") as fit:
+            result = web_app.build_analysis("ZZTEST", object(), history, degraded=True)
+        
+        fit.assert_not_called()
+        self.assertNotIn("forecast", result)
+        self.assertEqual(result["degraded"], ["forecast"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,151 @@
+"""
+Unit tests for the alert engine.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from src.alerts import AlertEngine, AlertQueue, AlertError, ThresholdIndex
+from app import web_app
+
+
+class TestThresholdIndex(unittest.TestCase):
+    """Test cases for ThresholdIndex."""
+    
+    def test_pop_crossed_returns_contiguous_range(self):
+        """Test crossing semantics for both directions."""
+        above = ThresholdIndex("above")
+        below = ThresholdIndex("below")
+        for rule_id, level in enumerate([90.0, 100.0, 100.0, 105.0, 110.0]):
+            above.add(level, rule_id)
+            below.add(level, rule_id)
+        
+        self.assertEqual(above.pop_crossed(100.0, 99.0), [])
+        self.assertEqual(above.pop_crossed(95.0, 105.0), [1, 2, 3])
+        self.assertEqual(above.pop_crossed(95.0, 105.0), [])
+        self.assertEqual(len(above), 2)
+        
+        self.assertEqual(below.pop_crossed(100.0, 90.0), [0])
+        self.assertEqual(below.pop_crossed(110.0, 100.0), [1, 2, 3])
+        self.assertTrue(below.remove(110.0, 4))
+        self.assertFalse(below.remove(110.0, 4))
+
+
+class TestAlertEngine(unittest.TestCase):
+    """Test cases for AlertEngine."""
+    
+    def setUp(self):
+        self.engine = AlertEngine(AlertQueue(maxsize=100, webhook_url=""))
+        self.engine.quote = MagicMock(return_value=None)
+    
+    def test_only_crossed_rules_fire(self):
+        """Test that of thousands of rules only the crossed ones fire, once."""
+        for level in np.linspace(50, 150, 5000):
+            self.engine.add_rule("AAPL", direction="above", level=level)
+        self.engine.add_rule("AAPL", direction="below", level=99.0, note="dip")
+        self.engine.add_rule("MSFT", direction="above", level=100.5)
+        
+        self.assertEqual(self.engine.on_quote("AAPL", 100.0), [])
+        fired = self.engine.on_quote("AAPL", 101.0)
+        self.assertEqual(len(fired), 50)
+        self.assertTrue(all(100.0 < e["level"] <= 101.0 for e in fired))
+        self.assertEqual(self.engine.on_quote("AAPL", 100.0), [])
+        self.assertEqual(self.engine.on_quote("AAPL", 101.0), [])
+        
+        dip = self.engine.on_quote("AAPL", 98.0)
+        self.assertEqual([e["note"] for e in dip], ["dip"])
+        self.assertEqual(len(self.engine.delivery.drain(1000)), 51)
+        self.assertEqual(self.engine.stats()["rules"], 5000 - 50 + 1)
+    
+    def test_percent_change_and_indicator_rules(self):
+        """Test percent rules against a reference and indicator rules on statistics."""
+        rule = self.engine.add_rule("AAPL", kind="percent_change", percent=-5, reference=200.0)
+        self.assertEqual((rule.direction, rule.level), ("below", 190.0))
+        self.engine.add_rule(
+            "AAPL", kind="indicator", indicator="volatility", direction="above", level=0.03
+        )
+        with self.assertRaises(AlertError):
+            self.engine.add_rule("AAPL", kind="indicator", indicator="rsi", level=70)
+        with self.assertRaises(AlertError):
+            self.engine.add_rule("AAPL", direction="sideways", level=1)
+        
+        self.engine.on_quote("AAPL", 200.0)
+        self.assertEqual(len(self.engine.on_quote("AAPL", 189.0)), 1)
+        self.engine.on_statistics("AAPL", {"volatility": 0.02})
+        fired = self.engine.on_statistics("AAPL", {"volatility": 0.04})
+        self.assertEqual(fired[0]["series"], "volatility")
+    
+    def test_one_quote_per_ticker_serves_all_rules(self):
+        """Test that polling uses one quote per ticker through the fetcher."""
+        for level in (101.0, 102.0, 103.0):
+            self.engine.add_rule("AAPL", direction="above", level=level)
+        fetcher = MagicMock()
+        fetcher.get_current_price.side_effect = [100.0, 102.5]
+        
+        with patch("src.alerts.data_fetcher", fetcher):
+            self.engine.poll_once()
+            fired = self.engine.poll_once()
+        
+        self.assertEqual([e["level"] for e in fired], [101.0, 102.0])
+        self.assertEqual(fetcher.get_current_price.call_count, 2)
+        fetcher.get_historical_data.assert_not_called()
+    
+    def test_new_rule_starts_from_a_fresh_quote(self):
+        """Test that a rule only fires on moves after it was added."""
+        rule = self.engine.add_rule("AAPL", direction="above", level=110.0)
+        self.engine.on_quote("AAPL", 100.0)
+        self.assertEqual(len(self.engine.on_quote("AAPL", 111.0)), 1)
+        self.assertEqual(self.engine._last, {})
+        
+        self.engine.quote.return_value = 200.0
+        self.engine.add_rule("AAPL", direction="above", level=150.0)
+        self.assertEqual(self.engine.on_quote("AAPL", 201.0), [])
+        percent = self.engine.add_rule("AAPL", kind="percent_change", percent=10)
+        self.assertAlmostEqual(percent.level, 220.0)
+        self.assertFalse(self.engine.remove_rule(rule.id))
+
+
+class TestAlertRoutes(unittest.TestCase):
+    """Test cases for the alert endpoints."""
+    
+    def test_create_fire_and_read_events(self):
+        """Test creating a rule over HTTP and reading the fired alert."""
+        engine = AlertEngine(AlertQueue(maxsize=10, webhook_url=""))
+        engine.quote = MagicMock(return_value=None)
+        client = web_app.app.test_client()
+        with patch.object(web_app, "alert_engine", engine), patch.object(engine, "start"):
+            created = client.post("/alerts", json={
+                "ticker": "aapl", "direction": "above", "level": 150
+            })
+            self.assertEqual(created.status_code, 201)
+            self.assertEqual(client.post("/alerts", json={"ticker": "AAPL"}).status_code, 400)
+            self.assertEqual(len(client.get("/alerts?ticker=AAPL").get_json()["rules"]), 1)
+            
+            engine.on_quote("AAPL", 149.0)
+            engine.on_quote("AAPL", 151.0)
+            events = client.get("/alerts/events").get_json()["events"]
+            self.assertEqual(events[0]["id"], created.get_json()["id"])
+            self.assertEqual(client.delete(f"/alerts/{events[0]['id']}").status_code, 404)
+    
+    def test_rejects_non_finite_level_and_wait(self):
+        """Test that NaN and infinite numbers are refused with 400."""
+        engine = AlertEngine(AlertQueue(maxsize=10, webhook_url=""))
+        engine.quote = MagicMock(return_value=None)
+        client = web_app.app.test_client()
+        with patch.object(web_app, "alert_engine", engine), patch.object(engine, "start"):
+            for level in ("NaN", "Infinity", "-Infinity"):
+                response = client.post(
+                    "/alerts",
+                    data='{"ticker": "AAPL", "direction": "above", "level": %s}' % level,
+                    content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 400, level)
+            self.assertEqual(engine.stats()["rules"], 0)
+            for wait in ("nan", "inf"):
+                self.assertEqual(client.get(f"/alerts/events?wait={wait}").status_code, 400, wait)
+
+
+if __name__ == "__main__":
+    unittest.main()
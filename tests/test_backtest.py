@@ -0,0 +1,76 @@
+"""
+Unit tests for the vectorized backtesting engine.
+"""
+
+import unittest
+
+import numpy as np
+
+from src.backtest import moving_average, ma_crossover_signals, run_backtest, parameter_sweep
+
+
+class TestBacktest(unittest.TestCase):
+    """Test cases for backtests and sweeps."""
+    
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        self.prices = 100 * np.exp(np.cumsum(rng.normal(0, 0.02, (80, 3)), axis=0))
+        self.signals = rng.integers(0, 2, (80, 3)).astype(float)
+    
+    def test_moving_average(self):
+        """Test the cumulative-sum moving average."""
+        prices = np.arange(1.0, 6.0)[:, None]
+        result = moving_average(prices, 3)[:, 0]
+        self.assertTrue(np.isnan(result[:2]).all())
+        np.testing.assert_allclose(result[2:], [2.0, 3.0, 4.0])
+    
+    def test_late_listing_has_no_signal_before_full_window(self):
+        """Test that bars before a listing do not count as zero prices."""
+        listed = np.concatenate([np.full(5, np.nan), np.arange(100.0, 106.0)])
+        prices = np.column_stack([np.arange(50.0, 61.0), listed])
+        
+        average = moving_average(prices, 3)[:, 1]
+        self.assertTrue(np.isnan(average[:7]).all())
+        np.testing.assert_allclose(average[7:], [101.0, 102.0, 103.0, 104.0])
+        
+        signals = ma_crossover_signals(prices, 2, 4)
+        self.assertTrue((signals[:8, 1] == 0).all())
+        self.assertTrue((signals[8:, 1] == 1).all())
+    
+    def test_buy_and_hold_single_asset(self):
+        """Test that a constant long position tracks the asset after one bar."""
+        prices = np.array([[10.0], [11.0], [12.1], [9.68]])
+        result = run_backtest(prices, np.ones_like(prices))
+        np.testing.assert_allclose(result["equity"], [1.0, 1.1, 1.21, 0.968])
+        self.assertAlmostEqual(result["drawdown"].min(), 0.968 / 1.21 - 1)
+        np.testing.assert_allclose(result["turnover"], [0.0, 1.0, 0.0, 0.0], atol=1e-12)
+    
+    def test_periodic_rebalance_matches_loop(self):
+        """Test drifting holdings between rebalances against a per-bar loop."""
+        every = 5
+        result = run_backtest(self.prices, self.signals, cost_bps=0, rebalance_every=every)
+        
+        weights = self.signals / np.maximum(self.signals.sum(axis=1, keepdims=True), 1.0)
+        holdings = np.zeros(3)
+        cash = 1.0
+        expected = []
+        for t in range(len(self.prices)):
+            if t >= 1 and (t - 1) % every == 0:
+                total = holdings.sum() + cash
+                holdings = weights[t - 1] * total
+                cash = total - holdings.sum()
+            if t >= 1:
+                holdings = holdings * self.prices[t] / self.prices[t - 1]
+            expected.append(holdings.sum() + cash)
+        
+        np.testing.assert_allclose(result["equity"], expected)
+    
+    def test_parameter_sweep_in_process(self):
+        """Test that the sweep covers every valid window pair."""
+        result = parameter_sweep(self.prices, [3, 5], [5, 10], max_workers=1)
+        pairs = set(zip(result["fast"], result["slow"]))
+        self.assertEqual(pairs, {(3, 5), (3, 10), (5, 10)})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,82 @@
+"""
+Unit tests for batch and watch processing helpers.
+"""
+
+import io
+import json
+import unittest
+from contextlib import redirect_stderr
+from unittest.mock import MagicMock, patch
+
+import pandas as pd
+
+from src.batch import parse_tickers, RowWriter, TickerWatcher, SUMMARY_FIELDS
+from app.console_app import build_parser
+
+
+class TestBatch(unittest.TestCase):
+    """Test cases for batch helpers."""
+    
+    def test_parse_tickers(self):
+        """Test parsing tickers from mixed input lines."""
+        lines = ["aapl, msft\n", "# comment\n", "\n", "BTC-USD AAPL  # dup\n"]
+        self.assertEqual(parse_tickers(lines), ["AAPL", "MSFT", "BTC-USD"])
+    
+    def test_watch_interval_must_be_positive(self):
+        """Test that --watch rejects zero, negative and non-numeric intervals."""
+        parser = build_parser()
+        self.assertEqual(parser.parse_args(["--watch", "2.5", "AAPL"]).watch, 2.5)
+        for value in ("0", "-5", "nan", "soon"):
+            with self.assertRaises(SystemExit), redirect_stderr(io.StringIO()):
+                parser.parse_args(["--watch", value, "AAPL"])
+    
+    def test_row_writer_jsonl(self):
+        """Test JSON Lines output."""
+        stream = io.StringIO()
+        RowWriter(stream, "jsonl").write({"ticker": "AAPL", "status": "ok"})
+        self.assertEqual(json.loads(stream.getvalue())["ticker"], "AAPL")
+    
+    def test_row_writer_csv_header_once(self):
+        """Test CSV output writes the header only once."""
+        stream = io.StringIO()
+        writer = RowWriter(stream, "csv")
+        writer.write({"ticker": "AAPL", "status": "ok"})
+        writer.write({"ticker": "MSFT", "status": "ok"})
+        lines = stream.getvalue().splitlines()
+        self.assertEqual(lines[0].split(","), SUMMARY_FIELDS)
+        self.assertEqual(len(lines), 3)
+    
+    def test_merge_history_replaces_overlap_and_trims(self):
+        """Test merging a refreshed tail into a cached history."""
+        index = pd.date_range("2024-01-01", periods=5, freq="D")
+        cached = pd.DataFrame({"Close": [1.0, 2.0, 3.0, 4.0, 5.0]}, index=index)
+        update_index = pd.date_range("2024-01-05", periods=2, freq="D")
+        update = pd.DataFrame({"Close": [5.5, 6.0]}, index=update_index)
+        
+        merged = TickerWatcher.merge_history(cached, update, pd.Timedelta(days=4))
+        
+        self.assertEqual(merged["Close"].tolist(), [2.0, 3.0, 4.0, 5.5, 6.0])
+    
+    def test_refresh_polls_uncached_recent_bars(self):
+        """Test that a second refresh picks up a changed last bar."""
+        index = pd.date_range("2024-01-01", periods=3, freq="D")
+        history = pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index)
+        revised = pd.DataFrame({"Close": [3.5]}, index=index[-1:])
+        fetcher = MagicMock()
+        fetcher.fetch_data.return_value = MagicMock()
+        fetcher.get_company_info.return_value = {"currency": "USD"}
+        fetcher.get_historical_data.return_value = history
+        fetcher.get_recent_bars.return_value = revised
+        
+        with patch("src.batch.data_fetcher", fetcher):
+            watcher = TickerWatcher(["AAPL"], period="5d", interval="1d")
+            watcher.refresh()
+            watcher.refresh()
+        
+        fetcher.get_historical_data.assert_called_once()
+        fetcher.get_recent_bars.assert_called_once()
+        self.assertEqual(watcher._history["AAPL"]["Close"].tolist(), [1.0, 2.0, 3.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
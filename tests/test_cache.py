@@ -0,0 +1,100 @@
+"""
+Unit tests for cache backends.
+"""
+
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from src.cache import CacheBackend, MemoryCache, SQLiteCache
+
+
+class TestMemoryCache(unittest.TestCase):
+    """Test cases for the in-process cache."""
+    
+    def test_backends_must_implement_storage(self):
+        """Test that the base class and incomplete backends cannot be instantiated."""
+        class Incomplete(CacheBackend):
+            def get_entry(self, key):
+                return None
+        
+        with self.assertRaises(TypeError):
+            CacheBackend()
+        with self.assertRaises(TypeError):
+            Incomplete()
+    
+    def test_ttl_and_stale_reads(self):
+        """Test that expired entries are only returned when stale reads are allowed."""
+        cache = MemoryCache(max_entries=10, stale_seconds=60)
+        cache.set("a", 1, ttl=-1)
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(cache.get("a", allow_stale=True), 1)
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted."""
+        cache = MemoryCache(max_entries=2)
+        cache.set("a", 1, ttl=60)
+        cache.set("b", 2, ttl=60)
+        cache.get("a")
+        cache.set("c", 3, ttl=60)
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), 1)
+
+
+class TestSQLiteCache(unittest.TestCase):
+    """Test cases for the cross-process SQLite cache."""
+    
+    def setUp(self):
+        self.tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmpdir.name, "cache.sqlite3")
+    
+    def tearDown(self):
+        self.tmpdir.cleanup()
+    
+    def test_shared_between_instances(self):
+        """Test that a second instance (another worker) sees stored values."""
+        SQLiteCache(self.path).set("k", {"x": [1, 2]}, ttl=60)
+        self.assertEqual(SQLiteCache(self.path).get("k"), {"x": [1, 2]})
+    
+    def test_size_bounded_eviction(self):
+        """Test eviction once the byte budget is exceeded."""
+        cache = SQLiteCache(self.path, max_entries=100, max_bytes=3000)
+        for i in range(5):
+            cache.set(f"k{i}", b"x" * 1000, ttl=60)
+            time.sleep(0.01)
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 3000)
+        self.assertIsNone(cache.get("k0"))
+        self.assertIsNotNone(cache.get("k4"))
+    
+    def test_only_one_worker_refreshes(self):
+        """Test that concurrent workers compute a missing key once."""
+        calls = []
+        
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return 42
+        
+        results = []
+        workers = [
+            threading.Thread(
+                target=lambda: results.append(
+                    SQLiteCache(self.path).get_or_compute("key", 60, compute)
+                )
+            )
+            for _ in range(4)
+        ]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        
+        self.assertEqual(results, [42] * 4)
+        self.assertEqual(len(calls), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,126 @@
+"""
+Unit tests for chunked history processing.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from app import web_app
+from src.analyzer import analyzer
+from src.cache import MemoryCache, NullCache
+from src.chunked import ChunkSummary, ChunkOrderError, iter_frame_chunks
+from src.data_fetcher import DataFetcher
+
+
+class TestChunked(unittest.TestCase):
+    """Test cases for merging partial aggregates."""
+    
+    def setUp(self):
+        rng = np.random.default_rng(4)
+        index = pd.bdate_range(
+            end=pd.Timestamp.now().normalize(), periods=5000, tz="America/New_York"
+        )
+        self.history = pd.DataFrame({
+            "Close": 50 * np.exp(np.cumsum(rng.normal(0, 0.01, len(index)))),
+            "Volume": rng.integers(1, 1000, len(index)),
+        }, index=index)
+    
+    def assert_matches_full_statistics(self, summary):
+        expected = analyzer.calculate_statistics(self.history)
+        actual = analyzer.format_statistics(summary.statistics.values())
+        for key, value in expected.items():
+            if isinstance(value, float):
+                self.assertAlmostEqual(actual[key], value, places=9, msg=key)
+            else:
+                self.assertEqual(actual[key], value, msg=key)
+    
+    def test_statistics_match_in_either_order(self):
+        """Test oldest-first and newest-first chunks against the full frame."""
+        chunks = list(iter_frame_chunks(self.history, 777))
+        self.assert_matches_full_statistics(ChunkSummary().consume(chunks))
+        self.assert_matches_full_statistics(ChunkSummary().consume(reversed(chunks)))
+    
+    def test_live_price_is_applied_to_cached_statistics(self):
+        """Test that re-basing per-bar statistics matches computing them with the price."""
+        cached = analyzer.calculate_statistics(self.history)
+        expected = analyzer.calculate_statistics(self.history, 61.5)
+        actual = analyzer.with_current_price(cached, 61.5)
+        for key in ("current_price", "price_change", "price_change_pct", "high_52w"):
+            self.assertAlmostEqual(actual[key], expected[key], places=9, msg=key)
+        self.assertEqual(actual["formatted"], expected["formatted"])
+        self.assertEqual(analyzer.with_current_price(cached)["current_price"], cached["current_price"])
+    
+    def test_chart_is_bounded_and_order_independent(self):
+        """Test the downsampled chart size, totals and chunking invariance."""
+        forward = ChunkSummary(max_points=300).consume(iter_frame_chunks(self.history, 500))
+        backward = ChunkSummary(max_points=300).consume(
+            reversed(list(iter_frame_chunks(self.history, 1200)))
+        )
+        chart = forward.chart.chart_data()
+        self.assertLessEqual(len(chart["dates"]), 300)
+        self.assertEqual(sum(chart["volume"]), self.history["Volume"].sum())
+        self.assertEqual(chart["prices"][-1], self.history["Close"].iloc[-1])
+        self.assertEqual(chart, backward.chart.chart_data())
+    
+    def test_overlapping_chunk_is_rejected(self):
+        """Test that re-adding consumed bars fails loudly."""
+        summary = ChunkSummary().consume([self.history.iloc[:100]])
+        with self.assertRaises(ChunkOrderError):
+            summary.add(self.history.iloc[50:150])
+    
+    def test_fetcher_pages_newest_first_until_listing(self):
+        """Test date-window paging for period='max'."""
+        history = self.history
+        
+        def fake_history(start, end, interval, raise_errors):
+            start = pd.Timestamp(start, tz="America/New_York")
+            end = pd.Timestamp(end, tz="America/New_York")
+            page = history[(history.index >= start) & (history.index < end)]
+            if page.empty:
+                raise Exception("AAPL: No price data found, symbol may be delisted")
+            return page
+        
+        ticker_obj = MagicMock(ticker="AAPL")
+        ticker_obj.history.side_effect = fake_history
+        pages = list(DataFetcher(cache=NullCache()).iter_history_pages(
+            ticker_obj, "max", "1d", rows=1000
+        ))
+        
+        self.assertGreater(len(pages), 5)
+        self.assertGreater(pages[0].index[0], pages[1].index[-1])
+        self.assertEqual(sum(len(page) for page in pages), len(history))
+    
+    def test_running_bar_reuses_summary_of_older_pages(self):
+        """Test that a moving close re-merges only the newest page."""
+        chunks = list(iter_frame_chunks(self.history, 1000))
+        newest, older = chunks[-1], chunks[-2::-1]
+        fetched = []
+        
+        def pages():
+            for page in older:
+                fetched.append(page)
+                yield page
+        
+        fetcher = MagicMock()
+        fetcher.get_company_info.return_value = {"currency": "USD"}
+        fetcher.get_current_price.return_value = None
+        revised = newest.copy()
+        revised.iloc[-1, revised.columns.get_loc("Close")] = 75.0
+        with patch.object(web_app, "cache", MemoryCache()), \
+                patch.object(web_app, "data_fetcher", fetcher), \
+                patch.object(web_app, "compute_forecast", return_value=None):
+            web_app.build_chunked_analysis("AAPL", MagicMock(), newest, pages(), "max", "1d")
+            response = web_app.build_chunked_analysis(
+                "AAPL", MagicMock(), revised, pages(), "max", "1d"
+            )
+        
+        self.assertEqual(len(fetched), len(older))
+        self.assertEqual(response["statistics"]["current_price"], 75.0)
+        self.assertEqual(response["statistics"]["data_points"], len(self.history))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Unit tests for the compact history container.
+"""
+
+import pickle
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from src.analyzer import analyzer
+from src.cache import MemoryCache
+from src.compact import CompactHistory
+from src.data_fetcher import DataFetcher
+
+
+def yfinance_frame(bars: int = 300) -> pd.DataFrame:
+    """History in the layout yfinance returns."""
+    index = pd.bdate_range("2024-01-01", periods=bars, tz="America/New_York", name="Date")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 1, bars))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close + 1,
+        "Low": close - 1,
+        "Close": close,
+        "Volume": np.arange(bars) * 1000,
+        "Dividends": 0.0,
+        "Stock Splits": 0.0,
+    }, index=index)
+
+
+class TestCompactHistory(unittest.TestCase):
+    """Test cases for column pruning, dtypes and buffer sharing."""
+    
+    def test_views_share_buffers(self):
+        """Test that columns and frames are views, not copies."""
+        compact = CompactHistory.from_frame(yfinance_frame(), price_dtype="float32")
+        frame = compact.to_frame()
+        
+        self.assertEqual(list(frame.columns), ["Open", "High", "Low", "Close", "Volume"])
+        self.assertEqual(frame["Close"].dtype, np.float32)
+        self.assertTrue(np.shares_memory(frame["Close"].to_numpy(), compact.prices))
+        self.assertTrue(np.shares_memory(compact["Volume"].to_numpy(), compact.volume))
+        self.assertFalse(compact.column("Close").flags.writeable)
+        self.assertTrue(frame.index.equals(yfinance_frame().index))
+    
+    def test_size_and_pickle_round_trip(self):
+        """Test the memory saving and that pickling keeps the data."""
+        frame = yfinance_frame()
+        compact = CompactHistory.from_frame(frame, price_dtype="float32")
+        self.assertEqual(compact.nbytes, 300 * (8 + 4 * 4 + 8))
+        restored = pickle.loads(pickle.dumps(compact))
+        pd.testing.assert_frame_equal(restored.to_frame(), compact.to_frame())
+    
+    def test_analyzer_accepts_compact_history(self):
+        """Test statistics on a compact history against the original frame."""
+        frame = yfinance_frame()
+        compact = CompactHistory.from_frame(frame)
+        expected = analyzer.calculate_statistics(frame)
+        actual = analyzer.calculate_statistics(compact)
+        self.assertEqual(actual, expected)
+        self.assertEqual(
+            analyzer.prepare_chart_data(compact), analyzer.prepare_chart_data(frame)
+        )
+    
+    def test_fetcher_caches_compact_history_and_reports_memory(self):
+        """Test that fetched histories are cached compactly and accounted per ticker."""
+        cache = MemoryCache()
+        fetcher = DataFetcher(cache=cache)
+        ticker_obj = MagicMock(ticker="AAPL")
+        ticker_obj.history.return_value = yfinance_frame()
+        
+        with patch("src.data_fetcher.config.HISTORY_PRICE_DTYPE", "float32"):
+            history = fetcher.get_historical_data(ticker_obj, "1y", "1d")
+            report = fetcher.history_memory()
+        
+        self.assertIsInstance(cache.get("history:AAPL:1y:1d"), CompactHistory)
+        self.assertNotIn("Dividends", history.columns)
+        self.assertEqual(report["tickers"], 1)
+        self.assertEqual(report["per_ticker"]["AAPL"]["bytes"], 300 * 32)
+        self.assertLess(report["bytes"], report["frame_bytes"])
+        
+        cache.delete("history:AAPL:1y:1d")
+        self.assertEqual(fetcher.history_memory()["tickers"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
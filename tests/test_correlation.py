@@ -0,0 +1,110 @@
+"""
+Unit tests for the correlation engine.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.correlation import (
+    align_closes,
+    returns_from_closes,
+    covariance_matrix,
+    correlation_from_covariance,
+    RollingCovariance,
+    correlation_report,
+    rolling_correlations,
+)
+from app import web_app
+
+
+class TestCorrelation(unittest.TestCase):
+    """Test cases for calendar alignment and matrix computation."""
+    
+    def test_align_drops_weekends_for_intersection(self):
+        """Test that crypto weekend bars are dropped when aligning with stocks."""
+        crypto = pd.DataFrame(
+            {"Close": np.arange(1.0, 15.0)},
+            index=pd.date_range("2024-01-01", periods=14, freq="D", tz="UTC"),
+        )
+        stock = pd.DataFrame(
+            {"Close": np.arange(1.0, 11.0)},
+            index=pd.date_range("2024-01-01", periods=10, freq="B", tz="America/New_York"),
+        )
+        closes = align_closes({"BTC-USD": crypto, "AAPL": stock})
+        self.assertEqual(len(closes), 10)
+        self.assertTrue((closes.index.dayofweek < 5).all())
+        
+        union = align_closes({"BTC-USD": crypto, "AAPL": stock}, calendar="union")
+        self.assertEqual(len(union), 14)
+    
+    def test_matrices_match_numpy(self):
+        """Test covariance/correlation against numpy."""
+        rng = np.random.default_rng(1)
+        returns = rng.normal(size=(200, 4))
+        covariance = covariance_matrix(returns)
+        np.testing.assert_allclose(covariance, np.cov(returns, rowvar=False))
+        np.testing.assert_allclose(
+            correlation_from_covariance(covariance), np.corrcoef(returns, rowvar=False)
+        )
+    
+    def test_rolling_matches_full_recompute(self):
+        """Test incremental window updates against a direct computation."""
+        rng = np.random.default_rng(2)
+        returns = rng.normal(scale=0.02, size=(100, 3))
+        rolling = RollingCovariance(3, window=30)
+        for row in returns:
+            rolling.update(row)
+        np.testing.assert_allclose(
+            rolling.covariance(), np.cov(returns[-30:], rowvar=False), atol=1e-12
+        )
+    
+    def test_rolling_is_stable_with_a_large_mean(self):
+        """Test that updates keep precision when returns sit far from zero."""
+        rng = np.random.default_rng(3)
+        returns = 1e4 + rng.normal(scale=1e-3, size=(1000, 2))
+        rolling = RollingCovariance(2, window=50)
+        for row in returns:
+            rolling.update(row)
+        np.testing.assert_allclose(
+            rolling.covariance(), np.cov(returns[-50:], rowvar=False), rtol=1e-6
+        )
+    
+    def test_report_includes_rolling_series(self):
+        """Test that a step adds rolling matrices ending with the latest window."""
+        rng = np.random.default_rng(4)
+        index = pd.bdate_range("2024-01-01", periods=61)
+        histories = {
+            name: pd.DataFrame(
+                {"Close": 100 * np.exp(np.cumsum(rng.normal(0, 0.01, 61)))}, index=index
+            )
+            for name in ("A", "B", "C")
+        }
+        report = correlation_report(histories, window=20, step=10)
+        self.assertEqual([entry["date"] for entry in report["rolling"]][-1], report["end"])
+        self.assertEqual(len(report["rolling"]), 5)
+        np.testing.assert_allclose(
+            report["rolling"][-1]["correlation"], report["rolling_correlation"], atol=1e-12
+        )
+        returns = returns_from_closes(align_closes(histories))
+        self.assertEqual(len(rolling_correlations(returns, 20)), 41)
+    
+    def test_endpoint_rejects_short_window(self):
+        """Test that windows below two returns are refused before any fetch."""
+        client = web_app.app.test_client()
+        with patch.object(web_app, "load_histories") as load:
+            for window in ("-5", "0", "1"):
+                response = client.get(f"/correlation?tickers=AAPL,MSFT&window={window}")
+                self.assertEqual(response.status_code, 400, window)
+        load.assert_not_called()
+    
+    def test_returns_from_closes(self):
+        """Test daily returns of aligned closes."""
+        closes = pd.DataFrame({"A": [1.0, 2.0, 1.0]})
+        self.assertEqual(returns_from_closes(closes)["A"].tolist(), [1.0, -0.5])
+
+
+if __name__ == "__main__":
+    unittest.main()
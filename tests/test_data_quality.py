@@ -0,0 +1,123 @@
+"""
+Unit tests for history validation and cleaning.
+"""
+
+import unittest
+from unittest.mock import MagicMock
+
+import numpy as np
+import pandas as pd
+
+from src.cache import MemoryCache
+from src.data_fetcher import DataFetcher
+from src.data_quality import HistoryValidator, outlier_scores
+
+
+def daily_bars(bars: int = 100) -> pd.DataFrame:
+    """Clean daily OHLCV bars."""
+    index = pd.bdate_range("2024-01-01", periods=bars, tz="America/New_York", name="Date")
+    close = 100 * np.exp(np.cumsum(np.random.default_rng(1).normal(0, 0.01, bars)))
+    return pd.DataFrame({
+        "Open": close,
+        "High": close * 1.01,
+        "Low": close * 0.99,
+        "Close": close,
+        "Volume": np.full(bars, 1000),
+    }, index=index)
+
+
+class TestHistoryValidator(unittest.TestCase):
+    """Test cases for HistoryValidator."""
+    
+    def test_clean_history_is_returned_unchanged(self):
+        """Test that a clean history passes without a copy or any counted issue."""
+        validator = HistoryValidator()
+        frame = daily_bars()
+        cleaned, report = validator.validate(frame)
+        
+        self.assertIs(cleaned, frame)
+        self.assertFalse(any(report.values()))
+        self.assertEqual(validator.counters()["checked"], 1)
+        self.assertEqual(validator.counters()["with_issues"], 0)
+    
+    def test_sorts_deduplicates_and_fills(self):
+        """Test ordering, duplicate removal and forward-filling of bad bars."""
+        validator = HistoryValidator(gap_policy="ffill")
+        frame = daily_bars()
+        frame.iloc[10, frame.columns.get_loc("Close")] = 0.0
+        frame.iloc[20, frame.columns.get_loc("Close")] = np.nan
+        shuffled = pd.concat([frame.iloc[50:], frame.iloc[:50], frame.iloc[[5, 6]]])
+        
+        cleaned, report = validator.validate(shuffled)
+        
+        self.assertEqual(report["unsorted"], 1)
+        self.assertEqual(report["duplicates"], 2)
+        self.assertEqual(report["invalid_prices"], 1)
+        self.assertEqual(report["missing_prices"], 1)
+        self.assertEqual(report["filled"], 2)
+        self.assertTrue(cleaned.index.is_monotonic_increasing)
+        self.assertEqual(len(cleaned), 100)
+        self.assertTrue((cleaned[["Open", "High", "Low", "Close"]] > 0).all().all())
+        self.assertEqual(cleaned["Close"].iloc[10], frame["Close"].iloc[9])
+        self.assertEqual(cleaned["Volume"].iloc[20], 0)
+        self.assertEqual(validator.counters()["issues"]["duplicates"], 2)
+        
+        dropped, report = HistoryValidator(gap_policy="drop").validate(frame)
+        self.assertEqual(len(dropped), 98)
+        self.assertEqual(report["dropped"], 2)
+    
+    def test_invalid_open_only_repairs_that_column(self):
+        """Test that a bad Open on a valid bar leaves Close and Volume alone."""
+        frame = daily_bars()
+        frame.iloc[30, frame.columns.get_loc("Open")] = -1.0
+        
+        cleaned, report = HistoryValidator(gap_policy="ffill").validate(frame)
+        self.assertEqual(report["invalid_prices"], 1)
+        self.assertEqual(report["filled"], 1)
+        self.assertEqual(cleaned["Open"].iloc[30], frame["Close"].iloc[30])
+        self.assertEqual(cleaned["Close"].iloc[30], frame["Close"].iloc[30])
+        self.assertEqual(cleaned["High"].iloc[30], frame["High"].iloc[30])
+        self.assertEqual(cleaned["Volume"].iloc[30], 1000)
+        
+        kept, report = HistoryValidator(gap_policy="drop").validate(frame)
+        self.assertEqual(len(kept), 100)
+        self.assertTrue(np.isnan(kept["Open"].iloc[30]))
+        self.assertEqual(report["dropped"], 0)
+    
+    def test_outlier_detection(self):
+        """Test that spikes are flagged and, under the drop policy, removed."""
+        frame = daily_bars()
+        frame.iloc[40, frame.columns.get_loc("Close")] *= 5
+        
+        returns = np.diff(np.log(frame["Close"].to_numpy()))
+        self.assertEqual(np.flatnonzero(outlier_scores(returns, "mad") > 8).tolist(), [39, 40])
+        self.assertTrue((outlier_scores(returns, "zscore")[[39, 40]] > 4).all())
+        
+        flagged, report = HistoryValidator(outlier_policy="flag").validate(frame)
+        self.assertIs(flagged, frame)
+        self.assertEqual(report["outliers"], 2)
+        
+        cleaned, report = HistoryValidator(outlier_policy="drop").validate(frame)
+        self.assertEqual(report["outliers_removed"], 1)
+        self.assertEqual(report["filled"], 1)
+        self.assertEqual(cleaned["Close"].iloc[40], frame["Close"].iloc[39])
+    
+    def test_fetcher_caches_cleaned_history(self):
+        """Test that the fetch pipeline validates before caching and reports counters."""
+        validator = HistoryValidator()
+        fetcher = DataFetcher(cache=MemoryCache(), validator=validator)
+        frame = daily_bars()
+        ticker_obj = MagicMock(ticker="AAPL")
+        ticker_obj.history.return_value = pd.concat([frame, frame.iloc[[-1]]])
+        
+        history = fetcher.get_historical_data(ticker_obj, "1y", "1d")
+        
+        self.assertEqual(len(history), 100)
+        self.assertFalse(history.index.has_duplicates)
+        self.assertEqual(fetcher.data_quality()["issues"]["duplicates"], 1)
+        fetcher.get_historical_data(ticker_obj, "1y", "1d")
+        self.assertEqual(fetcher.data_quality()["checked"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,189 @@
+"""
+Unit tests for bulk exports.
+"""
+
+import importlib.util
+import io
+import json
+import os
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from src.cache import MemoryCache
+from src.config import config
+from src.http_cache import history_key
+from src.export import Exporter, exporter
+from app import web_app
+from app.console_app import main
+
+
+def make_history(bars: int = 250, last_close: float = None) -> pd.DataFrame:
+    index = pd.date_range("2024-01-01", periods=bars, freq="B", tz="America/New_York")
+    close = 100 + np.arange(bars, dtype=float)
+    if last_close is not None:
+        close[-1] = last_close
+    return pd.DataFrame({
+        "Open": close - 1, "High": close + 1, "Low": close - 2, "Close": close,
+        "Volume": np.arange(bars) * 10
+    }, index=index)
+
+
+def make_fetcher(history: pd.DataFrame) -> MagicMock:
+    fetcher = MagicMock()
+    fetcher.fetch_data.side_effect = lambda ticker, *args: None if ticker == "NOPE" else object()
+    fetcher.get_historical_data.return_value = history
+    fetcher.get_company_info.return_value = {"currency": "USD"}
+    fetcher.get_current_price.return_value = None
+    return fetcher
+
+
+class TestExport(unittest.TestCase):
+    """Test cases for Exporter, the /export endpoint and the console export mode."""
+
+    def setUp(self):
+        self.history = make_history()
+        self.exporter = Exporter(make_fetcher(self.history), row_group_rows=100)
+
+    def test_stream_csv_in_row_groups(self):
+        """Test that a streamed CSV covers all tickers with a single header."""
+        chunks = list(self.exporter.stream(["AAPL", "MSFT"], "history", "csv"))
+        self.assertGreater(len(chunks), 2)
+        frame = pd.read_csv(io.BytesIO(b"".join(chunks)))
+
+        self.assertEqual(len(frame), 500)
+        self.assertEqual(list(frame["ticker"].unique()), ["AAPL", "MSFT"])
+        self.assertEqual(frame.columns[0], "ticker")
+        self.assertEqual(frame["Close"].iloc[-1], self.history["Close"].iloc[-1])
+
+    def test_incremental_export_skips_unchanged_partitions(self):
+        """Test that only partitions whose data changed are rewritten."""
+        with tempfile.TemporaryDirectory() as directory:
+            first = list(self.exporter.export_directory(
+                ["AAPL", "NOPE"], directory, "csv", ["history", "statistics"]
+            ))
+            self.assertEqual(
+                [(r["ticker"], r["status"]) for r in first],
+                [("AAPL", "written"), ("AAPL", "written"), ("NOPE", "error"), ("NOPE", "error")]
+            )
+            manifest = json.loads(open(os.path.join(directory, "manifest.json")).read())
+            self.assertEqual(manifest["partitions"]["history/AAPL.csv"]["rows"], 250)
+
+            again = list(self.exporter.export_directory(
+                ["AAPL"], directory, "csv", ["history", "statistics"]
+            ))
+            self.assertEqual([r["status"] for r in again], ["skipped", "skipped"])
+
+            # A revised last bar changes the fingerprint
+            self.exporter.fetcher.get_historical_data.return_value = make_history(last_close=1.0)
+            revised = list(self.exporter.export_directory(["AAPL"], directory, "csv", ["history"]))
+            self.assertEqual(revised[0]["status"], "written")
+            written = pd.read_csv(os.path.join(directory, "history", "AAPL.csv"))
+            self.assertEqual(written["Close"].iloc[-1], 1.0)
+
+            full = list(self.exporter.export_directory(
+                ["AAPL"], directory, "csv", ["history"], incremental=False
+            ))
+            self.assertEqual(full[0]["status"], "written")
+
+    def test_export_endpoint_streams_csv(self):
+        """Test that /export streams the requested dataset and validates input."""
+        client = web_app.app.test_client()
+        with patch.object(exporter, "fetcher", make_fetcher(self.history)):
+            response = client.get("/export?tickers=AAPL,MSFT&dataset=statistics&format=csv")
+            self.assertEqual(response.status_code, 200)
+            self.assertTrue(response.is_streamed)
+            self.assertIn("attachment", response.headers["Content-Disposition"])
+            frame = pd.read_csv(io.BytesIO(response.get_data()))
+
+            bad = client.get("/export?tickers=AAPL&format=xlsx")
+
+        self.assertEqual(list(frame["ticker"]), ["AAPL", "MSFT"])
+        self.assertEqual(frame["data_points"].iloc[0], 250)
+        self.assertEqual(bad.status_code, 400)
+
+    def test_forecast_uses_the_budgeted_forecaster(self):
+        """Test forecast routing, its cache entry and the disabled case."""
+        forecast = {
+            "dates": ["2024-12-17", "2024-12-18"], "mean": [1.0, 2.0],
+            "lower": [0.5, 1.5], "upper": [1.5, 2.5], "method": "arima"
+        }
+        forecaster = MagicMock()
+        forecaster.forecast.return_value = forecast
+        with patch.object(web_app.config, "ENABLE_ARIMA_FORECAST", True), \
+                patch("src.extensions.forecasting.budgeted.budgeted_forecaster", forecaster), \
+                patch("src.export.cache", MemoryCache()):
+            first = b"".join(self.exporter.stream(["AAPL"], "forecast", "csv"))
+            again = b"".join(self.exporter.stream(["AAPL"], "forecast", "csv"))
+            # Same entry as /analyze, keyed on the last bar and its close
+            analyze_key = "forecast:" + history_key(
+                "AAPL", config.DEFAULT_PERIOD, config.DEFAULT_INTERVAL, self.history
+            )
+
+        self.assertEqual(first, again)
+        self.assertEqual(forecaster.forecast.call_count, 1)
+        self.assertIsNotNone(forecaster.forecast.call_args.kwargs["calendar"])
+        self.assertEqual(forecaster.forecast.call_args.kwargs["key"], analyze_key)
+        self.assertEqual(pd.read_csv(io.BytesIO(first))["mean"].tolist(), [1.0, 2.0])
+
+        with patch.object(web_app.config, "ENABLE_ARIMA_FORECAST", False):
+            disabled = web_app.app.test_client().get("/export?tickers=AAPL&dataset=forecast")
+        self.assertEqual(disabled.status_code, 400)
+
+    def test_fingerprint_covers_content_and_price_only_for_statistics(self):
+        """Test that any revised bar changes the fingerprint and the price only matters for statistics."""
+        data = {"history": self.history, "current_price": 300.0}
+        revised = self.history.copy()
+        revised.iloc[10, revised.columns.get_loc("Close")] += 1
+        moved = {"history": self.history, "current_price": 301.0}
+
+        for dataset in ("history", "statistics", "forecast"):
+            self.assertNotEqual(
+                Exporter.fingerprint("AAPL", "1y", "1d", data, dataset),
+                Exporter.fingerprint("AAPL", "1y", "1d", {**data, "history": revised}, dataset)
+            )
+        self.assertEqual(
+            Exporter.fingerprint("AAPL", "1y", "1d", data, "history"),
+            Exporter.fingerprint("AAPL", "1y", "1d", moved, "history")
+        )
+        self.assertNotEqual(
+            Exporter.fingerprint("AAPL", "1y", "1d", data, "statistics"),
+            Exporter.fingerprint("AAPL", "1y", "1d", moved, "statistics")
+        )
+
+    def test_console_export_mode(self):
+        """Test that the console app writes files and one status row per file."""
+        output = io.StringIO()
+        with tempfile.TemporaryDirectory() as directory, \
+                patch.object(exporter, "fetcher", make_fetcher(self.history)), \
+                redirect_stdout(output):
+            code = main([
+                "--export", directory, "--export-format", "csv",
+                "--datasets", "history", "AAPL", "MSFT"
+            ])
+            files = sorted(os.listdir(os.path.join(directory, "history")))
+
+        self.assertEqual(code, 0)
+        self.assertEqual(files, ["AAPL.csv", "MSFT.csv"])
+        self.assertEqual(len(output.getvalue().strip().splitlines()), 3)
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow not installed")
+    def test_parquet_round_trip(self):
+        """Test that streamed Parquet keeps the schema across row groups."""
+        import pyarrow.parquet as pq
+
+        body = b"".join(self.exporter.stream(["AAPL", "MSFT"], "history", "parquet"))
+        parquet = pq.ParquetFile(io.BytesIO(body))
+        frame = pd.read_parquet(io.BytesIO(body))
+
+        self.assertEqual(parquet.metadata.num_rows, 500)
+        self.assertEqual(parquet.num_row_groups, 5)
+        self.assertEqual(str(frame["timestamp"].dt.tz), "UTC")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,122 @@
+"""
+Unit tests for time-budgeted forecasting.
+"""
+
+import importlib.util
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.extensions.forecasting.arima_forecaster import (
+    ForecastCancelled,
+    drift_forecast,
+    forecast_close_prices
+)
+from src.extensions.forecasting.budgeted import BudgetedForecaster
+
+FIT = "src.extensions.forecasting.budgeted.forecast_close_prices"
+
+
+def make_history(bars: int = 120) -> pd.DataFrame:
+    index = pd.bdate_range("2024-01-01", periods=bars)
+    steps = np.random.default_rng(5).normal(0.001, 0.01, bars)
+    return pd.DataFrame({"Close": 100 * np.exp(np.cumsum(steps))}, index=index)
+
+
+def arima_result(**extra):
+    return {"dates": [], "mean": [], "lower": [], "upper": [], "method": "arima",
+            "converged": True, "iterations": 7, **extra}
+
+
+class TestBudgetedForecaster(unittest.TestCase):
+    """Test cases for BudgetedForecaster and the drift fallback."""
+
+    def setUp(self):
+        self.history = make_history()
+
+    def test_fast_fit_is_returned_and_recorded(self):
+        """Test that a fit within the deadline is returned with its statistics."""
+        forecaster = BudgetedForecaster(workers=1, deadline=5)
+        with patch(FIT, return_value=arima_result(converged=False)) as fit:
+            result = forecaster.forecast("AAPL", self.history, steps=5)
+
+        self.assertEqual(result["method"], "arima")
+        self.assertNotIn("fallback", result)
+        self.assertEqual(fit.call_args.kwargs["maxiter"], forecaster.maxiter)
+        stats = forecaster.stats()
+        self.assertEqual(stats["fits"], 1)
+        self.assertEqual(stats["tickers"]["AAPL"]["not_converged"], 1)
+        self.assertEqual(stats["tickers"]["AAPL"]["last_iterations"], 7)
+        forecaster.shutdown()
+
+    def test_missed_deadline_returns_fallback_and_refines(self):
+        """Test that a slow fit yields a drift forecast and later a refined one."""
+        release = threading.Event()
+        refined = []
+        done = threading.Event()
+
+        def slow_fit(*args, **kwargs):
+            release.wait(5)
+            return arima_result()
+
+        forecaster = BudgetedForecaster(workers=1, deadline=0.05)
+        with patch(FIT, side_effect=slow_fit) as fit:
+            first = forecaster.forecast(
+                "MSFT", self.history, key="k", steps=5,
+                on_refined=lambda result: (refined.append(result), done.set())
+            )
+            started = time.monotonic()
+            second = forecaster.forecast("MSFT", self.history, key="k", steps=5)
+            self.assertLess(time.monotonic() - started, 0.05)
+            release.set()
+            self.assertTrue(done.wait(5))
+
+        self.assertTrue(first["fallback"])
+        self.assertEqual(first["method"], "drift")
+        self.assertEqual(len(first["dates"]), 5)
+        self.assertTrue(second["fallback"])
+        self.assertEqual(fit.call_count, 1)
+        self.assertEqual(refined[0]["method"], "arima")
+        self.assertEqual(forecaster.stats()["tickers"]["MSFT"]["fallbacks"], 2)
+        forecaster.shutdown()
+
+    def test_fit_cancelled_past_refine_budget(self):
+        """Test that a background fit is stopped once it exceeds the refine budget."""
+        def endless_fit(*args, should_stop=None, **kwargs):
+            while not should_stop():
+                time.sleep(0.01)
+            raise ForecastCancelled("ARIMA fit cancelled")
+
+        forecaster = BudgetedForecaster(workers=1, deadline=0.01, refine_seconds=0.1)
+        with patch(FIT, side_effect=endless_fit):
+            result = forecaster.forecast("TSLA", self.history, steps=3)
+            deadline = time.monotonic() + 5
+            while forecaster.stats()["cancelled"] == 0 and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        self.assertTrue(result["fallback"])
+        self.assertEqual(forecaster.stats()["tickers"]["TSLA"]["cancelled"], 1)
+        self.assertEqual(forecaster.stats()["refining"], 0)
+        forecaster.shutdown()
+
+    def test_drift_forecast_interval_widens(self):
+        """Test that the drift forecast interval grows with the horizon."""
+        result = drift_forecast(self.history, steps=10, alpha=0.2)
+        widths = np.array(result["upper"]) - np.array(result["lower"])
+        self.assertTrue((np.diff(widths) > 0).all())
+        self.assertTrue((np.array(result["lower"]) < np.array(result["mean"])).all())
+
+    @unittest.skipUnless(importlib.util.find_spec("statsmodels"), "statsmodels not installed")
+    def test_iteration_cap_reports_convergence(self):
+        """Test that capping optimizer iterations is reported as not converged."""
+        result = forecast_close_prices(self.history, steps=3, order=(2, 1, 2), maxiter=1)
+        self.assertFalse(result["converged"])
+        self.assertEqual(result["method"], "arima")
+
+
+if __name__ == "__main__":
+    unittest.main()
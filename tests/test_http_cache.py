@@ -0,0 +1,92 @@
+"""
+Unit tests for HTTP caching helpers and the cacheable /analyze endpoint.
+"""
+
+import gzip
+import unittest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.http_cache import compute_etag, history_key, is_market_open, cache_max_age, choose_encoding
+from src.config import config
+from app import web_app
+
+
+class TestHttpCache(unittest.TestCase):
+    """Test cases for HTTP caching helpers."""
+    
+    def test_etag_depends_on_last_bar_and_parameters(self):
+        """Test ETag stability and sensitivity."""
+        bar = datetime(2024, 3, 1, tzinfo=timezone.utc)
+        etag = compute_etag("AAPL", "1y", "1d", bar)
+        self.assertEqual(etag, compute_etag("AAPL", "1y", "1d", bar))
+        self.assertNotEqual(etag, compute_etag("AAPL", "6mo", "1d", bar))
+        self.assertNotEqual(
+            etag, compute_etag("AAPL", "1y", "1d", datetime(2024, 3, 4, tzinfo=timezone.utc))
+        )
+        # The running bar keeps its timestamp while its close moves
+        running = compute_etag("AAPL", "1y", "1d", bar, 181.5)
+        self.assertEqual(running, compute_etag("AAPL", "1y", "1d", bar, 181.5))
+        self.assertNotEqual(running, compute_etag("AAPL", "1y", "1d", bar, 181.75))
+        history = pd.DataFrame({"Close": [180.0, 181.5]}, index=[bar - timedelta(days=1), bar])
+        self.assertEqual(history_key("AAPL", "1y", "1d", history), running)
+    
+    def test_market_hours(self):
+        """Test regular session detection (times in UTC, New York is UTC-5 in winter)."""
+        self.assertTrue(is_market_open(datetime(2024, 1, 10, 15, 0)))
+        self.assertFalse(is_market_open(datetime(2024, 1, 10, 22, 0)))
+        self.assertFalse(is_market_open(datetime(2024, 1, 13, 15, 0)))  # Saturday
+        self.assertTrue(is_market_open(datetime(2024, 1, 13, 15, 0), is_crypto=True))
+    
+    def test_cache_max_age(self):
+        """Test max-age while open and closed."""
+        open_time = datetime(2024, 1, 10, 15, 0)
+        self.assertEqual(cache_max_age("1m", now=open_time), 60)
+        # Friday after close: valid until the cap, not over the weekend
+        closed = datetime(2024, 1, 12, 22, 0)
+        self.assertEqual(cache_max_age("1d", now=closed), config.HTTP_CACHE_MAX_AGE_CLOSED)
+    
+    def test_choose_encoding(self):
+        """Test Accept-Encoding negotiation."""
+        self.assertEqual(choose_encoding("gzip, deflate"), "gzip")
+        self.assertIsNone(choose_encoding("gzip;q=0, identity"))
+        self.assertIsNone(choose_encoding(""))
+
+
+class TestAnalyzeGet(unittest.TestCase):
+    """Test cases for GET /analyze conditional requests."""
+    
+    def setUp(self):
+        index = pd.date_range("2024-01-01", periods=3, freq="D")
+        self.history = pd.DataFrame({"Close": [1.0, 2.0, 3.0]}, index=index)
+        self.client = web_app.app.test_client()
+    
+    def test_conditional_get_returns_304(self):
+        """Test that a matching If-None-Match skips the analysis."""
+        payload = {"success": True, "ticker": "AAPL", "padding": "x" * 4096}
+        with patch.object(web_app, "load_market_data", return_value=(object(), self.history)), \
+                patch.object(web_app, "build_analysis", return_value=payload) as build:
+            first = self.client.get("/analyze?ticker=AAPL", headers={"Accept-Encoding": "gzip"})
+            self.assertEqual(first.status_code, 200)
+            self.assertEqual(first.headers["Content-Encoding"], "gzip")
+            self.assertIn(b'"ticker"', gzip.decompress(first.data))
+            self.assertIn("max-age", first.headers["Cache-Control"])
+            # One tag for every content-coding, so it must be weak
+            self.assertTrue(first.headers["ETag"].startswith('W/"'))
+            
+            second = self.client.get(
+                "/analyze?ticker=AAPL", headers={"If-None-Match": first.headers["ETag"]}
+            )
+            self.assertEqual(second.status_code, 304)
+            self.assertEqual(build.call_count, 1)
+    
+    def test_rejects_unsupported_interval(self):
+        """Test parameter validation."""
+        response = self.client.get("/analyze?ticker=AAPL&interval=7m")
+        self.assertEqual(response.status_code, 400)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,70 @@
+"""
+Unit tests for exchange calendars.
+"""
+
+import unittest
+
+import numpy as np
+import pandas as pd
+
+from src.market_calendar import calendar_for_exchange, get_calendar, infer_calendar
+from src.extensions.forecasting.arima_forecaster import _infer_future_dates
+
+
+class TestMarketCalendar(unittest.TestCase):
+    """Test cases for MarketCalendar."""
+
+    def test_nyse_holidays(self):
+        """Test that the 2024 NYSE holidays are not sessions."""
+        calendar = get_calendar("XNYS")
+        holidays = np.datetime_as_string(calendar.closed_days("2024-01-01", "2024-12-31")).tolist()
+        self.assertEqual(holidays, [
+            "2024-01-01", "2024-01-15", "2024-02-19", "2024-03-29", "2024-05-27",
+            "2024-06-19", "2024-07-04", "2024-09-02", "2024-11-28", "2024-12-25",
+        ])
+        self.assertEqual(
+            calendar.is_session(["2024-07-04", "2024-07-05", "2024-07-06"]).tolist(),
+            [False, True, False]
+        )
+
+    def test_next_sessions(self):
+        """Test next sessions skip weekends and holidays, vectorized over dates."""
+        calendar = get_calendar("XNYS")
+        last_bar = pd.Timestamp("2024-12-20 16:00", tz="America/New_York")
+        sessions = np.datetime_as_string(calendar.next_sessions(last_bar, 6)).tolist()
+        self.assertEqual(sessions, [
+            "2024-12-23", "2024-12-24", "2024-12-26", "2024-12-27", "2024-12-30", "2024-12-31",
+        ])
+
+        many = calendar.next_sessions_many(["2024-12-31", "2024-03-28"], 2)
+        self.assertEqual(np.datetime_as_string(many).tolist(), [
+            ["2025-01-02", "2025-01-03"],
+            ["2024-04-01", "2024-04-02"],
+        ])
+
+    def test_exchange_mapping(self):
+        """Test exchange codes, crypto fallback and inference from bars."""
+        self.assertEqual(calendar_for_exchange("NMS").name, "XNYS")
+        self.assertEqual(calendar_for_exchange("LSE").name, "XLON")
+        self.assertEqual(calendar_for_exchange(None, "BTC-USD").name, "24/7")
+        self.assertEqual(calendar_for_exchange("XYZ", "AAPL").name, "WEEKDAYS")
+        self.assertEqual(infer_calendar(pd.date_range("2024-01-01", periods=10)).name, "24/7")
+        self.assertEqual(infer_calendar(pd.bdate_range("2024-01-01", periods=10)).name, "WEEKDAYS")
+
+    def test_forecast_dates_and_rangebreaks(self):
+        """Test forecast dates follow the calendar and charts hide closed days."""
+        index = pd.bdate_range("2024-11-01", "2024-11-27")
+        calendar = get_calendar("XNYS")
+        self.assertEqual(
+            _infer_future_dates(index, 3, calendar),
+            ["2024-11-29", "2024-12-02", "2024-12-03"]
+        )
+        self.assertEqual(
+            calendar.rangebreaks("2024-11-01", "2024-12-03"),
+            [{"bounds": ["sat", "mon"]}, {"values": ["2024-11-28"]}]
+        )
+        self.assertEqual(get_calendar("24/7").rangebreaks("2024-11-01", "2024-12-03"), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
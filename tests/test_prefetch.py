@@ -0,0 +1,129 @@
+"""
+Unit tests for the access log and prefetcher.
+"""
+
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+
+from src.prefetch import AccessLog, Prefetcher
+
+
+class TestAccessLog(unittest.TestCase):
+    """Test cases for AccessLog."""
+
+    def test_top_orders_by_decayed_count(self):
+        """Test that recent requests outweigh older ones of the same count."""
+        log = AccessLog(half_life_hours=1)
+        with patch("src.prefetch.time.time", return_value=log.epoch):
+            for _ in range(3):
+                log.record("OLD", "1y", "1d")
+        with patch("src.prefetch.time.time", return_value=log.epoch + 7200):
+            for _ in range(2):
+                log.record("NEW", "1y", "1d")
+            top = log.top(2)
+
+        self.assertEqual([key for key, _ in top], [("NEW", "1y", "1d"), ("OLD", "1y", "1d")])
+        self.assertAlmostEqual(top[0][1], 2.0)
+        self.assertAlmostEqual(top[1][1], 0.75)
+
+    def test_long_uptime_rebases_instead_of_overflowing(self):
+        """Test that weights stay finite months after the epoch."""
+        log = AccessLog(half_life_hours=1)
+        start = log.epoch
+        with patch("src.prefetch.time.time", return_value=start):
+            log.record("OLD", "1y", "1d")
+        with patch("src.prefetch.time.time", return_value=start + 90 * 86400):
+            log.record("NEW", "1y", "1d")
+            log.record("NEW", "1y", "1d")
+            top = log.top(2)
+
+        self.assertGreater(log.epoch, start)
+        self.assertEqual(top[0][0], ("NEW", "1y", "1d"))
+        self.assertAlmostEqual(top[0][1], 2.0)
+        self.assertAlmostEqual(top[1][1], 0.0)
+
+    def test_save_and_load_round_trip(self):
+        """Test that saved counts are restored, decayed by their age."""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "access_log.json")
+            log = AccessLog(path, half_life_hours=1)
+            log.record("AAPL", "1y", "1d")
+            log.record("AAPL", "1y", "1d")
+            self.assertTrue(log.save())
+            self.assertFalse(log.save())
+
+            data = json.loads(open(path).read())
+            data["saved_at"] -= 3600
+            with open(path, "w") as handle:
+                json.dump(data, handle)
+
+            restored = AccessLog(path, half_life_hours=1)
+            self.assertEqual(restored.load(), 1)
+            (key, score), = restored.top(5)
+            self.assertEqual(key, ("AAPL", "1y", "1d"))
+            self.assertAlmostEqual(score, 1.0, places=3)
+
+    def test_prunes_least_popular_views(self):
+        """Test that the log keeps at most max_keys views."""
+        log = AccessLog(max_keys=10)
+        for i in range(20):
+            for _ in range(i + 1):
+                log.record(f"T{i}", "1y", "1d")
+
+        self.assertLessEqual(len(log), 11)
+        self.assertEqual(log.top(1)[0][0], ("T19", "1y", "1d"))
+
+
+class TestPrefetcher(unittest.TestCase):
+    """Test cases for Prefetcher."""
+
+    def make_log(self):
+        log = AccessLog()
+        for ticker, count in (("AAPL", 3), ("MSFT", 2), ("TSLA", 1)):
+            for _ in range(count):
+                log.record(ticker, "1y", "1d")
+        return log
+
+    def test_warm_up_in_popularity_order(self):
+        """Test that warm-up loads the top-N views, most popular first."""
+        fetcher = MagicMock()
+        fetcher.upstream_headroom.return_value = 10.0
+        warmed = []
+        prefetcher = Prefetcher(self.make_log(), fetcher, top_n=2)
+        prefetcher._warm = lambda ticker, period, interval: warmed.append(ticker)
+
+        self.assertEqual(prefetcher.warm_up(), 2)
+        self.assertEqual(warmed, ["AAPL", "MSFT"])
+
+    def test_refresh_ahead_only_expiring_views(self):
+        """Test that only views close to expiry are refetched."""
+        fetcher = MagicMock()
+        fetcher.upstream_headroom.return_value = 10.0
+        fetcher.history_expires_in.side_effect = lambda ticker, period, interval: {
+            "AAPL": 5.0, "MSFT": 3600.0, "TSLA": None
+        }[ticker]
+        prefetcher = Prefetcher(self.make_log(), fetcher)
+        prefetcher._warm = MagicMock()
+
+        self.assertEqual(prefetcher.refresh_ahead(), 1)
+        fetcher.fetch_data.assert_called_once_with("AAPL", "1y", "1d")
+        fetcher.refresh_history.assert_called_once()
+        prefetcher._warm.assert_called_once_with("AAPL", "1y", "1d")
+
+    def test_refresh_deferred_without_headroom(self):
+        """Test that refreshing stops while upstream has no tokens to spare."""
+        fetcher = MagicMock()
+        fetcher.upstream_headroom.return_value = 0.0
+        fetcher.history_expires_in.return_value = 1.0
+        prefetcher = Prefetcher(self.make_log(), fetcher)
+
+        self.assertEqual(prefetcher.refresh_ahead(), 0)
+        fetcher.refresh_history.assert_not_called()
+        self.assertEqual(prefetcher.stats()["deferred"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Unit tests for the shared live price stream.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import pandas as pd
+
+from src.price_stream import PriceStreamHub, statistics_delta
+
+
+def _history(closes, start="2024-01-01"):
+    index = pd.date_range(start, periods=len(closes), freq="D")
+    return pd.DataFrame({"Close": closes, "Volume": [100] * len(closes)}, index=index)
+
+
+class TestPriceStream(unittest.TestCase):
+    """Test cases for the price stream hub."""
+    
+    def test_statistics_delta_only_changed_fields(self):
+        """Test that deltas contain only changed statistics."""
+        previous = {"current_price": 1.0, "volatility": 0.1, "formatted": {}}
+        current = {
+            "current_price": 2.0,
+            "volatility": 0.1,
+            "formatted": {"current_price": "$2.00", "volatility": "10.00%"},
+        }
+        delta = statistics_delta(previous, current)
+        self.assertEqual(delta["current_price"], 2.0)
+        self.assertNotIn("volatility", delta)
+        self.assertEqual(delta["formatted"], {"current_price": "$2.00"})
+    
+    def test_feed_shared_and_pushes_only_new_bars(self):
+        """Test that subscribers share one feed and receive new and revised bars."""
+        initial = _history([1.0, 2.0, 3.0])
+        update = _history([3.5, 4.0], start="2024-01-03")
+        
+        with patch("src.price_stream.data_fetcher") as fetcher:
+            fetcher.fetch_data.return_value = object()
+            fetcher.get_company_info.return_value = {"currency": "USD"}
+            fetcher.get_historical_data.return_value = initial
+            fetcher.get_recent_bars.side_effect = [update, update]
+            
+            hub = PriceStreamHub(interval="1d", poll_seconds=3600)
+            first = hub.subscribe(["AAPL"], since="2024-01-03")
+            second = hub.subscribe(["AAPL"], since="2024-01-03")
+            
+            for subscription in (first, second):
+                backlog = subscription.get(timeout=5)
+                self.assertEqual(backlog["bars"]["dates"], [])
+            self.assertEqual(fetcher.fetch_data.call_count, 1)
+            self.assertEqual(hub.stats()["subscribers"], {"AAPL": 2})
+            
+            event = hub._feeds["AAPL"].poll()
+            self.assertEqual(event["bars"]["dates"], ["2024-01-03", "2024-01-04"])
+            self.assertEqual(event["bars"]["prices"], [3.5, 4.0])
+            self.assertEqual(event["statistics"]["current_price"], 4.0)
+            self.assertIsNone(hub._feeds["AAPL"].poll())
+            fetcher.get_historical_data.assert_called_once()
+            
+            late = hub.subscribe(["AAPL"], since="2024-01-02")
+            self.assertEqual(late.get(timeout=5)["bars"]["dates"], ["2024-01-03", "2024-01-04"])
+            with self.assertRaises(ValueError):
+                hub.subscribe(["AAPL"], since="yesterday-ish")
+            hub.unsubscribe(late)
+            
+            hub.unsubscribe(first)
+            hub.unsubscribe(second)
+            self.assertEqual(hub.stats()["feeds"], 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,129 @@
+"""
+Unit tests for OHLCV resampling.
+"""
+
+import unittest
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+import pandas as pd
+
+from src.cache import MemoryCache
+from src.data_fetcher import DataFetcher
+from src.screener import load_histories
+from src.resample import can_derive, plan_fetch, resample_ohlcv, slice_period, ResampleError
+
+
+def minute_bars(days: int = 5) -> pd.DataFrame:
+    """Regular-session 1m bars (9:30-16:00 New York) over business days."""
+    sessions = [
+        pd.date_range(day + pd.Timedelta("9h30min"), periods=390, freq="1min")
+        for day in pd.bdate_range("2024-03-06", periods=days)
+    ]
+    index = pd.DatetimeIndex(np.concatenate(sessions)).tz_localize("America/New_York")
+    close = 100 + np.cumsum(np.random.default_rng(0).normal(0, 0.05, len(index)))
+    return pd.DataFrame({
+        "Open": close - 0.01,
+        "High": close + 0.1,
+        "Low": close - 0.1,
+        "Close": close,
+        "Volume": np.arange(len(index)),
+    }, index=index)
+
+
+class TestResample(unittest.TestCase):
+    """Test cases for bar aggregation and fetch planning."""
+    
+    def test_hourly_bars_anchor_at_session_open(self):
+        """Test that hourly bins start at 9:30 and match pandas aggregation."""
+        bars = minute_bars()
+        hourly = resample_ohlcv(bars, "1h", "1m")
+        
+        self.assertEqual(len(hourly), 5 * 7)
+        self.assertEqual(hourly.index[0].strftime("%H:%M"), "09:30")
+        self.assertEqual(hourly.index[6].strftime("%H:%M"), "15:30")
+        
+        expected = bars.groupby(
+            pd.Grouper(freq="60min", origin="start_day", offset="30min")
+        ).agg({"Open": "first", "High": "max", "Low": "min", "Close": "last", "Volume": "sum"})
+        expected = expected.dropna()
+        np.testing.assert_allclose(hourly.to_numpy(), expected.to_numpy())
+    
+    def test_daily_and_weekly_keep_local_dates_across_dst(self):
+        """Test daily/weekly labels around the March DST change."""
+        daily = resample_ohlcv(minute_bars(), "1d", "1m")
+        self.assertEqual(
+            [ts.strftime("%Y-%m-%d %H:%M") for ts in daily.index[:2]],
+            ["2024-03-06 00:00", "2024-03-07 00:00"]
+        )
+        weekly = resample_ohlcv(daily, "1wk", "1d")
+        self.assertEqual([ts.day for ts in weekly.index], [4, 11])
+        self.assertEqual(weekly["Volume"].sum(), daily["Volume"].sum())
+        self.assertEqual(weekly.index[1].utcoffset(), pd.Timedelta(hours=-4))
+    
+    def test_derivability_and_plan(self):
+        """Test which intervals nest and which are fetched."""
+        self.assertTrue(can_derive("30m", "90m"))
+        self.assertFalse(can_derive("60m", "90m"))
+        self.assertFalse(can_derive("1wk", "1mo"))
+        with self.assertRaises(ResampleError):
+            resample_ohlcv(minute_bars(1), "1m", "5m")
+        
+        self.assertEqual(
+            plan_fetch("5d", ["1d", "15m", "5m"]),
+            {"5m": "5m", "15m": "5m", "1d": "5m"}
+        )
+        self.assertEqual(len(slice_period(minute_bars(), "1d")), 390)
+        # 5m bars only go back 60 days, so a year of them is fetched as requested
+        self.assertEqual(plan_fetch("1y", ["5m", "1d", "1wk"])["1wk"], "1d")
+    
+    def test_fetcher_derives_from_cached_finer_history(self):
+        """Test that a cached 1m history serves 15m requests without upstream."""
+        cache = MemoryCache()
+        cache.set("history:AAPL:5d:1m", minute_bars(), ttl=60)
+        fetcher = DataFetcher(cache=cache)
+        ticker_obj = MagicMock(ticker="AAPL")
+        
+        history = fetcher.get_historical_data(ticker_obj, "5d", "15m")
+        
+        ticker_obj.history.assert_not_called()
+        self.assertEqual(len(history), 5 * 26)
+        self.assertEqual(fetcher.upstream_state()["derived_served"], 1)
+        self.assertIsNotNone(cache.get("history:AAPL:5d:15m"))
+    
+    def test_get_histories_fetches_finest_and_caches_derived(self):
+        """Test one upstream request for several intervals and the derived cache entries."""
+        cache = MemoryCache()
+        fetcher = DataFetcher(cache=cache)
+        ticker_obj = MagicMock(ticker="AAPL")
+        ticker_obj.history.return_value = minute_bars()
+        
+        histories = fetcher.get_histories(ticker_obj, "5d", ["1m", "15m", "1h"])
+        again = fetcher.get_histories(ticker_obj, "5d", ["15m"])
+        
+        ticker_obj.history.assert_called_once()
+        self.assertEqual(len(histories["15m"]), 5 * 26)
+        self.assertEqual(len(again["15m"]), 5 * 26)
+        source = cache.get_entry("history:AAPL:5d:1m")
+        derived = cache.get_entry("history:AAPL:5d:1h")
+        self.assertAlmostEqual(derived.expires_at, source.expires_at, delta=1)
+    
+    def test_screener_loader_derives_missing_histories(self):
+        """Test that the screener's loader serves 15m bars from cached 1m bars."""
+        cache = MemoryCache()
+        cache.set("history:AAPL:5d:1m", minute_bars(), ttl=60)
+        ticker_obj = MagicMock(ticker="AAPL")
+        fetcher = DataFetcher(cache=cache, ticker_factory=lambda ticker: ticker_obj)
+        
+        with patch("src.screener.data_fetcher", fetcher), \
+                patch.object(fetcher, "fetch_data", return_value=ticker_obj):
+            histories, missing = load_histories(["AAPL"], "5d", "15m", fetch_missing=True)
+        
+        ticker_obj.history.assert_not_called()
+        self.assertEqual(missing, [])
+        self.assertEqual(len(histories["AAPL"]), 5 * 26)
+        self.assertIsNotNone(fetcher.get_cached_history("AAPL", "5d", "15m"))
+
+
+if __name__ == "__main__":
+    unittest.main()
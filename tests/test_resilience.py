@@ -0,0 +1,134 @@
+"""
+Unit tests for upstream rate limiting, retries and circuit breaking.
+"""
+
+import unittest
+from types import SimpleNamespace
+from unittest.mock import MagicMock
+
+import pandas as pd
+
+from src.cache import MemoryCache
+from src.data_fetcher import DataFetcher
+from src.resilience import (
+    TokenBucket,
+    CircuitBreaker,
+    UpstreamGuard,
+    CircuitOpenError,
+    RateLimitTimeout,
+    is_transient,
+)
+
+
+class HTTPError(Exception):
+    """requests-style error carrying the response status."""
+    
+    def __init__(self, status_code):
+        super().__init__(f"{status_code} Client Error")
+        self.response = SimpleNamespace(status_code=status_code)
+
+
+class TestResilience(unittest.TestCase):
+    """Test cases for upstream protection."""
+    
+    def test_token_bucket_burst_and_timeout(self):
+        """Test that the bucket allows its burst and then refuses."""
+        bucket = TokenBucket(rate=0.001, capacity=2)
+        self.assertTrue(bucket.try_acquire())
+        self.assertTrue(bucket.try_acquire())
+        self.assertFalse(bucket.acquire(timeout=0.01))
+    
+    def test_is_transient(self):
+        """Test transient error classification."""
+        class YFRateLimitError(Exception):
+            pass
+        
+        self.assertTrue(is_transient(HTTPError(429)))
+        self.assertTrue(is_transient(HTTPError(503)))
+        self.assertFalse(is_transient(HTTPError(404)))
+        self.assertTrue(is_transient(TimeoutError()))
+        self.assertTrue(is_transient(YFRateLimitError("Too Many Requests")))
+        self.assertFalse(is_transient(ValueError("No data found, symbol may be delisted")))
+        # Message text alone no longer makes an error retryable
+        self.assertFalse(is_transient(ValueError("Connection settings 500 invalid")))
+    
+    def test_retries_then_succeeds(self):
+        """Test that transient errors are retried with backoff."""
+        delays = []
+        guard = UpstreamGuard(
+            TokenBucket(100, 100), CircuitBreaker(10, 60), max_retries=3, sleep=delays.append
+        )
+        attempts = iter([HTTPError(429), TimeoutError("timed out"), "ok"])
+        
+        def flaky():
+            result = next(attempts)
+            if isinstance(result, Exception):
+                raise result
+            return result
+        
+        self.assertEqual(guard.call(flaky), "ok")
+        self.assertEqual(len(delays), 2)
+        self.assertEqual(guard.state()["retries"], 2)
+    
+    def test_breaker_opens_and_rejects(self):
+        """Test that repeated transient failures open the circuit."""
+        guard = UpstreamGuard(
+            TokenBucket(100, 100), CircuitBreaker(2, 60), max_retries=0, sleep=lambda s: None
+        )
+        
+        def failing():
+            raise ConnectionError("connection reset by peer")
+        
+        for _ in range(2):
+            with self.assertRaises(ConnectionError):
+                guard.call(failing)
+        with self.assertRaises(CircuitOpenError):
+            guard.call(failing)
+        self.assertEqual(guard.state()["circuit_breaker"]["state"], "open")
+    
+    def test_half_open_trial_closes_circuit(self):
+        """Test that a successful trial call closes the circuit."""
+        breaker = CircuitBreaker(1, reset_timeout=0)
+        breaker.record_failure()
+        self.assertTrue(breaker.allow_request())
+        self.assertFalse(breaker.allow_request())
+        breaker.record_success()
+        self.assertEqual(breaker.state, "closed")
+    
+    def test_limiter_timeout_releases_half_open_trial(self):
+        """Test that a trial refused by the limiter does not wedge the breaker."""
+        breaker = CircuitBreaker(1, reset_timeout=0)
+        limiter = MagicMock()
+        # The first token wait times out, the bucket has refilled by the next call
+        limiter.acquire.side_effect = [False, True]
+        guard = UpstreamGuard(limiter, breaker, max_retries=0, limiter_timeout=0.01)
+        breaker.record_failure()
+        self.assertEqual(breaker.state, "half_open")
+        
+        with self.assertRaises(RateLimitTimeout):
+            guard.call(lambda: "ok")
+        
+        self.assertEqual(guard.call(lambda: "ok"), "ok")
+        self.assertEqual(breaker.state, "closed")
+    
+    def test_fetcher_serves_stale_history_when_upstream_fails(self):
+        """Test the stale fallback in DataFetcher."""
+        cache = MemoryCache(stale_seconds=3600)
+        stale = pd.DataFrame({"Close": [1.0]}, index=pd.date_range("2024-01-01", periods=1))
+        cache.set("history:AAPL:1y:1d", stale, ttl=-1)
+        guard = UpstreamGuard(
+            TokenBucket(100, 100), CircuitBreaker(5, 60), max_retries=1, sleep=lambda s: None
+        )
+        fetcher = DataFetcher(cache=cache, guard=guard)
+        ticker_obj = MagicMock(ticker="AAPL")
+        ticker_obj.history.side_effect = HTTPError(429)
+        
+        result = fetcher.get_historical_data(ticker_obj, "1y", "1d")
+        
+        self.assertIs(result, stale)
+        self.assertEqual(ticker_obj.history.call_count, 2)
+        self.assertEqual(fetcher.upstream_state()["stale_served"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
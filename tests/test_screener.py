@@ -0,0 +1,79 @@
+"""
+Unit tests for the universe screener.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.analyzer import analyzer
+from src.screener import PricePanel, compute_metrics, screen, evaluate_filter, ScreenError
+from app import web_app
+
+
+def _history(closes):
+    index = pd.date_range("2024-01-01", periods=len(closes), freq="B")
+    return pd.DataFrame({"Close": closes}, index=index)
+
+
+class TestScreener(unittest.TestCase):
+    """Test cases for vectorized screening."""
+    
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.histories = {
+            "UP": _history(np.linspace(10, 20, 120)),
+            "DOWN": _history(np.linspace(20, 10, 120)),
+            "NOISY": _history(100 * np.exp(np.cumsum(rng.normal(0, 0.05, 60)))),
+        }
+        self.metrics = compute_metrics(PricePanel.from_histories(self.histories))
+    
+    def test_metrics_match_analyzer(self):
+        """Test that vectorized metrics match calculate_statistics."""
+        for ticker, history in self.histories.items():
+            expected = analyzer.calculate_statistics(history)
+            for field in ("high_52w", "low_52w", "average_price", "price_change_pct",
+                          "volatility", "avg_30d"):
+                self.assertAlmostEqual(self.metrics.loc[ticker, field], expected[field])
+        # Not enough bars for a 90-day average
+        self.assertTrue(np.isnan(self.metrics.loc["NOISY", "avg_90d"]))
+    
+    def test_filter_and_sort(self):
+        """Test filter evaluation and descending sort."""
+        result = screen(self.metrics, "avg_30d > avg_90d", sort="-price_change_pct")
+        self.assertEqual(list(result.index), ["UP"])
+        
+        result = screen(self.metrics, "data_points >= 60", sort="-volatility", limit=1)
+        self.assertEqual(list(result.index), ["NOISY"])
+    
+    def test_rejects_unsafe_expressions(self):
+        """Test that only whitelisted syntax is accepted."""
+        for expression in ("__import__('os')", "volatility.real > 0", "unknown < 1", "volatility"):
+            with self.assertRaises(ScreenError):
+                evaluate_filter(self.metrics, expression)
+
+    
+    def test_screen_endpoint_validates_tickers_and_limit(self):
+        """Test string and list tickers and rejection of bad limits."""
+        client = web_app.app.test_client()
+        with patch.object(web_app, "run_screen", return_value={"rows": []}) as run:
+            joined = client.post("/screen", json={"tickers": "aapl, msft"})
+            self.assertEqual(joined.status_code, 200)
+            self.assertEqual(run.call_args.args[0], ["AAPL", "MSFT"])
+            listed = client.post("/screen", json={"tickers": ["AAPL"], "limit": 5})
+            self.assertEqual(listed.status_code, 200)
+            for payload in (
+                {"tickers": ["AAPL", 3]},
+                {"tickers": {"AAPL": 1}},
+                {"tickers": ["AAPL"], "limit": 0},
+                {"tickers": ["AAPL"], "limit": "5"},
+                {"tickers": ["AAPL"], "limit": True},
+            ):
+                self.assertEqual(client.post("/screen", json=payload).status_code, 400, payload)
+        self.assertEqual(run.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Unit tests for Server-Timing stage reports and the load-test schedule.
+"""
+
+import unittest
+from datetime import date
+from functools import partial
+from unittest.mock import patch
+
+from app import web_app
+from benchmarks.fake_upstream import FakeUpstream
+from benchmarks.loadtest import PlannedRequest, Sample, plan_requests, summarize
+from src.cache import MemoryCache
+from src.data_fetcher import DataFetcher
+from src.server_timing import StageTimer, parse_server_timing
+from src.upstream_http import HTTPTicker
+
+
+class TestServerTiming(unittest.TestCase):
+    """Test cases for StageTimer, the /analyze header and load-test helpers."""
+
+    def test_header_round_trip(self):
+        """Test that repeated stages are summed and the header parses back."""
+        timer = StageTimer()
+        for _ in range(2):
+            with timer.stage("fetch"):
+                pass
+        with timer.stage("chart"):
+            pass
+        parsed = parse_server_timing(timer.header())
+
+        self.assertEqual(list(parsed), ["fetch", "chart", "total"])
+        self.assertGreaterEqual(parsed["total"], parsed["fetch"])
+        self.assertEqual(
+            parse_server_timing('cache;desc="hit", db;dur=53, app;dur=47.2'),
+            {"db": 53.0, "app": 47.2}
+        )
+
+    def test_analyze_reports_stages(self):
+        """Test that GET /analyze carries the pipeline stages."""
+        upstream = FakeUpstream(as_of=date(2024, 6, 3))
+        fetcher = DataFetcher(
+            cache=MemoryCache(), ticker_factory=partial(HTTPTicker, base_url=upstream.start())
+        )
+        client = web_app.app.test_client()
+        try:
+            with patch.object(web_app, "data_fetcher", fetcher), \
+                    patch.object(web_app, "cache", MemoryCache()):
+                response = client.get("/analyze?ticker=NVDA&period=6mo&interval=1d")
+                health = client.get("/health")
+        finally:
+            upstream.stop()
+
+        self.assertEqual(response.status_code, 200)
+        stages = parse_server_timing(response.headers["Server-Timing"])
+        for name in ("queue", "fetch", "info", "stats", "forecast", "chart", "serialize", "total"):
+            self.assertIn(name, stages)
+        self.assertNotIn("Server-Timing", health.headers)
+
+    def test_plan_is_deterministic_and_skewed(self):
+        """Test that the schedule depends only on its options."""
+        plan = plan_requests(20, 50, seed=7)
+        self.assertEqual(plan, plan_requests(20, 50, seed=7))
+        self.assertNotEqual(plan, plan_requests(20, 50, seed=8))
+        self.assertEqual(len(plan), 1000)
+        self.assertAlmostEqual(plan[-1].offset, 49.95)
+
+        counts = {}
+        for planned in plan:
+            counts[planned.ticker] = counts.get(planned.ticker, 0) + 1
+        self.assertEqual(max(counts, key=counts.get), "AAPL")
+
+    def test_summary_excludes_warmup(self):
+        """Test throughput, statuses and stage shares of a run."""
+        samples = [
+            Sample(PlannedRequest(i / 10, "AAPL", "1y", "1d"), i / 10, i / 10 + 0.05,
+                   200 if i % 5 else 429, 100, {"fetch": 10.0, "total": 40.0}, "")
+            for i in range(100)
+        ]
+        report = summarize(samples, warmup=5)
+
+        self.assertEqual(report["summary"]["requests"], 50)
+        self.assertEqual(report["summary"]["statuses"], {"200": 40, "429": 10})
+        self.assertAlmostEqual(report["summary"]["latency_ms"]["p50"], 50.0, places=3)
+        self.assertEqual(report["stages"]["fetch"]["share"], 0.25)
+        self.assertEqual(report["views"]["1y:1d"]["count"], 40)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+Unit tests for the shared-memory array registry.
+"""
+
+import pickle
+import unittest
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.analyzer import analyzer
+from src.backtest import parameter_sweep
+from src.shared_arrays import SharedArrayRegistry, attach, resolve
+
+
+def column_sum(descriptor):
+    """Sum the columns of a published array in a worker process."""
+    return resolve(descriptor).sum(axis=0).tolist()
+
+
+def make_history(bars: int = 60) -> pd.DataFrame:
+    index = pd.date_range("2024-01-01", periods=bars, freq="B", tz="America/New_York")
+    close = 100 + np.arange(bars, dtype=float)
+    return pd.DataFrame({
+        "Open": close - 1, "High": close + 1, "Low": close - 2, "Close": close,
+        "Volume": np.arange(bars) * 1000
+    }, index=index)
+
+
+class TestSharedArrays(unittest.TestCase):
+    """Test cases for SharedArrayRegistry and descriptors."""
+
+    def test_attach_returns_read_only_view(self):
+        """Test that an attached array has the published data and cannot be written."""
+        prices = np.arange(12.0).reshape(4, 3)
+        with SharedArrayRegistry() as registry:
+            descriptor = registry.publish(prices)
+            self.assertLess(len(pickle.dumps(descriptor)), 200)
+            view = attach(descriptor)
+            np.testing.assert_array_equal(view, prices)
+            self.assertFalse(view.flags.writeable)
+            self.assertEqual(registry.stats()["blocks"], 1)
+            del view
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=descriptor.name)
+
+    def test_close_unlinks_block_with_live_export(self):
+        """Test that a block whose buffer is still exported is unlinked anyway."""
+        registry = SharedArrayRegistry()
+        descriptor = registry.publish(np.arange(8.0))
+        block = registry._blocks[descriptor.name]
+        export = block.buf[:8]
+        
+        with self.assertLogs("src.shared_arrays", level="WARNING"):
+            registry.close()
+        with self.assertRaises(FileNotFoundError):
+            shared_memory.SharedMemory(name=descriptor.name)
+        del export
+        block.close()
+
+    def test_worker_process_reads_published_array(self):
+        """Test that a pool worker reads the array through its descriptor."""
+        prices = np.random.default_rng(1).normal(size=(500, 4))
+        with SharedArrayRegistry() as registry:
+            descriptor = registry.publish(prices)
+            with ProcessPoolExecutor(max_workers=1) as executor:
+                result = executor.submit(column_sum, descriptor).result()
+        np.testing.assert_allclose(result, prices.sum(axis=0))
+
+    def test_analyzer_accepts_history_descriptor(self):
+        """Test that statistics and chart data are the same from a shared history."""
+        history = make_history()
+        with SharedArrayRegistry() as registry:
+            descriptor = registry.publish_history(history)
+            shared = resolve(descriptor)
+            self.assertEqual(list(shared.index), list(history.index))
+            expected = analyzer.calculate_statistics(history)
+            self.assertEqual(analyzer.calculate_statistics(descriptor), expected)
+            self.assertEqual(
+                analyzer.prepare_chart_data(descriptor), analyzer.prepare_chart_data(history)
+            )
+            del shared
+
+    def test_parameter_sweep_through_shared_memory(self):
+        """Test that a multi-process sweep matches the in-process one."""
+        prices = 100 * np.exp(np.cumsum(
+            np.random.default_rng(3).normal(0, 0.02, (120, 3)), axis=0
+        ))
+        expected = parameter_sweep(prices, [3, 5], [10, 20], max_workers=1)
+        with patch("src.backtest.config.SHARED_MEMORY_MIN_BYTES", 0), \
+                patch.object(SharedArrayRegistry, "publish", autospec=True,
+                             side_effect=SharedArrayRegistry.publish) as publish:
+            result = parameter_sweep(prices, [3, 5], [10, 20], max_workers=2)
+        self.assertEqual(publish.call_count, 1)
+        pd.testing.assert_frame_equal(result, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
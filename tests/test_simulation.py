@@ -0,0 +1,102 @@
+"""
+Unit tests for the Monte Carlo simulation extension.
+"""
+
+import unittest
+from unittest.mock import patch
+
+import numpy as np
+import pandas as pd
+
+from src.extensions.simulation.monte_carlo import (
+    simulate_close_prices,
+    calibrate,
+    _chunk_log_returns,
+    SimulationError,
+)
+from app import web_app
+
+
+class TestMonteCarlo(unittest.TestCase):
+    """Test cases for path generation and reductions."""
+    
+    def setUp(self):
+        rng = np.random.default_rng(0)
+        closes = 100 * np.exp(np.cumsum(rng.normal(0.0005, 0.02, 250)))
+        self.history = pd.DataFrame(
+            {"Close": closes},
+            index=pd.bdate_range("2024-01-01", periods=250)
+        )
+    
+    def _reference_paths(self, method, paths, steps, chunk_size, seed):
+        """Materialize every path with the same random stream."""
+        params = calibrate(self.history)
+        rng = np.random.default_rng(seed)
+        chunks = []
+        for start in range(0, paths, chunk_size):
+            size = min(chunk_size, paths - start)
+            chunks.append(_chunk_log_returns(method, params, size, steps, rng))
+        return params["start_price"], np.cumsum(np.vstack(chunks), axis=1)
+    
+    def test_chunked_reductions_match_full_sample(self):
+        """Test bands, risk and touch probabilities against exact statistics."""
+        for method in ("gbm", "bootstrap"):
+            start, log_paths = self._reference_paths(method, 20000, 10, 3000, seed=5)
+            level_up, level_down = start * 1.05, start * 0.95
+            result = simulate_close_prices(
+                self.history, steps=10, paths=20000, method=method,
+                levels=[level_up, level_down], chunk_size=3000, seed=5
+            )
+            
+            prices = start * np.exp(log_paths)
+            np.testing.assert_allclose(result["mean"], prices.mean(axis=0))
+            np.testing.assert_allclose(
+                result["lower"], np.quantile(prices, 0.1, axis=0), rtol=2e-3
+            )
+            np.testing.assert_allclose(
+                result["upper"], np.quantile(prices, 0.9, axis=0), rtol=2e-3
+            )
+            
+            returns = prices[:, -1] / start - 1
+            cutoff = np.quantile(returns, 0.05)
+            self.assertAlmostEqual(result["risk"]["var"], -cutoff, places=3)
+            self.assertAlmostEqual(
+                result["risk"]["expected_shortfall"], -returns[returns <= cutoff].mean(), places=3
+            )
+            
+            touches = {t["level"]: t["probability"] for t in result["touch_probabilities"]}
+            self.assertEqual(touches[level_up], (prices.max(axis=1) >= level_up).mean())
+            self.assertEqual(touches[level_down], (prices.min(axis=1) <= level_down).mean())
+    
+    def test_output_matches_forecast_shape(self):
+        """Test that bands line up with future business dates."""
+        result = simulate_close_prices(self.history, steps=5, paths=1000, seed=1)
+        self.assertEqual(len(result["dates"]), 5)
+        self.assertEqual(result["dates"][0], "2024-12-16")
+        for key in ("mean", "lower", "upper"):
+            self.assertEqual(len(result[key]), 5)
+        self.assertTrue(all(lo < hi for lo, hi in zip(result["lower"], result["upper"])))
+    
+    def test_rejects_bad_input(self):
+        """Test validation of method and history."""
+        with self.assertRaises(SimulationError):
+            simulate_close_prices(self.history, method="heston")
+        with self.assertRaises(SimulationError):
+            simulate_close_prices(self.history.iloc[:5])
+        with self.assertRaises(SimulationError):
+            simulate_close_prices(self.history, steps=100000)
+        with self.assertRaises(SimulationError):
+            simulate_close_prices(self.history, levels=[float("nan")])
+    
+    def test_endpoint_rejects_non_finite_levels(self):
+        """Test that NaN and infinite levels get a 400 before any fetch."""
+        client = web_app.app.test_client()
+        with patch.object(web_app, "load_market_data") as load:
+            for levels in ("nan", "inf", "150,-inf"):
+                response = client.get(f"/simulate?ticker=AAPL&levels={levels}")
+                self.assertEqual(response.status_code, 400, levels)
+        load.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""
+Unit tests for precomputed analysis snapshots.
+"""
+
+import gzip
+import time
+import unittest
+from unittest.mock import patch
+
+from src.snapshots import Snapshot, SnapshotStore, SnapshotScheduler
+from app import web_app
+
+
+def fake_build(calls: list):
+    """Snapshot builder recording its calls."""
+    def build(ticker, period, interval):
+        calls.append((ticker, period, interval))
+        return f"etag-{ticker}", b'{"ticker": "%s", "padding": "%s"}' % (
+            ticker.encode(), b"x" * 4096
+        ), []
+    return build
+
+
+class TestSnapshotScheduler(unittest.TestCase):
+    """Test cases for SnapshotStore and SnapshotScheduler."""
+    
+    def test_refresh_stores_fresh_snapshot(self):
+        """Test that a refresh stores the snapshot and schedules the next one."""
+        calls = []
+        store = SnapshotStore()
+        scheduler = SnapshotScheduler(store, ["AAPL"], [("1y", "1d")], workers=1)
+        scheduler._build = fake_build(calls)
+        
+        self.assertIsNone(store.get("AAPL", "1y", "1d"))
+        scheduler.refresh(("AAPL", "1y", "1d"))
+        
+        snapshot = store.get("AAPL", "1y", "1d")
+        self.assertEqual(snapshot.etag, "etag-AAPL")
+        self.assertEqual(scheduler.stats()["pending"], 1)
+        self.assertEqual(store.stats()["hits"], 1)
+        self.assertEqual(store.stats()["misses"], 1)
+        self.assertTrue(scheduler.scheduled("AAPL", "1y", "1d"))
+        self.assertFalse(scheduler.scheduled("AAPL", "5d", "1h"))
+    
+    def test_expired_snapshot_is_not_served(self):
+        """Test the freshness check."""
+        store = SnapshotStore()
+        now = time.time()
+        store.put(("AAPL", "1y", "1d"), Snapshot("etag", b"{}", now - 700, now - 100))
+        self.assertIsNone(store.get("AAPL", "1y", "1d"))
+        self.assertEqual(store.stats()["expired"], 1)
+    
+    def test_scheduler_builds_every_view_in_background(self):
+        """Test that starting the scheduler warms all configured views across workers."""
+        calls = []
+        store = SnapshotStore()
+        tickers = [f"T{i}" for i in range(20)]
+        scheduler = SnapshotScheduler(store, tickers, [("1y", "1d"), ("5d", "1h")], workers=4)
+        self.assertTrue(scheduler.start(fake_build(calls)))
+        self.assertFalse(scheduler.start(fake_build(calls)))
+        try:
+            deadline = time.time() + 5
+            while scheduler.stats()["built"] < 40 and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            scheduler.stop()
+        
+        self.assertEqual(len(set(calls)), 40)
+        self.assertEqual(calls[0], ("T0", "1y", "1d"))
+        self.assertIsNotNone(store.get("T19", "5d", "1h"))
+        self.assertFalse(scheduler.running)
+
+
+class TestAnalyzeSnapshot(unittest.TestCase):
+    """Test cases for serving /analyze from snapshots."""
+    
+    def test_hot_ticker_served_from_snapshot(self):
+        """Test that a fresh snapshot is served without running the pipeline."""
+        store = SnapshotStore()
+        etag, body, _ = fake_build([])("AAPL", "1y", "1d")
+        now = time.time()
+        store.put(("AAPL", "1y", "1d"), Snapshot(etag, body, now, now + 600))
+        client = web_app.app.test_client()
+        
+        with patch.object(web_app, "snapshot_store", store), \
+                patch.object(web_app, "load_market_data") as load:
+            response = client.get("/analyze?ticker=AAPL", headers={"Accept-Encoding": "gzip"})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.headers["X-Snapshot"], "hit")
+            self.assertEqual(gzip.decompress(response.data), body)
+            
+            again = client.get("/analyze?ticker=AAPL", headers={"If-None-Match": f'"{etag}"'})
+            self.assertEqual(again.status_code, 304)
+            load.assert_not_called()
+        
+        self.assertEqual(store.get("AAPL", "1y", "1d").encoded("gzip")[0], response.data)
+    
+    def test_degraded_snapshot_is_not_cacheable(self):
+        """Test that a snapshot with a fallback forecast is served no-store."""
+        store = SnapshotStore()
+        now = time.time()
+        store.put(
+            ("AAPL", "1y", "1d"),
+            Snapshot("etag-degraded", b'{"ticker": "AAPL"}', now, now + 600, ["forecast"])
+        )
+        
+        with patch.object(web_app, "snapshot_store", store):
+            response = web_app.app.test_client().get("/analyze?ticker=AAPL")
+        
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.headers["X-Degraded"], "forecast")
+        self.assertIn("no-store", response.headers["Cache-Control"])
+        self.assertNotIn("max-age", response.headers["Cache-Control"])
+        self.assertNotIn("ETag", response.headers)
+
+
+if __name__ == "__main__":
+    unittest.main()
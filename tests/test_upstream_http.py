@@ -0,0 +1,88 @@
+"""
+Unit tests for the HTTP upstream and the fake upstream used in load tests.
+"""
+
+import unittest
+from datetime import date
+from functools import partial
+
+import numpy as np
+
+from benchmarks.fake_upstream import FakeUpstream
+from src.cache import MemoryCache
+from src.data_fetcher import DataFetcher
+from src.resilience import CircuitBreaker, TokenBucket, UpstreamGuard, is_transient
+from src.upstream_http import HTTPTicker, UpstreamHTTPError
+
+
+class TestHTTPTicker(unittest.TestCase):
+    """Test cases for HTTPTicker against FakeUpstream."""
+
+    def setUp(self):
+        self.upstream = FakeUpstream(seed=3, as_of=date(2024, 6, 3), unknown=["ZZQA"])
+        self.url = self.upstream.start()
+
+    def tearDown(self):
+        self.upstream.stop()
+
+    def test_history_matches_yfinance_layout(self):
+        """Test daily and intraday frames: columns, index name and timezone."""
+        ticker = HTTPTicker("AAPL", base_url=self.url)
+        daily = ticker.history(period="1y", interval="1d", raise_errors=True)
+        intraday = ticker.history(period="5d", interval="5m", raise_errors=True)
+
+        self.assertEqual(
+            list(daily.columns),
+            ["Open", "High", "Low", "Close", "Volume", "Dividends", "Stock Splits"]
+        )
+        self.assertEqual(daily.index.name, "Date")
+        self.assertEqual(str(daily.index.tz), "America/New_York")
+        self.assertEqual(str(daily.index[-1].date()), "2024-05-31")
+        self.assertTrue((daily.index.hour == 0).all())
+        self.assertTrue((daily["High"] >= daily[["Open", "Close"]].max(axis=1)).all())
+        self.assertEqual(intraday.index.name, "Datetime")
+        self.assertEqual(len(intraday), 5 * 78)
+        self.assertEqual(str(intraday.index[0].time()), "09:30:00")
+
+        again = HTTPTicker("AAPL", base_url=self.url).history(period="1y", interval="1d")
+        np.testing.assert_array_equal(daily["Close"].to_numpy(), again["Close"].to_numpy())
+
+    def test_info_and_unknown_symbols(self):
+        """Test the flattened info dict and 404 handling."""
+        info = HTTPTicker("MSFT", base_url=self.url).info
+        self.assertEqual(info["exchange"], "NMS")
+        self.assertIsInstance(info["currentPrice"], float)
+        self.assertEqual(info["currentPrice"], info["regularMarketPrice"])
+
+        self.assertEqual(HTTPTicker("ZZQA", base_url=self.url).info, {})
+        with self.assertRaises(UpstreamHTTPError) as error:
+            HTTPTicker("ZZQA", base_url=self.url).history(period="1y", raise_errors=True)
+        self.assertEqual(error.exception.status, 404)
+        self.assertTrue(HTTPTicker("ZZQA", base_url=self.url).history(period="1y").empty)
+
+    def test_injected_errors_are_transient(self):
+        """Test that throttled responses are retried by the upstream guard."""
+        self.upstream.throttle_rate = 1.0
+        with self.assertRaises(UpstreamHTTPError) as error:
+            HTTPTicker("AAPL", base_url=self.url).history(period="1y", raise_errors=True)
+        self.assertEqual(error.exception.status, 429)
+        self.assertTrue(is_transient(error.exception))
+
+        self.upstream.throttle_rate = 0.5
+        fetcher = DataFetcher(
+            cache=MemoryCache(),
+            guard=UpstreamGuard(
+                TokenBucket(1000, 1000), CircuitBreaker(100, 1),
+                max_retries=20, backoff_base=0.001, backoff_max=0.001
+            ),
+            ticker_factory=partial(HTTPTicker, base_url=self.url)
+        )
+        ticker_obj = fetcher.fetch_data("BTC-USD", "3mo", "1d")
+        history = fetcher.get_historical_data(ticker_obj, "3mo", "1d")
+        self.assertIsNotNone(history)
+        self.assertEqual(str(history.index.tz), "UTC")
+        self.assertGreater(self.upstream.stats()["responses"].get("chart_429", 0), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()